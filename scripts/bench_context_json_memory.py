@@ -0,0 +1,91 @@
+"""Peak memory of parsing + normalizing one JSON context artifact.
+
+Compares the previous load path (raw bytes, decoded text, parsed tree and
+canonical string all alive at once) with ``_parse_json_artifact``, which
+releases each representation once the next one exists and, for text-only
+artifacts, drains the parsed tree while the canonical string is emitted.
+Reports the peak during the call and what stays allocated while the result
+is held (the parsed tree is only retained when the consumer needs it). Uses
+tracemalloc, so numbers are Python heap allocations, not RSS. Reads here
+bypass any CachingArtifactStore, which keeps the raw bytes of cached reads.
+
+Usage: python scripts/bench_context_json_memory.py [size_kb ...]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from worker_llm_client.artifacts.domain import ArtifactUri  # noqa: E402
+from worker_llm_client.artifacts.services import ArtifactMetadata, LimitedRead  # noqa: E402
+from worker_llm_client.reporting.services import _parse_json_artifact  # noqa: E402
+
+
+URI = ArtifactUri.parse("gs://bench/report.json")
+
+
+def _document(size_kb: int) -> dict:
+    sections = []
+    while len(json.dumps(sections)) < size_kb * 1024:
+        index = len(sections)
+        sections.append(
+            {
+                "title": f"Section {index}",
+                "levels": [100.0 + index + step / 10 for step in range(20)],
+                "notes": "Momentum is fading near resistance; watch volume. " * 4,
+            }
+        )
+    return {"output": {"summary": {"markdown": "Trend is up."}, "details": {"sections": sections}}}
+
+
+def _legacy(raw: bytes) -> tuple[str, object]:
+    text = raw.decode("utf-8")
+    parsed = json.loads(text)
+    normalized = json.dumps(parsed, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return normalized, parsed
+
+
+def _measure(fn) -> tuple[int, int]:
+    tracemalloc.start()
+    try:
+        result = fn()  # noqa: F841 - held so retained memory is measured
+        current, peak = tracemalloc.get_traced_memory()
+        return peak // 1024, current // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main(sizes_kb: list[int]) -> None:
+    print(f"{'size_kb':>8} {'path':>10} {'peak_kb':>9} {'retained_kb':>12}")
+    for size_kb in sizes_kb:
+        payload = json.dumps(_document(size_kb)).encode("utf-8")
+        metadata = ArtifactMetadata(uri=URI, size=len(payload), content_type="application/json")
+
+        # Raw bytes are copied inside the measured region, as a network read
+        # would allocate them.
+        rows = [("legacy", _measure(lambda: _legacy(bytes(bytearray(payload)))))]
+
+        def streamed(keep_data: bool):
+            return _parse_json_artifact(
+                LimitedRead(data=bytes(bytearray(payload)), metadata=metadata),
+                label="previous_report",
+                event_logger=None,
+                event_id="bench",
+                run_id="bench",
+                step_id="bench",
+                keep_data=keep_data,
+            )
+
+        rows.append(("tree", _measure(lambda: streamed(True))))
+        rows.append(("text_only", _measure(lambda: streamed(False))))
+        for path, (peak, retained) in rows:
+            print(f"{size_kb:>8} {path:>10} {peak:>9} {retained:>12}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [64, 256, 1024])
@@ -1,3 +1,7 @@
+import gzip
+import random
+import threading
+import time
 import unittest
 
 from worker_llm_client.artifacts.domain import (
@@ -5,8 +9,15 @@ from worker_llm_client.artifacts.domain import (
     GcsUri,
     InvalidGcsUri,
     InvalidIdentifier,
+    report_digest_uri,
+)
+from worker_llm_client.artifacts.services import (
+    ArtifactNotFound,
+    ArtifactReadFailed,
+    ArtifactTooLarge,
+    ArtifactWriteFailed,
+    WriteResult,
 )
-from worker_llm_client.artifacts.services import ArtifactWriteFailed, WriteResult
 from worker_llm_client.infra.gcs import GcsArtifactStore
 
 
@@ -15,9 +26,19 @@ class FakeBlob:
         self._exists = exists
         self.raise_on_upload = raise_on_upload
         self.uploads: list[dict] = []
+        self.size = 7
+        self.content_type = "image/png"
+        self.generation = 42
+        self.crc32c = "AAAAAA=="
+        self.content_encoding = None
+        self.downloads: list[dict] = []
 
-    def download_as_bytes(self) -> bytes:
-        return b"payload"
+    def download_as_bytes(self, **kwargs) -> bytes:
+        self.downloads.append(kwargs)
+        payload = b"payload"
+        if "end" in kwargs:
+            return payload[kwargs.get("start", 0) : kwargs["end"] + 1]
+        return payload
 
     def exists(self) -> bool:
         return self._exists
@@ -34,22 +55,80 @@ class FakeBlob:
         )
 
 
+class GzipBlob(FakeBlob):
+    def __init__(self, payload: bytes) -> None:
+        super().__init__()
+        self.stored = gzip.compress(payload, mtime=0)
+        self.size = len(self.stored)
+        self.content_encoding = "gzip"
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        self.downloads.append(kwargs)
+        if "end" in kwargs:
+            return self.stored[kwargs.get("start", 0) : kwargs["end"] + 1]
+        return self.stored
+
+
 class FakeBucket:
-    def __init__(self, blob: FakeBlob) -> None:
+    def __init__(self, blob: FakeBlob | None) -> None:
         self._blob = blob
 
     def blob(self, object_path: str) -> FakeBlob:
         return self._blob
 
+    def get_blob(self, object_path: str) -> FakeBlob | None:
+        return self._blob
+
 
 class FakeClient:
-    def __init__(self, blob: FakeBlob) -> None:
+    def __init__(self, blob: FakeBlob | None) -> None:
         self._bucket = FakeBucket(blob)
 
     def bucket(self, name: str) -> FakeBucket:
         return self._bucket
 
 
+class NotFound(Exception):
+    pass
+
+
+class LatencyClient:
+    """In-memory GCS stand-in: every download sleeps ``latency`` seconds."""
+
+    def __init__(self, payloads: dict[str, bytes], *, latency: float) -> None:
+        self._payloads = payloads
+        self._latency = latency
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def bucket(self, name: str) -> "LatencyClient":
+        return self
+
+    def blob(self, object_path: str):
+        data = self._payloads.get(object_path)
+        client = self
+
+        class _Blob:
+            content_type = "image/png"
+            generation = 1
+            crc32c = None
+            content_encoding = None
+
+            def download_as_bytes(self, **kwargs) -> bytes:
+                with client._lock:
+                    client.in_flight += 1
+                    client.max_in_flight = max(client.max_in_flight, client.in_flight)
+                time.sleep(client._latency)
+                with client._lock:
+                    client.in_flight -= 1
+                if data is None:
+                    raise NotFound(object_path)
+                return data[: kwargs["end"] + 1]
+
+        return _Blob()
+
+
 class ArtifactsDomainTests(unittest.TestCase):
     def test_gcs_uri_parse_ok(self) -> None:
         uri = GcsUri.parse("gs://bucket/path/to/object.json")
@@ -88,6 +167,13 @@ class ArtifactsDomainTests(unittest.TestCase):
         uri = policy.report_uri("run-1", "1M", "llmreport_summary_v1")
         self.assertEqual(str(uri), "gs://bkt/run-1/1M/llmreport_summary_v1.json")
 
+    def test_report_digest_uri_sits_next_to_report(self) -> None:
+        report = ArtifactPathPolicy(bucket="bkt").report_uri("run-1", "1M", "llm_report_1M_v1")
+        digest = report_digest_uri(report)
+        self.assertEqual(str(digest), "gs://bkt/run-1/1M/llm_report_1M_v1.digest.json")
+        self.assertIsNone(report_digest_uri(digest))
+        self.assertIsNone(report_digest_uri(GcsUri.parse("gs://bkt/report.bin")))
+
 
 class ArtifactStoreTests(unittest.TestCase):
     def test_write_create_only_success(self) -> None:
@@ -122,6 +208,104 @@ class ArtifactStoreTests(unittest.TestCase):
             store.write_bytes_create_only(uri, b"data", content_type="application/json")
         self.assertTrue(ctx.exception.retryable)
 
+    def test_stat_returns_metadata(self) -> None:
+        store = GcsArtifactStore(FakeClient(FakeBlob()))
+        uri = GcsUri.parse("gs://bucket/charts/chart.png")
+        meta = store.stat(uri)
+        self.assertEqual(meta.size, 7)
+        self.assertEqual(meta.content_type, "image/png")
+        self.assertEqual(meta.generation, 42)
+
+    def test_stat_missing_object(self) -> None:
+        store = GcsArtifactStore(FakeClient(None))
+        with self.assertRaises(ArtifactNotFound) as ctx:
+            store.stat(GcsUri.parse("gs://bucket/charts/chart.png"))
+        self.assertFalse(ctx.exception.retryable)
+
+    def test_read_missing_object_is_not_found(self) -> None:
+        store = GcsArtifactStore(LatencyClient({}, latency=0))
+        uri = GcsUri.parse("gs://bucket/report.digest.json")
+        with self.assertRaises(ArtifactNotFound):
+            store.read_bytes_limited(uri, 1024)
+        with self.assertRaises(ArtifactNotFound):
+            store.read_bytes(uri)
+
+    def test_read_bytes_limited_is_a_single_ranged_download(self) -> None:
+        blob = FakeBlob()
+        store = GcsArtifactStore(FakeClient(blob))
+        result = store.read_bytes_limited(GcsUri.parse("gs://bucket/ohlcv.json"), 7)
+        self.assertEqual(result.data, b"payload")
+        self.assertEqual(result.metadata.size, 7)
+        self.assertEqual((result.metadata.generation, result.metadata.crc32c), (42, "AAAAAA=="))
+        self.assertEqual(blob.downloads, [{"start": 0, "end": 7, "raw_download": True}])
+
+    def test_read_bytes_limited_rejects_overlong_body(self) -> None:
+        blob = FakeBlob()
+        store = GcsArtifactStore(FakeClient(blob))
+        with self.assertRaises(ArtifactTooLarge) as ctx:
+            store.read_bytes_limited(GcsUri.parse("gs://bucket/ohlcv.json"), 4)
+        self.assertEqual((ctx.exception.size, ctx.exception.max_bytes), (5, 4))
+        self.assertFalse(ctx.exception.retryable)
+        self.assertEqual(len(blob.downloads), 1)
+
+    def test_read_many_preserves_order_with_per_item_errors(self) -> None:
+        payloads = {f"charts/{i}.png": bytes([i]) * (i + 1) for i in range(6)}
+        client = LatencyClient(payloads, latency=0.05)
+        store = GcsArtifactStore(client, read_concurrency=6)
+        uris = [GcsUri.parse(f"gs://bucket/charts/{i}.png") for i in range(6)]
+        uris.insert(2, GcsUri.parse("gs://bucket/charts/missing.png"))
+
+        started = time.monotonic()
+        results = store.read_many(uris, 4)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([r.uri for r in results], uris)
+        self.assertEqual(results[0].read.data, b"\x00")
+        self.assertIsInstance(results[2].error, ArtifactReadFailed)
+        self.assertIsInstance(results[-1].error, ArtifactTooLarge)
+        self.assertTrue(all(r.duration_ms >= 0 for r in results))
+        self.assertGreater(client.max_in_flight, 1)
+        # 4 downloads at 50ms each would take >=200ms sequentially.
+        self.assertLess(elapsed, 0.18)
+
+    def test_write_gzip_content_encoding(self) -> None:
+        blob = FakeBlob()
+        store = GcsArtifactStore(FakeClient(blob))
+        uri = GcsUri.parse("gs://bucket/path/report.json")
+        payload = b'{"details":' + b"1" * 1000 + b"}"
+        result = store.write_bytes_create_only(
+            uri, payload, content_type="application/json", content_encoding="gzip"
+        )
+        self.assertEqual(blob.content_encoding, "gzip")
+        self.assertEqual(gzip.decompress(blob.uploads[0]["data"]), payload)
+        self.assertLess(result.stored_bytes, len(payload))
+
+    def test_read_limited_decompresses_gzip(self) -> None:
+        payload = b"x" * 5000
+        blob = GzipBlob(payload)
+        store = GcsArtifactStore(FakeClient(blob))
+        result = store.read_bytes_limited(GcsUri.parse("gs://bucket/report.json"), 5000)
+        self.assertEqual(result.data, payload)
+        self.assertEqual(result.metadata.content_encoding, "gzip")
+        self.assertEqual(blob.downloads, [{"start": 0, "end": 5000, "raw_download": True}])
+
+    def test_read_limited_gzip_over_the_range_uses_the_stored_size(self) -> None:
+        # Incompressible: the stored bytes exceed the limit, the payload not.
+        payload = random.Random(0).randbytes(4096)
+        blob = GzipBlob(payload)
+        store = GcsArtifactStore(FakeClient(blob))
+        result = store.read_bytes_limited(GcsUri.parse("gs://bucket/report.json"), len(payload))
+        self.assertEqual(result.data, payload)
+        self.assertEqual(blob.downloads[1], {"raw_download": True, "if_generation_match": 42})
+
+    def test_read_limited_caps_decompressed_size(self) -> None:
+        # Compresses to a few dozen bytes but inflates past the limit.
+        blob = GzipBlob(b"x" * 100000)
+        store = GcsArtifactStore(FakeClient(blob))
+        with self.assertRaises(ArtifactTooLarge) as ctx:
+            store.read_bytes_limited(GcsUri.parse("gs://bucket/report.json"), 4096)
+        self.assertEqual(ctx.exception.size, 4097)
+
 
 if __name__ == "__main__":
     unittest.main()
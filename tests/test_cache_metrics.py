@@ -0,0 +1,28 @@
+import unittest
+
+from worker_llm_client.app.cache_metrics import PromptCacheTracker
+
+
+class PromptCacheTrackerTests(unittest.TestCase):
+    def test_tracks_hit_rate_per_prompt(self) -> None:
+        tracker = PromptCacheTracker()
+        tracker.record(prompt_id="p1", usage={"promptTokenCount": 100})
+        stats = tracker.record(
+            prompt_id="p1", usage={"promptTokenCount": 100, "cachedContentTokenCount": 80}
+        )
+        tracker.record(prompt_id="p2", usage={"prompt_token_count": 50, "cached_content_token_count": 50})
+
+        self.assertEqual((stats.requests, stats.hits), (2, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+        self.assertEqual(stats.cached_token_ratio, 0.4)
+        self.assertEqual(tracker.get("p2").hit_rate, 1.0)
+        self.assertEqual(stats.to_log_dict()["cachedTokens"], 80)
+
+    def test_missing_usage_counts_as_miss(self) -> None:
+        tracker = PromptCacheTracker()
+        stats = tracker.record(prompt_id="p1", usage=None)
+        self.assertEqual((stats.requests, stats.hits, stats.cached_token_ratio), (1, 0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+
+from worker_llm_client.app.commit import CommitPipeline, WriteRetryPolicy, write_with_retry
+from worker_llm_client.app.handler import FlowRunEventHandler
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy, ArtifactUri
+from worker_llm_client.artifacts.services import ArtifactWriteFailed
+from worker_llm_client.infra.memory import InMemoryFlowRunRepository
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from worker_llm_client.workflow.policies import ReadyStepSelector
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    RecordingArtifactStore,
+    _build_prompt,
+    _build_schema,
+)
+from tests.test_pull_worker import SlowLLMClient, _raw_run
+
+
+REPORT_URI = ArtifactUri.parse("gs://bucket/report.json")
+
+
+class FlakyArtifactStore(RecordingArtifactStore):
+    """Fails the first ``failures`` report writes with the given retryability."""
+
+    def __init__(self, failures: int, *, retryable: bool = True) -> None:
+        super().__init__()
+        self.attempts = 0
+        self._failures = failures
+        self._retryable = retryable
+
+    def write_bytes_create_only(self, uri, data, *, content_type):
+        if str(uri).endswith(".digest.json"):
+            return super().write_bytes_create_only(uri, data, content_type=content_type)
+        self.attempts += 1
+        if self.attempts <= self._failures:
+            raise ArtifactWriteFailed("GCS write failed", retryable=self._retryable)
+        return super().write_bytes_create_only(uri, data, content_type=content_type)
+
+
+class CountingFlowRunRepository(InMemoryFlowRunRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.gets = 0
+        self.finalize_calls = 0
+
+    def get(self, run_id):
+        self.gets += 1
+        return super().get(run_id)
+
+    def finalize_step(self, *args, **kwargs):
+        self.finalize_calls += 1
+        return super().finalize_step(*args, **kwargs)
+
+
+class WriteRetryTests(unittest.TestCase):
+    def _write(self, store, *, remaining: float = 100.0, **policy):
+        sleeps = []
+        result = write_with_retry(
+            store,
+            REPORT_URI,
+            b"{}",
+            content_type="application/json",
+            policy=WriteRetryPolicy(**policy),
+            remaining_seconds=lambda: remaining,
+            sleep=sleeps.append,
+        )
+        return result, sleeps
+
+    def test_transient_failures_are_retried_with_backoff(self) -> None:
+        store = FlakyArtifactStore(2)
+        (_result, attempts), sleeps = self._write(store)
+        self.assertEqual(attempts, 3)
+        self.assertEqual(sleeps, [0.5, 1.0])
+        self.assertIn(str(REPORT_URI), store.writes)
+
+    def test_permanent_failures_and_exhausted_budget_are_raised(self) -> None:
+        store = FlakyArtifactStore(1, retryable=False)
+        with self.assertRaises(ArtifactWriteFailed):
+            self._write(store)
+        self.assertEqual(store.attempts, 1)
+
+        store = FlakyArtifactStore(1)
+        with self.assertRaises(ArtifactWriteFailed):
+            self._write(store, remaining=10.2)  # backoff would eat the reserve
+        self.assertEqual(store.attempts, 1)
+
+        store = FlakyArtifactStore(3)
+        with self.assertRaises(ArtifactWriteFailed):
+            self._write(store, max_attempts=3)
+        self.assertEqual(store.attempts, 3)
+
+
+class CommitPipelineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = CommitPipeline()
+        self.addCleanup(self.pipeline.shutdown)
+        self.repo = CountingFlowRunRepository()
+        self.repo.put("run-1", _raw_run("run-1"))
+
+    def _running_step_id(self) -> str:
+        step_id = ReadyStepSelector.pick(self.repo.get("run-1").flow_run).step.step.step_id
+        self.assertTrue(self.repo.claim_step("run-1", step_id, "2026-01-01T00:00:00Z").claimed)
+        return step_id
+
+    def test_commit_patches_the_snapshot_read_ahead(self) -> None:
+        step_id = self._running_step_id()
+        pending = self.pipeline.begin(self.repo, "run-1")
+        result = pending.commit(
+            step_id, "SUCCEEDED", "2026-01-01T00:01:00Z", outputs_gcs_uri=str(REPORT_URI)
+        )
+        self.assertTrue(result.updated)
+        self.assertEqual(self.repo.finalize_calls, 0)
+        step = self.repo.raw("run-1")["steps"][step_id]
+        self.assertEqual(step["status"], "SUCCEEDED")
+        self.assertEqual(step["outputs"]["gcs_uri"], str(REPORT_URI))
+
+        again = self.pipeline.begin(self.repo, "run-1").commit(
+            step_id, "SUCCEEDED", "2026-01-01T00:02:00Z"
+        )
+        self.assertEqual((again.updated, again.reason), (False, "already_final"))
+
+    def test_changed_run_falls_back_to_finalize_step(self) -> None:
+        step_id = self._running_step_id()
+        pending = self.pipeline.begin(self.repo, "run-1")
+        self.pipeline.shutdown()  # waits for the read; then another writer lands
+        self.repo.patch("run-1", {"note": "other writer"}, precondition_update_time=None)
+
+        result = pending.commit(step_id, "SUCCEEDED", "2026-01-01T00:01:00Z")
+        self.assertTrue(result.updated)
+        self.assertEqual(self.repo.finalize_calls, 1)
+
+    def test_handler_retries_the_write_and_commits_through_the_pipeline(self) -> None:
+        store = FlakyArtifactStore(1)
+        logger = FakeEventLogger()
+        handler = FlowRunEventHandler(
+            flow_repo=self.repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=store,
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=SlowLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            commit_pipeline=self.pipeline,
+            write_retry=WriteRetryPolicy(base_backoff_seconds=0.001, reserve_seconds=0),
+        )
+        event = {
+            "id": "evt-1",
+            "type": "google.cloud.firestore.document.v1.updated",
+            "subject": "documents/flow_runs/run-1",
+        }
+
+        self.assertEqual(handler.handle(event), "ok")
+        self.assertEqual(self.repo.finalize_calls, 0)
+        retries = [e for e in logger.events if e["event"] == "gcs_write_retry"]
+        self.assertEqual([e["attempt"] for e in retries], [1])
+        [finished] = [e for e in logger.events if e["event"] == "gcs_write_finished"]
+        self.assertEqual(finished["attempts"], 2)
+        # The digest is uploaded alongside the report, ahead of the finalize.
+        names = [e["event"] for e in logger.events]
+        self.assertLess(names.index("report_digest_written"), names.index("cloud_event_finished"))
+        report_uri = "gs://bucket/run-1/1M/llm_report_1m_v1.json"
+        self.assertIn(report_uri, store.writes)
+        outputs = [
+            step.get("outputs", {}).get("gcs_uri")
+            for step in self.repo.raw("run-1")["steps"].values()
+            if step["status"] == "SUCCEEDED" and step.get("stepType") == "LLM_REPORT"
+        ]
+        self.assertIn(report_uri, outputs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -84,6 +84,69 @@ class WorkerConfigTests(unittest.TestCase):
 
         self.assertIn("ARTIFACTS_DRY_RUN", str(ctx.exception))
 
+    def test_gemini_files_upload_flag(self) -> None:
+        env = {
+            "ARTIFACTS_BUCKET": "test-bucket",
+            "GEMINI_API_KEY": "sk_test_123",
+        }
+        self.assertFalse(WorkerConfig.from_env(env).gemini_files_upload_enabled)
+
+        env["GEMINI_FILES_UPLOAD_ENABLED"] = "true"
+        self.assertTrue(WorkerConfig.from_env(env).gemini_files_upload_enabled)
+
+    def test_gemini_context_cache_settings(self) -> None:
+        env = {
+            "ARTIFACTS_BUCKET": "test-bucket",
+            "GEMINI_API_KEY": "sk_test_123",
+        }
+        config = WorkerConfig.from_env(env)
+        self.assertFalse(config.gemini_context_cache_enabled)
+        self.assertEqual(config.gemini_context_cache_ttl_seconds, 3600)
+
+        env["GEMINI_CONTEXT_CACHE_ENABLED"] = "true"
+        env["GEMINI_CONTEXT_CACHE_TTL_SECONDS"] = "900"
+        config = WorkerConfig.from_env(env)
+        self.assertTrue(config.gemini_context_cache_enabled)
+        self.assertEqual(config.gemini_context_cache_ttl_seconds, 900)
+
+    def test_vertex_auth_mode_without_api_key(self) -> None:
+        env = {
+            "ARTIFACTS_BUCKET": "test-bucket",
+            "GCP_PROJECT": "proj",
+            "GEMINI_AUTH_MODE": "vertex_adc",
+            "GEMINI_LOCATION": "us-central1",
+        }
+
+        config = WorkerConfig.from_env(env)
+
+        self.assertTrue(config.gemini_auth.is_vertex)
+        self.assertIsNone(config.gemini_api_key)
+        self.assertEqual(config.gemini_auth.location, "us-central1")
+
+    def test_vertex_auth_mode_requires_project(self) -> None:
+        env = {
+            "ARTIFACTS_BUCKET": "test-bucket",
+            "GEMINI_AUTH_MODE": "vertex_adc",
+            "GEMINI_LOCATION": "us-central1",
+        }
+
+        with self.assertRaises(ConfigurationError) as ctx:
+            WorkerConfig.from_env(env)
+
+        self.assertIn("GCP_PROJECT", str(ctx.exception))
+
+    def test_vertex_auth_mode_rejects_files_upload(self) -> None:
+        env = {
+            "ARTIFACTS_BUCKET": "test-bucket",
+            "GCP_PROJECT": "proj",
+            "GEMINI_AUTH_MODE": "vertex_adc",
+            "GEMINI_LOCATION": "us-central1",
+            "GEMINI_FILES_UPLOAD_ENABLED": "true",
+        }
+
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env(env)
+
     def test_invocation_timeout_invalid(self) -> None:
         env = {
             "ARTIFACTS_BUCKET": "test-bucket",
@@ -96,6 +159,106 @@ class WorkerConfigTests(unittest.TestCase):
 
         self.assertIn("INVOCATION_TIMEOUT_SECONDS", str(ctx.exception))
 
+    def test_ohlcv_downsampling_is_opt_in(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        self.assertIsNone(WorkerConfig.from_env(env).ohlcv_max_candles)
+
+        config = WorkerConfig.from_env({**env, "OHLCV_MAX_CANDLES": "500", "OHLCV_RECENT_CANDLES": "50"})
+        self.assertEqual(config.ohlcv_max_candles, 500)
+        self.assertEqual(config.ohlcv_recent_candles, 50)
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "OHLCV_MAX_CANDLES": "0"})
+
+    def test_context_bundle_flag(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        self.assertFalse(WorkerConfig.from_env(env).context_bundle_enabled)
+        self.assertTrue(
+            WorkerConfig.from_env({**env, "CONTEXT_BUNDLE_ENABLED": "true"}).context_bundle_enabled
+        )
+
+    def test_llm_batching_is_opt_in(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        self.assertEqual(WorkerConfig.from_env(env).llm_batch_max_steps, 1)
+
+        config = WorkerConfig.from_env(
+            {**env, "LLM_BATCH_MAX_STEPS": "4", "LLM_BATCH_MAX_INPUT_TOKENS": "50000"}
+        )
+        self.assertEqual(config.llm_batch_max_steps, 4)
+        self.assertEqual(config.llm_batch_max_input_tokens, 50000)
+        self.assertEqual(config.llm_batch_step_seconds, 60)
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "LLM_BATCH_MAX_STEPS": "0"})
+
+    def test_pull_worker_settings(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        config = WorkerConfig.from_env({**env, "WORKER_CONCURRENCY": "16"})
+        self.assertEqual(config.worker_concurrency, 16)
+        self.assertEqual(config.worker_poll_interval_seconds, 5)
+        self.assertEqual(config.worker_scan_limit, 50)
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "WORKER_SCAN_LIMIT": "0"})
+        self.assertEqual(config.worker_mode, "scan")
+        self.assertEqual(WorkerConfig.from_env({**env, "WORKER_MODE": "WATCH"}).worker_mode, "watch")
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "WORKER_MODE": "push"})
+
+    def test_run_gate_settings(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        config = WorkerConfig.from_env(env)
+        self.assertFalse(config.run_gate_enabled)
+        self.assertEqual(config.run_gate_idle_ttl_seconds, 30)
+        self.assertTrue(WorkerConfig.from_env({**env, "RUN_GATE_ENABLED": "true"}).run_gate_enabled)
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "RUN_GATE_IDLE_TTL_SECONDS": "0"})
+
+    def test_prefetch_settings(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        config = WorkerConfig.from_env(env)
+        self.assertFalse(config.prefetch_enabled)
+        self.assertEqual(config.prefetch_cache_max_mb, 64)
+        self.assertEqual(config.prefetch_timeout_seconds, 30)
+        self.assertEqual(config.prefetch_config_ttl_seconds, 300)
+        config = WorkerConfig.from_env(
+            {**env, "PREFETCH_ENABLED": "true", "PREFETCH_CACHE_MAX_MB": "16"}
+        )
+        self.assertTrue(config.prefetch_enabled)
+        self.assertEqual(config.prefetch_cache_max_mb, 16)
+        self.assertFalse(config.claim_prelude_enabled)
+        self.assertTrue(
+            WorkerConfig.from_env({**env, "CLAIM_PRELUDE_ENABLED": "1"}).claim_prelude_enabled
+        )
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "PREFETCH_TIMEOUT_SECONDS": "0"})
+
+    def test_commit_phase_settings(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        config = WorkerConfig.from_env(env)
+        self.assertFalse(config.commit_pipeline_enabled)
+        self.assertEqual(config.gcs_write_max_attempts, 3)
+        config = WorkerConfig.from_env(
+            {**env, "COMMIT_PIPELINE_ENABLED": "true", "GCS_WRITE_MAX_ATTEMPTS": "5"}
+        )
+        self.assertTrue(config.commit_pipeline_enabled)
+        self.assertEqual(config.gcs_write_max_attempts, 5)
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env({**env, "GCS_WRITE_MAX_ATTEMPTS": "0"})
+
+    def test_batch_api_requires_ai_studio_auth(self) -> None:
+        env = {"ARTIFACTS_BUCKET": "test-bucket", "GEMINI_API_KEY": "sk_test_123"}
+        self.assertFalse(WorkerConfig.from_env(env).gemini_batch_api_enabled)
+        config = WorkerConfig.from_env({**env, "GEMINI_BATCH_API_ENABLED": "true"})
+        self.assertTrue(config.gemini_batch_api_enabled)
+        with self.assertRaises(ConfigurationError):
+            WorkerConfig.from_env(
+                {
+                    "ARTIFACTS_BUCKET": "test-bucket",
+                    "GEMINI_AUTH_MODE": "vertex_adc",
+                    "GCP_PROJECT": "proj",
+                    "GEMINI_LOCATION": "us-central1",
+                    "GEMINI_BATCH_API_ENABLED": "true",
+                }
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,226 @@
+import json
+import threading
+import unittest
+
+from worker_llm_client.artifacts.bundle import (
+    BundleArtifactStore,
+    ContextBundle,
+    InvalidContextBundle,
+    pack_context_bundle,
+)
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy, ArtifactUri
+from worker_llm_client.artifacts.services import ArtifactTooLarge
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.workflow.domain import FlowRun, LLMReportStep
+from tests.test_handler_logging import FakeEventLogger
+
+
+OHLCV_URI = ArtifactUri.parse("gs://bucket/ohlcv.json")
+MANIFEST_URI = ArtifactUri.parse("gs://bucket/charts_manifest.json")
+CHART_URI = ArtifactUri.parse("gs://bucket/chart.png")
+REPORT_URI = ArtifactUri.parse("gs://bucket/report.json")
+DIGEST_URI = ArtifactUri.parse("gs://bucket/report.digest.json")
+BUNDLE_URI = ArtifactUri.parse("gs://artifacts/run-1/1M/_context.bundle")
+
+
+class CountingArtifactStore(InMemoryArtifactStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.body_reads: list[str] = []
+        self.exists_checks: list[str] = []
+
+    def read_bytes_limited(self, uri, max_bytes):
+        self.body_reads.append(str(uri))
+        return super().read_bytes_limited(uri, max_bytes)
+
+    def exists(self, uri):
+        self.exists_checks.append(str(uri))
+        return super().exists(uri)
+
+
+def _store() -> CountingArtifactStore:
+    store = CountingArtifactStore()
+    store.put(OHLCV_URI, json.dumps({"data": [{"c": 1}]}).encode(), content_type="application/json")
+    store.put(
+        MANIFEST_URI,
+        json.dumps({"items": [{"gcsUri": str(CHART_URI), "description": "MA"}]}).encode(),
+        content_type="application/json",
+    )
+    store.put(CHART_URI, b"\x89PNG", content_type="image/png")
+    store.put(REPORT_URI, json.dumps({"output": {"summary": "up"}}).encode())
+    return store
+
+
+def _flow_run() -> FlowRun:
+    return FlowRun.from_raw(
+        {
+            "runId": "run-1",
+            "status": "RUNNING",
+            "scope": {"symbol": "BTCUSDT"},
+            "steps": {
+                "ohlcv": {
+                    "stepType": "OHLCV_EXPORT",
+                    "status": "SUCCEEDED",
+                    "dependsOn": [],
+                    "inputs": {},
+                    "outputs": {"gcs_uri": str(OHLCV_URI)},
+                },
+                "charts": {
+                    "stepType": "CHART_EXPORT",
+                    "status": "SUCCEEDED",
+                    "dependsOn": [],
+                    "inputs": {},
+                    "outputs": {"gcs_uri": str(MANIFEST_URI)},
+                },
+                "llm": {
+                    "stepType": "LLM_REPORT",
+                    "status": "READY",
+                    "dependsOn": [],
+                    "timeframe": "1M",
+                    "inputs": {
+                        "llm": {
+                            "promptId": "llm_prompt_1M_report_v1_0",
+                            "llmProfile": {
+                                "responseMimeType": "application/json",
+                                "candidateCount": 1,
+                                "structuredOutput": {"schemaId": "llm_schema_1M_report_v1_0"},
+                            },
+                        },
+                        "ohlcvStepId": "ohlcv",
+                        "chartsManifestStepId": "charts",
+                        "previousReports": [{"gcs_uri": str(REPORT_URI)}],
+                    },
+                    "outputs": {},
+                },
+            },
+        }
+    )
+
+
+class ContextBundleFormatTests(unittest.TestCase):
+    def test_round_trip_keeps_payloads_and_metadata(self) -> None:
+        store = _store()
+        reads = [
+            store.read_bytes_limited(OHLCV_URI, 1024),
+            store.read_bytes_limited(CHART_URI, 1024),
+            store.read_bytes_limited(OHLCV_URI, 1024),
+        ]
+        bundle = ContextBundle(pack_context_bundle(reads))
+
+        self.assertEqual(len(bundle), 2)
+        member = bundle.member(CHART_URI)
+        self.assertEqual(bundle.read(member), b"\x89PNG")
+        self.assertEqual(member.metadata.content_type, "image/png")
+        self.assertEqual(member.metadata.generation, reads[1].metadata.generation)
+
+    def test_rejects_malformed_bytes(self) -> None:
+        data = pack_context_bundle([_store().read_bytes_limited(OHLCV_URI, 1024)])
+        for raw in (b"", b"not a bundle", data[:12], data[:-1]):
+            with self.assertRaises(InvalidContextBundle, msg=raw):
+                ContextBundle(raw)
+
+    def test_bundle_store_serves_members_and_falls_back(self) -> None:
+        store = _store()
+        bundle = ContextBundle(pack_context_bundle([store.read_bytes_limited(CHART_URI, 1024)]))
+        store.body_reads.clear()
+        bundled = BundleArtifactStore(bundle, store)
+
+        results = bundled.read_many([CHART_URI, OHLCV_URI], 1024)
+
+        self.assertEqual([result.uri for result in results], [CHART_URI, OHLCV_URI])
+        self.assertEqual(results[0].read.data, b"\x89PNG")
+        self.assertEqual(store.body_reads, [str(OHLCV_URI)])
+        with self.assertRaises(ArtifactTooLarge):
+            bundled.read_bytes_limited(CHART_URI, 2)
+
+
+class BlockingWriteStore(CountingArtifactStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def write_bytes_create_only(self, uri, data, **kwargs):
+        self.release.wait(5)
+        return super().write_bytes_create_only(uri, data, **kwargs)
+
+
+class AssemblerContextBundleTests(unittest.TestCase):
+    def _resolve(self, store: CountingArtifactStore, event_logger=None, *, wait: bool = True):
+        flow_run = _flow_run()
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        assembler = UserInputAssembler(
+            artifact_store=store,
+            bundle_path_policy=ArtifactPathPolicy(bucket="artifacts", prefix=None),
+        )
+        self.addCleanup(assembler.shutdown)
+        resolved = assembler.resolve(
+            flow_run=flow_run,
+            step=step,
+            inputs=step.parse_inputs(flow_run=flow_run),
+            event_logger=event_logger,
+        )
+        if wait:
+            assembler.wait_for_bundle_writes()
+        return resolved
+
+    def test_first_step_writes_bundle_and_later_steps_read_it(self) -> None:
+        store = _store()
+        logger = FakeEventLogger()
+        first = self._resolve(store, logger)
+
+        # The missing bundle and digest are each a single not-found GET, with
+        # no exists() probe and no warning.
+        self.assertEqual(store.exists_checks, [])
+        self.assertTrue(store.exists(BUNDLE_URI))
+        self.assertFalse([e for e in logger.events if e["severity"] != "INFO"])
+        self.assertEqual(
+            sorted(store.body_reads),
+            sorted(
+                [
+                    str(BUNDLE_URI),
+                    str(OHLCV_URI),
+                    str(MANIFEST_URI),
+                    str(CHART_URI),
+                    str(DIGEST_URI),
+                    str(REPORT_URI),
+                ]
+            ),
+        )
+
+        store.body_reads.clear()
+        second = self._resolve(store)
+
+        # One GET for the bundle; previous reports are step-specific and never bundled.
+        self.assertEqual(
+            store.body_reads, [str(BUNDLE_URI), str(DIGEST_URI), str(REPORT_URI)]
+        )
+        self.assertEqual(second.ohlcv.payload, first.ohlcv.payload)
+        self.assertEqual(second.chart_images[0].data, b"\x89PNG")
+
+    def test_bundle_is_written_off_the_resolve_path(self) -> None:
+        store = BlockingWriteStore()
+        for uri in (OHLCV_URI, MANIFEST_URI, CHART_URI, REPORT_URI):
+            read = _store().read_bytes_limited(uri, 1024)
+            store.put(uri, read.data, content_type=read.metadata.content_type)
+        self.addCleanup(store.release.set)
+
+        # resolve() returns while the bundle upload is still blocked.
+        resolved = self._resolve(store, wait=False)
+
+        self.assertEqual(resolved.chart_images[0].data, b"\x89PNG")
+        self.assertFalse(store.exists(BUNDLE_URI))
+        store.release.set()
+
+    def test_corrupt_bundle_falls_back_to_object_reads(self) -> None:
+        store = _store()
+        store.put(BUNDLE_URI, b"garbage")
+
+        resolved = self._resolve(store)
+
+        self.assertEqual(resolved.chart_images[0].data, b"\x89PNG")
+        self.assertIn(str(OHLCV_URI), store.body_reads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+from worker_llm_client.app.context_cache import CachedContent, ContextCacheRegistry
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeCacheStore:
+    def __init__(self, *, clock: FakeClock, fail: bool = False) -> None:
+        self._clock = clock
+        self.fail = fail
+        self.creates: list[dict] = []
+
+    def create(self, *, model_name: str, system: str, parts, ttl_seconds: int) -> CachedContent:
+        if self.fail:
+            raise RuntimeError("create failed")
+        self.creates.append({"model_name": model_name, "parts": list(parts), "ttl": ttl_seconds})
+        return CachedContent(
+            name=f"cachedContents/{len(self.creates)}",
+            expires_at=self._clock() + ttl_seconds,
+        )
+
+
+SYSTEM = "s" * 9000
+
+
+class ContextCacheRegistryTests(unittest.TestCase):
+    def test_reuses_cache_for_identical_prefix(self) -> None:
+        clock = FakeClock()
+        store = FakeCacheStore(clock=clock)
+        registry = ContextCacheRegistry(cache_store=store, ttl_seconds=600, clock=clock)
+
+        first = registry.lookup_or_create(model_name="m", system=SYSTEM, parts=["ohlcv"])
+        second = registry.lookup_or_create(model_name="m", system=SYSTEM, parts=["ohlcv"])
+        other_model = registry.lookup_or_create(model_name="m2", system=SYSTEM, parts=["ohlcv"])
+
+        self.assertEqual(first, "cachedContents/1")
+        self.assertEqual(second, first)
+        self.assertEqual(other_model, "cachedContents/2")
+        self.assertEqual(store.creates[0]["ttl"], 600)
+        stats = registry.stats()
+        self.assertEqual((stats.hits, stats.creates), (1, 2))
+
+    def test_recreates_when_entry_near_expiry(self) -> None:
+        clock = FakeClock()
+        store = FakeCacheStore(clock=clock)
+        registry = ContextCacheRegistry(
+            cache_store=store, ttl_seconds=600, expiry_margin_seconds=60, clock=clock
+        )
+
+        registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[])
+        clock.now += 545
+        name = registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[])
+
+        self.assertEqual(name, "cachedContents/2")
+        self.assertEqual(registry.stats().expired, 1)
+
+    def test_skips_small_prefix(self) -> None:
+        clock = FakeClock()
+        store = FakeCacheStore(clock=clock)
+        registry = ContextCacheRegistry(cache_store=store, clock=clock)
+
+        self.assertIsNone(registry.lookup_or_create(model_name="m", system="short", parts=["x"]))
+        self.assertEqual(store.creates, [])
+        self.assertEqual(registry.stats().skipped_small, 1)
+
+    def test_create_failure_returns_none(self) -> None:
+        clock = FakeClock()
+        store = FakeCacheStore(clock=clock, fail=True)
+        registry = ContextCacheRegistry(cache_store=store, clock=clock)
+
+        self.assertIsNone(registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[]))
+        self.assertEqual(registry.stats().create_failures, 1)
+
+    def test_failed_create_is_not_retried_until_its_ttl_passes(self) -> None:
+        clock = FakeClock()
+        store = FakeCacheStore(clock=clock, fail=True)
+        registry = ContextCacheRegistry(cache_store=store, failure_ttl_seconds=60, clock=clock)
+
+        registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[])
+        store.fail = False
+        self.assertIsNone(registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[]))
+        # A different prefix is not affected.
+        self.assertIsNotNone(registry.lookup_or_create(model_name="m", system=SYSTEM, parts=["x"]))
+        stats = registry.stats()
+        self.assertEqual((stats.create_failures, stats.skipped_failed, stats.creates), (1, 1, 1))
+
+        clock.now += 60
+        self.assertEqual(
+            registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[]), "cachedContents/2"
+        )
+
+    def test_invalidate_forces_recreate(self) -> None:
+        clock = FakeClock()
+        store = FakeCacheStore(clock=clock)
+        registry = ContextCacheRegistry(cache_store=store, clock=clock)
+
+        name = registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[])
+        registry.invalidate(name)
+        again = registry.lookup_or_create(model_name="m", system=SYSTEM, parts=[])
+
+        self.assertEqual(again, "cachedContents/2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+import json
+import unittest
+
+from worker_llm_client.app.handler import DeferredStepCompleter, handle_cloud_event
+from worker_llm_client.app.llm_client import ProviderResponse, RateLimited
+from worker_llm_client.app.services import ClaimResult, FinalizeResult
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy
+from worker_llm_client.infra.memory import (
+    InMemoryBatchPredictionService,
+    InMemoryFlowRunRepository,
+)
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from worker_llm_client.workflow.domain import FlowRun, InvalidStepInputs, LLMReportInputs
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakeFlowRunRepo,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    RecordingArtifactStore,
+    _build_prompt,
+    _build_schema,
+)
+
+
+STEP_ID = "llm_report_1d_v1"
+OK_OUTPUT = {"summary": {"markdown": "ok"}, "details": {}}
+CLOUD_EVENT = {
+    "id": "evt-1",
+    "type": "google.cloud.firestore.document.v1.updated",
+    "subject": "documents/flow_runs/run-1",
+}
+
+
+def _deferred_flow_run(*, execution_mode: str = "deferred") -> FlowRun:
+    raw = {
+        "runId": "run-1",
+        "status": "RUNNING",
+        "scope": {"symbol": "LINKUSDT"},
+        "steps": {
+            "ohlcv_1d_v1": {
+                "stepType": "OHLCV_EXPORT",
+                "status": "SUCCEEDED",
+                "dependsOn": [],
+                "outputs": {"gcs_uri": "gs://bucket/ohlcv.json"},
+            },
+            "charts_1d_v1": {
+                "stepType": "CHART_EXPORT",
+                "status": "SUCCEEDED",
+                "dependsOn": ["ohlcv_1d_v1"],
+                "outputs": {"gcs_uri": "gs://bucket/charts.json"},
+            },
+            STEP_ID: {
+                "stepType": "LLM_REPORT",
+                "status": "READY",
+                "dependsOn": ["ohlcv_1d_v1", "charts_1d_v1"],
+                "timeframe": "1D",
+                "inputs": {
+                    "llm": {
+                        "promptId": "llm_prompt_1D_report_v1_0",
+                        "llmProfile": {
+                            "modelName": "gemini-2.0-flash",
+                            "responseMimeType": "application/json",
+                            "candidateCount": 1,
+                            "structuredOutput": {"schemaId": "llm_schema_1M_report_v1_0"},
+                        },
+                    },
+                    "ohlcvStepId": "ohlcv_1d_v1",
+                    "chartsManifestStepId": "charts_1d_v1",
+                    "executionMode": execution_mode,
+                },
+                "outputs": {},
+            },
+        },
+    }
+    return FlowRun.from_raw(raw, run_id="run-1")
+
+
+class StatefulFlowRunRepo(FakeFlowRunRepo):
+    """Applies claims, submissions and finalizes to the in-memory flow run."""
+
+    def __init__(self, flow_run: FlowRun) -> None:
+        super().__init__(flow_run)
+        self.submissions: list[dict] = []
+
+    def _step(self, step_id: str) -> dict:
+        return self._flow_run.steps[step_id]
+
+    def claim_step(self, run_id: str, step_id: str, started_at_rfc3339: str) -> ClaimResult:
+        result = super().claim_step(run_id, step_id, started_at_rfc3339)
+        self._step(step_id)["status"] = "RUNNING"
+        return result
+
+    def record_submission(self, run_id: str, step_id: str, submission: dict) -> FinalizeResult:
+        step = self._step(step_id)
+        if step["status"] != "RUNNING":
+            return FinalizeResult(updated=False, status=step["status"], reason="not_running")
+        self.submissions.append(dict(submission))
+        step.setdefault("outputs", {}).setdefault("execution", {})["deferred"] = dict(submission)
+        return FinalizeResult(updated=True, status="RUNNING")
+
+    def finalize_step(self, run_id, step_id, status, finished_at_rfc3339, **kwargs) -> FinalizeResult:
+        result = super().finalize_step(run_id, step_id, status, finished_at_rfc3339, **kwargs)
+        self._step(step_id)["status"] = status
+        return result
+
+
+class FailingLLMClient:
+    def generate(self, **_kwargs):
+        raise AssertionError("online call not expected")
+
+
+class DeferredExecutionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.logger = FakeEventLogger()
+        self.store = RecordingArtifactStore()
+        self.batch = InMemoryBatchPredictionService()
+        self.path_policy = ArtifactPathPolicy(bucket="bucket")
+
+    def _handle(self, repo, *, batch_prediction=None, llm_client=None) -> str:
+        return handle_cloud_event(
+            CLOUD_EVENT,
+            flow_repo=repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=self.logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=self.store,
+            path_policy=self.path_policy,
+            llm_client=llm_client or FailingLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            batch_prediction=batch_prediction,
+        )
+
+    def _completer(self, repo) -> DeferredStepCompleter:
+        return DeferredStepCompleter(
+            flow_repo=repo,
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=self.logger,
+            artifact_store=self.store,
+            path_policy=self.path_policy,
+            batch_prediction=self.batch,
+        )
+
+    def _submit(self) -> tuple[StatefulFlowRunRepo, str]:
+        repo = StatefulFlowRunRepo(_deferred_flow_run())
+        self.assertEqual(self._handle(repo, batch_prediction=self.batch), "submitted")
+        return repo, repo.submissions[0]["jobName"]
+
+    def test_submit_leaves_step_running_with_submitted_sub_state(self) -> None:
+        repo, job_name = self._submit()
+
+        self.assertEqual(repo.finalized, [])
+        self.assertEqual(self.store.writes, {})
+        step = repo._flow_run.get_step(STEP_ID)
+        self.assertEqual(step.status, "RUNNING")
+        self.assertEqual(step.deferred_submission()["jobName"], job_name)
+        self.assertEqual(self.batch.submissions[job_name]["display_name"], f"run-1/{STEP_ID}")
+        finished = [e for e in self.logger.events if e["event"] == "cloud_event_finished"]
+        self.assertEqual(finished[-1]["status"], "submitted")
+
+    def test_completion_validates_and_writes_report(self) -> None:
+        repo, job_name = self._submit()
+        self.assertEqual(self._completer(repo).complete_run("run-1"), {STEP_ID: "pending"})
+
+        self.batch.complete(job_name, json.dumps(OK_OUTPUT))
+        self.assertEqual(self._completer(repo).complete_run("run-1"), {STEP_ID: "ok"})
+
+        self.assertEqual(repo.finalized[-1]["status"], "SUCCEEDED")
+        report_uri = repo.finalized[-1]["outputs_gcs_uri"]
+        report = json.loads(self.store.writes[report_uri])
+        self.assertEqual(report["output"], OK_OUTPUT)
+        self.assertEqual(report["metadata"]["llm"]["deferred"]["jobName"], job_name)
+        self.assertEqual(report["metadata"]["inputs"]["ohlcv_gcs_uri"], "gs://bucket/ohlcv.json")
+        # Finalized steps are no longer picked up by later polls.
+        self.assertEqual(self._completer(repo).complete_run("run-1"), {})
+
+    def test_failed_job_and_invalid_output_fail_the_step(self) -> None:
+        repo, job_name = self._submit()
+        self.batch.fail(job_name, "quota exhausted")
+        self.assertEqual(self._completer(repo).complete_run("run-1"), {STEP_ID: "failed"})
+        self.assertEqual(repo.finalized[-1]["error"].code, "GEMINI_REQUEST_FAILED")
+
+        repo, job_name = self._submit()
+        self.batch.complete(job_name, "not json")
+        self.assertEqual(self._completer(repo).complete_run("run-1"), {STEP_ID: "failed"})
+        self.assertEqual(repo.finalized[-1]["error"].code, "INVALID_STRUCTURED_OUTPUT")
+
+    def test_submission_error_fails_the_step(self) -> None:
+        class RateLimitedBatch(InMemoryBatchPredictionService):
+            def submit(self, **_kwargs):
+                raise RateLimited("quota")
+
+        repo = StatefulFlowRunRepo(_deferred_flow_run())
+        self.assertEqual(self._handle(repo, batch_prediction=RateLimitedBatch()), "failed")
+        self.assertEqual(repo.finalized[-1]["error"].code, "RATE_LIMITED")
+        self.assertEqual(repo.submissions, [])
+
+    def test_unrecorded_submission_cancels_the_job(self) -> None:
+        class UnrecordedRepo(StatefulFlowRunRepo):
+            def record_submission(self, run_id, step_id, submission):
+                raise RuntimeError("firestore unavailable")
+
+        repo = UnrecordedRepo(_deferred_flow_run())
+        self.assertEqual(self._handle(repo, batch_prediction=self.batch), "failed")
+        [job_name] = self.batch.submissions
+        self.assertEqual(self.batch.get(job_name).error, "cancelled")
+        self.assertEqual(repo.finalized[-1]["error"].code, "FIRESTORE_FINALIZE_FAILED")
+        [cancelled] = [e for e in self.logger.events if e["event"] == "llm_deferred_cancelled"]
+        self.assertEqual(
+            (cancelled["status"], cancelled["reason"], cancelled["llm"]["jobName"]),
+            ("ok", "record_failed", job_name),
+        )
+
+    def test_failed_cancel_logs_the_job_name(self) -> None:
+        class LostRepo(StatefulFlowRunRepo):
+            def record_submission(self, run_id, step_id, submission):
+                return FinalizeResult(updated=False, status="FAILED", reason="not_running")
+
+        class NoCancelBatch(InMemoryBatchPredictionService):
+            def cancel(self, job_name):
+                raise RateLimited("quota")
+
+        batch = NoCancelBatch()
+        repo = LostRepo(_deferred_flow_run())
+        self.assertEqual(self._handle(repo, batch_prediction=batch), "noop")
+        [cancelled] = [e for e in self.logger.events if e["event"] == "llm_deferred_cancelled"]
+        self.assertEqual(cancelled["severity"], "ERROR")
+        self.assertEqual(cancelled["reason"], "not_running")
+        self.assertEqual(cancelled["llm"]["jobName"], next(iter(batch.submissions)))
+
+    def test_memory_repository_scans_for_submitted_steps(self) -> None:
+        repo = InMemoryFlowRunRepository()
+        repo.put("run-1", dict(_deferred_flow_run().raw))
+        self.assertEqual(repo.deferred_run_ids(limit=10), [])
+
+        self.assertEqual(self._handle(repo, batch_prediction=self.batch), "submitted")
+        self.assertEqual(repo.deferred_run_ids(limit=10), ["run-1"])
+        self.assertEqual(repo.ready_run_ids(limit=10), [])
+
+    def test_without_batch_service_the_step_runs_online(self) -> None:
+        class OnlineClient:
+            def generate(self, **_kwargs):
+                return ProviderResponse(
+                    text=json.dumps(OK_OUTPUT), finish_reason="STOP", usage=None, raw=None
+                )
+
+        repo = StatefulFlowRunRepo(_deferred_flow_run())
+        self.assertEqual(self._handle(repo, llm_client=OnlineClient()), "ok")
+        unavailable = [e for e in self.logger.events if e["event"] == "llm_deferred_unavailable"]
+        self.assertEqual(unavailable[0]["reason"], "batch_prediction_disabled")
+
+
+class ExecutionModeInputsTests(unittest.TestCase):
+    def _inputs(self, flow_run: FlowRun) -> LLMReportInputs:
+        return LLMReportInputs.from_raw(flow_run.steps[STEP_ID]["inputs"], flow_run=flow_run)
+
+    def test_execution_mode_defaults_to_online(self) -> None:
+        flow_run = _deferred_flow_run()
+        del flow_run.steps[STEP_ID]["inputs"]["executionMode"]
+        self.assertEqual(self._inputs(flow_run).execution_mode, "online")
+        self.assertEqual(self._inputs(_deferred_flow_run()).execution_mode, "deferred")
+
+    def test_unknown_execution_mode_is_rejected(self) -> None:
+        with self.assertRaises(InvalidStepInputs):
+            self._inputs(_deferred_flow_run(execution_mode="overnight"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from worker_llm_client.app.file_registry import UploadedFileRegistry
+from worker_llm_client.app.llm_client import FileReference, UploadedFile
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeFileStore:
+    def __init__(self, *, ttl_seconds: float | None = 172800.0, clock: FakeClock, fail: bool = False) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self.fail = fail
+        self.uploads: list[dict] = []
+
+    def upload(self, *, data: bytes, mime_type: str, display_name: str) -> UploadedFile:
+        if self.fail:
+            raise RuntimeError("upload failed")
+        self.uploads.append({"data": data, "mime_type": mime_type, "display_name": display_name})
+        expires_at = None if self._ttl_seconds is None else self._clock() + self._ttl_seconds
+        return UploadedFile(
+            uri=f"files/{len(self.uploads)}",
+            mime_type=mime_type,
+            expires_at=expires_at,
+        )
+
+
+class UploadedFileRegistryTests(unittest.TestCase):
+    def test_uploads_once_per_distinct_content(self) -> None:
+        clock = FakeClock()
+        store = FakeFileStore(clock=clock)
+        registry = UploadedFileRegistry(file_store=store, clock=clock)
+
+        first = registry.reference_for(b"chart-a", mime_type="image/png")
+        second = registry.reference_for(b"chart-a", mime_type="image/png")
+        other = registry.reference_for(b"chart-b", mime_type="image/png")
+
+        self.assertEqual(first, FileReference(file_uri="files/1", mime_type="image/png"))
+        self.assertEqual(second, first)
+        self.assertEqual(other.file_uri, "files/2")
+        self.assertEqual(len(store.uploads), 2)
+        stats = registry.stats()
+        self.assertEqual((stats.hits, stats.uploads), (1, 2))
+
+    def test_reuploads_when_entry_nears_expiry(self) -> None:
+        clock = FakeClock()
+        store = FakeFileStore(ttl_seconds=7200.0, clock=clock)
+        registry = UploadedFileRegistry(file_store=store, expiry_margin_seconds=3600, clock=clock)
+
+        registry.reference_for(b"chart-a", mime_type="image/png")
+        clock.now += 3601
+        again = registry.reference_for(b"chart-a", mime_type="image/png")
+
+        self.assertEqual(again.file_uri, "files/2")
+        self.assertEqual(registry.stats().expired, 1)
+
+    def test_upload_failure_falls_back_to_inline(self) -> None:
+        clock = FakeClock()
+        store = FakeFileStore(clock=clock, fail=True)
+        registry = UploadedFileRegistry(file_store=store, clock=clock)
+
+        self.assertIsNone(registry.reference_for(b"chart-a", mime_type="image/png"))
+        self.assertEqual(registry.stats().upload_failures, 1)
+
+    def test_short_lived_upload_is_sent_inline(self) -> None:
+        clock = FakeClock()
+        store = FakeFileStore(ttl_seconds=60.0, clock=clock)
+        registry = UploadedFileRegistry(file_store=store, expiry_margin_seconds=3600, clock=clock)
+
+        self.assertIsNone(registry.reference_for(b"chart-a", mime_type="image/png"))
+        # Not uploaded again on every call while that upload is still alive.
+        self.assertIsNone(registry.reference_for(b"chart-a", mime_type="image/png"))
+        self.assertEqual(len(store.uploads), 1)
+        clock.now += 61
+        self.assertIsNone(registry.reference_for(b"chart-a", mime_type="image/png"))
+        self.assertEqual(len(store.uploads), 2)
+
+    def test_invalidate_and_lru_bound(self) -> None:
+        clock = FakeClock()
+        store = FakeFileStore(ttl_seconds=None, clock=clock)
+        registry = UploadedFileRegistry(file_store=store, max_entries=1, clock=clock)
+
+        first = registry.reference_for(b"chart-a", mime_type="image/png")
+        registry.invalidate(first.file_uri)
+        registry.reference_for(b"chart-a", mime_type="image/png")
+        registry.reference_for(b"chart-b", mime_type="image/png")
+        registry.reference_for(b"chart-a", mime_type="image/png")
+
+        self.assertEqual(len(store.uploads), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
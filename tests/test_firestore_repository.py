@@ -153,6 +153,24 @@ class FirestoreRepositoryTests(unittest.TestCase):
         self.assertFalse(result.claimed)
         self.assertEqual(result.reason, "precondition_failed")
 
+    def test_release_step_returns_running_step_to_ready(self) -> None:
+        flow_run = self._base_flow_run()
+        flow_run["steps"]["step-1"]["status"] = "RUNNING"
+        doc_ref = FakeDocRef([FakeSnapshot(flow_run)])
+        repo = FirestoreFlowRunRepository(FakeClient(doc_ref), max_attempts=1)
+        result = repo.release_step("run-1", "step-1")
+        self.assertTrue(result.updated)
+        self.assertEqual(doc_ref.updates[0]["steps.step-1.status"], "READY")
+        self.assertIn("steps.step-1.outputs.execution.timing.startedAt", doc_ref.updates[0])
+
+    def test_release_step_not_running(self) -> None:
+        doc_ref = FakeDocRef([FakeSnapshot(self._base_flow_run())])
+        repo = FirestoreFlowRunRepository(FakeClient(doc_ref))
+        result = repo.release_step("run-1", "step-1")
+        self.assertFalse(result.updated)
+        self.assertEqual(result.reason, "not_running")
+        self.assertEqual(doc_ref.updates, [])
+
     def test_finalize_already_final(self) -> None:
         flow_run = self._base_flow_run()
         flow_run["steps"]["step-1"]["status"] = "SUCCEEDED"
@@ -227,5 +245,44 @@ class FirestoreRepositoryTests(unittest.TestCase):
             repo.claim_step("run-1", "bad.step", "2025-01-01T00:00:00Z")
 
 
+    def test_ready_run_ids_filters_running_runs_client_side(self) -> None:
+        ready = self._base_flow_run()
+        waiting = self._base_flow_run()
+        waiting["runId"] = "run-2"
+        waiting["steps"]["step-1"]["status"] = "RUNNING"
+        waiting["steps"]["step-1"]["outputs"] = {
+            "execution": {"deferred": {"state": "SUBMITTED", "jobName": "batches/1"}}
+        }
+        third = self._base_flow_run()
+        third["runId"] = "run-3"
+
+        class Snapshot(FakeSnapshot):
+            def __init__(self, run_id: str, data: dict) -> None:
+                super().__init__(data)
+                self.id = run_id
+
+        class QueryClient:
+            wheres: list[tuple] = []
+
+            def collection(self, name: str) -> "QueryClient":
+                return self
+
+            def where(self, *args: Any) -> "QueryClient":
+                self.wheres.append(args)
+                return self
+
+            def stream(self):
+                return iter(
+                    [Snapshot("run-1", ready), Snapshot("run-2", waiting), Snapshot("run-3", third)]
+                )
+
+        client = QueryClient()
+        repo = FirestoreFlowRunRepository(client)
+        self.assertEqual(repo.ready_run_ids(limit=1), ["run-1"])
+        self.assertEqual(repo.ready_run_ids(limit=5), ["run-1", "run-3"])
+        self.assertEqual(repo.deferred_run_ids(limit=5), ["run-2"])
+        self.assertEqual(client.wheres[0], ("status", "==", "RUNNING"))
+
+
 if __name__ == "__main__":
     unittest.main()
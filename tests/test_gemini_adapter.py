@@ -0,0 +1,204 @@
+from types import SimpleNamespace
+import time
+import unittest
+from unittest import mock
+
+from worker_llm_client.app.context_cache import ContextCacheRegistry
+from worker_llm_client.app.file_registry import UploadedFileRegistry
+from worker_llm_client.app.handler import _generate_once
+from worker_llm_client.app.llm_client import FileReferencesExpired, ProviderResponse, RequestFailed
+from worker_llm_client.infra import gemini
+from worker_llm_client.ops.time_budget import TimeBudgetPolicy
+from worker_llm_client.reporting.domain import LLMProfile
+from worker_llm_client.reporting.services import ChartImage
+from tests.test_context_cache import FakeCacheStore
+from tests.test_file_registry import FakeClock, FakeFileStore
+from tests.test_handler_logging import FakeEventLogger
+
+
+CHART = ChartImage(
+    uri="gs://bucket/charts/1d.png",
+    description="1D",
+    mime_type="image/png",
+    data=b"\x89PNG",
+    bytes_len=4,
+)
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code: int, message: str, *, status: str | None = None, details=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+        self.details = details
+
+
+class FakeModels:
+    """Fails requests that reference uploaded files (``files_gone``) or a cache."""
+
+    def __init__(self) -> None:
+        self.files_gone = False
+        self.cache_error: FakeAPIError | None = None
+        self.requests: list[list] = []
+
+    def generate_content(self, *, model, contents, config):
+        self.requests.append(contents)
+        if self.cache_error is not None and config["cachedContent"] is not None:
+            raise self.cache_error
+        if self.files_gone and any(part[0] == "file" for part in contents):
+            raise FakeAPIError(
+                403,
+                "You do not have permission to access the File files/1 or it may not exist.",
+                status="PERMISSION_DENIED",
+            )
+        return SimpleNamespace(text="{}", candidates=[], usage_metadata=None)
+
+
+def _fake_sdk(models: FakeModels):
+    part = SimpleNamespace(
+        from_uri=lambda *, file_uri, mime_type: ("file", file_uri),
+        from_bytes=lambda *, data, mime_type: ("bytes", data),
+        from_text=lambda *, text: ("text", text),
+    )
+    sdk_types = SimpleNamespace(Part=part, GenerateContentConfig=lambda **kwargs: kwargs)
+    client = SimpleNamespace(models=models)
+    return (
+        mock.patch.object(gemini, "genai", SimpleNamespace(Client=lambda **_kwargs: client)),
+        mock.patch.object(gemini, "types", sdk_types),
+        mock.patch.object(gemini, "genai_errors", SimpleNamespace(APIError=FakeAPIError)),
+    )
+
+
+class GeminiClientAdapterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.models = FakeModels()
+        for patcher in _fake_sdk(self.models):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        clock = FakeClock()
+        self.file_store = FakeFileStore(clock=clock)
+        self.registry = UploadedFileRegistry(file_store=self.file_store, clock=clock)
+        self.adapter = gemini.GeminiClientAdapter(api_key="k", file_registry=self.registry)
+        self.profile = LLMProfile.from_raw({"modelName": "gemini-2.5-flash"})
+
+    def _generate(self, **kwargs) -> ProviderResponse:
+        return self.adapter.generate(
+            system="s", user_parts=["prompt", CHART], profile=self.profile, **kwargs
+        )
+
+    def test_rejected_uploads_are_invalidated_and_resent_inline(self) -> None:
+        self._generate()
+        self.assertEqual(self.models.requests[-1][1], ("file", "files/1"))
+
+        self.models.files_gone = True
+        with self.assertRaises(FileReferencesExpired):
+            self._generate()
+        # The upload was forgotten: the inline resend carries the bytes ...
+        self._generate(inline_files=True)
+        self.assertEqual(self.models.requests[-1][1], ("bytes", b"\x89PNG"))
+        self.assertEqual(len(self.file_store.uploads), 1)
+
+        # ... and the next regular request uploads the image again.
+        self.models.files_gone = False
+        self._generate()
+        self.assertEqual(self.models.requests[-1][1], ("file", "files/2"))
+
+
+class CachedContentErrorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.models = FakeModels()
+        for patcher in _fake_sdk(self.models):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        clock = FakeClock()
+        self.cache_store = FakeCacheStore(clock=clock)
+        self.adapter = gemini.GeminiClientAdapter(
+            api_key="k",
+            context_cache=ContextCacheRegistry(
+                cache_store=self.cache_store, min_prefix_chars=0, clock=clock
+            ),
+        )
+        self.profile = LLMProfile.from_raw({"modelName": "gemini-2.5-flash"})
+
+    def _generate(self) -> ProviderResponse:
+        return self.adapter.generate(
+            system="s", user_parts=["prefix", "step"], profile=self.profile, cached_prefix_parts=1
+        )
+
+    def test_missing_cached_content_is_dropped_and_the_request_resent(self) -> None:
+        self.models.cache_error = FakeAPIError(
+            404,
+            "Not found",
+            status="NOT_FOUND",
+            details={
+                "error": {
+                    "details": [
+                        {
+                            "@type": "type.googleapis.com/google.rpc.ResourceInfo",
+                            "resourceType": "CachedContent",
+                            "resourceName": "cachedContents/1",
+                        }
+                    ]
+                }
+            },
+        )
+        response = self._generate()
+        self.assertIsNone(response.cached_content)
+        self.assertEqual(self.models.requests[-1], [("text", "prefix"), ("text", "step")])
+
+        self.models.cache_error = None
+        self.assertEqual(self._generate().cached_content, "cachedContents/2")
+
+    def test_other_client_errors_mentioning_a_cache_are_not_retried(self) -> None:
+        self.models.cache_error = FakeAPIError(
+            400, "Request too large for the context cache window", status="INVALID_ARGUMENT"
+        )
+        with self.assertRaises(RequestFailed):
+            self._generate()
+        self.assertEqual(len(self.models.requests), 1)
+
+
+class InlineRetryTests(unittest.TestCase):
+    class ExpiringClient:
+        def __init__(self) -> None:
+            self.calls: list[dict] = []
+
+        def generate(self, *, system, user_parts, profile, llm_schema=None, inline_files=False):
+            self.calls.append({"inline_files": inline_files})
+            if not inline_files:
+                raise FileReferencesExpired("files gone", status_code=403)
+            return ProviderResponse(text="{}", finish_reason="STOP", usage=None, raw=None)
+
+    def _generate(self, client, *, remaining_seconds: float, logger: FakeEventLogger):
+        budget = TimeBudgetPolicy(
+            invocation_started_at=time.monotonic() - (100 - remaining_seconds),
+            invocation_timeout_seconds=100,
+            finalize_budget_seconds=30,
+        )
+        return _generate_once(
+            client,
+            request={"system": "s", "user_parts": ["p"], "profile": None},
+            time_budget=budget,
+            event_logger=logger,
+            log_ids={"eventId": "evt-1", "runId": "run-1", "stepId": "step"},
+        )
+
+    def test_resends_inline_when_the_budget_allows(self) -> None:
+        client = self.ExpiringClient()
+        logger = FakeEventLogger()
+        self._generate(client, remaining_seconds=90, logger=logger)
+        self.assertEqual(client.calls, [{"inline_files": False}, {"inline_files": True}])
+        self.assertEqual([e["event"] for e in logger.events], ["llm_inline_retry"])
+
+    def test_no_resend_without_budget(self) -> None:
+        client = self.ExpiringClient()
+        logger = FakeEventLogger()
+        with self.assertRaises(FileReferencesExpired):
+            self._generate(client, remaining_seconds=10, logger=logger)
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(logger.events[0]["action"], "llm_inline_retry")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 import unittest
 from dataclasses import dataclass, field
+import json
 
 from worker_llm_client.app.handler import FlowRunEventHandler, handle_cloud_event
-from worker_llm_client.app.llm_client import ProviderResponse
+from worker_llm_client.app.cache_metrics import PromptCacheTracker
+from worker_llm_client.app.llm_client import ProviderResponse, RateLimited, RequestFailed
 from worker_llm_client.app.services import ClaimResult, FinalizeResult, FlowRunRecord, LLMPrompt, LLMSchema
 from worker_llm_client.artifacts.domain import ArtifactPathPolicy, GcsUri
 from worker_llm_client.artifacts.services import WriteResult
@@ -26,6 +28,7 @@ class FakeFlowRunRepo:
         self._flow_run = flow_run
         self.claims: list[dict] = []
         self.finalized: list[dict] = []
+        self.released: list[str] = []
 
     def get(self, run_id: str) -> FlowRunRecord | None:
         if self._flow_run is None:
@@ -66,6 +69,10 @@ class FakeFlowRunRepo:
         )
         return FinalizeResult(updated=True, status="RUNNING")
 
+    def release_step(self, run_id: str, step_id: str) -> FinalizeResult:
+        self.released.append(step_id)
+        return FinalizeResult(updated=True, status="RUNNING")
+
 
 class FakePromptRepo:
     def __init__(self, prompt: LLMPrompt | None) -> None:
@@ -104,6 +111,45 @@ class FakeLLMClient:
         )
 
 
+class RecordingLLMClient(FakeLLMClient):
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def generate(
+        self, *, system: str, user_parts, profile, llm_schema=None, **kwargs
+    ) -> ProviderResponse:
+        self.calls.append({"user_parts": list(user_parts), **kwargs})
+        return ProviderResponse(
+            text='{"summary":{"markdown":"ok"},"details":{}}',
+            finish_reason="STOP",
+            usage={"promptTokenCount": 10, "cachedContentTokenCount": 8},
+            raw=None,
+            cached_content="cachedContents/1",
+        )
+
+
+class RecordingArtifactStore(FakeArtifactStore):
+    def __init__(self) -> None:
+        self.writes: dict[str, bytes] = {}
+
+    def write_bytes_create_only(self, uri: GcsUri, data: bytes, *, content_type: str) -> WriteResult:
+        self.writes[str(uri)] = data
+        return WriteResult(uri=uri, created=True, reused=False)
+
+
+class ScriptedLLMClient:
+    def __init__(self, outcomes: dict[str, Exception]) -> None:
+        self._outcomes = outcomes
+        self.models: list[str] = []
+
+    def generate(self, *, system: str, user_parts, profile, llm_schema=None) -> ProviderResponse:
+        self.models.append(profile.model_name)
+        outcome = self._outcomes.get(profile.model_name)
+        if outcome is not None:
+            raise outcome
+        return FakeLLMClient().generate(system=system, user_parts=user_parts, profile=profile)
+
+
 class FakeUserInputAssembler:
     def resolve(self, *, flow_run: FlowRun, step, inputs, **_kwargs) -> ResolvedUserInput:
         ohlcv = type("JsonArtifact", (), {"uri": "gs://bucket/ohlcv.json", "bytes_len": 2})()
@@ -122,14 +168,22 @@ class FakeUserInputAssembler:
     def assemble(self, *, base_user_prompt: str, resolved: ResolvedUserInput) -> UserInputPayload:
         return UserInputPayload(text="user prompt", chart_images=())
 
+    def wait_for_bundle_writes(self, timeout_seconds: float | None = None) -> None:
+        return None
 
-def _build_flow_run(schema_id: str | None = "llm_schema_1M_report_v1_0") -> FlowRun:
+
+def _build_flow_run(
+    schema_id: str | None = "llm_schema_1M_report_v1_0",
+    fallback_model_names: list[str] | None = None,
+) -> FlowRun:
     llm_profile = {
         "modelName": "gemini-2.0-flash",
         "responseMimeType": "application/json",
         "candidateCount": 1,
         "structuredOutput": {"schemaId": schema_id} if schema_id is not None else {},
     }
+    if fallback_model_names is not None:
+        llm_profile["fallbackModelNames"] = fallback_model_names
     raw = {
         "runId": "run-1",
         "status": "RUNNING",
@@ -316,5 +370,180 @@ class HandlerLoggingTests(unittest.TestCase):
         self.assertFalse(any(e["event"] == "structured_output_schema_invalid" for e in events))
 
 
+
+class PrefixSplitAssembler(FakeUserInputAssembler):
+    def assemble(self, *, base_user_prompt: str, resolved: ResolvedUserInput) -> UserInputPayload:
+        return UserInputPayload(text="shared|volatile", chart_images=(), shared_prefix_chars=7)
+
+
+class ContextCachePrefixTests(unittest.TestCase):
+    def _run(self, llm_client, *, cache_shared_prefix: bool, cache_tracker=None):
+        logger = FakeEventLogger()
+        result = handle_cloud_event(
+            {"id": "evt-1", "type": "google.cloud.firestore.document.v1.updated", "subject": "documents/flow_runs/run-1"},
+            flow_repo=FakeFlowRunRepo(_build_flow_run()),
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=RecordingArtifactStore(),
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=llm_client,
+            user_input_assembler=PrefixSplitAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            cache_shared_prefix=cache_shared_prefix,
+            cache_tracker=cache_tracker,
+        )
+        return result, logger.events
+
+    def test_splits_shared_prefix_and_logs_cached_tokens(self) -> None:
+        client = RecordingLLMClient()
+        result, events = self._run(client, cache_shared_prefix=True)
+        self.assertEqual(result, "ok")
+        self.assertEqual(client.calls[0]["user_parts"], ["shared|", "volatile"])
+        self.assertEqual(client.calls[0]["cached_prefix_parts"], 1)
+        finished = [
+            e for e in events if e["event"] == "llm_request_finished" and e.get("status") == "succeeded"
+        ][0]
+        self.assertEqual(finished["llm"]["cachedContentTokenCount"], 8)
+        self.assertEqual(finished["llm"]["cachedContent"], "cachedContents/1")
+
+    def test_disabled_keeps_single_text_part(self) -> None:
+        client = RecordingLLMClient()
+        self._run(client, cache_shared_prefix=False)
+        self.assertEqual(client.calls[0]["user_parts"], ["shared|volatile"])
+        self.assertNotIn("cached_prefix_parts", client.calls[0])
+
+    def test_tracks_implicit_cache_stats_per_prompt(self) -> None:
+        tracker = PromptCacheTracker()
+        _result, events = self._run(FakeLLMClient(), cache_shared_prefix=False, cache_tracker=tracker)
+        stats_event = [e for e in events if e["event"] == "llm_prompt_cache_stats"][0]
+        self.assertEqual(stats_event["llm"]["promptId"], "llm_prompt_1M_report_v1_0")
+        self.assertEqual(stats_event["llm"]["implicitCache"]["requests"], 1)
+        self.assertEqual(tracker.get("llm_prompt_1M_report_v1_0").hits, 0)
+
+
+class ModelFallbackTests(unittest.TestCase):
+    def _run(self, llm_client, *, fallback_model_names, model_allowed=lambda _: True):
+        logger = FakeEventLogger()
+        store = RecordingArtifactStore()
+        repo = FakeFlowRunRepo(_build_flow_run(fallback_model_names=fallback_model_names))
+        result = handle_cloud_event(
+            {"id": "evt-1", "type": "google.cloud.firestore.document.v1.updated", "subject": "documents/flow_runs/run-1"},
+            flow_repo=repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=store,
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=llm_client,
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            model_allowed=model_allowed,
+            invocation_timeout_seconds=780,
+        )
+        return result, logger.events, store, repo
+
+    def test_rate_limited_falls_back_to_next_model(self) -> None:
+        client = ScriptedLLMClient({"gemini-2.0-flash": RateLimited("quota")})
+        result, events, store, _repo = self._run(
+            client, fallback_model_names=["gemini-2.0-flash-lite"]
+        )
+        self.assertEqual(result, "ok")
+        self.assertEqual(client.models, ["gemini-2.0-flash", "gemini-2.0-flash-lite"])
+        self.assertTrue(any(e["event"] == "llm_model_fallback" for e in events))
+        report = json.loads(next(iter(store.writes.values())))
+        self.assertEqual(report["metadata"]["llm"]["modelName"], "gemini-2.0-flash-lite")
+        report_uri, digest_uri = list(store.writes)
+        self.assertEqual(digest_uri, report_uri.replace(".json", ".digest.json"))
+        digest = json.loads(store.writes[digest_uri])
+        self.assertEqual(digest["output"], {"summary": {"markdown": "ok"}, "details": {}})
+        self.assertEqual(digest["report"]["bytes"], len(store.writes[report_uri]))
+        self.assertNotIn("llmProfile", digest["metadata"]["llm"])
+        # Steps triggered by the finalize must find the digest.
+        names = [e["event"] for e in events]
+        self.assertLess(names.index("report_digest_written"), names.index("cloud_event_finished"))
+        self.assertEqual(
+            report["metadata"]["llm"]["fallbackPath"],
+            [
+                {"modelName": "gemini-2.0-flash", "errorCode": "RATE_LIMITED"},
+                {"modelName": "gemini-2.0-flash-lite"},
+            ],
+        )
+
+    def test_server_error_skips_disallowed_fallback(self) -> None:
+        client = ScriptedLLMClient(
+            {"gemini-2.0-flash": RequestFailed("unavailable", status_code=503)}
+        )
+        result, _events, store, _repo = self._run(
+            client,
+            fallback_model_names=["gemini-exp", "gemini-2.5-flash"],
+            model_allowed=lambda name: name != "gemini-exp",
+        )
+        self.assertEqual(result, "ok")
+        self.assertEqual(client.models, ["gemini-2.0-flash", "gemini-2.5-flash"])
+        report = json.loads(next(iter(store.writes.values())))
+        self.assertEqual(report["metadata"]["llm"]["modelName"], "gemini-2.5-flash")
+
+    def test_client_error_does_not_fall_back(self) -> None:
+        client = ScriptedLLMClient(
+            {"gemini-2.0-flash": RequestFailed("bad request", status_code=400)}
+        )
+        result, _events, store, repo = self._run(
+            client, fallback_model_names=["gemini-2.0-flash-lite"]
+        )
+        self.assertEqual(result, "failed")
+        self.assertEqual(client.models, ["gemini-2.0-flash"])
+        self.assertEqual(store.writes, {})
+        self.assertEqual(repo.finalized[0]["error"].code.value, "GEMINI_REQUEST_FAILED")
+
+    def test_exhausted_chain_reports_last_failure(self) -> None:
+        client = ScriptedLLMClient(
+            {
+                "gemini-2.0-flash": RequestFailed("unavailable", status_code=500),
+                "gemini-2.0-flash-lite": RateLimited("quota"),
+            }
+        )
+        result, _events, _store, repo = self._run(
+            client, fallback_model_names=["gemini-2.0-flash-lite"]
+        )
+        self.assertEqual(result, "failed")
+        self.assertEqual(repo.finalized[0]["error"].code.value, "RATE_LIMITED")
+
+
+class ReportContentEncodingTests(unittest.TestCase):
+    class EncodingArtifactStore(RecordingArtifactStore):
+        def __init__(self) -> None:
+            super().__init__()
+            self.encodings: dict[str, str | None] = {}
+
+        def write_bytes_create_only(
+            self, uri: GcsUri, data: bytes, *, content_type: str, content_encoding=None
+        ) -> WriteResult:
+            self.encodings[str(uri)] = content_encoding
+            return super().write_bytes_create_only(uri, data, content_type=content_type)
+
+    def test_only_the_report_is_written_with_the_encoding(self) -> None:
+        store = self.EncodingArtifactStore()
+        result = handle_cloud_event(
+            {"id": "evt-1", "type": "google.cloud.firestore.document.v1.updated", "subject": "documents/flow_runs/run-1"},
+            flow_repo=FakeFlowRunRepo(_build_flow_run()),
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=FakeEventLogger(),
+            flow_runs_collection="flow_runs",
+            artifact_store=store,
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=FakeLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            report_content_encoding="gzip",
+        )
+        self.assertEqual(result, "ok")
+        report_uri, digest_uri = list(store.writes)
+        self.assertEqual(store.encodings, {report_uri: "gzip", digest_uri: None})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,173 @@
+import json
+import unittest
+from unittest import mock
+
+from worker_llm_client.app.services import LLMPrompt
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.reporting.indicators import IndicatorCache, compute_indicators
+from worker_llm_client.reporting.ohlcv import ohlcv_frame_from_json
+from worker_llm_client.reporting import services
+from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.workflow.domain import LLMReportStep
+
+from tests.test_ohlcv import _flow_run
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+
+class RecordingLogger:
+    def __init__(self) -> None:
+        self.events = []
+
+    def log(self, **payload) -> None:
+        self.events.append(payload)
+
+
+def _rows(count: int) -> list[dict]:
+    return [
+        {
+            "timestamp": 1700000000000 + i * 60000,
+            "open": 100.0 + i,
+            "high": 101.0 + i + (3.0 if i % 10 == 5 else 0.0),
+            "low": 99.0 + i - (3.0 if i % 10 == 0 else 0.0),
+            "close": 100.5 + i,
+            "volume": 10.0 + i % 4,
+        }
+        for i in range(count)
+    ]
+
+
+class PromptDerivedIndicatorsTests(unittest.TestCase):
+    def _raw(self, **extra) -> dict:
+        return {"schemaVersion": 1, "systemInstruction": "s", "userPrompt": "u", **extra}
+
+    def test_defaults_to_none_and_dedupes(self) -> None:
+        self.assertEqual(LLMPrompt.from_raw(self._raw(), prompt_id="p").derived_indicators, ())
+        prompt = LLMPrompt.from_raw(self._raw(derivedIndicators=["rsi", "atr", "rsi"]), prompt_id="p")
+        self.assertEqual(prompt.derived_indicators, ("rsi", "atr"))
+
+    def test_rejects_unknown_indicator(self) -> None:
+        with self.assertRaises(ValueError):
+            LLMPrompt.from_raw(self._raw(derivedIndicators=["macd"]), prompt_id="p")
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class ComputeIndicatorsTests(unittest.TestCase):
+    def test_matches_reference_values(self) -> None:
+        frame = ohlcv_frame_from_json({"data": _rows(60)})
+        result = compute_indicators(frame, ["sma", "ema", "rsi", "atr", "bollinger"])
+
+        close = np.array([row["close"] for row in _rows(60)])
+        self.assertEqual(result["candles"], 60)
+        self.assertAlmostEqual(result["sma"]["sma20"], close[-20:].mean(), places=3)
+        ema = close[0]
+        for value in close[1:]:
+            ema = value * (2 / 13) + ema * (11 / 13)
+        self.assertAlmostEqual(result["ema"]["ema12"], ema, places=3)
+        # Monotonically rising closes: no losses.
+        self.assertEqual(result["rsi"]["rsi14"], 100.0)
+        self.assertGreater(result["atr"]["atr14"], 0.0)
+        self.assertLess(result["bollinger"]["lower"], result["bollinger"]["upper"])
+
+    def test_swings_and_volume_profile(self) -> None:
+        frame = ohlcv_frame_from_json(_rows(40))
+        result = compute_indicators(frame, ["swings", "volume_profile"])
+
+        highs = [point["timestamp"] for point in result["swings"]["highs"]]
+        self.assertEqual(highs, [1700000000000 + i * 60000 for i in (15, 25, 35)])
+        self.assertEqual(len(result["volumeProfile"]["topLevels"]), 3)
+
+    def test_short_history_omits_long_lookbacks(self) -> None:
+        frame = ohlcv_frame_from_json(_rows(5))
+        result = compute_indicators(frame, ["sma", "rsi", "bollinger"])
+        self.assertEqual(result, {"candles": 5})
+
+    def test_cache_is_keyed_by_generation(self) -> None:
+        cache = IndicatorCache()
+        frame = ohlcv_frame_from_json(_rows(30))
+        _, hit = cache.get_or_compute(uri="gs://b/o.json", generation=1, frame=frame, names=["sma"])
+        self.assertFalse(hit)
+        _, hit = cache.get_or_compute(uri="gs://b/o.json", generation=1, frame=frame, names=["sma"])
+        self.assertTrue(hit)
+        _, hit = cache.get_or_compute(uri="gs://b/o.json", generation=2, frame=frame, names=["sma"])
+        self.assertFalse(hit)
+        _, hit = cache.get_or_compute(uri="gs://b/o.json", generation=None, frame=frame, names=["sma"])
+        self.assertFalse(hit)
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class DerivedIndicatorsAssemblerTests(unittest.TestCase):
+    def _resolve(self, ohlcv_payload, *, indicators, assembler=None, store=None, logger=None):
+        store = store or InMemoryArtifactStore()
+        ohlcv_uri = ArtifactUri.parse("gs://bucket/ohlcv.json")
+        if not store.exists(ohlcv_uri):
+            store.put(ohlcv_uri, json.dumps(ohlcv_payload).encode())
+        store.put(
+            ArtifactUri.parse("gs://bucket/charts_manifest.json"),
+            json.dumps({"items": [{"gcsUri": "gs://bucket/chart.png", "description": "MA"}]}).encode(),
+        )
+        store.put(ArtifactUri.parse("gs://bucket/chart.png"), b"png")
+        flow_run = _flow_run("gs://bucket/ohlcv.json")
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+        assembler = assembler or UserInputAssembler(artifact_store=store)
+        resolved = assembler.resolve(
+            flow_run=flow_run, step=step, inputs=inputs, event_logger=logger, indicators=indicators
+        )
+        return assembler, resolved
+
+    def test_block_follows_ohlcv(self) -> None:
+        logger = RecordingLogger()
+        assembler, resolved = self._resolve({"data": _rows(30)}, indicators=("sma",), logger=logger)
+        text = assembler.assemble(base_user_prompt="Analyze.", resolved=resolved).text
+
+        ohlcv_at = text.index("1M OHLCV Candles (JSON)")
+        derived_at = text.index("1M Derived Indicators (JSON)")
+        charts_at = text.index("Technical Charts (Images)")
+        self.assertLess(ohlcv_at, derived_at)
+        self.assertLess(derived_at, charts_at)
+        self.assertIn('"sma20":', text)
+        computed = [e for e in logger.events if e["event"] == "derived_indicators_computed"]
+        self.assertEqual(len(computed), 1)
+        self.assertFalse(computed[0]["cacheHit"])
+
+    def test_second_step_reuses_cached_indicators(self) -> None:
+        logger = RecordingLogger()
+        cache = IndicatorCache()
+        store = InMemoryArtifactStore()
+        first = UserInputAssembler(artifact_store=store, indicator_cache=cache)
+        second = UserInputAssembler(artifact_store=store, indicator_cache=cache)
+        self._resolve({"data": _rows(30)}, indicators=("sma",), assembler=first, store=store)
+        with mock.patch.object(services, "ohlcv_frame_from_json") as build_frame:
+            self._resolve(
+                {"data": _rows(30)},
+                indicators=("sma",),
+                assembler=second,
+                store=store,
+                logger=logger,
+            )
+        build_frame.assert_not_called()
+        computed = [e for e in logger.events if e["event"] == "derived_indicators_computed"]
+        self.assertTrue(computed[0]["cacheHit"])
+        self.assertEqual(computed[0]["candles"], 30)
+
+    def test_unusable_ohlcv_skips_block(self) -> None:
+        logger = RecordingLogger()
+        assembler, resolved = self._resolve({"data": "n/a"}, indicators=("rsi",), logger=logger)
+        text = assembler.assemble(base_user_prompt="Analyze.", resolved=resolved).text
+
+        self.assertIsNone(resolved.derived_indicators)
+        self.assertNotIn("Derived Indicators", text)
+        self.assertIn("derived_indicators_skipped", [e["event"] for e in logger.events])
+
+    def test_no_indicators_leaves_prompt_unchanged(self) -> None:
+        assembler, resolved = self._resolve({"data": _rows(30)}, indicators=())
+        self.assertIsNone(resolved.derived_indicators)
+
+
+if __name__ == "__main__":
+    unittest.main()
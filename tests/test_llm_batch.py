@@ -0,0 +1,423 @@
+import json
+import unittest
+
+from worker_llm_client.app.batch import (
+    LLMBatchPolicy,
+    build_batch_schema,
+    build_batch_user_parts,
+    estimate_tokens,
+    split_batch_output,
+)
+from worker_llm_client.app.commit import WriteRetryPolicy
+from worker_llm_client.app.handler import handle_cloud_event
+from worker_llm_client.app.llm_client import ProviderResponse, RateLimited
+from worker_llm_client.app.services import ClaimResult
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy
+from worker_llm_client.artifacts.services import ArtifactWriteFailed
+from worker_llm_client.reporting.services import UserInputPayload
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from worker_llm_client.workflow.domain import FlowRun, InvalidStepInputs
+from worker_llm_client.workflow.policies import ReadyStepSelector
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakeFlowRunRepo,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    RecordingArtifactStore,
+    _build_prompt,
+    _build_schema,
+)
+
+
+STEP_IDS = ["llm_report_1m_v1", "llm_report_1m_v2"]
+OK_OUTPUT = {"summary": {"markdown": "ok"}, "details": {}}
+
+
+def _batch_flow_run(*, second_model: str = "gemini-2.0-flash") -> FlowRun:
+    def llm_step(model_name: str) -> dict:
+        return {
+            "stepType": "LLM_REPORT",
+            "status": "READY",
+            "dependsOn": ["ohlcv_1m_v1", "charts_1m_v1"],
+            "timeframe": "1M",
+            "inputs": {
+                "llm": {
+                    "promptId": "llm_prompt_1M_report_v1_0",
+                    "llmProfile": {
+                        "modelName": model_name,
+                        "responseMimeType": "application/json",
+                        "candidateCount": 1,
+                        "structuredOutput": {"schemaId": "llm_schema_1M_report_v1_0"},
+                    },
+                },
+                "ohlcvStepId": "ohlcv_1m_v1",
+                "chartsManifestStepId": "charts_1m_v1",
+            },
+            "outputs": {},
+        }
+
+    raw = {
+        "runId": "run-1",
+        "status": "RUNNING",
+        "scope": {"symbol": "LINKUSDT"},
+        "steps": {
+            "ohlcv_1m_v1": {
+                "stepType": "OHLCV_EXPORT",
+                "status": "SUCCEEDED",
+                "dependsOn": [],
+                "outputs": {"gcs_uri": "gs://bucket/ohlcv.json"},
+            },
+            "charts_1m_v1": {
+                "stepType": "CHART_EXPORT",
+                "status": "SUCCEEDED",
+                "dependsOn": ["ohlcv_1m_v1"],
+                "outputs": {"gcs_uri": "gs://bucket/charts.json"},
+            },
+            STEP_IDS[0]: llm_step("gemini-2.0-flash"),
+            STEP_IDS[1]: llm_step(second_model),
+        },
+    }
+    return FlowRun.from_raw(raw, run_id="run-1")
+
+
+class ScriptedBatchClient:
+    def __init__(self, batch_text: str | None = None, batch_error: Exception | None = None) -> None:
+        self._batch_text = batch_text
+        self._batch_error = batch_error
+        self.calls: list[dict] = []
+
+    def generate(self, *, system, user_parts, profile, llm_schema=None, **_kwargs) -> ProviderResponse:
+        batched = "reports" in llm_schema.json_schema.get("properties", {})
+        self.calls.append({"batched": batched, "user_parts": list(user_parts)})
+        if batched and self._batch_error is not None:
+            raise self._batch_error
+        text = self._batch_text if batched else json.dumps(OK_OUTPUT)
+        return ProviderResponse(text=text, finish_reason="STOP", usage={"totalTokenCount": 9}, raw=None)
+
+
+class ConflictingFlowRunRepo(FakeFlowRunRepo):
+    """Loses the claim race for ``conflicts``."""
+
+    def __init__(self, flow_run: FlowRun, *, conflicts: set[str]) -> None:
+        super().__init__(flow_run)
+        self._conflicts = conflicts
+
+    def claim_step(self, run_id, step_id, started_at_rfc3339) -> ClaimResult:
+        if step_id in self._conflicts:
+            return ClaimResult(claimed=False, status="RUNNING", reason="precondition_failed")
+        return super().claim_step(run_id, step_id, started_at_rfc3339)
+
+
+class RecordingAssembler(FakeUserInputAssembler):
+    """Records, per resolved step, which steps were claimed at that point."""
+
+    def __init__(self, repo: FakeFlowRunRepo, *, failing: set[str] = frozenset()) -> None:
+        self._repo = repo
+        self._failing = failing
+        self.resolved: dict[str, list[str]] = {}
+
+    def resolve(self, *, flow_run, step, inputs, **kwargs):
+        step_id = step.step.step_id
+        self.resolved[step_id] = [claim["step_id"] for claim in self._repo.claims]
+        if step_id in self._failing:
+            raise InvalidStepInputs("ohlcv artifact missing")
+        return super().resolve(flow_run=flow_run, step=step, inputs=inputs, **kwargs)
+
+
+def _batch_text(outputs: dict[str, dict]) -> str:
+    return json.dumps({"reports": [{"stepId": step_id, **output} for step_id, output in outputs.items()]})
+
+
+class BatchHelperTests(unittest.TestCase):
+    def test_estimate_tokens_counts_text_and_images(self) -> None:
+        self.assertEqual(estimate_tokens("abcdefghi"), 3)
+        self.assertEqual(estimate_tokens("", images=2), 516)
+
+    def test_admit_respects_token_and_time_limits(self) -> None:
+        policy = LLMBatchPolicy(max_steps=4, max_input_tokens=100, step_seconds=60)
+        self.assertEqual(policy.admit([40, 40, 40], remaining_seconds=900, finalize_budget_seconds=120), 2)
+        self.assertEqual(policy.admit([10, 10, 10, 10, 10], remaining_seconds=900, finalize_budget_seconds=120), 4)
+        self.assertEqual(policy.admit([10, 10, 10], remaining_seconds=250, finalize_budget_seconds=120), 2)
+        self.assertEqual(policy.admit([500, 10], remaining_seconds=900, finalize_budget_seconds=120), 1)
+        self.assertFalse(LLMBatchPolicy().enabled)
+
+    def test_wrapper_schema_reuses_report_properties(self) -> None:
+        schema = _build_schema()
+        wrapper = build_batch_schema(schema, STEP_IDS)
+        item = wrapper.json_schema["properties"]["reports"]["items"]
+        self.assertEqual(item["properties"]["summary"], schema.json_schema["properties"]["summary"])
+        self.assertEqual(item["properties"]["stepId"]["enum"], STEP_IDS)
+        self.assertEqual(wrapper.json_schema["properties"]["reports"]["minItems"], 2)
+        self.assertEqual(len(wrapper.sha256), 64)
+
+    def test_split_keeps_steps_that_appear_exactly_once(self) -> None:
+        outputs = split_batch_output(_batch_text({sid: OK_OUTPUT for sid in STEP_IDS}), STEP_IDS)
+        self.assertEqual(outputs, {sid: OK_OUTPUT for sid in STEP_IDS})
+        partial = split_batch_output(_batch_text({STEP_IDS[0]: OK_OUTPUT}), STEP_IDS)
+        self.assertEqual(partial, {STEP_IDS[0]: OK_OUTPUT})
+        mixed = json.dumps(
+            {
+                "reports": [
+                    {"stepId": STEP_IDS[0], **OK_OUTPUT},
+                    {"stepId": STEP_IDS[0], **OK_OUTPUT},
+                    {"stepId": "unknown", **OK_OUTPUT},
+                    "not an entry",
+                    {"stepId": STEP_IDS[1], **OK_OUTPUT},
+                ]
+            }
+        )
+        self.assertEqual(split_batch_output(mixed, STEP_IDS), {STEP_IDS[1]: OK_OUTPUT})
+        self.assertIsNone(split_batch_output("not json", STEP_IDS))
+        self.assertIsNone(split_batch_output(json.dumps({"reports": {}}), STEP_IDS))
+
+    def test_user_parts_label_each_step(self) -> None:
+        parts = build_batch_user_parts(
+            [(sid, "1M", UserInputPayload(text=f"ctx {sid}", chart_images=())) for sid in STEP_IDS]
+        )
+        self.assertEqual(len(parts), 3)
+        self.assertIn(f"stepId: {STEP_IDS[1]}, timeframe: 1M", parts[2])
+
+    def test_selector_lists_all_executable_steps(self) -> None:
+        steps = ReadyStepSelector.executable_llm_steps(_batch_flow_run())
+        self.assertEqual([step.step.step_id for step in steps], STEP_IDS)
+
+
+class HandlerBatchTests(unittest.TestCase):
+    def _run(
+        self,
+        client,
+        *,
+        flow_run: FlowRun | None = None,
+        max_steps: int = 4,
+        repo: FakeFlowRunRepo | None = None,
+        assembler=None,
+        store: RecordingArtifactStore | None = None,
+        write_retry: WriteRetryPolicy | None = None,
+    ):
+        logger = FakeEventLogger()
+        store = store or RecordingArtifactStore()
+        repo = repo or FakeFlowRunRepo(flow_run or _batch_flow_run())
+        result = handle_cloud_event(
+            {"id": "evt-1", "type": "google.cloud.firestore.document.v1.updated", "subject": "documents/flow_runs/run-1"},
+            flow_repo=repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=store,
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=client,
+            user_input_assembler=assembler or FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            batch_policy=LLMBatchPolicy(max_steps=max_steps),
+            write_retry=write_retry,
+        )
+        return result, logger.events, store, repo
+
+    def _reports(self, store: RecordingArtifactStore) -> dict[str, dict]:
+        reports = {}
+        for uri, data in store.writes.items():
+            if not uri.endswith(".digest.json"):
+                report = json.loads(data)
+                reports[report["metadata"]["stepId"]] = report
+        return reports
+
+    def test_compatible_steps_share_one_request(self) -> None:
+        client = ScriptedBatchClient(_batch_text({sid: OK_OUTPUT for sid in STEP_IDS}))
+        result, events, store, repo = self._run(client)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [True])
+        self.assertEqual([claim["step_id"] for claim in repo.claims], STEP_IDS)
+        self.assertEqual(
+            sorted((item["step_id"], item["status"]) for item in repo.finalized),
+            [(sid, "SUCCEEDED") for sid in STEP_IDS],
+        )
+        reports = self._reports(store)
+        self.assertEqual(sorted(reports), STEP_IDS)
+        # The combined usage is recorded once, on the primary's report.
+        primary_llm = reports[STEP_IDS[0]]["metadata"]["llm"]
+        self.assertEqual(
+            primary_llm["batch"],
+            {"stepIds": STEP_IDS, "size": 2, "usageMetadata": {"totalTokenCount": 9}},
+        )
+        companion_llm = reports[STEP_IDS[1]]["metadata"]["llm"]
+        self.assertEqual(companion_llm["batch"], {"stepIds": STEP_IDS, "size": 2})
+        for llm in (primary_llm, companion_llm):
+            self.assertNotIn("usageMetadata", llm)
+        started = [e for e in events if e["event"] == "llm_batch_started"][0]
+        self.assertEqual(started["batch"]["stepIds"], STEP_IDS)
+
+    def _released(self, events: list[dict]) -> dict[str, str]:
+        return {
+            e["stepId"]: e["reason"]
+            for e in events
+            if e["event"] == "llm_batch_step_finished" and e["status"] == "released"
+        }
+
+    def test_partial_combined_response_releases_missing_steps(self) -> None:
+        client = ScriptedBatchClient(_batch_text({STEP_IDS[0]: OK_OUTPUT}))
+        result, events, store, repo = self._run(client)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [True])
+        self.assertEqual(sorted(self._reports(store)), [STEP_IDS[0]])
+        self.assertEqual([item["step_id"] for item in repo.finalized], [STEP_IDS[0]])
+        self.assertEqual(repo.released, [STEP_IDS[1]])
+        self.assertEqual(self._released(events), {STEP_IDS[1]: "batch_output_missing"})
+        finished = [e for e in events if e["event"] == "llm_batch_finished"][0]
+        self.assertEqual(finished["status"], "partial")
+        self.assertEqual(finished["batch"]["validStepIds"], [STEP_IDS[0]])
+
+    def test_entries_failing_validation_count_as_missing(self) -> None:
+        client = ScriptedBatchClient(
+            _batch_text({STEP_IDS[0]: OK_OUTPUT, STEP_IDS[1]: {"details": {}}})
+        )
+        result, events, _store, repo = self._run(client)
+
+        self.assertEqual(result, "ok")
+        [finished] = [e for e in events if e["event"] == "llm_batch_finished"]
+        self.assertEqual(finished["status"], "partial")
+        self.assertEqual(finished["severity"], "WARNING")
+        self.assertEqual(repo.released, [STEP_IDS[1]])
+
+    def test_primary_without_entry_leaves_the_usage_to_the_first_answered_step(self) -> None:
+        client = ScriptedBatchClient(_batch_text({STEP_IDS[1]: OK_OUTPUT}))
+        result, _events, store, _repo = self._run(client)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [True, False])
+        reports = self._reports(store)
+        self.assertNotIn("batch", reports[STEP_IDS[0]]["metadata"]["llm"])
+        self.assertEqual(
+            reports[STEP_IDS[1]]["metadata"]["llm"]["batch"]["usageMetadata"],
+            {"totalTokenCount": 9},
+        )
+
+    def test_companion_report_write_is_retried(self) -> None:
+        class FlakyCompanionStore(RecordingArtifactStore):
+            def __init__(self) -> None:
+                super().__init__()
+                self.failed = False
+
+            def write_bytes_create_only(self, uri, data, *, content_type):
+                if STEP_IDS[1] in str(uri) and not self.failed:
+                    self.failed = True
+                    raise ArtifactWriteFailed("GCS write failed", retryable=True)
+                return super().write_bytes_create_only(uri, data, content_type=content_type)
+
+        client = ScriptedBatchClient(_batch_text({sid: OK_OUTPUT for sid in STEP_IDS}))
+        result, events, store, repo = self._run(
+            client,
+            store=FlakyCompanionStore(),
+            write_retry=WriteRetryPolicy(base_backoff_seconds=0.001, reserve_seconds=0),
+        )
+
+        self.assertEqual(result, "ok")
+        self.assertTrue(store.failed)
+        self.assertEqual(sorted(self._reports(store)), STEP_IDS)
+        self.assertTrue(all(item["status"] == "SUCCEEDED" for item in repo.finalized))
+        [retry] = [e for e in events if e["event"] == "gcs_write_retry"]
+        self.assertEqual(retry["stepId"], STEP_IDS[1])
+
+    def test_invalid_combined_response_releases_companions(self) -> None:
+        client = ScriptedBatchClient("not json")
+        result, events, store, repo = self._run(client)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [True, False])
+        reports = self._reports(store)
+        self.assertEqual(sorted(reports), [STEP_IDS[0]])
+        self.assertNotIn("batch", reports[STEP_IDS[0]]["metadata"]["llm"])
+        self.assertEqual(repo.released, [STEP_IDS[1]])
+        finished = [e for e in events if e["event"] == "llm_batch_finished"][0]
+        self.assertEqual(finished["status"], "invalid")
+
+    def test_failed_combined_request_releases_companions(self) -> None:
+        client = ScriptedBatchClient(batch_error=RateLimited("quota"))
+        result, events, store, repo = self._run(client)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [True, False])
+        self.assertEqual(sorted(self._reports(store)), [STEP_IDS[0]])
+        self.assertEqual(
+            [(item["step_id"], item["status"]) for item in repo.finalized],
+            [(STEP_IDS[0], "SUCCEEDED")],
+        )
+        self.assertEqual(self._released(events), {STEP_IDS[1]: "not_answered"})
+
+    def test_unexpected_error_releases_claimed_companions(self) -> None:
+        class ExplodingAssembler(FakeUserInputAssembler):
+            def resolve(self, *, flow_run, step, inputs, **kwargs):
+                if step.step.step_id == STEP_IDS[1]:
+                    raise RuntimeError("boom")
+                return super().resolve(flow_run=flow_run, step=step, inputs=inputs, **kwargs)
+
+        repo = FakeFlowRunRepo(_batch_flow_run())
+        try:
+            self._run(ScriptedBatchClient(), repo=repo, assembler=ExplodingAssembler())
+        except RuntimeError:
+            pass
+
+        self.assertEqual([claim["step_id"] for claim in repo.claims], STEP_IDS)
+        self.assertEqual(repo.released, [STEP_IDS[1]])
+
+    def test_steps_with_other_model_are_not_batched(self) -> None:
+        client = ScriptedBatchClient()
+        result, events, _store, repo = self._run(
+            client, flow_run=_batch_flow_run(second_model="gemini-2.5-flash")
+        )
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [False])
+        self.assertEqual([claim["step_id"] for claim in repo.claims], [STEP_IDS[0]])
+        self.assertFalse(any(e["event"] == "llm_batch_started" for e in events))
+        [skipped] = [e for e in events if e["event"] == "llm_batch_candidate_skipped"]
+        self.assertEqual((skipped["candidate"], skipped["reason"]), (STEP_IDS[1], "llm_profile"))
+
+    def test_companions_are_resolved_only_after_their_claim(self) -> None:
+        repo = FakeFlowRunRepo(_batch_flow_run())
+        assembler = RecordingAssembler(repo)
+        client = ScriptedBatchClient(_batch_text({sid: OK_OUTPUT for sid in STEP_IDS}))
+        result, _events, _store, _repo = self._run(client, repo=repo, assembler=assembler)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(assembler.resolved[STEP_IDS[1]], STEP_IDS)
+
+    def test_claim_conflict_skips_the_companion_without_resolving_it(self) -> None:
+        repo = ConflictingFlowRunRepo(_batch_flow_run(), conflicts={STEP_IDS[1]})
+        assembler = RecordingAssembler(repo)
+        client = ScriptedBatchClient()
+        result, events, _store, _repo = self._run(client, repo=repo, assembler=assembler)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(list(assembler.resolved), [STEP_IDS[0]])
+        self.assertEqual([call["batched"] for call in client.calls], [False])
+        [skipped] = [e for e in events if e["event"] == "llm_batch_candidate_skipped"]
+        self.assertEqual(
+            (skipped["candidate"], skipped["reason"], skipped["message"]),
+            (STEP_IDS[1], "claim_conflict", "precondition_failed"),
+        )
+
+    def test_claimed_companion_with_invalid_inputs_is_failed(self) -> None:
+        repo = FakeFlowRunRepo(_batch_flow_run())
+        assembler = RecordingAssembler(repo, failing={STEP_IDS[1]})
+        client = ScriptedBatchClient()
+        result, _events, _store, _repo = self._run(client, repo=repo, assembler=assembler)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual([call["batched"] for call in client.calls], [False])
+        finalized = {item["step_id"]: item for item in repo.finalized}
+        self.assertEqual(finalized[STEP_IDS[0]]["status"], "SUCCEEDED")
+        self.assertEqual(finalized[STEP_IDS[1]]["status"], "FAILED")
+        self.assertEqual(finalized[STEP_IDS[1]]["error"].code.value, "INVALID_STEP_INPUTS")
+
+    def test_disabled_policy_keeps_single_step_path(self) -> None:
+        client = ScriptedBatchClient()
+        self._run(client, max_steps=1)
+        self.assertEqual([call["batched"] for call in client.calls], [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy, ArtifactUri
+from worker_llm_client.artifacts.services import ArtifactReadFailed, ArtifactTooLarge
+from worker_llm_client.infra.filesystem import FilesystemArtifactStore
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+
+
+class FilesystemArtifactStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.store = FilesystemArtifactStore()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _uri(self, name: str) -> ArtifactUri:
+        return ArtifactUri.parse(f"file://{self.root}/{name}")
+
+    def test_create_only_write_and_read(self) -> None:
+        uri = self._uri("run-1/1M/report.json")
+        first = self.store.write_bytes_create_only(uri, b'{"a":1}', content_type="application/json")
+        second = self.store.write_bytes_create_only(uri, b"other", content_type="application/json")
+
+        self.assertTrue(first.created)
+        self.assertTrue(second.reused)
+        self.assertEqual(self.store.read_bytes(uri), b'{"a":1}')
+        self.assertTrue(self.store.exists(uri))
+        self.assertEqual(sorted(p.name for p in (self.root / "run-1/1M").iterdir()), ["report.json"])
+
+    def test_read_limited_carries_file_metadata(self) -> None:
+        uri = self._uri("chart.png")
+        (self.root / "chart.png").write_bytes(b"\x89PNG-data")
+        read = self.store.read_bytes_limited(uri, 1024)
+        self.assertEqual(read.data, b"\x89PNG-data")
+        self.assertEqual(read.metadata, self.store.stat(uri))
+        self.assertEqual(read.metadata.content_type, "image/png")
+
+    def test_read_limited_rejects_from_stat(self) -> None:
+        uri = self._uri("big.json")
+        (self.root / "big.json").write_bytes(b"x" * 100)
+        with self.assertRaises(ArtifactTooLarge):
+            self.store.read_bytes_limited(uri, 10)
+        self.assertEqual(self.store.read_bytes_limited(uri, 100).data, b"x" * 100)
+
+    def test_rejects_other_schemes_and_missing_files(self) -> None:
+        with self.assertRaises(ArtifactReadFailed):
+            self.store.read_bytes(ArtifactUri.parse("gs://bucket/obj.json"))
+        with self.assertRaises(ArtifactReadFailed):
+            self.store.stat(self._uri("missing.json"))
+        with self.assertRaises(ArtifactReadFailed):
+            self.store.read_bytes_limited(self._uri("missing.json"), 10)
+
+
+class InMemoryArtifactStoreTests(unittest.TestCase):
+    def test_read_many_overlaps_injected_latency(self) -> None:
+        store = InMemoryArtifactStore(read_latency_seconds=0.05, read_concurrency=8)
+        uris = [ArtifactUri.parse(f"mem://bench/chart_{i}.png") for i in range(8)]
+        for uri in uris:
+            store.put(uri, b"png")
+
+        started = time.monotonic()
+        results = store.read_many(uris, 1024)
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([result.uri for result in results], uris)
+        self.assertLess(elapsed, 0.3)
+
+    def test_create_only_semantics(self) -> None:
+        store = InMemoryArtifactStore()
+        uri = ArtifactUri.parse("mem://bench/report.json")
+        self.assertTrue(store.write_bytes_create_only(uri, b"a", content_type="application/json").created)
+        self.assertTrue(store.write_bytes_create_only(uri, b"b", content_type="application/json").reused)
+        self.assertEqual(store.read_bytes(uri), b"a")
+
+
+class ArtifactUriTests(unittest.TestCase):
+    def test_parse_file_and_mem_uris(self) -> None:
+        file_uri = ArtifactUri.parse("file:///data/artifacts/run-1/report.json")
+        self.assertEqual((file_uri.scheme, file_uri.bucket), ("file", ""))
+        self.assertEqual(str(file_uri), "file:///data/artifacts/run-1/report.json")
+        self.assertEqual(ArtifactUri.parse("mem://ns/obj").scheme, "mem")
+
+    def test_path_policy_for_file_location(self) -> None:
+        policy = ArtifactPathPolicy(bucket="file:///data/artifacts", prefix="reports")
+        uri = policy.report_uri("run-1", "1M", "llm_report_1M_v1")
+        self.assertEqual(policy.scheme, "file")
+        self.assertEqual(str(uri), "file:///data/artifacts/reports/run-1/1M/llm_report_1M_v1.json")
+
+
+if __name__ == "__main__":
+    unittest.main()
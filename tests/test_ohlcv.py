@@ -0,0 +1,385 @@
+import io
+import json
+import unittest
+
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.reporting.ohlcv import (
+    OhlcvFrame,
+    _validate_columns,
+    binary_ohlcv_format,
+    downsample_ohlcv,
+    ohlcv_coverage,
+    ohlcv_coverage_from_json,
+    ohlcv_since,
+    load_ohlcv_frame,
+    render_ohlcv_json,
+)
+from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.workflow.domain import FlowRun, InvalidStepInputs, LLMReportStep
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc as pa_ipc  # type: ignore
+    import pyarrow.parquet as pa_parquet  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+
+
+def _flow_run(ohlcv_uri: str, extra_inputs: dict | None = None) -> FlowRun:
+    return FlowRun.from_raw(
+        {
+            "runId": "run-1",
+            "status": "RUNNING",
+            "scope": {"symbol": "BTCUSDT"},
+            "steps": {
+                "ohlcv": {
+                    "stepType": "OHLCV_EXPORT",
+                    "status": "SUCCEEDED",
+                    "dependsOn": [],
+                    "inputs": {},
+                    "outputs": {"gcs_uri": ohlcv_uri},
+                },
+                "charts": {
+                    "stepType": "CHART_EXPORT",
+                    "status": "SUCCEEDED",
+                    "dependsOn": [],
+                    "inputs": {},
+                    "outputs": {"gcs_uri": "gs://bucket/charts_manifest.json"},
+                },
+                "llm": {
+                    "stepType": "LLM_REPORT",
+                    "status": "READY",
+                    "dependsOn": [],
+                    "timeframe": "1M",
+                    "inputs": {
+                        "llm": {
+                            "promptId": "llm_prompt_1M_report_v1_0",
+                            "llmProfile": {
+                                "responseMimeType": "application/json",
+                                "candidateCount": 1,
+                                "structuredOutput": {"schemaId": "llm_schema_1M_report_v1_0"},
+                            },
+                        },
+                        "ohlcvStepId": "ohlcv",
+                        "chartsManifestStepId": "charts",
+                        **(extra_inputs or {}),
+                    },
+                    "outputs": {},
+                },
+            },
+        }
+    )
+
+
+def _candles(count: int) -> dict:
+    return {
+        "timestamp": np.arange(count, dtype=np.int64) * 60000 + 1700000000000,
+        "open": np.linspace(100.0, 110.0, count),
+        "high": np.linspace(101.0, 111.0, count),
+        "low": np.linspace(99.0, 109.0, count),
+        "close": np.linspace(100.5, 110.5, count),
+        "volume": np.full(count, 12.5),
+    }
+
+
+def _npz_bytes(columns: dict) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, **columns)
+    return buffer.getvalue()
+
+
+def _arrow_table(columns: dict):
+    return pa.table({name: pa.array(values) for name, values in columns.items()})
+
+
+def _parquet_bytes(columns: dict) -> bytes:
+    buffer = io.BytesIO()
+    pa_parquet.write_table(_arrow_table(columns), buffer)
+    return buffer.getvalue()
+
+
+def _arrow_bytes(columns: dict) -> bytes:
+    table = _arrow_table(columns)
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class BinaryOhlcvFormatTests(unittest.TestCase):
+    def test_detects_by_extension_then_content_type(self) -> None:
+        self.assertEqual(binary_ohlcv_format("gs://b/ohlcv.npz"), "npz")
+        self.assertEqual(binary_ohlcv_format("gs://b/ohlcv.parquet"), "parquet")
+        self.assertEqual(binary_ohlcv_format("gs://b/ohlcv.feather"), "arrow")
+        self.assertEqual(binary_ohlcv_format("gs://b/ohlcv", "application/vnd.apache.parquet"), "parquet")
+        self.assertIsNone(binary_ohlcv_format("gs://b/ohlcv.json", "application/json"))
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class DownsampleOhlcvTests(unittest.TestCase):
+    def test_merges_older_candles_with_ohlc_semantics(self) -> None:
+        frame = OhlcvFrame(columns=_candles(10))
+        sampled, policy = downsample_ohlcv(frame, max_candles=5, recent_candles=2)
+
+        # 8 older candles into 3 slots: buckets of 3 anchored at the recent
+        # boundary, so the oldest bucket is partial ([0:2], [2:5], [5:8]).
+        self.assertEqual(policy.to_dict(), {
+            "method": "ohlc_buckets",
+            "sourceCandles": 10,
+            "outputCandles": 5,
+            "recentCandles": 2,
+            "bucketSize": 3,
+        })
+        columns = frame.columns
+        self.assertEqual(sampled.columns["timestamp"].tolist(), columns["timestamp"][[0, 2, 5, 8, 9]].tolist())
+        self.assertEqual(sampled.columns["open"][1], columns["open"][2])
+        self.assertEqual(sampled.columns["close"][1], columns["close"][4])
+        self.assertEqual(sampled.columns["high"][1], columns["high"][2:5].max())
+        self.assertEqual(sampled.columns["low"][1], columns["low"][2:5].min())
+        self.assertEqual(sampled.columns["volume"][0], 25.0)
+        self.assertEqual(sampled.columns["close"][-2:].tolist(), columns["close"][-2:].tolist())
+
+    def test_short_frames_are_untouched(self) -> None:
+        frame = OhlcvFrame(columns=_candles(4))
+        sampled, policy = downsample_ohlcv(frame, max_candles=4, recent_candles=2)
+        self.assertIs(sampled, frame)
+        self.assertIsNone(policy)
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class IncrementalOhlcvTests(unittest.TestCase):
+    def test_since_keeps_newer_candles_and_rejects_gaps(self) -> None:
+        frame = OhlcvFrame(columns=_candles(5))
+        last = int(frame.columns["timestamp"][2])
+
+        newer = ohlcv_since(frame, last)
+        self.assertEqual(newer.columns["timestamp"].tolist(), frame.columns["timestamp"][3:].tolist())
+        self.assertEqual(len(ohlcv_since(frame, int(frame.columns["timestamp"][-1]))), 0)
+        # A base that ends before this window starts would leave a gap.
+        self.assertIsNone(ohlcv_since(frame, last - 10**9))
+        self.assertIsNone(ohlcv_since(frame, "2024-01-01"))
+        self.assertEqual(ohlcv_coverage(frame).to_dict()["lastTimestamp"], 1700000240000)
+
+    def test_json_coverage_reads_first_and_last_rows(self) -> None:
+        rows = [{"timestamp": "2024-01-01"}, {}, {"timestamp": "2024-01-03"}]
+        coverage = ohlcv_coverage_from_json({"data": rows})
+        self.assertEqual(
+            coverage.to_dict(),
+            {"candles": 3, "firstTimestamp": "2024-01-01", "lastTimestamp": "2024-01-03"},
+        )
+        self.assertIsNone(ohlcv_coverage_from_json({"data": []}))
+        self.assertIsNone(ohlcv_coverage_from_json([{"timestamp": True}]))
+
+
+class BinaryOhlcvAssemblerTests(unittest.TestCase):
+    def _resolve(
+        self,
+        ohlcv_uri: str,
+        data: bytes,
+        *,
+        max_json_bytes: int = 65536,
+        content_type=None,
+        ohlcv_max_candles=None,
+        extra_inputs=None,
+        objects=None,
+    ):
+        store = InMemoryArtifactStore()
+        for uri, payload in (objects or {}).items():
+            store.put(ArtifactUri.parse(uri), payload)
+        store.put(ArtifactUri.parse(ohlcv_uri), data, content_type=content_type)
+        store.put(
+            ArtifactUri.parse("gs://bucket/charts_manifest.json"),
+            json.dumps({"items": [{"gcsUri": "gs://bucket/chart.png", "description": "MA"}]}).encode(),
+        )
+        store.put(ArtifactUri.parse("gs://bucket/chart.png"), b"png")
+        flow_run = _flow_run(ohlcv_uri, extra_inputs)
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+        assembler = UserInputAssembler(
+            artifact_store=store,
+            max_json_bytes=max_json_bytes,
+            ohlcv_max_candles=ohlcv_max_candles,
+            ohlcv_recent_candles=10,
+        )
+        return assembler, assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
+
+    def test_npz_renders_like_canonical_json(self) -> None:
+        columns = _candles(3)
+        _assembler, resolved = self._resolve("gs://bucket/ohlcv.npz", _npz_bytes(columns))
+
+        expected_rows = [
+            {name: values[i].item() for name, values in columns.items()} for i in range(3)
+        ]
+        expected = json.dumps(expected_rows, sort_keys=True, separators=(",", ":"))
+        self.assertEqual(resolved.ohlcv.payload, expected)
+        self.assertEqual(len(resolved.ohlcv_frame), 3)
+
+    def test_content_type_detection_and_nan_as_null(self) -> None:
+        columns = _candles(2)
+        columns["volume"] = np.array([1.0, np.nan])
+        assembler, resolved = self._resolve(
+            "gs://bucket/ohlcv", _npz_bytes(columns), content_type="application/x-npz"
+        )
+        self.assertIn('"volume":null', resolved.ohlcv.payload)
+        payload = assembler.assemble(base_user_prompt="Analyze.", resolved=resolved)
+        self.assertIn('"close":100.5', payload.text)
+
+    def test_columnar_without_extension_gets_the_binary_cap(self) -> None:
+        # Array headers make a 2-candle npz larger than its rendered JSON.
+        data = _npz_bytes(_candles(2))
+        _assembler, resolved = self._resolve(
+            "gs://bucket/ohlcv", data, content_type="application/x-npz", max_json_bytes=1024
+        )
+        self.assertGreater(len(data), 1024)
+        self.assertEqual(len(json.loads(resolved.ohlcv.payload)), 2)
+
+        with self.assertRaises(InvalidStepInputs):
+            self._resolve("gs://bucket/ohlcv", b"[" + b" " * 2000 + b"]", max_json_bytes=1024)
+
+    def test_string_timestamps_are_json_escaped(self) -> None:
+        columns = _candles(2)
+        columns["timestamp"] = np.array(['2024-01-01 "open"', "2024-01-02\\\n"])
+        rows = json.loads(render_ohlcv_json(OhlcvFrame(columns=columns)))
+        self.assertEqual(rows[0]["timestamp"], '2024-01-01 "open"')
+        self.assertEqual(rows[1]["timestamp"], "2024-01-02\\\n")
+
+    def test_limit_applies_to_rendered_output(self) -> None:
+        data = _npz_bytes(_candles(2000))
+        with self.assertRaises(InvalidStepInputs):
+            # The raw npz is well under the cap; the rendered JSON is not.
+            self._resolve("gs://bucket/ohlcv.npz", data, max_json_bytes=len(data) * 2)
+
+    def test_downsampling_fits_candle_count_and_byte_budget(self) -> None:
+        data = _npz_bytes(_candles(2000))
+        assembler, resolved = self._resolve("gs://bucket/ohlcv.npz", data, ohlcv_max_candles=100)
+        # 1990 older candles in buckets of 23 -> 87 rows, plus 10 recent.
+        self.assertEqual(len(json.loads(resolved.ohlcv.payload)), 97)
+        self.assertEqual(len(resolved.ohlcv_frame), 2000)
+        text = assembler.assemble(base_user_prompt="Analyze.", resolved=resolved).text
+        self.assertIn("1M OHLCV Candles (JSON; last 10 at full resolution, older merged 23:1)", text)
+
+        _assembler, resolved = self._resolve(
+            "gs://bucket/ohlcv.npz", data, max_json_bytes=4096, ohlcv_max_candles=100
+        )
+        self.assertLessEqual(len(resolved.ohlcv.payload.encode()), 4096)
+        self.assertLess(resolved.ohlcv_downsampling.output_candles, 100)
+
+    def test_downsampling_accepts_json_beyond_context_limit(self) -> None:
+        columns = _candles(500)
+        rows = [{name: values[i].item() for name, values in columns.items()} for i in range(500)]
+        raw = json.dumps({"metadata": {}, "data": rows}).encode()
+        _assembler, resolved = self._resolve(
+            "gs://bucket/ohlcv.json", raw, max_json_bytes=len(raw) // 2, ohlcv_max_candles=50
+        )
+        self.assertEqual(resolved.ohlcv_downsampling.source_candles, 500)
+        self.assertLessEqual(len(json.loads(resolved.ohlcv.payload)), 50)
+
+        raw = json.dumps({"metadata": {}, "data": rows[:100]}).encode()
+        _assembler, resolved = self._resolve("gs://bucket/ohlcv.json", raw, ohlcv_max_candles=100)
+        self.assertIsNone(resolved.ohlcv_downsampling)
+        self.assertIsNotNone(resolved.ohlcv.data)
+        self.assertIn("metadata", json.loads(resolved.ohlcv.payload))
+
+    def _incremental(self, base_report: dict, *, max_json_bytes: int = 65536):
+        columns = _candles(300)
+        rows = [{name: values[i].item() for name, values in columns.items()} for i in range(300)]
+        return self._resolve(
+            "gs://bucket/ohlcv.json",
+            json.dumps({"data": rows}).encode(),
+            max_json_bytes=max_json_bytes,
+            extra_inputs={
+                "ohlcvMode": "incremental",
+                "previousReports": [{"gcs_uri": "gs://bucket/prev.json"}],
+            },
+            objects={"gs://bucket/prev.json": json.dumps(base_report).encode()},
+        )
+
+    def test_incremental_mode_sends_only_new_candles(self) -> None:
+        base = {
+            "metadata": {"inputs": {"ohlcv_coverage": {"candles": 295, "lastTimestamp": 1700017640000}}},
+            "output": {"summary": {"markdown": "up"}},
+        }
+        # The full history would not fit the context limit; the delta does.
+        assembler, resolved = self._incremental(base, max_json_bytes=4096)
+
+        self.assertEqual(len(json.loads(resolved.ohlcv.payload)), 5)
+        self.assertEqual(resolved.ohlcv_increment.to_dict()["newCandles"], 5)
+        self.assertEqual(resolved.ohlcv_coverage.candles, 300)
+        self.assertEqual(len(resolved.ohlcv_frame), 300)
+        self.assertIsNone(resolved.previous_reports[0].artifact.data)
+        text = assembler.assemble(base_user_prompt="Analyze.", resolved=resolved).text
+        self.assertIn("OHLCV Candles since the previous report (JSON; 5 new after 1700017640000)", text)
+        self.assertIn("update the first previous report", text)
+
+    def test_incremental_mode_falls_back_without_base_coverage(self) -> None:
+        _assembler, resolved = self._incremental({"output": {"summary": {"markdown": "up"}}})
+        self.assertIsNone(resolved.ohlcv_increment)
+        self.assertEqual(len(json.loads(resolved.ohlcv.payload)["data"]), 300)
+        self.assertIsNone(resolved.ohlcv_frame)
+        self.assertEqual(resolved.ohlcv_coverage.to_dict()["lastTimestamp"], 1700017940000)
+
+    def test_incremental_mode_without_a_cut_keeps_the_artifact_shape(self) -> None:
+        # The base ends before this window starts: not contiguous, no cut.
+        base = {"metadata": {"inputs": {"ohlcv_coverage": {"candles": 5, "lastTimestamp": 1}}}}
+        _assembler, resolved = self._incremental(base)
+        self.assertIsNone(resolved.ohlcv_increment)
+        self.assertEqual(len(json.loads(resolved.ohlcv.payload)["data"]), 300)
+
+    def test_missing_columns_rejected(self) -> None:
+        columns = _candles(2)
+        del columns["close"]
+        with self.assertRaises(InvalidStepInputs):
+            self._resolve("gs://bucket/ohlcv.npz", _npz_bytes(columns))
+
+    def test_object_string_timestamps_are_accepted(self) -> None:
+        columns = _candles(2)
+        columns["timestamp"] = np.array(["2024-01-01", "2024-01-02"], dtype=object)
+        frame = _validate_columns(columns)
+        self.assertEqual(frame.columns["timestamp"].dtype.kind, "U")
+
+        columns["timestamp"] = np.array(["2024-01-01", None], dtype=object)
+        with self.assertRaises(InvalidStepInputs):
+            _validate_columns(columns)
+        columns = _candles(2)
+        columns["close"] = np.array(["1", "2"], dtype=object)
+        with self.assertRaises(InvalidStepInputs):
+            _validate_columns(columns)
+
+
+@unittest.skipUnless(pa is not None, "pyarrow not installed")
+class ArrowOhlcvTests(unittest.TestCase):
+    def _columns(self) -> dict:
+        columns = {name: values.tolist() for name, values in _candles(3).items()}
+        columns["timestamp"] = ["2024-01-01T00:00:00Z", "2024-01-01T00:01:00Z", '2024 "x"']
+        return columns
+
+    def _assert_renders(self, data: bytes, fmt: str) -> None:
+        columns = self._columns()
+        frame = load_ohlcv_frame(data, fmt)
+        expected_rows = [{name: values[i] for name, values in columns.items()} for i in range(3)]
+        self.assertEqual(json.loads(render_ohlcv_json(frame)), expected_rows)
+
+    def test_parquet_with_string_timestamps(self) -> None:
+        self._assert_renders(_parquet_bytes(self._columns()), "parquet")
+
+    def test_arrow_with_string_timestamps(self) -> None:
+        self._assert_renders(_arrow_bytes(self._columns()), "arrow")
+
+    def test_numeric_parquet_and_null_timestamps(self) -> None:
+        columns = {name: values.tolist() for name, values in _candles(2).items()}
+        frame = load_ohlcv_frame(_parquet_bytes(columns), "parquet")
+        self.assertEqual(frame.columns["timestamp"].dtype.kind, "i")
+
+        columns["timestamp"] = ["2024-01-01", None]
+        with self.assertRaises(InvalidStepInputs):
+            load_ohlcv_frame(_arrow_bytes(columns), "arrow")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,306 @@
+import copy
+import json
+import threading
+import time
+import unittest
+
+from worker_llm_client.app.handler import handle_cloud_event
+from worker_llm_client.app.services import ClaimResult
+from worker_llm_client.app.prefetch import (
+    CachingPromptRepository,
+    ClaimPrelude,
+    PrefetchPolicy,
+    StepPrefetcher,
+    plan_prefetch,
+)
+from worker_llm_client.artifacts.cache import CachingArtifactStore
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy, ArtifactUri
+from worker_llm_client.artifacts.services import ArtifactTooLarge
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from worker_llm_client.workflow.domain import FlowRun
+from worker_llm_client.workflow.policies import ReadyStepSelector
+from tests.test_deferred_execution import CLOUD_EVENT, STEP_ID, _deferred_flow_run
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakeFlowRunRepo,
+    FakeLLMClient,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    _build_prompt,
+    _build_schema,
+)
+
+
+WEEKLY_STEP_ID = "llm_report_1w_v1"
+OHLCV_URI = "gs://bucket/ohlcv.json"
+MANIFEST_URI = "gs://bucket/charts.json"
+CHART_URI = "gs://bucket/charts/1d.png"
+
+
+def _waiting_flow_run(*, charts_status: str = "SUCCEEDED") -> FlowRun:
+    """The 1D report waits on the weekly report (and optionally on charts)."""
+    raw = copy.deepcopy(dict(_deferred_flow_run(execution_mode="online").raw))
+    raw["steps"]["charts_1d_v1"]["status"] = charts_status
+    raw["steps"][WEEKLY_STEP_ID] = {
+        "stepType": "LLM_REPORT",
+        "status": "RUNNING",
+        "dependsOn": ["ohlcv_1d_v1"],
+        "outputs": {},
+    }
+    step = raw["steps"][STEP_ID]
+    step["dependsOn"].append(WEEKLY_STEP_ID)
+    step["inputs"]["previousReports"] = [{"gcs_uri": "gs://bucket/prev/1w.json"}]
+    return FlowRun.from_raw(raw, run_id="run-1")
+
+
+def _seeded_store(**kwargs) -> InMemoryArtifactStore:
+    store = InMemoryArtifactStore(**kwargs)
+    store.put(ArtifactUri.parse(OHLCV_URI), b'[{"t": 1}]')
+    manifest = {"items": [{"gcs_uri": CHART_URI, "description": "1D"}]}
+    store.put(ArtifactUri.parse(MANIFEST_URI), json.dumps(manifest).encode())
+    store.put(ArtifactUri.parse(CHART_URI), b"\x89PNG")
+    store.put(ArtifactUri.parse("gs://bucket/prev/1w.digest.json"), b"{}")
+    return store
+
+
+class CountingPromptRepo(FakePromptRepo):
+    def __init__(self, prompt, *, gate: threading.Event | None = None) -> None:
+        super().__init__(prompt)
+        self.calls = 0
+        self.started = threading.Event()
+        self._gate = gate
+
+    def get(self, prompt_id):
+        self.calls += 1
+        self.started.set()
+        if self._gate is not None:
+            self._gate.wait(5)
+        return super().get(prompt_id)
+
+
+class LostClaimFlowRunRepo(FakeFlowRunRepo):
+    def claim_step(self, run_id, step_id, started_at_rfc3339):
+        super().claim_step(run_id, step_id, started_at_rfc3339)
+        return ClaimResult(claimed=False, status="RUNNING", reason="not_ready")
+
+
+def _wait_finished(logger: FakeEventLogger) -> dict:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        finished = [e for e in logger.events if e["event"] == "prefetch_finished"]
+        if finished:
+            return finished[-1]
+        time.sleep(0.005)
+    raise AssertionError("prefetch did not finish")
+
+
+class CachingArtifactStoreTests(unittest.TestCase):
+    def test_reads_are_cached_and_bounded_by_bytes(self) -> None:
+        cache = CachingArtifactStore(_seeded_store(), max_bytes=20)
+        ohlcv = ArtifactUri.parse(OHLCV_URI)
+        cache.read_bytes_limited(ohlcv, 1024)
+        self.assertIn(OHLCV_URI, cache)
+        with self.assertRaises(ArtifactTooLarge):
+            cache.read_bytes_limited(ohlcv, 4)
+
+        # The manifest (> 20 bytes) is not kept; the PNG evicts nothing.
+        cache.read_many([ArtifactUri.parse(MANIFEST_URI), ArtifactUri.parse(CHART_URI)], 1024)
+        self.assertNotIn(MANIFEST_URI, cache)
+        self.assertIn(CHART_URI, cache)
+        stats = cache.stats()
+        self.assertEqual((stats.entries, stats.hits, stats.misses), (2, 1, 3))
+
+    def test_concurrent_reads_of_one_object_are_coalesced(self) -> None:
+        store = _seeded_store(read_latency_seconds=0.05)
+        reads = []
+        original = store.read_bytes_limited
+
+        def counting_read(uri, max_bytes):
+            reads.append(str(uri))
+            return original(uri, max_bytes)
+
+        store.read_bytes_limited = counting_read
+        cache = CachingArtifactStore(store, max_bytes=1024)
+        uri = ArtifactUri.parse(OHLCV_URI)
+        threads = [
+            threading.Thread(target=cache.read_bytes_limited, args=(uri, 1024)) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertEqual(reads, [OHLCV_URI])
+        self.assertEqual(cache.stats().coalesced, 2)
+
+
+class PrefetchPlanTests(unittest.TestCase):
+    def test_only_steps_blocked_on_one_dependency_are_planned(self) -> None:
+        flow_run = _waiting_flow_run()
+        pick = ReadyStepSelector.pick(flow_run)
+        self.assertEqual(pick.reason, "dependency_not_succeeded")
+        [plan] = plan_prefetch(flow_run, pick.blocked)
+        self.assertEqual(plan.waiting_on, WEEKLY_STEP_ID)
+        self.assertEqual(plan.prompt_id, "llm_prompt_1D_report_v1_0")
+        self.assertEqual(plan.schema_id, "llm_schema_1M_report_v1_0")
+        self.assertEqual((plan.ohlcv_uri, plan.manifest_uri), (OHLCV_URI, MANIFEST_URI))
+        self.assertEqual(plan.previous_report_uris, ("gs://bucket/prev/1w.json",))
+
+        flow_run = _waiting_flow_run(charts_status="RUNNING")
+        self.assertEqual(plan_prefetch(flow_run, ReadyStepSelector.pick(flow_run).blocked), [])
+
+    def test_prompt_cache_expires(self) -> None:
+        now = [0.0]
+        repo = CountingPromptRepo(_build_prompt())
+        cached = CachingPromptRepository(repo, ttl_seconds=10, clock=lambda: now[0])
+        cached.get("p")
+        cached.get("p")
+        self.assertEqual(repo.calls, 1)
+        now[0] = 10.0
+        cached.get("p")
+        self.assertEqual(repo.calls, 2)
+
+
+class StepPrefetcherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.logger = FakeEventLogger()
+
+    def _prefetcher(self, store, prompt_repo, **policy) -> StepPrefetcher:
+        prefetcher = StepPrefetcher(
+            artifact_store=store,
+            prompt_repo=prompt_repo,
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=self.logger,
+            policy=PrefetchPolicy(**policy),
+        )
+        self.addCleanup(prefetcher.shutdown)
+        return prefetcher
+
+    def test_blocked_step_warms_the_caches(self) -> None:
+        cache = CachingArtifactStore(_seeded_store(), max_bytes=1024 * 1024)
+        prompt_repo = CountingPromptRepo(_build_prompt())
+        result = handle_cloud_event(
+            CLOUD_EVENT,
+            flow_repo=FakeFlowRunRepo(_waiting_flow_run()),
+            prompt_repo=prompt_repo,
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=self.logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=cache,
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            prefetcher=self._prefetcher(cache, prompt_repo),
+        )
+        self.assertEqual(result, "noop")
+
+        finished = _wait_finished(self.logger)
+        self.assertEqual(
+            (finished["status"], finished["fetched"], finished["failed"]), ("ok", 6, 0)
+        )
+        for uri in (OHLCV_URI, MANIFEST_URI, CHART_URI, "gs://bucket/prev/1w.digest.json"):
+            self.assertIn(uri, cache)
+        self.assertEqual(prompt_repo.calls, 1)
+        scheduled = [e for e in self.logger.events if e["event"] == "prefetch_scheduled"]
+        self.assertEqual(scheduled[0]["waitingOn"], WEEKLY_STEP_ID)
+
+    def test_cancel_and_timeout_stop_between_reads(self) -> None:
+        release = threading.Event()
+        prompt_repo = CountingPromptRepo(_build_prompt(), gate=release)
+        cache = CachingArtifactStore(_seeded_store(), max_bytes=1024)
+        prefetcher = self._prefetcher(cache, prompt_repo)
+        flow_run = _waiting_flow_run()
+        blocked = ReadyStepSelector.pick(flow_run).blocked
+
+        self.assertEqual(prefetcher.schedule(flow_run, blocked), 1)
+        self.assertEqual(prefetcher.schedule(flow_run, blocked), 0)  # already pending
+        prompt_repo.started.wait(5)
+        self.assertEqual(prefetcher.cancel("run-1"), 1)
+        release.set()
+        self.assertEqual(_wait_finished(self.logger)["status"], "cancelled")
+        self.assertNotIn(OHLCV_URI, cache)
+
+        self.logger.events.clear()
+        slow = self._prefetcher(
+            CachingArtifactStore(_seeded_store(read_latency_seconds=0.05), max_bytes=1024),
+            CountingPromptRepo(_build_prompt()),
+            timeout_seconds=0.02,
+        )
+        slow.schedule(flow_run, blocked)
+        self.assertEqual(_wait_finished(self.logger)["status"], "timeout")
+
+
+class ClaimPreludeTests(unittest.TestCase):
+    def _handle(self, flow_repo, prompt_repo, cache, prelude) -> str:
+        return handle_cloud_event(
+            CLOUD_EVENT,
+            flow_repo=flow_repo,
+            prompt_repo=prompt_repo,
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=FakeEventLogger(),
+            flow_runs_collection="flow_runs",
+            artifact_store=cache,
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=FakeLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            claim_prelude=prelude,
+        )
+
+    def test_claimed_step_uses_the_speculative_loads(self) -> None:
+        cache = CachingArtifactStore(_seeded_store(), max_bytes=1024 * 1024)
+        prompt_repo = CountingPromptRepo(_build_prompt())
+        prelude = ClaimPrelude(artifact_store=cache)
+        flow_repo = FakeFlowRunRepo(_deferred_flow_run(execution_mode="online"))
+
+        result = self._handle(flow_repo, prompt_repo, cache, prelude)
+        prelude.shutdown()
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(prompt_repo.calls, 1)
+        self.assertEqual(len(flow_repo.claims), 1)
+        for uri in (OHLCV_URI, MANIFEST_URI, CHART_URI):
+            self.assertIn(uri, cache)
+
+    def test_lost_claim_discards_pending_loads(self) -> None:
+        release = threading.Event()
+        cache = CachingArtifactStore(_seeded_store(), max_bytes=1024 * 1024)
+        prompt_repo = CountingPromptRepo(_build_prompt(), gate=release)
+        # One worker: the prompt load holds it, schema and artifacts queue up.
+        prelude = ClaimPrelude(artifact_store=cache, max_workers=1)
+        self.addCleanup(prelude.shutdown)
+        flow_repo = LostClaimFlowRunRepo(_deferred_flow_run(execution_mode="online"))
+
+        result = self._handle(flow_repo, prompt_repo, cache, prelude)
+        release.set()
+        prelude.shutdown()
+
+        self.assertEqual(result, "noop")
+        self.assertEqual(flow_repo.finalized, [])
+        self.assertNotIn(OHLCV_URI, cache)
+        self.assertEqual(cache.stats().misses, 0)
+
+    def test_step_failed_after_the_claim_discards_pending_loads(self) -> None:
+        release = threading.Event()
+        cache = CachingArtifactStore(_seeded_store(), max_bytes=1024 * 1024)
+        prompt_repo = CountingPromptRepo(_build_prompt(), gate=release)
+        prelude = ClaimPrelude(artifact_store=cache, max_workers=1)
+        self.addCleanup(prelude.shutdown)
+        # The plan ignores the invalid execution mode; parse_inputs rejects it.
+        flow_repo = FakeFlowRunRepo(_deferred_flow_run(execution_mode="sometime"))
+
+        result = self._handle(flow_repo, prompt_repo, cache, prelude)
+        release.set()
+        # Drain the single worker (shutdown would cancel the queued loads itself).
+        prelude._pool.submit(lambda: None).result(timeout=5)
+        prelude.shutdown()
+
+        self.assertEqual(result, "failed")
+        self.assertEqual([item["status"] for item in flow_repo.finalized], ["FAILED"])
+        self.assertNotIn(OHLCV_URI, cache)
+        self.assertEqual(cache.stats().misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
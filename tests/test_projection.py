@@ -0,0 +1,159 @@
+import json
+import unittest
+
+from worker_llm_client.app.services import LLMPrompt
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.reporting.projection import ContextProjection, parse_context_projections
+from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.workflow.domain import FlowRun, InvalidStepInputs, LLMReportStep
+
+
+REPORT = {
+    "metadata": {"runId": "run-0", "llm": {"usageMetadata": {"promptTokenCount": 1200}}},
+    "output": {
+        "summary": {"markdown": "Trend is up. " * 40},
+        "details": {"levels": [1, 2, 3, 4, 5], "notes": "x" * 5000},
+    },
+}
+
+
+def _flow_run() -> FlowRun:
+    return FlowRun.from_raw(
+        {
+            "runId": "run-1",
+            "status": "RUNNING",
+            "scope": {"symbol": "BTCUSDT"},
+            "steps": {
+                "ohlcv": {
+                    "stepType": "OHLCV_EXPORT",
+                    "status": "SUCCEEDED",
+                    "dependsOn": [],
+                    "inputs": {},
+                    "outputs": {"gcs_uri": "gs://bucket/ohlcv.json"},
+                },
+                "charts": {
+                    "stepType": "CHART_EXPORT",
+                    "status": "SUCCEEDED",
+                    "dependsOn": [],
+                    "inputs": {},
+                    "outputs": {"gcs_uri": "gs://bucket/charts_manifest.json"},
+                },
+                "llm": {
+                    "stepType": "LLM_REPORT",
+                    "status": "READY",
+                    "dependsOn": [],
+                    "timeframe": "1M",
+                    "inputs": {
+                        "llm": {
+                            "promptId": "llm_prompt_1M_report_v1_0",
+                            "llmProfile": {
+                                "responseMimeType": "application/json",
+                                "candidateCount": 1,
+                                "structuredOutput": {"schemaId": "llm_schema_1M_report_v1_0"},
+                            },
+                        },
+                        "ohlcvStepId": "ohlcv",
+                        "chartsManifestStepId": "charts",
+                        "previousReports": [{"gcs_uri": "gs://bucket/report.json"}],
+                    },
+                    "outputs": {},
+                },
+            },
+        }
+    )
+
+
+class ContextProjectionTests(unittest.TestCase):
+    def test_include_keeps_only_listed_pointers(self) -> None:
+        projection = ContextProjection(include=("/output/summary/markdown", "/metadata/runId"))
+        markdown = REPORT["output"]["summary"]["markdown"]
+        self.assertEqual(
+            projection.apply(REPORT),
+            {"metadata": {"runId": "run-0"}, "output": {"summary": {"markdown": markdown}}},
+        )
+
+    def test_exclude_windows_and_truncation(self) -> None:
+        projection = ContextProjection(
+            exclude=("/metadata",),
+            array_windows=(("/output/details/levels", 2),),
+            max_string_chars=10,
+        )
+        projected = projection.apply(REPORT)
+
+        self.assertNotIn("metadata", projected)
+        self.assertEqual(projected["output"]["details"]["levels"], [4, 5])
+        self.assertEqual(projected["output"]["details"]["notes"], "x" * 10 + "…[truncated]")
+        # The source document is left untouched.
+        self.assertEqual(len(REPORT["output"]["details"]["levels"]), 5)
+
+    def test_wildcard_and_escaped_segments(self) -> None:
+        value = {"items": [{"a/b": 1, "c": 2}, {"a/b": 3, "c": 4}]}
+        projection = ContextProjection(include=("/items/*/a~1b",))
+        self.assertEqual(projection.apply(value), {"items": [{"a/b": 1}, {"a/b": 3}]})
+
+    def test_parse_rejects_invalid_specs(self) -> None:
+        self.assertEqual(parse_context_projections(None), {})
+        for raw in (
+            {"charts_manifest": {}},
+            {"previous_report": {"include": ["output"]}},
+            {"previous_report": {"arrayWindows": {"/a": 0}}},
+            {"previous_report": {"maxStringChars": "10"}},
+            {"previous_report": {"unknown": []}},
+        ):
+            with self.assertRaises(ValueError, msg=raw):
+                parse_context_projections(raw)
+
+    def test_prompt_document_field(self) -> None:
+        prompt = LLMPrompt.from_raw(
+            {
+                "schemaVersion": 1,
+                "systemInstruction": "s",
+                "userPrompt": "u",
+                "contextProjections": {"previous_report": {"include": ["/output/summary"]}},
+            },
+            prompt_id="p",
+        )
+        self.assertEqual(
+            prompt.context_projections["previous_report"].include, ("/output/summary",)
+        )
+
+
+class ProjectionAssemblerTests(unittest.TestCase):
+    def _resolve(self, projections, *, max_json_bytes: int):
+        store = InMemoryArtifactStore()
+        store.put(ArtifactUri.parse("gs://bucket/ohlcv.json"), json.dumps({"data": []}).encode())
+        store.put(
+            ArtifactUri.parse("gs://bucket/charts_manifest.json"),
+            json.dumps({"items": [{"gcsUri": "gs://bucket/chart.png", "description": "MA"}]}).encode(),
+        )
+        store.put(ArtifactUri.parse("gs://bucket/chart.png"), b"png")
+        store.put(ArtifactUri.parse("gs://bucket/report.json"), json.dumps(REPORT).encode())
+        flow_run = _flow_run()
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+        assembler = UserInputAssembler(artifact_store=store, max_json_bytes=max_json_bytes)
+        return assembler.resolve(
+            flow_run=flow_run, step=step, inputs=inputs, projections=projections
+        )
+
+    def test_limit_applies_to_projected_payload(self) -> None:
+        with self.assertRaises(InvalidStepInputs):
+            self._resolve(None, max_json_bytes=2048)
+
+        projection = ContextProjection(include=("/output/summary/markdown",))
+        resolved = self._resolve({"previous_report": projection}, max_json_bytes=2048)
+
+        report = resolved.previous_reports[0].artifact
+        markdown = REPORT["output"]["summary"]["markdown"]
+        self.assertEqual(json.loads(report.payload), {"output": {"summary": {"markdown": markdown}}})
+        self.assertGreater(report.bytes_len, 2048)
+
+    def test_projected_payload_still_bounded(self) -> None:
+        projection = ContextProjection(exclude=("/metadata",))
+        with self.assertRaises(InvalidStepInputs):
+            self._resolve({"previous_report": projection}, max_json_bytes=2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
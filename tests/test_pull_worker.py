@@ -0,0 +1,180 @@
+import copy
+import json
+import threading
+import time
+import unittest
+
+from worker_llm_client.app.handler import FlowRunEventHandler
+from worker_llm_client.app.llm_client import ProviderResponse
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy
+from worker_llm_client.infra.memory import FailedPrecondition, InMemoryFlowRunRepository
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from worker_llm_client.worker import PullWorker, PullWorkerPolicy
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    RecordingArtifactStore,
+    _build_prompt,
+    _build_schema,
+)
+from tests.test_llm_batch import STEP_IDS, _batch_flow_run
+
+
+OK_TEXT = json.dumps({"summary": {"markdown": "ok"}, "details": {}})
+
+
+def _raw_run(run_id: str) -> dict:
+    raw = copy.deepcopy(dict(_batch_flow_run().raw))
+    raw["runId"] = run_id
+    return raw
+
+
+class SlowLLMClient:
+    def __init__(self, delay: float = 0.0) -> None:
+        self._delay = delay
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    def generate(self, **_kwargs) -> ProviderResponse:
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self._delay)
+        with self._lock:
+            self.active -= 1
+        return ProviderResponse(text=OK_TEXT, finish_reason="STOP", usage=None, raw=None)
+
+
+class PullWorkerTests(unittest.TestCase):
+    def _worker(self, repo, client, *, concurrency: int = 2) -> tuple[PullWorker, FakeEventLogger]:
+        logger = FakeEventLogger()
+        handler = FlowRunEventHandler(
+            flow_repo=repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=RecordingArtifactStore(),
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=client,
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+        )
+        worker = PullWorker(
+            scanner=repo,
+            handler=handler,
+            flow_runs_collection="flow_runs",
+            event_logger=logger,
+            policy=PullWorkerPolicy(concurrency=concurrency, poll_interval_seconds=0.01),
+        )
+        return worker, logger
+
+    def _statuses(self, repo: InMemoryFlowRunRepository, run_id: str) -> list[str]:
+        steps = repo.raw(run_id)["steps"]
+        return [steps[step_id]["status"] for step_id in STEP_IDS]
+
+    def test_drains_every_ready_step_with_bounded_concurrency(self) -> None:
+        repo = InMemoryFlowRunRepository()
+        run_ids = [f"run-{index}" for index in range(4)]
+        for run_id in run_ids:
+            repo.put(run_id, _raw_run(run_id))
+        client = SlowLLMClient(delay=0.02)
+        worker, _logger = self._worker(repo, client, concurrency=2)
+
+        processed = worker.run(until_idle=True)
+
+        self.assertEqual(processed, 8)
+        self.assertEqual(client.calls, 8)
+        self.assertLessEqual(client.max_active, 2)
+        for run_id in run_ids:
+            self.assertEqual(self._statuses(repo, run_id), ["SUCCEEDED", "SUCCEEDED"])
+        self.assertEqual(repo.ready_run_ids(limit=10), [])
+
+    def test_stop_lets_in_flight_tasks_finish(self) -> None:
+        repo = InMemoryFlowRunRepository()
+        repo.put("run-1", _raw_run("run-1"))
+        client = SlowLLMClient(delay=0.1)
+        worker, logger = self._worker(repo, client, concurrency=1)
+
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        while client.calls == 0:
+            time.sleep(0.005)
+        worker.stop()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        # The in-flight step finished; the second one was never dispatched.
+        self.assertEqual(self._statuses(repo, "run-1"), ["SUCCEEDED", "READY"])
+        self.assertEqual(logger.events[-1]["event"], "pull_worker_stopped")
+
+    def test_failing_task_is_logged_and_cooled_down(self) -> None:
+        repo = InMemoryFlowRunRepository()
+        repo.put("run-1", _raw_run("run-1"))
+
+        class ExplodingHandler:
+            calls = 0
+
+            def handle(self, cloud_event):
+                ExplodingHandler.calls += 1
+                raise RuntimeError("boom")
+
+        logger = FakeEventLogger()
+        worker = PullWorker(
+            scanner=repo,
+            handler=ExplodingHandler(),
+            flow_runs_collection="flow_runs",
+            event_logger=logger,
+            policy=PullWorkerPolicy(concurrency=1, poll_interval_seconds=60),
+        )
+        worker.run(until_idle=True)
+
+        self.assertEqual(ExplodingHandler.calls, 1)
+        failed = [e for e in logger.events if e["event"] == "pull_worker_task_failed"]
+        self.assertEqual(failed[0]["runId"], "run-1")
+
+
+class InMemoryFlowRunRepositoryTests(unittest.TestCase):
+    def test_claim_finalize_and_precondition(self) -> None:
+        repo = InMemoryFlowRunRepository()
+        repo.put("run-1", _raw_run("run-1"))
+        record = repo.get("run-1")
+
+        self.assertTrue(repo.claim_step("run-1", STEP_IDS[0], "2026-01-01T00:00:00Z").claimed)
+        self.assertEqual(repo.claim_step("run-1", STEP_IDS[0], "2026-01-01T00:00:00Z").reason, "not_ready")
+        with self.assertRaises(FailedPrecondition):
+            repo.patch("run-1", {"status": "FAILED"}, precondition_update_time=record.update_time)
+
+        result = repo.finalize_step(
+            "run-1", STEP_IDS[0], "SUCCEEDED", "2026-01-01T00:01:00Z", outputs_gcs_uri="gs://b/r.json"
+        )
+        self.assertTrue(result.updated)
+        step = repo.raw("run-1")["steps"][STEP_IDS[0]]
+        self.assertEqual(step["outputs"]["gcs_uri"], "gs://b/r.json")
+        self.assertEqual(step["outputs"]["execution"]["timing"]["startedAt"], "2026-01-01T00:00:00Z")
+        self.assertNotIn("error", step)
+        self.assertEqual(
+            repo.finalize_step("run-1", STEP_IDS[0], "FAILED", "2026-01-01T00:02:00Z").reason,
+            "already_final",
+        )
+
+    def test_release_returns_claimed_step_to_ready(self) -> None:
+        repo = InMemoryFlowRunRepository()
+        repo.put("run-1", _raw_run("run-1"))
+        self.assertEqual(repo.release_step("run-1", STEP_IDS[0]).reason, "not_running")
+
+        repo.claim_step("run-1", STEP_IDS[0], "2026-01-01T00:00:00Z")
+        self.assertTrue(repo.release_step("run-1", STEP_IDS[0]).updated)
+        step = repo.raw("run-1")["steps"][STEP_IDS[0]]
+        self.assertEqual(step["status"], "READY")
+        self.assertNotIn("startedAt", step["outputs"]["execution"]["timing"])
+        self.assertEqual(repo.ready_run_ids(limit=10), ["run-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
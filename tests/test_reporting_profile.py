@@ -40,6 +40,20 @@ class LLMProfileTests(unittest.TestCase):
         with self.assertRaises(LLMProfileInvalid):
             profile.validate_for_mvp()
 
+    def test_profile_fallback_model_chain(self) -> None:
+        raw = {
+            "modelName": "gemini-2.5-flash",
+            "fallbackModelNames": ["gemini-2.5-flash-lite", "gemini-2.5-flash"],
+        }
+        profile = LLMProfile.from_raw(raw)
+        self.assertEqual(profile.model_chain(), ("gemini-2.5-flash", "gemini-2.5-flash-lite"))
+        fallback = profile.with_model_name("gemini-2.5-flash-lite")
+        self.assertEqual(fallback.to_provider_request()["model"], "gemini-2.5-flash-lite")
+
+    def test_profile_fallback_models_invalid(self) -> None:
+        with self.assertRaises(LLMProfileInvalid):
+            LLMProfile.from_raw({"modelName": "gemini-2.5-flash", "fallbackModelNames": "x"})
+
 
 class StructuredOutputSpecTests(unittest.TestCase):
     def test_schema_version(self) -> None:
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone
+import threading
+import time
+import unittest
+
+from worker_llm_client.app.handler import FlowRunEventHandler
+from worker_llm_client.app.run_gate import RunGate
+from worker_llm_client.app.services import FlowRunRecord
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy
+from worker_llm_client.infra.cloudevents import parse_timestamp, snapshot_time
+from worker_llm_client.infra.memory import InMemoryFlowRunRepository
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    RecordingArtifactStore,
+    _build_prompt,
+    _build_schema,
+)
+from tests.test_pull_worker import SlowLLMClient, _raw_run
+from tests.test_watch_mode import _waiting_run
+
+
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _rfc3339(seconds: float) -> str:
+    return (BASE_TIME + timedelta(seconds=seconds)).isoformat().replace("+00:00", "Z")
+
+
+def _event(seconds: float | None = None) -> dict:
+    event = {
+        "id": "evt-1",
+        "type": "google.cloud.firestore.document.v1.updated",
+        "subject": "documents/flow_runs/run-1",
+    }
+    if seconds is not None:
+        event["time"] = _rfc3339(seconds)
+    return event
+
+
+class TimedRepository(InMemoryFlowRunRepository):
+    """Reports ``update_time`` as a timestamp (version N -> BASE_TIME + N s)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gets = 0
+
+    def get(self, run_id):
+        self.gets += 1
+        record = super().get(run_id)
+        if record is None:
+            return None
+        return FlowRunRecord(
+            flow_run=record.flow_run,
+            update_time=BASE_TIME + timedelta(seconds=record.update_time),
+        )
+
+
+class RunGateTests(unittest.TestCase):
+    def test_idle_snapshot_covers_older_events_until_it_expires(self) -> None:
+        now = [0.0]
+        gate = RunGate(idle_ttl_seconds=10, clock=lambda: now[0])
+        gate.mark_idle("run-1", BASE_TIME + timedelta(seconds=5))
+
+        self.assertTrue(gate.covers("run-1", BASE_TIME + timedelta(seconds=5)))
+        self.assertTrue(gate.covers("run-1", BASE_TIME))
+        self.assertFalse(gate.covers("run-1", BASE_TIME + timedelta(seconds=6)))
+        self.assertFalse(gate.covers("run-1", None))
+        self.assertFalse(gate.covers("run-2", BASE_TIME))
+        self.assertTrue(gate.is_idle_snapshot("run-1", BASE_TIME + timedelta(seconds=5)))
+
+        now[0] = 10.0
+        self.assertFalse(gate.covers("run-1", BASE_TIME))
+        self.assertEqual(len(gate), 0)
+
+    def test_cache_is_bounded(self) -> None:
+        gate = RunGate(max_entries=2)
+        for index in range(3):
+            gate.mark_idle(f"run-{index}", "t1")
+        self.assertEqual(len(gate), 2)
+        self.assertFalse(gate.is_idle_snapshot("run-0", "t1"))
+        self.assertTrue(gate.is_idle_snapshot("run-2", "t1"))
+
+    def test_snapshot_time_prefers_payload_update_time(self) -> None:
+        event = {
+            "time": "2026-01-01T00:00:09Z",
+            "data": {"value": {"updateTime": "2026-01-01T00:00:03.123456789Z"}},
+        }
+        self.assertEqual(
+            snapshot_time(event), BASE_TIME + timedelta(seconds=3, microseconds=123456)
+        )
+        self.assertEqual(snapshot_time(_event(4)), BASE_TIME + timedelta(seconds=4))
+        self.assertIsNone(snapshot_time(_event()))
+        self.assertIsNone(parse_timestamp("t1"))
+
+
+class GatedHandlerTests(unittest.TestCase):
+    def _handler(self, repo, *, gate: RunGate, client=None) -> tuple[FlowRunEventHandler, FakeEventLogger]:
+        logger = FakeEventLogger()
+        handler = FlowRunEventHandler(
+            flow_repo=repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=RecordingArtifactStore(),
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=client or SlowLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            run_gate=gate,
+        )
+        return handler, logger
+
+    def test_redundant_events_skip_the_read(self) -> None:
+        repo = TimedRepository()
+        repo.put("run-1", _waiting_run("run-1"))  # version 1
+        handler, logger = self._handler(repo, gate=RunGate())
+
+        self.assertEqual(handler.handle(_event(1)), "noop")
+        self.assertEqual(repo.gets, 1)
+        # Same write (or older) again: answered from the negative cache.
+        self.assertEqual(handler.handle(_event(1)), "noop")
+        self.assertEqual(handler.handle(_event(0.5)), "noop")
+        self.assertEqual(repo.gets, 1)
+        # Newer event time but the document did not change.
+        self.assertEqual(handler.handle(_event(2)), "noop")
+        self.assertEqual(repo.gets, 2)
+        reasons = [e["reason"] for e in logger.events if e["event"] == "cloud_event_noop"]
+        self.assertEqual(
+            reasons[1:],
+            ["known_idle_snapshot", "known_idle_snapshot", "unchanged_snapshot"],
+        )
+
+    def test_newer_write_is_handled(self) -> None:
+        repo = TimedRepository()
+        repo.put("run-1", _waiting_run("run-1"))
+        handler, _logger = self._handler(repo, gate=RunGate())
+        handler.handle(_event(1))
+
+        repo.put("run-1", _raw_run("run-1"))  # version 2, READY steps again
+        self.assertEqual(handler.handle(_event(2)), "ok")
+
+    def test_gate_is_released_after_the_claim(self) -> None:
+        repo = TimedRepository()
+        repo.put("run-1", _raw_run("run-1"))
+        client = SlowLLMClient(delay=0.2)
+        handler, _logger = self._handler(repo, gate=RunGate(), client=client)
+
+        threads = [threading.Thread(target=handler.handle, args=(_event(),)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Each event claimed its own READY step; the LLM calls overlapped.
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(client.max_active, 2)
+
+    def test_waiting_for_the_gate_counts_against_the_budget(self) -> None:
+        repo = TimedRepository()
+        repo.put("run-1", _raw_run("run-1"))
+        gate = RunGate()
+        logger = FakeEventLogger()
+        handler = FlowRunEventHandler(
+            flow_repo=repo,
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=RecordingArtifactStore(),
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=SlowLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+            run_gate=gate,
+            invocation_timeout_seconds=2,
+            finalize_budget_seconds=1,
+        )
+        results = []
+        with gate.hold("run-1"):
+            thread = threading.Thread(target=lambda: results.append(handler.handle(_event())))
+            thread.start()
+            time.sleep(1.05)  # leaves less than the finalize budget
+        thread.join(timeout=5)
+
+        self.assertEqual(results, ["failed"])
+        [exceeded] = [e for e in logger.events if e["event"] == "time_budget_exceeded"]
+        self.assertEqual(exceeded["action"], "claim")
+
+
+if __name__ == "__main__":
+    unittest.main()
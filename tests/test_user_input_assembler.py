@@ -1,10 +1,24 @@
+from dataclasses import replace
 import json
 import unittest
 
 from worker_llm_client.artifacts.domain import GcsUri
-from worker_llm_client.artifacts.services import ArtifactStore
-from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactNotFound,
+    ArtifactStore,
+    ArtifactTooLarge,
+    BulkReadResult,
+    LimitedRead,
+    read_many_parallel,
+)
+from worker_llm_client.reporting.services import (
+    UserInputAssembler,
+    _drain_canonical_json,
+    _normalize_json,
+)
 from worker_llm_client.workflow.domain import FlowRun, InvalidStepInputs, LLMReportStep
+from tests.test_handler_logging import FakeEventLogger
 
 
 class FakeArtifactStore(ArtifactStore):
@@ -14,9 +28,18 @@ class FakeArtifactStore(ArtifactStore):
     def read_bytes(self, uri: GcsUri) -> bytes:
         key = str(uri)
         if key not in self._payloads:
-            raise InvalidStepInputs(f"missing artifact: {key}")
+            raise ArtifactNotFound(f"missing artifact: {key}")
         return self._payloads[key]
 
+    def read_bytes_limited(self, uri: GcsUri, max_bytes: int) -> LimitedRead:
+        data = self.read_bytes(uri)
+        if len(data) > max_bytes:
+            raise ArtifactTooLarge("too large", size=len(data), max_bytes=max_bytes)
+        return LimitedRead(data=data, metadata=ArtifactMetadata(uri=uri, size=len(data), generation=1))
+
+    def read_many(self, uris, max_bytes: int) -> list[BulkReadResult]:
+        return read_many_parallel(self.read_bytes_limited, uris, max_bytes, max_workers=1)
+
     def exists(self, uri: GcsUri) -> bool:
         return str(uri) in self._payloads
 
@@ -24,6 +47,20 @@ class FakeArtifactStore(ArtifactStore):
         raise NotImplementedError
 
 
+class MetadataOnlyArtifactStore(FakeArtifactStore):
+    def __init__(self, payloads: dict[str, bytes], metadata: dict[str, ArtifactMetadata]) -> None:
+        super().__init__(payloads)
+        self._metadata = metadata
+        self.reads: list[str] = []
+
+    def read_bytes(self, uri: GcsUri) -> bytes:
+        self.reads.append(str(uri))
+        return super().read_bytes(uri)
+
+    def stat(self, uri: GcsUri) -> ArtifactMetadata:
+        return self._metadata[str(uri)]
+
+
 def _flow_run_base() -> dict:
     return {
         "runId": "run-1",
@@ -123,6 +160,47 @@ class UserInputAssemblerTests(unittest.TestCase):
         self.assertIn("prev_report.json", payload.text)
         self.assertIn("<task>", payload.text)
         self.assertEqual(len(payload.chart_images), 1)
+        self.assertEqual(resolved.ohlcv.generation, 1)
+        self.assertEqual(resolved.chart_images[0].generation, 1)
+        prefix = payload.text[: payload.shared_prefix_chars]
+        self.assertTrue(prefix.startswith("Analyze market."))
+        self.assertIn("Price MA", prefix)
+        self.assertNotIn("prev_report.json", prefix)
+
+    def test_prefix_stable_layout_orders_shared_blocks_first(self) -> None:
+        flow_run = self._build_flow_run()
+        raw_step = flow_run.get_step("llm")
+        step = LLMReportStep.from_flow_step(raw_step)
+        inputs = step.parse_inputs(flow_run=flow_run)
+        payloads = {
+            "gs://bucket/ohlcv.json": b'{"rows": [1]}',
+            "gs://bucket/charts_manifest.json": json.dumps(
+                {"items": [{"gcsUri": "gs://bucket/chart1.png", "description": "Price MA"}]}
+            ).encode("utf-8"),
+            "gs://bucket/prev_report.json": b'{"summary": {"markdown": "ok"}, "details": {}}',
+            "gs://bucket/chart1.png": b"png-data",
+        }
+        assembler = UserInputAssembler(
+            artifact_store=FakeArtifactStore(payloads), layout="prefix_stable"
+        )
+        resolved = assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
+        payload = assembler.assemble(base_user_prompt="Analyze market.", resolved=resolved)
+
+        text = payload.text
+        blocks = ["<task>", "Technical Charts", "OHLCV Candles", "Previous Report"]
+        positions = [text.index(block) for block in blocks]
+        self.assertEqual(positions, sorted(positions))
+        self.assertNotIn("uri: gs://bucket/prev_report.json", text)
+        prefix = text[: payload.shared_prefix_chars]
+        self.assertIn("<task>", prefix)
+        self.assertIn("Price MA", prefix)
+        self.assertTrue(prefix.rstrip().endswith("</context>"))
+        self.assertIn('"rows"', prefix)
+        self.assertNotIn("Previous Report", prefix)
+
+    def test_rejects_unknown_layout(self) -> None:
+        with self.assertRaises(ValueError):
+            UserInputAssembler(artifact_store=FakeArtifactStore({}), layout="bogus")
 
     def test_accepts_png_gcs_uri(self) -> None:
         flow_run = self._build_flow_run()
@@ -244,6 +322,74 @@ class UserInputAssemblerTests(unittest.TestCase):
 
         self.assertIn("external_report.json", payload.text)
         self.assertIn("external", payload.text)
+        # Previous reports are injected as text only; the parsed tree is not kept.
+        self.assertIsNone(resolved.previous_reports[0].artifact.data)
+
+    def test_previous_report_prefers_digest_unless_full(self) -> None:
+        flow_run = self._build_flow_run()
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+        digest = {"output": {"summary": {"markdown": "short"}}, "report": {"sha256": "0" * 64}}
+        store = FakeArtifactStore(
+            {
+                "gs://bucket/ohlcv.json": b"{}",
+                "gs://bucket/charts_manifest.json": json.dumps(
+                    {"items": [{"gcsUri": "gs://bucket/chart1.png"}]}
+                ).encode("utf-8"),
+                "gs://bucket/chart1.png": b"png-data",
+                "gs://bucket/prev_report.json": json.dumps(
+                    {"output": {"summary": {"markdown": "short"}, "details": {"notes": "x" * 100}}}
+                ).encode("utf-8"),
+                "gs://bucket/prev_report.digest.json": json.dumps(digest).encode("utf-8"),
+            }
+        )
+        assembler = UserInputAssembler(artifact_store=store)
+
+        resolved = assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
+        report = resolved.previous_reports[0]
+        self.assertTrue(report.digest)
+        self.assertEqual(report.artifact.uri, "gs://bucket/prev_report.digest.json")
+        text = assembler.assemble(base_user_prompt="Analyze.", resolved=resolved).text
+        self.assertIn("Previous Report Digest (prev", text)
+
+        full = assembler.resolve(
+            flow_run=flow_run, step=step, inputs=replace(inputs, previous_report_format="full")
+        )
+        self.assertFalse(full.previous_reports[0].digest)
+        self.assertEqual(full.previous_reports[0].artifact.uri, "gs://bucket/prev_report.json")
+
+    def test_missing_digest_falls_back_without_an_exists_probe(self) -> None:
+        flow_run = self._build_flow_run()
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+
+        class NoExistsStore(FakeArtifactStore):
+            def exists(self, uri: GcsUri) -> bool:
+                raise AssertionError("digest lookup must not probe exists()")
+
+        store = NoExistsStore(
+            {
+                "gs://bucket/ohlcv.json": b"{}",
+                "gs://bucket/charts_manifest.json": json.dumps(
+                    {"items": [{"gcsUri": "gs://bucket/chart1.png"}]}
+                ).encode("utf-8"),
+                "gs://bucket/chart1.png": b"png-data",
+                "gs://bucket/prev_report.json": json.dumps(
+                    {"output": {"summary": {"markdown": "full"}}}
+                ).encode("utf-8"),
+            }
+        )
+        logger = FakeEventLogger()
+        resolved = UserInputAssembler(artifact_store=store).resolve(
+            flow_run=flow_run, step=step, inputs=inputs, event_logger=logger
+        )
+
+        self.assertFalse(resolved.previous_reports[0].digest)
+        self.assertEqual(resolved.previous_reports[0].artifact.uri, "gs://bucket/prev_report.json")
+        # A missing sidecar is expected for older reports: no warning, no error.
+        self.assertEqual(
+            [e["severity"] for e in logger.events if e["severity"] != "INFO"], []
+        )
 
     def test_chart_image_size_limit(self) -> None:
         flow_run = self._build_flow_run()
@@ -266,6 +412,44 @@ class UserInputAssemblerTests(unittest.TestCase):
         with self.assertRaises(InvalidStepInputs):
             assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
 
+    def _reference_mode_store(self, *, size: int, content_type: str) -> MetadataOnlyArtifactStore:
+        manifest = json.dumps({"items": [{"gcsUri": "gs://bucket/chart1.png", "description": "Price"}]})
+        payloads = {
+            "gs://bucket/ohlcv.json": json.dumps({"rows": [1]}).encode("utf-8"),
+            "gs://bucket/charts_manifest.json": manifest.encode("utf-8"),
+            "gs://bucket/prev_report.json": json.dumps({"summary": {"markdown": "ok"}, "details": {}}).encode("utf-8"),
+        }
+        chart_uri = GcsUri.parse("gs://bucket/chart1.png")
+        metadata = {
+            str(chart_uri): ArtifactMetadata(uri=chart_uri, size=size, content_type=content_type)
+        }
+        return MetadataOnlyArtifactStore(payloads, metadata)
+
+    def test_reference_mode_skips_image_download(self) -> None:
+        flow_run = self._build_flow_run()
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+        store = self._reference_mode_store(size=1024, content_type="image/png")
+        assembler = UserInputAssembler(artifact_store=store, reference_chart_images=True)
+
+        resolved = assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
+
+        self.assertNotIn("gs://bucket/chart1.png", store.reads)
+        image = resolved.chart_images[0]
+        self.assertIsNone(image.data)
+        self.assertEqual(image.bytes_len, 1024)
+        self.assertEqual(image.uri, "gs://bucket/chart1.png")
+
+    def test_reference_mode_enforces_size_and_content_type(self) -> None:
+        flow_run = self._build_flow_run()
+        step = LLMReportStep.from_flow_step(flow_run.get_step("llm"))
+        inputs = step.parse_inputs(flow_run=flow_run)
+        for size, content_type in ((300000, "image/png"), (10, "application/pdf")):
+            store = self._reference_mode_store(size=size, content_type=content_type)
+            assembler = UserInputAssembler(artifact_store=store, reference_chart_images=True)
+            with self.assertRaises(InvalidStepInputs):
+                assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
+
     def test_json_size_limit(self) -> None:
         flow_run = self._build_flow_run()
         raw_step = flow_run.get_step("llm")
@@ -286,5 +470,22 @@ class UserInputAssemblerTests(unittest.TestCase):
             assembler.resolve(flow_run=flow_run, step=step, inputs=inputs)
 
 
+class DrainCanonicalJsonTests(unittest.TestCase):
+    def test_matches_normalize_json_and_empties_the_tree(self) -> None:
+        samples = [
+            {"b": [1, {"z": [], "a": {}}, "é"], "a": None, "c": {"x": [[1, [2, [3, [4]]]]]}},
+            [[], {}, 0, "", False],
+            {},
+            [],
+            "text",
+            1.5,
+        ]
+        for sample in samples:
+            value = json.loads(json.dumps(sample))
+            self.assertEqual(_drain_canonical_json(value), _normalize_json(sample))
+            if isinstance(value, (dict, list)):
+                self.assertEqual(len(value), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,224 @@
+import copy
+import unittest
+from types import SimpleNamespace
+
+from worker_llm_client.app.handler import FlowRunEventHandler
+from worker_llm_client.app.watch import (
+    ReadyRunIndex,
+    RunChange,
+    RunWatchSupervisor,
+    WatchedFlowRunRepository,
+)
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy
+from worker_llm_client.infra.firestore import FirestoreRunWatchSource
+from worker_llm_client.infra.memory import InMemoryFlowRunRepository
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+from worker_llm_client.worker import PullWorker, PullWorkerPolicy
+from tests.test_handler_logging import (
+    FakeEventLogger,
+    FakePromptRepo,
+    FakeSchemaRepo,
+    FakeUserInputAssembler,
+    RecordingArtifactStore,
+    _build_prompt,
+    _build_schema,
+)
+from tests.test_llm_batch import STEP_IDS
+from tests.test_pull_worker import SlowLLMClient, _raw_run
+
+
+def _waiting_run(run_id: str) -> dict:
+    raw = _raw_run(run_id)
+    for step_id in STEP_IDS:
+        raw["steps"][step_id]["status"] = "SUCCEEDED"
+    return raw
+
+
+class FakeSubscription:
+    def __init__(self) -> None:
+        self.is_active = True
+        self.unsubscribed = False
+
+    def unsubscribe(self) -> None:
+        self.unsubscribed = True
+        self.is_active = False
+
+
+class FakeWatchSource:
+    def __init__(self) -> None:
+        self.callback = None
+        self.subscriptions: list[FakeSubscription] = []
+
+    def subscribe(self, on_changes):
+        self.callback = on_changes
+        self.subscriptions.append(FakeSubscription())
+        return self.subscriptions[-1]
+
+    def emit(self, changes, *, reset: bool = False) -> None:
+        self.callback(list(changes), reset)
+
+
+class ListenedRepository(InMemoryFlowRunRepository):
+    """In-memory flow_runs whose writes are echoed to a watch callback."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.listener = None
+        self.gets = 0
+
+    def get(self, run_id):
+        self.gets += 1
+        return super().get(run_id)
+
+    def _apply_locked(self, run_id, patch) -> None:
+        super()._apply_locked(run_id, patch)
+        if self.listener is not None:
+            doc = copy.deepcopy(self._docs[run_id])
+            self.listener([RunChange(run_id, doc, self._versions[run_id])], False)
+
+
+class ReadyRunIndexTests(unittest.TestCase):
+    def test_index_tracks_ready_runs_and_drops_duplicates(self) -> None:
+        index = ReadyRunIndex()
+        index.apply(
+            [RunChange("run-1", _raw_run("run-1"), 1), RunChange("run-2", _waiting_run("run-2"), 1)],
+            reset=True,
+        )
+        self.assertEqual(index.ready_run_ids(limit=10), ["run-1"])
+        self.assertTrue(index.changed.is_set())
+
+        index.apply([RunChange("run-1", _raw_run("run-1"), 1)] * 3)
+        self.assertEqual(index.stats().duplicates, 3)
+
+        index.apply([RunChange("run-2", _raw_run("run-2"), 2), RunChange("run-1", None)])
+        self.assertEqual(index.ready_run_ids(limit=10), ["run-2"])
+        self.assertIsNone(index.record("run-1"))
+
+        index.apply([RunChange("run-3", _raw_run("run-3"), 1)], reset=True)
+        self.assertEqual(index.ready_run_ids(limit=10), ["run-3"])
+        self.assertEqual(index.stats().resets, 2)
+
+    def test_repository_serves_reads_from_index_and_invalidates_on_claim(self) -> None:
+        delegate = ListenedRepository()
+        delegate.put("run-1", _raw_run("run-1"))
+        index = ReadyRunIndex()
+        index.apply([RunChange("run-1", _raw_run("run-1"), 1)], reset=True)
+        repo = WatchedFlowRunRepository(delegate, index)
+
+        self.assertIsNotNone(repo.get("run-1"))
+        self.assertEqual(delegate.gets, 0)
+        self.assertTrue(repo.claim_step("run-1", STEP_IDS[0], "2026-01-01T00:00:00Z").claimed)
+        self.assertEqual(index.ready_run_ids(limit=10), [])
+        repo.get("run-1")
+        self.assertEqual(delegate.gets, 1)
+
+
+class RunWatchSupervisorTests(unittest.TestCase):
+    def test_dead_listener_is_replaced_and_index_rebuilt(self) -> None:
+        source = FakeWatchSource()
+        index = ReadyRunIndex()
+        logger = FakeEventLogger()
+        supervisor = RunWatchSupervisor(source=source, index=index, event_logger=logger)
+        supervisor.start()
+        source.emit([RunChange("run-1", _raw_run("run-1"), 1)], reset=True)
+        self.assertTrue(supervisor.check())
+        self.assertEqual(len(source.subscriptions), 1)
+
+        source.subscriptions[0].is_active = False
+        self.assertTrue(supervisor.check())
+        self.assertTrue(source.subscriptions[0].unsubscribed)
+        self.assertEqual(len(source.subscriptions), 2)
+        # run-1 finished while disconnected; the new full snapshot drops it.
+        source.emit([RunChange("run-2", _raw_run("run-2"), 1)], reset=True)
+        self.assertEqual(index.ready_run_ids(limit=10), ["run-2"])
+        restarted = [e for e in logger.events if e["event"] == "watch_listener_restarted"]
+        self.assertEqual(restarted[0]["restarts"], 1)
+
+
+class WatchModeWorkerTests(unittest.TestCase):
+    def test_worker_drains_runs_fed_by_the_listener(self) -> None:
+        delegate = ListenedRepository()
+        for run_id in ("run-1", "run-2"):
+            delegate.put(run_id, _raw_run(run_id))
+        index = ReadyRunIndex()
+        source = FakeWatchSource()
+        logger = FakeEventLogger()
+        RunWatchSupervisor(source=source, index=index, event_logger=logger).start()
+        source.emit(
+            [RunChange(run_id, delegate.raw(run_id), 1) for run_id in ("run-1", "run-2")],
+            reset=True,
+        )
+        delegate.listener = source.callback
+
+        handler = FlowRunEventHandler(
+            flow_repo=WatchedFlowRunRepository(delegate, index),
+            prompt_repo=FakePromptRepo(_build_prompt()),
+            schema_repo=FakeSchemaRepo(_build_schema()),
+            event_logger=logger,
+            flow_runs_collection="flow_runs",
+            artifact_store=RecordingArtifactStore(),
+            path_policy=ArtifactPathPolicy(bucket="bucket"),
+            llm_client=SlowLLMClient(),
+            user_input_assembler=FakeUserInputAssembler(),
+            structured_output_validator=StructuredOutputValidator(),
+        )
+        worker = PullWorker(
+            scanner=index,
+            handler=handler,
+            flow_runs_collection="flow_runs",
+            event_logger=logger,
+            policy=PullWorkerPolicy(concurrency=2, poll_interval_seconds=0.01),
+            wake=index.changed,
+        )
+        self.assertEqual(worker.run(until_idle=True), 4)
+
+        for run_id in ("run-1", "run-2"):
+            statuses = [delegate.raw(run_id)["steps"][sid]["status"] for sid in STEP_IDS]
+            self.assertEqual(statuses, ["SUCCEEDED", "SUCCEEDED"])
+        # Every handler read came from listener snapshots.
+        self.assertEqual(delegate.gets, 0)
+
+
+class FirestoreRunWatchSourceTests(unittest.TestCase):
+    def test_first_snapshot_resets_and_later_changes_are_incremental(self) -> None:
+        def doc(run_id: str, raw: dict | None = None):
+            data = raw or _raw_run(run_id)
+            return SimpleNamespace(id=run_id, update_time="t1", to_dict=lambda: data)
+
+        class Query:
+            callback = None
+
+            def where(self, *_args):
+                return self
+
+            def on_snapshot(self, callback):
+                Query.callback = callback
+                return SimpleNamespace(is_active=True, unsubscribe=lambda: None)
+
+        client = SimpleNamespace(collection=lambda name: Query())
+        received: list[tuple] = []
+        subscription = FirestoreRunWatchSource(client).subscribe(
+            lambda changes, reset: received.append((changes, reset))
+        )
+        self.assertTrue(subscription.is_active)
+
+        Query.callback([doc("run-1")], [], None)
+        Query.callback(
+            [],
+            [
+                SimpleNamespace(type=SimpleNamespace(name="MODIFIED"), document=doc("run-2")),
+                SimpleNamespace(type=SimpleNamespace(name="REMOVED"), document=doc("run-1")),
+            ],
+            None,
+        )
+
+        self.assertTrue(received[0][1])
+        self.assertEqual([c.run_id for c in received[0][0]], ["run-1"])
+        self.assertFalse(received[1][1])
+        self.assertEqual(
+            [(c.run_id, c.raw is None) for c in received[1][0]], [("run-2", False), ("run-1", True)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import sys
+import unittest
+
+from worker_llm_client.app.watch import ReadyRunIndex, WatchedFlowRunRepository
+from worker_llm_client.artifacts.cache import CachingArtifactStore
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.ops.config import WorkerConfig
+from worker_llm_client.wiring import build_wiring
+
+
+class FakeFirestoreClient:
+    def collection(self, name: str) -> "FakeFirestoreClient":
+        raise AssertionError("wiring must not read Firestore")
+
+
+def _config(**env: str) -> WorkerConfig:
+    return WorkerConfig.from_env(
+        {"ARTIFACTS_BUCKET": "mem://bucket", "GEMINI_API_KEY": "sk_test_123", **env}
+    )
+
+
+class WiringTests(unittest.TestCase):
+    def test_builds_without_functions_framework(self) -> None:
+        wiring = build_wiring(_config(), firestore_client=FakeFirestoreClient())
+
+        self.assertIsInstance(wiring.artifact_store, InMemoryArtifactStore)
+        self.assertIs(wiring.flow_run_repo.client, wiring.firestore_client)
+        self.assertIsNone(wiring.deferred_completer())
+        self.assertIsNone(wiring.run_gate)
+        self.assertNotIn("functions_framework", sys.modules)
+        self.assertNotIn("main", sys.modules)
+
+    def test_optional_components_follow_the_config(self) -> None:
+        wiring = build_wiring(
+            _config(
+                CLAIM_PRELUDE_ENABLED="true",
+                RUN_GATE_ENABLED="true",
+                GEMINI_BATCH_API_ENABLED="true",
+            ),
+            firestore_client=FakeFirestoreClient(),
+        )
+
+        self.assertIsInstance(wiring.artifact_store, CachingArtifactStore)
+        self.assertIsNotNone(wiring.claim_prelude)
+        self.assertIsNotNone(wiring.run_gate)
+        self.assertIsNotNone(wiring.deferred_completer())
+
+    def test_event_handler_takes_an_overriding_repository(self) -> None:
+        wiring = build_wiring(_config(), firestore_client=FakeFirestoreClient())
+        watched = WatchedFlowRunRepository(wiring.flow_run_repo, ReadyRunIndex())
+
+        self.assertIs(wiring.event_handler()._flow_repo, wiring.flow_run_repo)
+        self.assertIs(wiring.event_handler(watched)._flow_repo, watched)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -166,6 +166,25 @@ class LLMReportInputsTests(unittest.TestCase):
         with self.assertRaises(InvalidStepInputs):
             LLMReportInputs.from_raw(inputs, flow_run=flow)
 
+    def test_previous_report_format(self) -> None:
+        flow = self._flow_run_for_inputs()
+        inputs = _llm_step(step_id="llm-a", status="READY")["inputs"]
+        self.assertEqual(LLMReportInputs.from_raw(inputs, flow_run=flow).previous_report_format, "digest")
+        inputs["previousReportFormat"] = "full"
+        self.assertEqual(LLMReportInputs.from_raw(inputs, flow_run=flow).previous_report_format, "full")
+        inputs["previousReportFormat"] = "summary"
+        with self.assertRaises(InvalidStepInputs):
+            LLMReportInputs.from_raw(inputs, flow_run=flow)
+
+    def test_incremental_mode_requires_previous_report(self) -> None:
+        flow = self._flow_run_for_inputs()
+        inputs = _llm_step(step_id="llm-a", status="READY")["inputs"]
+        inputs["ohlcvMode"] = "incremental"
+        with self.assertRaises(InvalidStepInputs):
+            LLMReportInputs.from_raw(inputs, flow_run=flow)
+        inputs["previousReportStepIds"] = ["prev"]
+        self.assertEqual(LLMReportInputs.from_raw(inputs, flow_run=flow).ohlcv_mode, "incremental")
+
     def test_missing_prompt_id(self) -> None:
         flow = self._flow_run_for_inputs()
         inputs = _llm_step(step_id="llm-a", status="READY")["inputs"]
@@ -1,41 +1,111 @@
 from worker_llm_client.app.services import (
     ClaimResult,
+    DeferredRunScanner,
     FinalizeResult,
     FlowRunRecord,
     FlowRunRepository,
+    FlowRunScanner,
     LLMPrompt,
     LLMSchema,
     PromptRepository,
     SchemaRepository,
     build_claim_patch,
     build_finalize_patch,
+    build_release_patch,
     build_step_update,
+    build_submission_patch,
     is_precondition_or_aborted,
 )
+from worker_llm_client.app.batch import LLMBatchPolicy
+from worker_llm_client.app.cache_metrics import PromptCacheStats, PromptCacheTracker
+from worker_llm_client.app.context_cache import (
+    CachedContent,
+    ContextCacheRegistry,
+    ContextCacheStats,
+    ProviderContextCache,
+)
+from worker_llm_client.app.commit import CommitPipeline, PendingFinalize, WriteRetryPolicy
+from worker_llm_client.app.prefetch import (
+    CachingPromptRepository,
+    CachingSchemaRepository,
+    ClaimPrelude,
+    PrefetchPolicy,
+    PreludeLoads,
+    StepPrefetcher,
+)
+from worker_llm_client.app.run_gate import RunGate
+from worker_llm_client.app.watch import (
+    ReadyRunIndex,
+    RunChange,
+    RunWatchSource,
+    RunWatchSupervisor,
+    WatchedFlowRunRepository,
+)
+from worker_llm_client.app.file_registry import FileRegistryStats, UploadedFileRegistry
 from worker_llm_client.app.llm_client import (
+    BatchJobStatus,
+    BatchPredictionService,
+    FileReference,
+    FileReferencesExpired,
     LLMClient,
+    ProviderFileStore,
     ProviderResponse,
     RateLimited,
     RequestFailed,
     SafetyBlocked,
+    UploadedFile,
 )
 
 __all__ = [
+    "BatchJobStatus",
+    "BatchPredictionService",
     "ClaimResult",
+    "DeferredRunScanner",
     "FinalizeResult",
     "FlowRunRecord",
     "FlowRunRepository",
+    "FlowRunScanner",
     "LLMPrompt",
     "LLMSchema",
     "PromptRepository",
     "SchemaRepository",
+    "CachedContent",
+    "CachingPromptRepository",
+    "CachingSchemaRepository",
+    "ClaimPrelude",
+    "CommitPipeline",
+    "ContextCacheRegistry",
+    "ContextCacheStats",
+    "FileReference",
+    "FileReferencesExpired",
+    "FileRegistryStats",
+    "LLMBatchPolicy",
     "LLMClient",
+    "PendingFinalize",
+    "PrefetchPolicy",
+    "PreludeLoads",
+    "PromptCacheStats",
+    "PromptCacheTracker",
+    "ProviderContextCache",
+    "ProviderFileStore",
     "ProviderResponse",
     "RateLimited",
+    "ReadyRunIndex",
     "RequestFailed",
+    "RunChange",
+    "RunGate",
+    "RunWatchSource",
+    "RunWatchSupervisor",
     "SafetyBlocked",
+    "StepPrefetcher",
+    "UploadedFile",
+    "UploadedFileRegistry",
+    "WatchedFlowRunRepository",
+    "WriteRetryPolicy",
     "build_claim_patch",
     "build_finalize_patch",
+    "build_release_patch",
     "build_step_update",
+    "build_submission_patch",
     "is_precondition_or_aborted",
 ]
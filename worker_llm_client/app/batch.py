@@ -0,0 +1,158 @@
+"""Batching of compatible READY LLM_REPORT steps into one provider request."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import json
+from typing import Any, Mapping, Sequence
+
+from worker_llm_client.app.services import LLMSchema
+from worker_llm_client.reporting.services import UserInputPayload
+
+
+BATCH_REPORTS_KEY = "reports"
+BATCH_SCHEMA_KIND = "LLM_REPORT_BATCH_OUTPUT"
+# Rough input token estimate: ~4 characters per token for text and the flat
+# per-image cost the provider charges for small images.
+CHARS_PER_TOKEN = 4
+IMAGE_TOKEN_ESTIMATE = 258
+
+_BATCH_INSTRUCTION = (
+    "This request covers several independent report steps. Each step below "
+    "has its own task and context; do not mix context between steps. Return "
+    f"one entry in `{BATCH_REPORTS_KEY}` per step, with `stepId` set to the "
+    "step id and `summary`/`details` following the step's report format."
+)
+
+
+def estimate_tokens(text: str, *, images: int = 0) -> int:
+    """Approximate input tokens of a user payload (no tokenizer round trip)."""
+    return -(-len(text) // CHARS_PER_TOKEN) + images * IMAGE_TOKEN_ESTIMATE
+
+
+def estimate_payload_tokens(payload: UserInputPayload) -> int:
+    return estimate_tokens(payload.text, images=len(payload.chart_images))
+
+
+@dataclass(frozen=True, slots=True)
+class LLMBatchPolicy:
+    """Limits for combining steps; ``max_steps`` of 1 disables batching."""
+
+    max_steps: int = 1
+    max_input_tokens: int = 200_000
+    step_seconds: int = 60
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_steps > 1
+
+    def admit(
+        self,
+        token_estimates: Sequence[int],
+        *,
+        remaining_seconds: float,
+        finalize_budget_seconds: int,
+    ) -> int:
+        """Number of leading steps that fit into one request (at least 1).
+
+        Every admitted step reserves ``step_seconds`` on top of the finalize
+        budget so individual fallback calls still fit when the combined
+        response is unusable.
+        """
+        admitted = 0
+        total_tokens = 0
+        for tokens in token_estimates[: self.max_steps]:
+            if admitted:
+                if total_tokens + tokens > self.max_input_tokens:
+                    break
+                needed = finalize_budget_seconds + (admitted + 1) * self.step_seconds
+                if remaining_seconds < needed:
+                    break
+            admitted += 1
+            total_tokens += tokens
+        return max(admitted, 1)
+
+
+def build_batch_schema(schema: LLMSchema, step_ids: Sequence[str]) -> LLMSchema:
+    """Wrap a report schema into ``{"reports": [{stepId, summary, details}]}``."""
+    properties = schema.json_schema.get("properties")
+    properties = properties if isinstance(properties, Mapping) else {}
+    item = {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["stepId", "summary", "details"],
+        "properties": {
+            "stepId": {"type": "string", "enum": list(step_ids)},
+            "summary": properties.get("summary", {"type": "object"}),
+            "details": properties.get("details", {"type": "object"}),
+        },
+    }
+    json_schema = {
+        "type": "object",
+        "additionalProperties": False,
+        "required": [BATCH_REPORTS_KEY],
+        "properties": {
+            BATCH_REPORTS_KEY: {
+                "type": "array",
+                "minItems": len(step_ids),
+                "maxItems": len(step_ids),
+                "items": item,
+            }
+        },
+    }
+    canonical = json.dumps(json_schema, sort_keys=True, separators=(",", ":"))
+    return LLMSchema(
+        schema_id=schema.schema_id,
+        kind=BATCH_SCHEMA_KIND,
+        json_schema=json_schema,
+        sha256=hashlib.sha256(canonical.encode("utf-8")).hexdigest(),
+    )
+
+
+def split_batch_output(
+    text: str | None, step_ids: Sequence[str]
+) -> dict[str, dict[str, Any]] | None:
+    """Per-step ``{summary, details}`` outputs; None if the response is unusable.
+
+    Only steps that appear exactly once are returned: malformed entries,
+    unknown step ids and duplicated steps are left out, so the caller falls
+    back to individual calls for just those steps. Outputs are not validated
+    here; each one is checked against the step's own report schema afterwards.
+    """
+    try:
+        payload = json.loads(text) if isinstance(text, str) else None
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(payload, Mapping):
+        return None
+    reports = payload.get(BATCH_REPORTS_KEY)
+    if not isinstance(reports, list):
+        return None
+    outputs: dict[str, dict[str, Any]] = {}
+    duplicated: set[str] = set()
+    for entry in reports:
+        if not isinstance(entry, Mapping):
+            continue
+        step_id = entry.get("stepId")
+        if step_id not in step_ids:
+            continue
+        if step_id in outputs:
+            duplicated.add(step_id)
+            continue
+        outputs[step_id] = {key: value for key, value in entry.items() if key != "stepId"}
+    for step_id in duplicated:
+        del outputs[step_id]
+    return outputs
+
+
+def build_batch_user_parts(
+    sections: Sequence[tuple[str, str | None, UserInputPayload]],
+) -> list[Any]:
+    """One text part per step followed by that step's chart images."""
+    parts: list[Any] = [_BATCH_INSTRUCTION]
+    for step_id, timeframe, payload in sections:
+        label = f"stepId: {step_id}" + (f", timeframe: {timeframe}" if timeframe else "")
+        parts.append(f"\n\n## Step ({label})\n\n{payload.text}")
+        parts.extend(payload.chart_images)
+    return parts
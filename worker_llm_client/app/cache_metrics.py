@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+from typing import Any, Mapping
+
+
+@dataclass(frozen=True, slots=True)
+class PromptCacheStats:
+    prompt_id: str
+    requests: int
+    hits: int
+    prompt_tokens: int
+    cached_tokens: int
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    @property
+    def cached_token_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def to_log_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "hitRate": round(self.hit_rate, 4),
+            "promptTokens": self.prompt_tokens,
+            "cachedTokens": self.cached_tokens,
+            "cachedTokenRatio": round(self.cached_token_ratio, 4),
+        }
+
+
+class PromptCacheTracker:
+    """Per-prompt counters of implicit provider cache hits for this instance.
+
+    A request counts as a hit when ``usageMetadata`` reports a non-zero
+    ``cachedContentTokenCount``. Counters live for the lifetime of the
+    process, so they describe one warm instance rather than the fleet.
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[str, PromptCacheStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, *, prompt_id: str, usage: Mapping[str, Any] | None) -> PromptCacheStats:
+        prompt_tokens = _usage_int(usage, "promptTokenCount", "prompt_token_count")
+        cached_tokens = _usage_int(usage, "cachedContentTokenCount", "cached_content_token_count")
+        with self._lock:
+            previous = self._stats.get(prompt_id) or PromptCacheStats(
+                prompt_id=prompt_id, requests=0, hits=0, prompt_tokens=0, cached_tokens=0
+            )
+            updated = PromptCacheStats(
+                prompt_id=prompt_id,
+                requests=previous.requests + 1,
+                hits=previous.hits + (1 if cached_tokens > 0 else 0),
+                prompt_tokens=previous.prompt_tokens + prompt_tokens,
+                cached_tokens=previous.cached_tokens + cached_tokens,
+            )
+            self._stats[prompt_id] = updated
+            return updated
+
+    def get(self, prompt_id: str) -> PromptCacheStats | None:
+        with self._lock:
+            return self._stats.get(prompt_id)
+
+
+def _usage_int(usage: Mapping[str, Any] | None, *keys: str) -> int:
+    if not isinstance(usage, Mapping):
+        return 0
+    for key in keys:
+        value = usage.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return 0
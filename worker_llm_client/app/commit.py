@@ -0,0 +1,179 @@
+"""Commit phase helpers: write retries and the pipelined finalize."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import time
+from typing import Any, Callable
+
+from worker_llm_client.app.services import (
+    FinalizeResult,
+    FlowRunRecord,
+    FlowRunRepository,
+    build_finalize_patch,
+    is_precondition_or_aborted,
+)
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.artifacts.services import (
+    ArtifactStore,
+    ArtifactWriteFailed,
+    WriteResult,
+    encoding_kwargs,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class WriteRetryPolicy:
+    """Retries transient create-only writes with exponential backoff.
+
+    A retry is only started if, after the backoff, at least
+    ``reserve_seconds`` of the invocation remain for the finalize itself.
+    Create-only writes make retries safe: an attempt that reached GCS but
+    reported a failure is reused by the next one.
+    """
+
+    max_attempts: int = 3
+    base_backoff_seconds: float = 0.5
+    max_backoff_seconds: float = 4.0
+    reserve_seconds: float = 10.0
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based)."""
+        return min(self.base_backoff_seconds * (2 ** (attempt - 1)), self.max_backoff_seconds)
+
+
+def write_with_retry(
+    artifact_store: ArtifactStore,
+    uri: ArtifactUri,
+    data: bytes,
+    *,
+    content_type: str,
+    content_encoding: str | None = None,
+    policy: WriteRetryPolicy,
+    remaining_seconds: Callable[[], float],
+    on_retry: Callable[[int, float, ArtifactWriteFailed], None] | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[WriteResult, int]:
+    """Write ``data``; returns the result and the number of attempts made.
+
+    Non-retryable failures, the last attempt's failure and failures with no
+    budget left for another attempt are raised as is.
+    """
+    attempt = 1
+    while True:
+        try:
+            result = artifact_store.write_bytes_create_only(
+                uri, data, content_type=content_type, **encoding_kwargs(content_encoding)
+            )
+            return result, attempt
+        except ArtifactWriteFailed as exc:
+            if not exc.retryable or attempt >= policy.max_attempts:
+                raise
+            backoff = policy.backoff_seconds(attempt)
+            if remaining_seconds() - backoff < policy.reserve_seconds:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, backoff, exc)
+            sleep(backoff)
+            attempt += 1
+
+
+class PendingFinalize:
+    """A finalize whose precondition read was started ahead of time."""
+
+    def __init__(
+        self, flow_repo: FlowRunRepository, run_id: str, read: Future[FlowRunRecord | None]
+    ) -> None:
+        self._flow_repo = flow_repo
+        self._run_id = run_id
+        self._read = read
+
+    def cancel(self) -> None:
+        self._read.cancel()
+
+    def commit(
+        self,
+        step_id: str,
+        status: str,
+        finished_at_rfc3339: str,
+        *,
+        outputs_gcs_uri: str | None = None,
+        error: Any | None = None,
+    ) -> FinalizeResult:
+        """Patch the step against the snapshot read while the report uploaded.
+
+        Same outcomes as ``FlowRunRepository.finalize_step``; if the run
+        changed since that read (or it failed) this falls back to it.
+        """
+
+        def fallback() -> FinalizeResult:
+            return self._flow_repo.finalize_step(
+                self._run_id,
+                step_id,
+                status,
+                finished_at_rfc3339,
+                outputs_gcs_uri=outputs_gcs_uri,
+                error=error,
+            )
+
+        try:
+            record = self._read.result()
+        except Exception:
+            # finalize_step re-reads and surfaces the error if it persists.
+            return fallback()
+        # Without an update_time the patch would not be conditional.
+        if record is None or record.update_time is None:
+            return fallback()
+        step = record.flow_run.get_step(step_id)
+        current = step.status if step is not None else None
+        if current in ("SUCCEEDED", "FAILED"):
+            return FinalizeResult(updated=False, status=current, reason="already_final")
+        if current != "RUNNING":
+            return FinalizeResult(updated=False, status=current, reason="not_running")
+        patch = build_finalize_patch(
+            step_id=step_id,
+            status=status,
+            finished_at_rfc3339=finished_at_rfc3339,
+            outputs_gcs_uri=outputs_gcs_uri,
+            error=error,
+        )
+        try:
+            self._flow_repo.patch(
+                self._run_id, patch, precondition_update_time=record.update_time
+            )
+        except Exception as exc:
+            if is_precondition_or_aborted(exc):
+                return fallback()
+            raise
+        return FinalizeResult(updated=True, status=current)
+
+
+class CommitPipeline:
+    """Overlaps the finalize precondition read with the report upload.
+
+    The report URI is known before the upload, so the flow run can be read
+    while the report is written; ``PendingFinalize.commit`` then issues only
+    the conditional patch, and only after the write was confirmed. Side
+    writes that belong with the report (e.g. its digest) run on the same
+    pool, concurrently with the upload.
+    """
+
+    def __init__(self, *, max_workers: int = 2) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="commit")
+
+    def begin(self, flow_repo: FlowRunRepository, run_id: str) -> PendingFinalize:
+        return PendingFinalize(flow_repo, run_id, self._pool.submit(flow_repo.get, run_id))
+
+    def submit(self, write: Callable[[], None]) -> Future[None]:
+        """Run a best-effort side write (e.g. the report digest) alongside the upload."""
+        return self._pool.submit(write)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
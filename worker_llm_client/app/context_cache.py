@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Protocol, Sequence
+
+
+DEFAULT_CACHE_TTL_SECONDS = 3600
+DEFAULT_EXPIRY_MARGIN_SECONDS = 60
+DEFAULT_MIN_PREFIX_CHARS = 8192
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_FAILURE_TTL_SECONDS = 300
+# Rough text-equivalent weight of one image part when sizing a prefix
+# (Gemini bills a small image as ~258 tokens).
+_IMAGE_PART_CHARS = 1032
+
+
+@dataclass(frozen=True, slots=True)
+class CachedContent:
+    name: str
+    expires_at: float | None = None  # epoch seconds
+
+
+class ProviderContextCache(Protocol):
+    def create(
+        self,
+        *,
+        model_name: str,
+        system: str,
+        parts: Sequence[Any],
+        ttl_seconds: int,
+    ) -> CachedContent:
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class ContextCacheStats:
+    hits: int
+    creates: int
+    expired: int
+    create_failures: int
+    skipped_small: int
+    skipped_failed: int
+
+
+class ContextCacheRegistry:
+    """Local registry of live provider-side cached contents for shared prompt prefixes.
+
+    A prefix is the system instruction plus the leading user parts that are
+    byte-identical across steps. Its key is a sha256 over model, system text
+    and part contents, so any change produces a new cache entry. Prefixes
+    below ``min_prefix_chars`` are not cached (providers reject tiny caches).
+    A failed create (token minimum, unsupported model, outage) is remembered
+    for ``failure_ttl_seconds`` so requests with that prefix go uncached
+    instead of paying another failing create first. ``None`` means "send the
+    request uncached".
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_store: ProviderContextCache,
+        ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+        expiry_margin_seconds: float = DEFAULT_EXPIRY_MARGIN_SECONDS,
+        min_prefix_chars: int = DEFAULT_MIN_PREFIX_CHARS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        failure_ttl_seconds: float = DEFAULT_FAILURE_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._cache_store = cache_store
+        self._ttl_seconds = ttl_seconds
+        self._expiry_margin_seconds = expiry_margin_seconds
+        self._min_prefix_chars = min_prefix_chars
+        self._max_entries = max_entries
+        self._failure_ttl_seconds = failure_ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, CachedContent] = OrderedDict()
+        # key -> time until which a failed create is not retried.
+        self._failed: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._creates = 0
+        self._expired = 0
+        self._create_failures = 0
+        self._skipped_small = 0
+        self._skipped_failed = 0
+
+    @staticmethod
+    def cache_key(*, model_name: str, system: str, parts: Sequence[Any]) -> str:
+        digest = hashlib.sha256()
+        for chunk in (model_name, system):
+            digest.update(chunk.encode("utf-8"))
+            digest.update(b"\x00")
+        for part in parts:
+            digest.update(_part_digest(part))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def lookup_or_create(
+        self, *, model_name: str, system: str, parts: Sequence[Any]
+    ) -> str | None:
+        if _approx_chars(system, parts) < self._min_prefix_chars:
+            with self._lock:
+                self._skipped_small += 1
+            return None
+
+        key = self.cache_key(model_name=model_name, system=system, parts=parts)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_usable(entry):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.name
+                del self._entries[key]
+                self._expired += 1
+            retry_at = self._failed.get(key)
+            if retry_at is not None:
+                if retry_at > self._clock():
+                    self._skipped_failed += 1
+                    return None
+                del self._failed[key]
+
+        try:
+            created = self._cache_store.create(
+                model_name=model_name,
+                system=system,
+                parts=parts,
+                ttl_seconds=self._ttl_seconds,
+            )
+        except Exception:
+            with self._lock:
+                self._create_failures += 1
+                self._failed[key] = self._clock() + self._failure_ttl_seconds
+                self._failed.move_to_end(key)
+                while len(self._failed) > self._max_entries:
+                    self._failed.popitem(last=False)
+            return None
+
+        with self._lock:
+            self._creates += 1
+            self._entries[key] = created
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return created.name
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.name == name:
+                    del self._entries[key]
+
+    def stats(self) -> ContextCacheStats:
+        with self._lock:
+            return ContextCacheStats(
+                hits=self._hits,
+                creates=self._creates,
+                expired=self._expired,
+                create_failures=self._create_failures,
+                skipped_small=self._skipped_small,
+                skipped_failed=self._skipped_failed,
+            )
+
+    def _is_usable(self, entry: CachedContent) -> bool:
+        if entry.expires_at is None:
+            return True
+        return entry.expires_at - self._expiry_margin_seconds > self._clock()
+
+
+def _part_digest(part: Any) -> bytes:
+    if isinstance(part, str):
+        return b"text:" + hashlib.sha256(part.encode("utf-8")).digest()
+    if isinstance(part, (bytes, bytearray, memoryview)):
+        return b"bytes:" + hashlib.sha256(part).digest()
+    data = getattr(part, "data", None)
+    mime_type = getattr(part, "mime_type", None) or ""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return b"blob:" + mime_type.encode("utf-8") + hashlib.sha256(data).digest()
+    for attr in ("file_uri", "uri"):
+        value = getattr(part, attr, None)
+        if isinstance(value, str) and value:
+            return b"uri:" + mime_type.encode("utf-8") + value.encode("utf-8")
+    return b"repr:" + repr(part).encode("utf-8")
+
+
+def _approx_chars(system: str, parts: Sequence[Any]) -> int:
+    total = len(system)
+    for part in parts:
+        total += len(part) if isinstance(part, str) else _IMAGE_PART_CHARS
+    return total
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import threading
+import time
+from typing import Callable
+
+from worker_llm_client.app.llm_client import FileReference, ProviderFileStore, UploadedFile
+
+
+DEFAULT_EXPIRY_MARGIN_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class FileRegistryStats:
+    hits: int
+    uploads: int
+    expired: int
+    upload_failures: int
+
+
+class UploadedFileRegistry:
+    """Upload-once, reference-many mapping from content hash to provider file URI.
+
+    Entries are keyed by sha256 of the bytes (plus mime type) and dropped once
+    they are within ``expiry_margin_seconds`` of the provider expiry, so a
+    request never references a file that may disappear mid-flight. When an
+    upload fails the caller gets ``None`` and must send the bytes inline.
+    An upload that is already inside the margin is remembered until it
+    expires, so those bytes are sent inline without uploading them again.
+    """
+
+    def __init__(
+        self,
+        *,
+        file_store: ProviderFileStore,
+        expiry_margin_seconds: float = DEFAULT_EXPIRY_MARGIN_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._file_store = file_store
+        self._expiry_margin_seconds = expiry_margin_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, UploadedFile] = OrderedDict()
+        # content key -> provider expiry of an upload that came back too short-lived.
+        self._inline_until: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._uploads = 0
+        self._expired = 0
+        self._upload_failures = 0
+
+    @staticmethod
+    def content_key(data: bytes, mime_type: str) -> str:
+        return f"{mime_type}:{hashlib.sha256(data).hexdigest()}"
+
+    def reference_for(
+        self, data: bytes, *, mime_type: str, display_name: str | None = None
+    ) -> FileReference | None:
+        key = self.content_key(data, mime_type)
+        with self._lock:
+            cached = self._lookup_locked(key)
+            if cached is not None:
+                self._hits += 1
+                return FileReference(file_uri=cached.uri, mime_type=cached.mime_type)
+            if self._inline_only_locked(key):
+                return None
+
+        # Upload outside the lock; a concurrent miss for the same bytes may
+        # upload twice, which is harmless (last writer wins the mapping).
+        try:
+            uploaded = self._file_store.upload(
+                data=data,
+                mime_type=mime_type,
+                display_name=display_name or key.split(":", 1)[1],
+            )
+        except Exception:
+            with self._lock:
+                self._upload_failures += 1
+            return None
+
+        with self._lock:
+            self._uploads += 1
+            if self._is_usable(uploaded):
+                self._entries[key] = uploaded
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            elif uploaded.expires_at is not None:
+                self._inline_until[key] = uploaded.expires_at
+                self._inline_until.move_to_end(key)
+                while len(self._inline_until) > self._max_entries:
+                    self._inline_until.popitem(last=False)
+        if not self._is_usable(uploaded):
+            return None
+        return FileReference(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+    def invalidate(self, file_uri: str) -> None:
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.uri == file_uri:
+                    del self._entries[key]
+
+    def stats(self) -> FileRegistryStats:
+        with self._lock:
+            return FileRegistryStats(
+                hits=self._hits,
+                uploads=self._uploads,
+                expired=self._expired,
+                upload_failures=self._upload_failures,
+            )
+
+    def _lookup_locked(self, key: str) -> UploadedFile | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_usable(entry):
+            del self._entries[key]
+            self._expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _inline_only_locked(self, key: str) -> bool:
+        expires_at = self._inline_until.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= self._clock():
+            del self._inline_until[key]
+            return False
+        return True
+
+    def _is_usable(self, entry: UploadedFile) -> bool:
+        if entry.expires_at is None:
+            return True
+        return entry.expires_at - self._expiry_margin_seconds > self._clock()
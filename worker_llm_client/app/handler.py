@@ -1,29 +1,85 @@
 from __future__ import annotations
 
+from contextlib import ExitStack
+from dataclasses import dataclass
 from datetime import datetime, timezone
+import json
 import re
-from typing import Any, Callable, Mapping
-
-from worker_llm_client.app.llm_client import LLMClient, RateLimited, RequestFailed, SafetyBlocked
+import time
+from typing import Any, Callable, Mapping, Sequence
+
+from worker_llm_client.app.batch import (
+    LLMBatchPolicy,
+    build_batch_schema,
+    build_batch_user_parts,
+    estimate_payload_tokens,
+    split_batch_output,
+)
+from worker_llm_client.app.cache_metrics import PromptCacheTracker
+from worker_llm_client.app.commit import (
+    CommitPipeline,
+    PendingFinalize,
+    WriteRetryPolicy,
+    write_with_retry,
+)
+from worker_llm_client.app.llm_client import (
+    BATCH_JOB_SUCCEEDED,
+    BatchPredictionService,
+    FileReferencesExpired,
+    LLMClient,
+    LLMClientError,
+    ProviderResponse,
+    RateLimited,
+    RequestFailed,
+    SafetyBlocked,
+)
+from worker_llm_client.app.prefetch import ClaimPrelude, PreludeLoads, StepPrefetcher
+from worker_llm_client.app.run_gate import RunGate
 from worker_llm_client.app.services import (
     FlowRunRepository,
+    LLMPrompt,
+    LLMSchema,
     PromptRepository,
     SchemaRepository,
 )
-from worker_llm_client.artifacts.domain import ArtifactPathPolicy, InvalidIdentifier
-from worker_llm_client.artifacts.services import ArtifactStore, ArtifactWriteFailed
-from worker_llm_client.infra.cloudevents import CloudEventParser
+from worker_llm_client.artifacts.domain import (
+    ArtifactPathPolicy,
+    ArtifactUri,
+    InvalidIdentifier,
+    report_digest_uri,
+)
+from worker_llm_client.artifacts.services import (
+    ArtifactStore,
+    ArtifactWriteFailed,
+    encoding_kwargs,
+)
+from worker_llm_client.infra.cloudevents import CloudEventParser, snapshot_time
 from worker_llm_client.ops.logging import EventLogger, MAX_ARRAY_LENGTH
 from worker_llm_client.ops.time_budget import TimeBudgetPolicy
 from worker_llm_client.reporting.domain import (
     LLMProfile,
+    LLMReportDigest,
     LLMReportFile,
     SerializationError,
     StructuredOutputInvalid,
 )
-from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.reporting.services import (
+    ResolvedUserInput,
+    UserInputAssembler,
+    UserInputPayload,
+)
 from worker_llm_client.reporting.structured_output import StructuredOutputValidator
-from worker_llm_client.workflow.domain import ErrorCode, InvalidStepInputs, LLMProfileInvalid, StepError
+from worker_llm_client.workflow.domain import (
+    DEFERRED_STATE_SUBMITTED,
+    EXECUTION_MODE_DEFERRED,
+    ErrorCode,
+    FlowRun,
+    InvalidStepInputs,
+    LLMProfileInvalid,
+    LLMReportInputs,
+    LLMReportStep,
+    StepError,
+)
 from worker_llm_client.workflow.policies import ReadyStepSelector
 
 
@@ -36,6 +92,25 @@ def _extract_field(cloud_event: Any, name: str) -> Any:
     return getattr(cloud_event, name, None)
 
 
+def _log_noop(event_logger: EventLogger, *, event_id: str, run_id: str, reason: str) -> None:
+    event_logger.log(
+        event="cloud_event_noop",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId="unknown",
+        reason=reason,
+    )
+    event_logger.log(
+        event="cloud_event_finished",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId="unknown",
+        status="noop",
+    )
+
+
 def _step_summaries(steps: list[Any]) -> list[dict[str, Any]]:
     summaries: list[dict[str, Any]] = []
     for step in steps[:MAX_ARRAY_LENGTH]:
@@ -69,37 +144,1409 @@ def _parse_schema_version(schema_id: str) -> int | None:
     return int(match.group(2))
 
 
-def _extract_symbol(flow_run: Any) -> str | None:
-    raw = getattr(flow_run, "raw", None)
-    if not isinstance(raw, Mapping):
-        return None
-    scope = raw.get("scope")
-    if not isinstance(scope, Mapping):
-        return None
-    symbol = scope.get("symbol")
-    if not isinstance(symbol, str) or not symbol.strip():
-        return None
-    return symbol.strip()
+def _extract_symbol(flow_run: Any) -> str | None:
+    raw = getattr(flow_run, "raw", None)
+    if not isinstance(raw, Mapping):
+        return None
+    scope = raw.get("scope")
+    if not isinstance(scope, Mapping):
+        return None
+    symbol = scope.get("symbol")
+    if not isinstance(symbol, str) or not symbol.strip():
+        return None
+    return symbol.strip()
+
+
+def _extract_timeframe(step: Any) -> str | None:
+    raw = getattr(step, "raw", None)
+    if not isinstance(raw, Mapping):
+        return None
+    timeframe = raw.get("timeframe")
+    if not isinstance(timeframe, str) or not timeframe.strip():
+        return None
+    return timeframe.strip()
+
+
+def _extract_model_name(llm_profile: Mapping[str, Any]) -> str:
+    model_name = llm_profile.get("modelName")
+    if isinstance(model_name, str) and model_name.strip():
+        return model_name.strip()
+    model_name = llm_profile.get("model")
+    if isinstance(model_name, str) and model_name.strip():
+        return model_name.strip()
+    return "dry_run"
+
+
+def _cached_content_token_count(usage: Mapping[str, Any] | None) -> int | None:
+    if not isinstance(usage, Mapping):
+        return None
+    for key in ("cachedContentTokenCount", "cached_content_token_count"):
+        value = usage.get(key)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _write_report_digest(
+    artifact_store: ArtifactStore,
+    *,
+    report: LLMReportFile,
+    report_uri: ArtifactUri,
+    payload: bytes,
+    event_logger: EventLogger,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> None:
+    # Best-effort sidecar for later steps; the report itself is already
+    # written, so a failure here never fails the step.
+    digest_uri = report_digest_uri(report_uri)
+    if digest_uri is None:
+        return
+    log_ids = {"eventId": event_id, "runId": run_id, "stepId": step_id}
+    try:
+        digest = LLMReportDigest.from_report(report, report_uri=str(report_uri), payload=payload)
+        data = digest.to_json_bytes()
+        result = artifact_store.write_bytes_create_only(
+            digest_uri, data, content_type="application/json"
+        )
+    except (ArtifactWriteFailed, SerializationError) as exc:
+        event_logger.log(
+            event="report_digest_write_failed",
+            severity="WARNING",
+            **log_ids,
+            artifact={"gcs_uri": str(digest_uri)},
+            reason=exc.__class__.__name__,
+        )
+        return
+    event_logger.log(
+        event="report_digest_written",
+        severity="INFO",
+        **log_ids,
+        artifact={"gcs_uri": str(digest_uri)},
+        bytes=len(data),
+        reportBytes=len(payload),
+        reused=result.reused,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class _GenerateOutcome:
+    response: ProviderResponse | None
+    model_name: str
+    fallback_path: list[dict[str, Any]]
+    failure: tuple[ErrorCode, str] | None = None
+
+
+def _generate_once(
+    llm_client: LLMClient,
+    *,
+    request: Mapping[str, Any],
+    time_budget: TimeBudgetPolicy,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+) -> ProviderResponse:
+    try:
+        return llm_client.generate(**request)
+    except FileReferencesExpired as exc:
+        # Resending with inline bytes is a second full LLM call; it needs the
+        # same budget as any other.
+        if not time_budget.can_start_llm_call():
+            event_logger.log(
+                event="time_budget_exceeded",
+                severity="WARNING",
+                **log_ids,
+                action="llm_inline_retry",
+                policy=time_budget.snapshot(),
+            )
+            raise
+        event_logger.log(
+            event="llm_inline_retry",
+            severity="WARNING",
+            **log_ids,
+            error={"code": ErrorCode.GEMINI_REQUEST_FAILED.value, "message": str(exc)},
+        )
+        return llm_client.generate(**request, inline_files=True)
+
+
+def _generate_with_fallback(
+    llm_client: LLMClient,
+    *,
+    prompt: LLMPrompt,
+    profile: LLMProfile,
+    schema: LLMSchema,
+    user_parts: list[Any],
+    cached_prefix_parts: int,
+    model_allowed: Callable[[str], bool] | None,
+    cache_tracker: PromptCacheTracker | None,
+    time_budget: TimeBudgetPolicy,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+) -> _GenerateOutcome:
+    # Primary model first, then any allowlisted fallbacks from the profile.
+    # Only rate limits and provider 5xx errors advance the cascade.
+    model_chain = [
+        model_name
+        for model_name in profile.model_chain()
+        if model_name == profile.model_name
+        or model_allowed is None
+        or model_allowed(model_name)
+    ]
+    fallback_path: list[dict[str, Any]] = []
+    last_failure: tuple[ErrorCode, str] = (
+        ErrorCode.GEMINI_REQUEST_FAILED,
+        "Gemini request failed",
+    )
+    response = None
+    used_model_name = profile.model_name
+    for attempt_index, model_name in enumerate(model_chain):
+        request: dict[str, Any] = {
+            "system": prompt.system_instruction,
+            "user_parts": user_parts,
+            "profile": profile.with_model_name(model_name),
+            "llm_schema": schema,
+        }
+        # Only sent when there is a prefix to cache, so clients that predate
+        # context caching keep working.
+        if cached_prefix_parts > 0:
+            request["cached_prefix_parts"] = cached_prefix_parts
+        if attempt_index > 0:
+            if not time_budget.can_start_llm_call():
+                event_logger.log(
+                    event="time_budget_exceeded",
+                    severity="WARNING",
+                    **log_ids,
+                    action="llm_fallback",
+                    policy=time_budget.snapshot(),
+                )
+                break
+            event_logger.log(
+                event="llm_model_fallback",
+                severity="WARNING",
+                **log_ids,
+                llm={
+                    "fromModelName": model_chain[attempt_index - 1],
+                    "toModelName": model_name,
+                },
+                reason={"code": last_failure[0].value},
+            )
+
+        event_logger.log(
+            event="llm_request_started",
+            severity="INFO",
+            **log_ids,
+            llm={
+                "promptId": prompt.prompt_id,
+                "modelName": model_name,
+                "schemaId": schema.schema_id,
+            },
+            attempt=attempt_index + 1,
+        )
+
+        try:
+            response = _generate_once(
+                llm_client,
+                request=request,
+                time_budget=time_budget,
+                event_logger=event_logger,
+                log_ids=log_ids,
+            )
+        except RateLimited as exc:
+            event_logger.log(
+                event="llm_request_finished",
+                severity="ERROR",
+                **log_ids,
+                status="failed",
+                error={"code": ErrorCode.RATE_LIMITED.value, "message": str(exc)},
+            )
+            last_failure = (ErrorCode.RATE_LIMITED, "Gemini rate limited")
+            fallback_path.append(
+                {"modelName": model_name, "errorCode": ErrorCode.RATE_LIMITED.value}
+            )
+            continue
+        except SafetyBlocked as exc:
+            event_logger.log(
+                event="llm_request_finished",
+                severity="ERROR",
+                **log_ids,
+                status="failed",
+                error={"code": ErrorCode.LLM_SAFETY_BLOCK.value, "message": str(exc)},
+            )
+            return _GenerateOutcome(
+                response=None,
+                model_name=model_name,
+                fallback_path=fallback_path,
+                failure=(ErrorCode.LLM_SAFETY_BLOCK, "Gemini safety block"),
+            )
+        except RequestFailed as exc:
+            event_logger.log(
+                event="llm_request_finished",
+                severity="ERROR",
+                **log_ids,
+                status="failed",
+                error={"code": ErrorCode.GEMINI_REQUEST_FAILED.value, "message": str(exc)},
+            )
+            if not exc.is_server_error():
+                return _GenerateOutcome(
+                    response=None,
+                    model_name=model_name,
+                    fallback_path=fallback_path,
+                    failure=(ErrorCode.GEMINI_REQUEST_FAILED, "Gemini request failed"),
+                )
+            last_failure = (ErrorCode.GEMINI_REQUEST_FAILED, "Gemini request failed")
+            fallback_path.append(
+                {"modelName": model_name, "errorCode": ErrorCode.GEMINI_REQUEST_FAILED.value}
+            )
+            continue
+        used_model_name = model_name
+        break
+
+    if response is None:
+        return _GenerateOutcome(
+            response=None,
+            model_name=used_model_name,
+            fallback_path=fallback_path,
+            failure=last_failure,
+        )
+
+    event_logger.log(
+        event="llm_request_finished",
+        severity="INFO",
+        **log_ids,
+        status="succeeded",
+        finishReason=response.finish_reason,
+        llm={
+            "modelName": used_model_name,
+            "usageMetadata": response.usage,
+            "cachedContent": response.cached_content,
+            "cachedContentTokenCount": _cached_content_token_count(response.usage),
+        },
+    )
+    if cache_tracker is not None and response.cached_content is None:
+        # Only requests without an explicit cached content say anything about
+        # the provider's implicit prefix caching.
+        cache_stats = cache_tracker.record(prompt_id=prompt.prompt_id, usage=response.usage)
+        event_logger.log(
+            event="llm_prompt_cache_stats",
+            severity="INFO",
+            **log_ids,
+            llm={"promptId": prompt.prompt_id, "implicitCache": cache_stats.to_log_dict()},
+        )
+    if fallback_path:
+        fallback_path.append({"modelName": used_model_name})
+    return _GenerateOutcome(
+        response=response, model_name=used_model_name, fallback_path=fallback_path
+    )
+
+
+def _log_structured_output_invalid(
+    event_logger: EventLogger,
+    *,
+    validated: StructuredOutputInvalid,
+    finish_reason: str | None,
+    finalize_budget_seconds: int,
+    log_ids: Mapping[str, str],
+) -> None:
+    event_logger.log(
+        event="structured_output_invalid",
+        severity="WARNING",
+        **log_ids,
+        reason={"kind": validated.kind, "message": validated.message},
+        llm={"finishReason": finish_reason},
+        diagnostics={
+            "textBytes": validated.text_bytes,
+            "textSha256": validated.text_sha256,
+        },
+        policy={"repairPlanned": False, "finalizeBudgetSeconds": finalize_budget_seconds},
+    )
+
+
+def _llm_report_metadata(
+    *,
+    schema_version: int,
+    run_id: str,
+    step_id: str,
+    symbol: str,
+    timeframe: str,
+    inputs: LLMReportInputs,
+    metadata_inputs: Mapping[str, Any],
+    schema: LLMSchema,
+    model_name: str,
+    response: ProviderResponse,
+    fallback_path: list[dict[str, Any]],
+) -> dict[str, Any]:
+    created_at = _now_rfc3339()
+    metadata: dict[str, Any] = {
+        "schemaVersion": schema_version,
+        "runId": run_id,
+        "stepId": step_id,
+        "createdAt": created_at,
+        "finishedAt": created_at,
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "llm": {
+            "promptId": inputs.prompt_id,
+            "modelName": model_name,
+            "schemaId": schema.schema_id,
+            "schemaSha256": schema.sha256,
+            "llmProfile": dict(inputs.llm_profile),
+            "finishReason": response.finish_reason,
+            "usageMetadata": response.usage,
+        },
+        "inputs": dict(metadata_inputs),
+    }
+    if fallback_path:
+        metadata["llm"]["fallbackPath"] = fallback_path
+    return metadata
+
+
+def _set_batch_metadata(
+    metadata: dict[str, Any],
+    batch: Mapping[str, Any],
+    *,
+    usage: Mapping[str, Any] | None,
+) -> None:
+    # The combined request's usage covers every step it answered, so it is
+    # recorded once, on the first answered step in request order, instead of
+    # being copied into each report as that step's own usage.
+    llm = metadata["llm"]
+    llm.pop("usageMetadata", None)
+    llm["batch"] = dict(batch)
+    if usage is not None:
+        llm["batch"]["usageMetadata"] = usage
+
+
+def _report_metadata_inputs(
+    inputs: LLMReportInputs, resolved: ResolvedUserInput
+) -> dict[str, Any]:
+    metadata_inputs: dict[str, Any] = {
+        "ohlcv_gcs_uri": inputs.ohlcv_gcs_uri,
+        "charts_outputsManifestGcsUri": inputs.charts_manifest_gcs_uri,
+    }
+    if inputs.previous_report_gcs_uris:
+        metadata_inputs["report_gcs_uris"] = list(inputs.previous_report_gcs_uris)
+    if resolved.ohlcv_downsampling is not None:
+        metadata_inputs["ohlcv_downsampling"] = resolved.ohlcv_downsampling.to_dict()
+    if resolved.ohlcv_coverage is not None:
+        metadata_inputs["ohlcv_coverage"] = resolved.ohlcv_coverage.to_dict()
+    if resolved.ohlcv_increment is not None:
+        metadata_inputs["ohlcv_increment"] = resolved.ohlcv_increment.to_dict()
+    return metadata_inputs
+
+
+def _store_report(
+    artifact_store: ArtifactStore,
+    *,
+    report: LLMReportFile,
+    report_uri: ArtifactUri,
+    event_logger: EventLogger,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+    write_retry: WriteRetryPolicy | None = None,
+    time_budget: TimeBudgetPolicy | None = None,
+    content_encoding: str | None = None,
+    commit_pipeline: CommitPipeline | None = None,
+) -> tuple[ErrorCode, str] | None:
+    """Write the report and its digest sidecar; returns the step failure, if any.
+
+    Both writes are done when this returns, so steps triggered by the
+    finalize always find the digest. With ``commit_pipeline`` the digest is
+    uploaded alongside the report. ``content_encoding`` applies to the
+    report only; the digest sidecar is always stored as is.
+    """
+    try:
+        payload = report.to_json_bytes()
+    except SerializationError as exc:
+        return (ErrorCode.INVALID_STEP_INPUTS, str(exc))
+
+    payload_bytes = len(payload)
+    log_ids = {"eventId": event_id, "runId": run_id, "stepId": step_id}
+    event_logger.log(
+        event="gcs_write_started",
+        severity="INFO",
+        **log_ids,
+        artifact={"gcs_uri": str(report_uri)},
+        bytes=payload_bytes,
+    )
+
+    def _log_retry(attempt: int, backoff: float, exc: ArtifactWriteFailed) -> None:
+        event_logger.log(
+            event="gcs_write_retry",
+            severity="WARNING",
+            **log_ids,
+            artifact={"gcs_uri": str(report_uri)},
+            attempt=attempt,
+            backoffSeconds=backoff,
+            error={"code": ErrorCode.GCS_WRITE_FAILED.value, "retryable": exc.retryable},
+        )
+
+    def write_digest() -> None:
+        _write_report_digest(
+            artifact_store,
+            report=report,
+            report_uri=report_uri,
+            payload=payload,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+        )
+
+    digest_write = commit_pipeline.submit(write_digest) if commit_pipeline is not None else None
+    attempts = 1
+    try:
+        if write_retry is not None and time_budget is not None:
+            write_result, attempts = write_with_retry(
+                artifact_store,
+                report_uri,
+                payload,
+                content_type="application/json",
+                content_encoding=content_encoding,
+                policy=write_retry,
+                remaining_seconds=time_budget.remaining_seconds,
+                on_retry=_log_retry,
+            )
+        else:
+            write_result = artifact_store.write_bytes_create_only(
+                report_uri,
+                payload,
+                content_type="application/json",
+                **encoding_kwargs(content_encoding),
+            )
+    except ArtifactWriteFailed as exc:
+        event_logger.log(
+            event="gcs_write_finished",
+            severity="ERROR",
+            **log_ids,
+            artifact={"gcs_uri": str(report_uri)},
+            ok=False,
+            bytes=payload_bytes,
+            error={"code": ErrorCode.GCS_WRITE_FAILED.value, "retryable": exc.retryable},
+        )
+        if digest_write is not None:
+            # Started with the upload; let it finish within the invocation. A
+            # retried step keeps this create-only digest, and its report.sha256
+            # names the payload it was built from.
+            digest_write.result()
+        return (ErrorCode.GCS_WRITE_FAILED, "Artifact write failed")
+
+    event_logger.log(
+        event="gcs_write_finished",
+        severity="INFO",
+        **log_ids,
+        artifact={"gcs_uri": str(report_uri)},
+        ok=True,
+        bytes=payload_bytes,
+        storedBytes=write_result.stored_bytes,
+        reused=write_result.reused,
+        attempts=attempts,
+    )
+    if digest_write is None:
+        write_digest()
+    else:
+        digest_write.result()
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class _BatchCandidate:
+    step: LLMReportStep
+    timeframe: str
+    inputs: LLMReportInputs
+    report_uri: ArtifactUri
+
+    @property
+    def step_id(self) -> str:
+        return self.step.step.step_id
+
+
+@dataclass(frozen=True, slots=True)
+class _BatchMember:
+    step_id: str
+    timeframe: str
+    inputs: LLMReportInputs
+    resolved: ResolvedUserInput
+    payload: UserInputPayload
+    report_uri: ArtifactUri
+
+
+@dataclass(frozen=True, slots=True)
+class _BatchOutcome:
+    response: ProviderResponse
+    model_name: str
+    batch: dict[str, Any]
+    primary_output: dict[str, Any] | None
+
+
+def _base_user_prompt(prompt: LLMPrompt, resolved: ResolvedUserInput) -> str:
+    if resolved.ohlcv_increment is not None and prompt.incremental_user_prompt:
+        return prompt.incremental_user_prompt
+    return prompt.user_prompt
+
+
+def _batch_candidate(
+    candidate: LLMReportStep,
+    *,
+    flow_run: FlowRun,
+    primary_inputs: LLMReportInputs,
+    path_policy: ArtifactPathPolicy,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+    run_id: str,
+) -> _BatchCandidate | None:
+    # Only steps that would send the same request shape can share a call:
+    # same prompt and the same llmProfile (hence model and schema). These
+    # checks read nothing; context is only resolved once the step is claimed.
+    step_id = candidate.step.step_id
+
+    def skip(reason: str, message: str | None = None) -> None:
+        event_logger.log(
+            event="llm_batch_candidate_skipped",
+            severity="INFO",
+            **log_ids,
+            candidate=step_id,
+            reason=reason,
+            message=message,
+        )
+
+    try:
+        inputs = candidate.parse_inputs(flow_run=flow_run)
+    except (InvalidStepInputs, LLMProfileInvalid) as exc:
+        skip("invalid_inputs", str(exc))
+        return None
+    if inputs.execution_mode != primary_inputs.execution_mode:
+        skip("execution_mode")
+        return None
+    if inputs.prompt_id != primary_inputs.prompt_id:
+        skip("prompt")
+        return None
+    if inputs.llm_profile != primary_inputs.llm_profile:
+        skip("llm_profile")
+        return None
+    timeframe = _extract_timeframe(candidate.step)
+    if timeframe is None:
+        skip("invalid_inputs", "timeframe is required")
+        return None
+    try:
+        report_uri = path_policy.report_uri(run_id, timeframe, step_id)
+    except InvalidIdentifier as exc:
+        skip("invalid_inputs", str(exc))
+        return None
+    return _BatchCandidate(
+        step=candidate, timeframe=timeframe, inputs=inputs, report_uri=report_uri
+    )
+
+
+def _resolve_batch_member(
+    candidate: _BatchCandidate,
+    *,
+    flow_run: FlowRun,
+    prompt: LLMPrompt,
+    user_input_assembler: UserInputAssembler,
+    event_logger: EventLogger,
+    event_id: str,
+) -> _BatchMember:
+    """Resolve and assemble a claimed candidate; raises InvalidStepInputs."""
+    resolved = user_input_assembler.resolve(
+        flow_run=flow_run,
+        step=candidate.step,
+        inputs=candidate.inputs,
+        event_logger=event_logger,
+        event_id=event_id,
+        indicators=prompt.derived_indicators,
+        projections=prompt.context_projections,
+    )
+    payload = user_input_assembler.assemble(
+        base_user_prompt=_base_user_prompt(prompt, resolved), resolved=resolved
+    )
+    return _BatchMember(
+        step_id=candidate.step_id,
+        timeframe=candidate.timeframe,
+        inputs=candidate.inputs,
+        resolved=resolved,
+        payload=payload,
+        report_uri=candidate.report_uri,
+    )
+
+
+def _finalize_step_result(
+    flow_repo: FlowRunRepository,
+    *,
+    run_id: str,
+    step_id: str,
+    event: str,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+    outputs_gcs_uri: str | None = None,
+    failure: tuple[ErrorCode, str] | None = None,
+) -> str:
+    # Finalize for steps other than the invocation's primary one (batch
+    # companions, deferred completions); logs ``event`` instead of
+    # ``cloud_event_finished``.
+    finished_at = _now_rfc3339()
+    try:
+        if failure is None:
+            result = flow_repo.finalize_step(
+                run_id, step_id, "SUCCEEDED", finished_at, outputs_gcs_uri=outputs_gcs_uri
+            )
+        else:
+            result = flow_repo.finalize_step(
+                run_id,
+                step_id,
+                "FAILED",
+                finished_at,
+                error=StepError.from_error_code(*failure),
+            )
+    except Exception:
+        event_logger.log(
+            event=event,
+            severity="ERROR",
+            **log_ids,
+            status="failed",
+            error={
+                "code": ErrorCode.FIRESTORE_FINALIZE_FAILED.value,
+                "message": "Failed to finalize step",
+            },
+        )
+        return "failed"
+    if not result.updated:
+        event_logger.log(
+            event=event,
+            severity="WARNING",
+            **log_ids,
+            status="noop",
+            error={"code": ErrorCode.STEP_FINALIZE_CONFLICT.value},
+            reason=result.reason,
+        )
+        return "noop"
+    if failure is not None:
+        event_logger.log(
+            event=event,
+            severity="ERROR",
+            **log_ids,
+            status="failed",
+            error={"code": failure[0].value, "message": failure[1]},
+        )
+        return "failed"
+    event_logger.log(event=event, severity="INFO", **log_ids, status="ok")
+    return "ok"
+
+
+def _send_batch_request(
+    *,
+    step_ids: list[str],
+    sections: Sequence[tuple[str, str | None, UserInputPayload]],
+    estimated_tokens: int,
+    prompt: LLMPrompt,
+    schema: LLMSchema,
+    llm_profile: LLMProfile,
+    llm_client: LLMClient,
+    structured_output_validator: StructuredOutputValidator,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+) -> tuple[ProviderResponse | None, dict[str, dict[str, Any]]]:
+    """Send the combined request; returns the response and the valid outputs."""
+    batch_schema = build_batch_schema(schema, step_ids)
+    user_parts = build_batch_user_parts(sections)
+    event_logger.log(
+        event="llm_batch_started",
+        severity="INFO",
+        **log_ids,
+        llm={
+            "promptId": prompt.prompt_id,
+            "modelName": llm_profile.model_name,
+            "schemaId": schema.schema_id,
+        },
+        batch={
+            "stepIds": step_ids,
+            "estimatedTokens": estimated_tokens,
+        },
+    )
+
+    response: ProviderResponse | None = None
+    outputs: dict[str, dict[str, Any]] = {}
+    try:
+        response = llm_client.generate(
+            system=prompt.system_instruction,
+            user_parts=user_parts,
+            profile=llm_profile,
+            llm_schema=batch_schema,
+        )
+    except LLMClientError as exc:
+        event_logger.log(
+            event="llm_batch_finished",
+            severity="WARNING",
+            **log_ids,
+            status="failed",
+            reason=exc.__class__.__name__,
+            batch={"stepIds": step_ids},
+        )
+    if response is not None:
+        split = split_batch_output(response.text, step_ids) or {}
+        for step_id, output in split.items():
+            validated = structured_output_validator.validate(
+                text=json.dumps(output), llm_schema=schema
+            )
+            if not isinstance(validated, StructuredOutputInvalid):
+                outputs[step_id] = validated
+        # Steps without a valid entry are released by the caller.
+        if len(outputs) == len(step_ids):
+            status = "succeeded"
+        else:
+            status = "partial" if outputs else "invalid"
+        event_logger.log(
+            event="llm_batch_finished",
+            severity="INFO" if status == "succeeded" else "WARNING",
+            **log_ids,
+            status=status,
+            finishReason=response.finish_reason,
+            llm={"modelName": llm_profile.model_name, "usageMetadata": response.usage},
+            batch={"stepIds": step_ids, "validStepIds": sorted(outputs)},
+        )
+    return response, outputs
+
+
+def _run_step_batch(
+    *,
+    batch_policy: LLMBatchPolicy,
+    flow_run: FlowRun,
+    primary: LLMReportStep,
+    primary_inputs: LLMReportInputs,
+    primary_payload: UserInputPayload,
+    primary_timeframe: str,
+    prompt: LLMPrompt,
+    schema: LLMSchema,
+    schema_version: int,
+    symbol: str,
+    llm_profile: LLMProfile,
+    flow_repo: FlowRunRepository,
+    artifact_store: ArtifactStore,
+    path_policy: ArtifactPathPolicy,
+    llm_client: LLMClient,
+    user_input_assembler: UserInputAssembler,
+    structured_output_validator: StructuredOutputValidator,
+    time_budget: TimeBudgetPolicy,
+    finalize_budget_seconds: int,
+    event_logger: EventLogger,
+    event_id: str,
+    run_id: str,
+    write_retry: WriteRetryPolicy | None = None,
+    report_content_encoding: str | None = None,
+) -> _BatchOutcome | None:
+    """Answer the claimed primary step and compatible READY steps in one call.
+
+    Companion steps are admitted and claimed before their context is read,
+    then resolved and finalized here; the primary step's output is returned
+    for the regular write path. Claimed companions that do not fit into the
+    request once resolved, or that the combined answer leaves out, are
+    released back to READY. Returns None when no batch was sent or the
+    combined call failed, so the primary runs on its own.
+    """
+    primary_id = primary.step.step_id
+    log_ids = {"eventId": event_id, "runId": run_id, "stepId": primary_id}
+    candidates: list[_BatchCandidate] = []
+    for step in ReadyStepSelector.executable_llm_steps(flow_run):
+        if len(candidates) + 1 >= batch_policy.max_steps:
+            break
+        if step.step.step_id == primary_id:
+            continue
+        candidate = _batch_candidate(
+            step,
+            flow_run=flow_run,
+            primary_inputs=primary_inputs,
+            path_policy=path_policy,
+            event_logger=event_logger,
+            log_ids=log_ids,
+            run_id=run_id,
+        )
+        if candidate is not None:
+            candidates.append(candidate)
+    if not candidates:
+        return None
+
+    # Candidates share the primary's prompt and profile, so its payload
+    # stands in for their size until they are claimed and resolved.
+    primary_tokens = estimate_payload_tokens(primary_payload)
+    admitted = batch_policy.admit(
+        [primary_tokens] * (len(candidates) + 1),
+        remaining_seconds=time_budget.remaining_seconds(),
+        finalize_budget_seconds=finalize_budget_seconds,
+    )
+    if admitted < 2:
+        event_logger.log(
+            event="llm_batch_skipped",
+            severity="INFO",
+            **log_ids,
+            reason="budget",
+            candidates=[candidate.step_id for candidate in candidates],
+            estimatedTokens=[primary_tokens],
+            policy=time_budget.snapshot(),
+        )
+        return None
+
+    claimed: list[_BatchCandidate] = []
+    for candidate in candidates[: admitted - 1]:
+        claim = flow_repo.claim_step(run_id, candidate.step_id, _now_rfc3339())
+        if claim.claimed:
+            claimed.append(candidate)
+        else:
+            event_logger.log(
+                event="llm_batch_candidate_skipped",
+                severity="INFO",
+                **log_ids,
+                candidate=candidate.step_id,
+                reason="claim_conflict",
+                message=claim.reason,
+            )
+    if not claimed:
+        event_logger.log(
+            event="llm_batch_skipped",
+            severity="INFO",
+            **log_ids,
+            reason="claim_conflict",
+            candidates=[candidate.step_id for candidate in candidates[: admitted - 1]],
+        )
+        return None
+
+    # Claimed companions this invocation has not finished yet; whatever is
+    # left when it stops (unusable answer, no room, an exception) goes back
+    # to READY so the step's own trigger runs it.
+    pending = {candidate.step_id: "not_answered" for candidate in claimed}
+    try:
+        return _answer_step_batch(
+            claimed,
+            pending=pending,
+            flow_run=flow_run,
+            primary_id=primary_id,
+            primary_payload=primary_payload,
+            primary_timeframe=primary_timeframe,
+            primary_tokens=primary_tokens,
+            batch_policy=batch_policy,
+            prompt=prompt,
+            schema=schema,
+            schema_version=schema_version,
+            symbol=symbol,
+            llm_profile=llm_profile,
+            flow_repo=flow_repo,
+            artifact_store=artifact_store,
+            llm_client=llm_client,
+            user_input_assembler=user_input_assembler,
+            structured_output_validator=structured_output_validator,
+            time_budget=time_budget,
+            finalize_budget_seconds=finalize_budget_seconds,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            log_ids=log_ids,
+            write_retry=write_retry,
+            report_content_encoding=report_content_encoding,
+        )
+    finally:
+        for step_id, reason in pending.items():
+            _release_step(
+                flow_repo,
+                run_id=run_id,
+                step_id=step_id,
+                reason=reason,
+                event_logger=event_logger,
+                log_ids={"eventId": event_id, "runId": run_id, "stepId": step_id},
+            )
+
+
+def _answer_step_batch(
+    claimed: Sequence[_BatchCandidate],
+    *,
+    pending: dict[str, str],
+    flow_run: FlowRun,
+    primary_id: str,
+    primary_payload: UserInputPayload,
+    primary_timeframe: str,
+    primary_tokens: int,
+    batch_policy: LLMBatchPolicy,
+    prompt: LLMPrompt,
+    schema: LLMSchema,
+    schema_version: int,
+    symbol: str,
+    llm_profile: LLMProfile,
+    flow_repo: FlowRunRepository,
+    artifact_store: ArtifactStore,
+    llm_client: LLMClient,
+    user_input_assembler: UserInputAssembler,
+    structured_output_validator: StructuredOutputValidator,
+    time_budget: TimeBudgetPolicy,
+    finalize_budget_seconds: int,
+    event_logger: EventLogger,
+    event_id: str,
+    run_id: str,
+    log_ids: Mapping[str, str],
+    write_retry: WriteRetryPolicy | None,
+    report_content_encoding: str | None,
+) -> _BatchOutcome | None:
+    # Steps removed from ``pending`` are finished here; the caller releases
+    # the rest with the reason left next to them.
+    members: list[_BatchMember] = []
+    for candidate in claimed:
+        member_ids = {"eventId": event_id, "runId": run_id, "stepId": candidate.step_id}
+        try:
+            members.append(
+                _resolve_batch_member(
+                    candidate,
+                    flow_run=flow_run,
+                    prompt=prompt,
+                    user_input_assembler=user_input_assembler,
+                    event_logger=event_logger,
+                    event_id=event_id,
+                )
+            )
+        except InvalidStepInputs as exc:
+            # Claimed already: fail it as its own invocation would have.
+            del pending[candidate.step_id]
+            _finalize_step_result(
+                flow_repo,
+                run_id=run_id,
+                step_id=candidate.step_id,
+                event="llm_batch_step_finished",
+                event_logger=event_logger,
+                log_ids=member_ids,
+                failure=(ErrorCode.INVALID_STEP_INPUTS, str(exc)),
+            )
+    if not members:
+        return None
+
+    # Re-check the token limit with the resolved payloads; claimed members
+    # that no longer fit are released.
+    token_estimates = [primary_tokens]
+    token_estimates.extend(estimate_payload_tokens(member.payload) for member in members)
+    fits = batch_policy.admit(
+        token_estimates,
+        remaining_seconds=time_budget.remaining_seconds(),
+        finalize_budget_seconds=finalize_budget_seconds,
+    )
+    unbatched = members[fits - 1 :]
+    members = members[: fits - 1]
+    for member in unbatched:
+        pending[member.step_id] = "budget"
+        event_logger.log(
+            event="llm_batch_candidate_skipped",
+            severity="INFO",
+            **log_ids,
+            candidate=member.step_id,
+            reason="budget",
+            message="claimed; released",
+        )
+    if not members:
+        event_logger.log(
+            event="llm_batch_skipped",
+            severity="INFO",
+            **log_ids,
+            reason="budget",
+            candidates=[member.step_id for member in unbatched],
+            estimatedTokens=token_estimates,
+            policy=time_budget.snapshot(),
+        )
+        return None
+
+    step_ids = [primary_id] + [member.step_id for member in members]
+    response, outputs = _send_batch_request(
+        step_ids=step_ids,
+        sections=[(primary_id, primary_timeframe, primary_payload)]
+        + [(member.step_id, member.timeframe, member.payload) for member in members],
+        estimated_tokens=sum(token_estimates[: len(step_ids)]),
+        prompt=prompt,
+        schema=schema,
+        llm_profile=llm_profile,
+        llm_client=llm_client,
+        structured_output_validator=structured_output_validator,
+        event_logger=event_logger,
+        log_ids=log_ids,
+    )
+    if response is None:
+        return None
+
+    batch_metadata = {"stepIds": step_ids, "size": len(step_ids)}
+    usage_step_id = next((step_id for step_id in step_ids if step_id in outputs), None)
+    for member in members:
+        output = outputs.get(member.step_id)
+        if output is None:
+            # Combined answer unusable for this step: it runs on its own.
+            pending[member.step_id] = "batch_output_missing"
+            continue
+        member_ids = {"eventId": event_id, "runId": run_id, "stepId": member.step_id}
+        metadata = _llm_report_metadata(
+            schema_version=schema_version,
+            run_id=run_id,
+            step_id=member.step_id,
+            symbol=symbol,
+            timeframe=member.timeframe,
+            inputs=member.inputs,
+            metadata_inputs=_report_metadata_inputs(member.inputs, member.resolved),
+            schema=schema,
+            model_name=llm_profile.model_name,
+            response=response,
+            fallback_path=[],
+        )
+        _set_batch_metadata(
+            metadata,
+            batch_metadata,
+            usage=response.usage if member.step_id == usage_step_id else None,
+        )
+        failure = _store_report(
+            artifact_store,
+            report=LLMReportFile(metadata=metadata, output=output),
+            report_uri=member.report_uri,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=member.step_id,
+            write_retry=write_retry,
+            time_budget=time_budget,
+            content_encoding=report_content_encoding,
+        )
+        del pending[member.step_id]
+        _finalize_step_result(
+            flow_repo,
+            run_id=run_id,
+            step_id=member.step_id,
+            event="llm_batch_step_finished",
+            event_logger=event_logger,
+            log_ids=member_ids,
+            outputs_gcs_uri=str(member.report_uri) if failure is None else None,
+            failure=failure,
+        )
+
+    return _BatchOutcome(
+        response=response,
+        model_name=llm_profile.model_name,
+        batch=batch_metadata,
+        primary_output=outputs.get(primary_id),
+    )
+
+
+def _release_step(
+    flow_repo: FlowRunRepository,
+    *,
+    run_id: str,
+    step_id: str,
+    reason: str,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+) -> None:
+    # Undo a batch claim; the step keeps no trace of this invocation.
+    try:
+        result = flow_repo.release_step(run_id, step_id)
+    except Exception:
+        event_logger.log(
+            event="llm_batch_step_finished",
+            severity="ERROR",
+            **log_ids,
+            status="failed",
+            reason=reason,
+            error={
+                "code": ErrorCode.FIRESTORE_FINALIZE_FAILED.value,
+                "message": "Failed to release step",
+            },
+        )
+        return
+    event_logger.log(
+        event="llm_batch_step_finished",
+        severity="INFO" if result.updated else "WARNING",
+        **log_ids,
+        status="released" if result.updated else "noop",
+        reason=reason if result.updated else result.reason,
+    )
+
+
+def _submit_deferred(
+    batch_prediction: BatchPredictionService,
+    *,
+    flow_repo: FlowRunRepository,
+    prompt: LLMPrompt,
+    profile: LLMProfile,
+    schema: LLMSchema,
+    user_parts: list[Any],
+    metadata_inputs: Mapping[str, Any],
+    event_logger: EventLogger,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+    finalize_failed: Callable[[ErrorCode, str], str],
+    log_finished: Callable[..., None],
+) -> str:
+    # The step stays RUNNING; ``outputs.execution.deferred`` marks it as
+    # waiting on the provider job until DeferredStepCompleter finalizes it.
+    log_ids = {"eventId": event_id, "runId": run_id, "stepId": step_id}
+    try:
+        job_name = batch_prediction.submit(
+            display_name=f"{run_id}/{step_id}",
+            system=prompt.system_instruction,
+            user_parts=user_parts,
+            profile=profile,
+            llm_schema=schema,
+        )
+    except LLMClientError as exc:
+        code = (
+            ErrorCode.RATE_LIMITED
+            if isinstance(exc, RateLimited)
+            else ErrorCode.GEMINI_REQUEST_FAILED
+        )
+        event_logger.log(
+            event="llm_deferred_submitted",
+            severity="ERROR",
+            **log_ids,
+            status="failed",
+            llm={"modelName": profile.model_name},
+            error={"code": code.value, "message": str(exc)},
+        )
+        return finalize_failed(code, "Batch job submission failed")
+
+    submission = {
+        "state": DEFERRED_STATE_SUBMITTED,
+        "jobName": job_name,
+        "submittedAt": _now_rfc3339(),
+        "modelName": profile.model_name,
+        "schemaId": schema.schema_id,
+        "reportInputs": dict(metadata_inputs),
+    }
+    try:
+        result = flow_repo.record_submission(run_id, step_id, submission)
+    except Exception:
+        _cancel_deferred_job(
+            batch_prediction,
+            job_name,
+            reason="record_failed",
+            event_logger=event_logger,
+            log_ids=log_ids,
+        )
+        return finalize_failed(
+            ErrorCode.FIRESTORE_FINALIZE_FAILED,
+            f"Failed to record batch job {job_name}",
+        )
+    if not result.updated:
+        _cancel_deferred_job(
+            batch_prediction,
+            job_name,
+            reason=result.reason or "not_recorded",
+            event_logger=event_logger,
+            log_ids=log_ids,
+        )
+        log_finished(
+            status="noop",
+            severity="WARNING",
+            error={"code": ErrorCode.STEP_FINALIZE_CONFLICT.value},
+            reason=result.reason,
+        )
+        return "noop"
+    event_logger.log(
+        event="llm_deferred_submitted",
+        severity="INFO",
+        **log_ids,
+        status="ok",
+        llm={"modelName": profile.model_name, "jobName": job_name},
+    )
+    log_finished(status="submitted", severity="INFO")
+    return "submitted"
+
+
+def _cancel_deferred_job(
+    batch_prediction: BatchPredictionService,
+    job_name: str,
+    *,
+    reason: str,
+    event_logger: EventLogger,
+    log_ids: Mapping[str, str],
+) -> None:
+    # Without a recorded submission no completion poll will ever see the
+    # job; cancel it, or leave its name in the log so it can be found.
+    try:
+        batch_prediction.cancel(job_name)
+    except LLMClientError as exc:
+        event_logger.log(
+            event="llm_deferred_cancelled",
+            severity="ERROR",
+            **log_ids,
+            status="failed",
+            reason=reason,
+            llm={"jobName": job_name},
+            error={"message": str(exc)},
+        )
+        return
+    event_logger.log(
+        event="llm_deferred_cancelled",
+        severity="WARNING",
+        **log_ids,
+        status="ok",
+        reason=reason,
+        llm={"jobName": job_name},
+    )
+
+
+class DeferredStepCompleter:
+    """Finalizes deferred LLM_REPORT steps once their batch jobs are done.
 
+    Invoked from a poll/completion entry point rather than a Firestore event:
+    for each RUNNING step with a SUBMITTED batch job it validates the job
+    output against the step's schema, writes the report and finalizes the
+    step. Steps whose job is still running are left untouched.
+    """
 
-def _extract_timeframe(step: Any) -> str | None:
-    raw = getattr(step, "raw", None)
-    if not isinstance(raw, Mapping):
-        return None
-    timeframe = raw.get("timeframe")
-    if not isinstance(timeframe, str) or not timeframe.strip():
-        return None
-    return timeframe.strip()
+    def __init__(
+        self,
+        *,
+        flow_repo: FlowRunRepository,
+        schema_repo: SchemaRepository,
+        event_logger: EventLogger,
+        artifact_store: ArtifactStore,
+        path_policy: ArtifactPathPolicy,
+        batch_prediction: BatchPredictionService,
+        structured_output_validator: StructuredOutputValidator | None = None,
+        finalize_budget_seconds: int = 120,
+        report_content_encoding: str | None = None,
+    ) -> None:
+        self._flow_repo = flow_repo
+        self._schema_repo = schema_repo
+        self._event_logger = event_logger
+        self._artifact_store = artifact_store
+        self._path_policy = path_policy
+        self._batch_prediction = batch_prediction
+        self._structured_output_validator = (
+            structured_output_validator or StructuredOutputValidator()
+        )
+        self._finalize_budget_seconds = finalize_budget_seconds
+        self._report_content_encoding = report_content_encoding
+
+    def complete_run(self, run_id: str) -> dict[str, str]:
+        """Status per deferred step: ok, failed, noop or pending."""
+        record = self._flow_repo.get(run_id)
+        if record is None:
+            return {}
+        flow_run = record.flow_run
+        results: dict[str, str] = {}
+        for step in ReadyStepSelector.deferred_llm_steps(flow_run):
+            results[step.step_id] = self._complete_step(
+                flow_run, LLMReportStep.from_flow_step(step), step.deferred_submission()
+            )
+        return results
 
+    def _complete_step(
+        self,
+        flow_run: FlowRun,
+        step: LLMReportStep,
+        submission: Mapping[str, Any],
+    ) -> str:
+        run_id = flow_run.run_id
+        step_id = step.step.step_id
+        job_name = submission["jobName"]
+        log_ids = {"eventId": job_name, "runId": run_id, "stepId": step_id}
+
+        def finalize(**kwargs: Any) -> str:
+            return _finalize_step_result(
+                self._flow_repo,
+                run_id=run_id,
+                step_id=step_id,
+                event="llm_deferred_step_finished",
+                event_logger=self._event_logger,
+                log_ids=log_ids,
+                **kwargs,
+            )
 
-def _extract_model_name(llm_profile: Mapping[str, Any]) -> str:
-    model_name = llm_profile.get("modelName")
-    if isinstance(model_name, str) and model_name.strip():
-        return model_name.strip()
-    model_name = llm_profile.get("model")
-    if isinstance(model_name, str) and model_name.strip():
-        return model_name.strip()
-    return "dry_run"
+        try:
+            status = self._batch_prediction.get(job_name)
+        except LLMClientError as exc:
+            # Transient poll failures leave the step for the next poll.
+            self._event_logger.log(
+                event="llm_deferred_pending",
+                severity="WARNING",
+                **log_ids,
+                jobState="unknown",
+                error={"message": str(exc)},
+            )
+            return "pending"
+        if not status.done:
+            self._event_logger.log(
+                event="llm_deferred_pending",
+                severity="INFO",
+                **log_ids,
+                jobState=status.state,
+            )
+            return "pending"
+        if status.state != BATCH_JOB_SUCCEEDED or status.response is None:
+            message = status.error or "Batch job failed"
+            return finalize(failure=(ErrorCode.GEMINI_REQUEST_FAILED, message))
+
+        try:
+            inputs = step.parse_inputs(flow_run=flow_run)
+        except (InvalidStepInputs, LLMProfileInvalid) as exc:
+            return finalize(failure=(ErrorCode.INVALID_STEP_INPUTS, str(exc)))
+        timeframe = _extract_timeframe(step.step)
+        if timeframe is None:
+            return finalize(failure=(ErrorCode.INVALID_STEP_INPUTS, "timeframe is required"))
+        try:
+            report_uri = self._path_policy.report_uri(run_id, timeframe, step_id)
+        except InvalidIdentifier as exc:
+            return finalize(failure=(ErrorCode.INVALID_STEP_INPUTS, str(exc)))
+        schema_id = submission.get("schemaId")
+        schema = self._schema_repo.get(schema_id) if isinstance(schema_id, str) else None
+        schema_version = _parse_schema_version(schema.schema_id) if schema else None
+        if schema is None or schema_version is None:
+            return finalize(
+                failure=(ErrorCode.LLM_PROFILE_INVALID, "schema missing or violates invariants")
+            )
+
+        response = status.response
+        validated = self._structured_output_validator.validate(
+            text=response.text,
+            llm_schema=schema,
+            finish_reason=response.finish_reason,
+        )
+        if isinstance(validated, StructuredOutputInvalid):
+            _log_structured_output_invalid(
+                self._event_logger,
+                validated=validated,
+                finish_reason=response.finish_reason,
+                finalize_budget_seconds=self._finalize_budget_seconds,
+                log_ids=log_ids,
+            )
+            return finalize(
+                failure=(ErrorCode.INVALID_STRUCTURED_OUTPUT, validated.to_error_message())
+            )
+
+        metadata_inputs = submission.get("reportInputs")
+        if not isinstance(metadata_inputs, Mapping):
+            metadata_inputs = {
+                "ohlcv_gcs_uri": inputs.ohlcv_gcs_uri,
+                "charts_outputsManifestGcsUri": inputs.charts_manifest_gcs_uri,
+            }
+        metadata = _llm_report_metadata(
+            schema_version=schema_version,
+            run_id=run_id,
+            step_id=step_id,
+            symbol=_extract_symbol(flow_run) or "",
+            timeframe=timeframe,
+            inputs=inputs,
+            metadata_inputs=metadata_inputs,
+            schema=schema,
+            model_name=submission.get("modelName") or _extract_model_name(inputs.llm_profile),
+            response=response,
+            fallback_path=[],
+        )
+        metadata["llm"]["deferred"] = {
+            "jobName": job_name,
+            "submittedAt": submission.get("submittedAt"),
+        }
+        failure = _store_report(
+            self._artifact_store,
+            report=LLMReportFile(metadata=metadata, output=validated),
+            report_uri=report_uri,
+            event_logger=self._event_logger,
+            event_id=job_name,
+            run_id=run_id,
+            step_id=step_id,
+            content_encoding=self._report_content_encoding,
+        )
+        if failure is not None:
+            return finalize(failure=failure)
+        return finalize(outputs_gcs_uri=str(report_uri))
 
 
 class FlowRunEventHandler:
@@ -120,8 +1567,18 @@ class FlowRunEventHandler:
         user_input_assembler: UserInputAssembler | None = None,
         structured_output_validator: StructuredOutputValidator | None = None,
         model_allowed: Callable[[str], bool] | None = None,
+        cache_shared_prefix: bool = False,
+        cache_tracker: PromptCacheTracker | None = None,
         finalize_budget_seconds: int = 120,
         invocation_timeout_seconds: int = 780,
+        batch_policy: LLMBatchPolicy | None = None,
+        batch_prediction: BatchPredictionService | None = None,
+        run_gate: RunGate | None = None,
+        prefetcher: StepPrefetcher | None = None,
+        claim_prelude: ClaimPrelude | None = None,
+        commit_pipeline: CommitPipeline | None = None,
+        write_retry: WriteRetryPolicy | None = None,
+        report_content_encoding: str | None = None,
     ) -> None:
         self._flow_repo = flow_repo
         self._prompt_repo = prompt_repo
@@ -135,10 +1592,62 @@ class FlowRunEventHandler:
         self._user_input_assembler = user_input_assembler
         self._structured_output_validator = structured_output_validator
         self._model_allowed = model_allowed
+        self._cache_shared_prefix = cache_shared_prefix
+        self._cache_tracker = cache_tracker
         self._finalize_budget_seconds = finalize_budget_seconds
         self._invocation_timeout_seconds = invocation_timeout_seconds
+        self._batch_policy = batch_policy
+        self._batch_prediction = batch_prediction
+        self._run_gate = run_gate
+        self._prefetcher = prefetcher
+        self._claim_prelude = claim_prelude
+        self._commit_pipeline = commit_pipeline
+        self._write_retry = write_retry
+        self._report_content_encoding = report_content_encoding
 
     def handle(self, cloud_event: Any) -> str:
+        try:
+            return self._handle_gated(cloud_event)
+        finally:
+            # A context bundle started by this step was written while its LLM
+            # call ran; the invocation still owns it until it lands.
+            if self._user_input_assembler is not None:
+                self._user_input_assembler.wait_for_bundle_writes(
+                    timeout_seconds=self._finalize_budget_seconds
+                )
+
+    def _handle_gated(self, cloud_event: Any) -> str:
+        # The budget starts on arrival, so time spent waiting for the run
+        # gate counts against the invocation.
+        started_at = time.monotonic()
+        gate = self._run_gate
+        if gate is None:
+            return self._handle(cloud_event, run_gate=None, invocation_started_at=started_at)
+        subject = _extract_field(cloud_event, "subject")
+        run_id = CloudEventParser(
+            flow_runs_collection=self._flow_runs_collection
+        ).run_id_from_subject(subject if isinstance(subject, str) else "")
+        if run_id is None:
+            return self._handle(cloud_event, run_gate=None, invocation_started_at=started_at)
+        # The gate covers read, select and claim only; it is released right
+        # after the claim so the LLM call never holds up the run's other steps.
+        with ExitStack() as gate_hold:
+            gate_hold.enter_context(gate.hold(run_id))
+            return self._handle(
+                cloud_event,
+                run_gate=gate,
+                invocation_started_at=started_at,
+                release_run_gate=gate_hold.close,
+            )
+
+    def _handle(
+        self,
+        cloud_event: Any,
+        *,
+        run_gate: RunGate | None,
+        invocation_started_at: float,
+        release_run_gate: Callable[[], None] | None = None,
+    ) -> str:
         return _handle_cloud_event_impl(
             cloud_event,
             flow_repo=self._flow_repo,
@@ -153,8 +1662,20 @@ class FlowRunEventHandler:
             user_input_assembler=self._user_input_assembler,
             structured_output_validator=self._structured_output_validator,
             model_allowed=self._model_allowed,
+            cache_shared_prefix=self._cache_shared_prefix,
+            cache_tracker=self._cache_tracker,
             finalize_budget_seconds=self._finalize_budget_seconds,
             invocation_timeout_seconds=self._invocation_timeout_seconds,
+            batch_policy=self._batch_policy,
+            batch_prediction=self._batch_prediction,
+            run_gate=run_gate,
+            invocation_started_at=invocation_started_at,
+            release_run_gate=release_run_gate,
+            prefetcher=self._prefetcher,
+            claim_prelude=self._claim_prelude,
+            commit_pipeline=self._commit_pipeline,
+            write_retry=self._write_retry,
+            report_content_encoding=self._report_content_encoding,
         )
 
 
@@ -173,8 +1694,18 @@ def handle_cloud_event(
     user_input_assembler: UserInputAssembler | None = None,
     structured_output_validator: StructuredOutputValidator | None = None,
     model_allowed: Callable[[str], bool] | None = None,
+    cache_shared_prefix: bool = False,
+    cache_tracker: PromptCacheTracker | None = None,
     finalize_budget_seconds: int = 120,
     invocation_timeout_seconds: int = 780,
+    batch_policy: LLMBatchPolicy | None = None,
+    batch_prediction: BatchPredictionService | None = None,
+    run_gate: RunGate | None = None,
+    prefetcher: StepPrefetcher | None = None,
+    claim_prelude: ClaimPrelude | None = None,
+    commit_pipeline: CommitPipeline | None = None,
+    write_retry: WriteRetryPolicy | None = None,
+    report_content_encoding: str | None = None,
 ) -> str:
     """CloudEvent handler for one Firestore update invocation."""
     handler = FlowRunEventHandler(
@@ -190,8 +1721,18 @@ def handle_cloud_event(
         user_input_assembler=user_input_assembler,
         structured_output_validator=structured_output_validator,
         model_allowed=model_allowed,
+        cache_shared_prefix=cache_shared_prefix,
+        cache_tracker=cache_tracker,
         finalize_budget_seconds=finalize_budget_seconds,
         invocation_timeout_seconds=invocation_timeout_seconds,
+        batch_policy=batch_policy,
+        batch_prediction=batch_prediction,
+        run_gate=run_gate,
+        prefetcher=prefetcher,
+        claim_prelude=claim_prelude,
+        commit_pipeline=commit_pipeline,
+        write_retry=write_retry,
+        report_content_encoding=report_content_encoding,
     )
     return handler.handle(cloud_event)
 
@@ -211,8 +1752,20 @@ def _handle_cloud_event_impl(
     user_input_assembler: UserInputAssembler | None = None,
     structured_output_validator: StructuredOutputValidator | None = None,
     model_allowed: Callable[[str], bool] | None = None,
+    cache_shared_prefix: bool = False,
+    cache_tracker: PromptCacheTracker | None = None,
     finalize_budget_seconds: int = 120,
     invocation_timeout_seconds: int = 780,
+    batch_policy: LLMBatchPolicy | None = None,
+    batch_prediction: BatchPredictionService | None = None,
+    run_gate: RunGate | None = None,
+    invocation_started_at: float | None = None,
+    release_run_gate: Callable[[], None] | None = None,
+    prefetcher: StepPrefetcher | None = None,
+    claim_prelude: ClaimPrelude | None = None,
+    commit_pipeline: CommitPipeline | None = None,
+    write_retry: WriteRetryPolicy | None = None,
+    report_content_encoding: str | None = None,
 ) -> str:
     event_id = _extract_field(cloud_event, "id") or "unknown"
     event_type = _extract_field(cloud_event, "type") or "unknown"
@@ -241,6 +1794,11 @@ def _handle_cloud_event_impl(
         )
         return "ignored"
 
+    if run_gate is not None and run_gate.covers(run_id, snapshot_time(cloud_event)):
+        # Part of a burst for a snapshot already seen idle: skip the read.
+        _log_noop(event_logger, event_id=event_id, run_id=run_id, reason="known_idle_snapshot")
+        return "noop"
+
     record = flow_repo.get(run_id)
     if record is None:
         event_logger.log(
@@ -253,6 +1811,10 @@ def _handle_cloud_event_impl(
         )
         return "ignored"
 
+    if run_gate is not None and run_gate.is_idle_snapshot(run_id, record.update_time):
+        _log_noop(event_logger, event_id=event_id, run_id=run_id, reason="unchanged_snapshot")
+        return "noop"
+
     flow_run = record.flow_run
     event_logger.log(
         event="cloud_event_parsed",
@@ -266,6 +1828,10 @@ def _handle_cloud_event_impl(
     )
 
     if flow_run.is_terminal():
+        if run_gate is not None:
+            run_gate.mark_idle(run_id, record.update_time)
+        if prefetcher is not None:
+            prefetcher.cancel(run_id)
         event_logger.log(
             event="cloud_event_noop",
             severity="INFO",
@@ -286,6 +1852,11 @@ def _handle_cloud_event_impl(
 
     pick = ReadyStepSelector.pick(flow_run)
     if pick.step is None:
+        if run_gate is not None:
+            run_gate.mark_idle(run_id, record.update_time)
+        if prefetcher is not None and pick.reason == "dependency_not_succeeded":
+            # Warm caches for steps one dependency away from running.
+            prefetcher.schedule(flow_run, pick.blocked, event_id=event_id)
         event_logger.log(
             event="cloud_event_noop",
             severity="INFO",
@@ -317,10 +1888,20 @@ def _handle_cloud_event_impl(
         timeframe=timeframe,
     )
     started_at = _now_rfc3339()
-    time_budget = TimeBudgetPolicy.start_now(
-        invocation_timeout_seconds=invocation_timeout_seconds,
-        finalize_budget_seconds=finalize_budget_seconds,
-    )
+    if invocation_started_at is None:
+        time_budget = TimeBudgetPolicy.start_now(
+            invocation_timeout_seconds=invocation_timeout_seconds,
+            finalize_budget_seconds=finalize_budget_seconds,
+        )
+    else:
+        time_budget = TimeBudgetPolicy(
+            invocation_started_at=invocation_started_at,
+            invocation_timeout_seconds=invocation_timeout_seconds,
+            finalize_budget_seconds=finalize_budget_seconds,
+        )
+    # Set once the claim is in flight; failing the step stops whatever reads
+    # the prelude has not done yet.
+    prelude: PreludeLoads | None = None
 
     def _log_cloud_event_finished(
         *,
@@ -346,6 +1927,8 @@ def _handle_cloud_event_impl(
     def _finalize_failed(
         code: ErrorCode, message: str, *, allow_ready: bool = False
     ) -> str:
+        if prelude is not None:
+            prelude.discard()
         finished_at = _now_rfc3339()
         error = StepError.from_error_code(code, message)
         try:
@@ -382,16 +1965,23 @@ def _handle_cloud_event_impl(
         )
         return "failed"
 
-    def _finalize_success(outputs_gcs_uri: str | None = None) -> str:
+    def _finalize_success(
+        outputs_gcs_uri: str | None = None, *, pending: PendingFinalize | None = None
+    ) -> str:
         finished_at = _now_rfc3339()
         try:
-            result = flow_repo.finalize_step(
-                run_id,
-                step_id,
-                "SUCCEEDED",
-                finished_at,
-                outputs_gcs_uri=outputs_gcs_uri,
-            )
+            if pending is not None:
+                result = pending.commit(
+                    step_id, "SUCCEEDED", finished_at, outputs_gcs_uri=outputs_gcs_uri
+                )
+            else:
+                result = flow_repo.finalize_step(
+                    run_id,
+                    step_id,
+                    "SUCCEEDED",
+                    finished_at,
+                    outputs_gcs_uri=outputs_gcs_uri,
+                )
         except Exception:
             _log_cloud_event_finished(
                 status="failed",
@@ -429,8 +2019,25 @@ def _handle_cloud_event_impl(
             allow_ready=True,
         )
 
+    # Prompt, schema and artifact reads overlap the claim round trip. They only
+    # read; their results are used once the claim succeeded, else discarded.
+    prelude = (
+        claim_prelude.start(
+            flow_run,
+            step_id,
+            prompt_repo=prompt_repo,
+            schema_repo=schema_repo,
+            event_id=event_id,
+        )
+        if claim_prelude is not None
+        else None
+    )
     claim = flow_repo.claim_step(run_id, step_id, started_at)
+    if release_run_gate is not None:
+        release_run_gate()
     if not claim.claimed:
+        if prelude is not None:
+            prelude.discard()
         if claim.reason == "precondition_failed":
             _log_cloud_event_finished(
                 status="noop",
@@ -471,7 +2078,10 @@ def _handle_cloud_event_impl(
         llm={"promptId": inputs.prompt_id},
     )
 
-    prompt = prompt_repo.get(inputs.prompt_id)
+    if prelude is not None:
+        prompt = prelude.prompt_for(inputs.prompt_id, prompt_repo.get)
+    else:
+        prompt = prompt_repo.get(inputs.prompt_id)
     if prompt is None:
         event_logger.log(
             event="prompt_fetch_finished",
@@ -519,7 +2129,10 @@ def _handle_cloud_event_impl(
         )
         return "schema_invalid"
 
-    schema = schema_repo.get(schema_id)
+    if prelude is not None:
+        schema = prelude.schema_for(schema_id, schema_repo.get)
+    else:
+        schema = schema_repo.get(schema_id)
     if schema is None:
         event_logger.log(
             event="structured_output_schema_invalid",
@@ -569,6 +2182,9 @@ def _handle_cloud_event_impl(
         return _finalize_failed(ErrorCode.INVALID_STEP_INPUTS, str(exc))
 
     if artifacts_dry_run:
+        # Dry runs read no context.
+        if prelude is not None:
+            prelude.discard()
         llm_profile = (
             dict(inputs.llm_profile) if isinstance(inputs.llm_profile, Mapping) else {}
         )
@@ -605,52 +2221,18 @@ def _handle_cloud_event_impl(
                 "details": {},
             },
         )
-        try:
-            payload = report.to_json_bytes()
-        except SerializationError as exc:
-            return _finalize_failed(ErrorCode.INVALID_STEP_INPUTS, str(exc))
-
-        payload_bytes = len(payload)
-        event_logger.log(
-            event="gcs_write_started",
-            severity="INFO",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            artifact={"gcs_uri": str(report_uri)},
-            bytes=payload_bytes,
-        )
-
-        try:
-            write_result = artifact_store.write_bytes_create_only(
-                report_uri, payload, content_type="application/json"
-            )
-        except ArtifactWriteFailed as exc:
-            event_logger.log(
-                event="gcs_write_finished",
-                severity="ERROR",
-                eventId=event_id,
-                runId=run_id,
-                stepId=step_id,
-                artifact={"gcs_uri": str(report_uri)},
-                ok=False,
-                bytes=payload_bytes,
-                error={"code": ErrorCode.GCS_WRITE_FAILED.value, "retryable": exc.retryable},
-            )
-            return _finalize_failed(ErrorCode.GCS_WRITE_FAILED, "Artifact write failed")
-
-        event_logger.log(
-            event="gcs_write_finished",
-            severity="INFO",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            artifact={"gcs_uri": str(report_uri)},
-            ok=True,
-            bytes=payload_bytes,
-            reused=write_result.reused,
+        failure = _store_report(
+            artifact_store,
+            report=report,
+            report_uri=report_uri,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+            content_encoding=report_content_encoding,
         )
-
+        if failure is not None:
+            return _finalize_failed(*failure)
         return _finalize_success(outputs_gcs_uri=str(report_uri))
 
     if llm_client is None or user_input_assembler is None or structured_output_validator is None:
@@ -703,6 +2285,8 @@ def _handle_cloud_event_impl(
             inputs=inputs,
             event_logger=event_logger,
             event_id=event_id,
+            indicators=prompt.derived_indicators,
+            projections=prompt.context_projections,
         )
     except InvalidStepInputs as exc:
         event_logger.log(
@@ -737,6 +2321,8 @@ def _handle_cloud_event_impl(
                 entry["stepId"] = report.step_id
             else:
                 entry["source"] = "external"
+            if report.digest:
+                entry["digest"] = True
             previous_reports_summary.append(entry)
         artifacts_summary["previous_reports"] = previous_reports_summary
 
@@ -752,8 +2338,7 @@ def _handle_cloud_event_impl(
 
     try:
         user_payload = user_input_assembler.assemble(
-            base_user_prompt=prompt.user_prompt,
-            resolved=resolved,
+            base_user_prompt=_base_user_prompt(prompt, resolved), resolved=resolved
         )
     except InvalidStepInputs as exc:
         return _finalize_failed(ErrorCode.INVALID_STEP_INPUTS, str(exc))
@@ -771,170 +2356,152 @@ def _handle_cloud_event_impl(
         textChars=len(user_payload.text),
     )
 
-    user_parts = [user_payload.text]
-    user_parts.extend(user_payload.chart_images)
-
-    event_logger.log(
-        event="llm_request_started",
-        severity="INFO",
-        eventId=event_id,
-        runId=run_id,
-        stepId=step_id,
-        llm={
-            "promptId": inputs.prompt_id,
-            "modelName": llm_profile_obj.model_name,
-            "schemaId": schema.schema_id,
-        },
-    )
-
-    try:
-        response = llm_client.generate(
-            system=prompt.system_instruction,
-            user_parts=user_parts,
-            profile=llm_profile_obj,
-            llm_schema=schema,
-        )
-    except RateLimited as exc:
-        event_logger.log(
-            event="llm_request_finished",
-            severity="ERROR",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            status="failed",
-            error={"code": ErrorCode.RATE_LIMITED.value, "message": str(exc)},
-        )
-        return _finalize_failed(ErrorCode.RATE_LIMITED, "Gemini rate limited")
-    except SafetyBlocked as exc:
-        event_logger.log(
-            event="llm_request_finished",
-            severity="ERROR",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            status="failed",
-            error={"code": ErrorCode.LLM_SAFETY_BLOCK.value, "message": str(exc)},
-        )
-        return _finalize_failed(ErrorCode.LLM_SAFETY_BLOCK, "Gemini safety block")
-    except RequestFailed as exc:
-        event_logger.log(
-            event="llm_request_finished",
-            severity="ERROR",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            status="failed",
-            error={"code": ErrorCode.GEMINI_REQUEST_FAILED.value, "message": str(exc)},
-        )
-        return _finalize_failed(ErrorCode.GEMINI_REQUEST_FAILED, "Gemini request failed")
-
-    event_logger.log(
-        event="llm_request_finished",
-        severity="INFO",
-        eventId=event_id,
-        runId=run_id,
-        stepId=step_id,
-        status="succeeded",
-        finishReason=response.finish_reason,
-        llm={"usageMetadata": response.usage},
-    )
-
-    validated = structured_output_validator.validate(
-        text=response.text,
-        llm_schema=schema,
-        finish_reason=response.finish_reason,
-    )
-    if isinstance(validated, StructuredOutputInvalid):
+    cached_prefix_parts = 0
+    if cache_shared_prefix and user_payload.shared_prefix_chars > 0:
+        # Shared prefix (base prompt, OHLCV, charts) goes first together with
+        # the images so the provider can serve it from a context cache.
+        user_parts = [user_payload.text[: user_payload.shared_prefix_chars]]
+        user_parts.extend(user_payload.chart_images)
+        user_parts.append(user_payload.text[user_payload.shared_prefix_chars :])
+        cached_prefix_parts = 1 + len(user_payload.chart_images)
+    else:
+        user_parts = [user_payload.text]
+        user_parts.extend(user_payload.chart_images)
+
+    if inputs.execution_mode == EXECUTION_MODE_DEFERRED:
+        if batch_prediction is not None:
+            return _submit_deferred(
+                batch_prediction,
+                flow_repo=flow_repo,
+                prompt=prompt,
+                profile=llm_profile_obj,
+                schema=schema,
+                user_parts=user_parts,
+                metadata_inputs=_report_metadata_inputs(inputs, resolved),
+                event_logger=event_logger,
+                event_id=event_id,
+                run_id=run_id,
+                step_id=step_id,
+                finalize_failed=_finalize_failed,
+                log_finished=_log_cloud_event_finished,
+            )
+        # Deferred is a cost optimization, never a requirement: run online.
         event_logger.log(
-            event="structured_output_invalid",
+            event="llm_deferred_unavailable",
             severity="WARNING",
             eventId=event_id,
             runId=run_id,
             stepId=step_id,
-            reason={"kind": validated.kind, "message": validated.message},
-            llm={"finishReason": response.finish_reason},
-            diagnostics={
-                "textBytes": validated.text_bytes,
-                "textSha256": validated.text_sha256,
-            },
-            policy={"repairPlanned": False, "finalizeBudgetSeconds": finalize_budget_seconds},
-        )
-        return _finalize_failed(
-            ErrorCode.INVALID_STRUCTURED_OUTPUT,
-            validated.to_error_message(),
+            reason="batch_prediction_disabled",
         )
 
-    created_at = _now_rfc3339()
-    metadata = {
-        "schemaVersion": schema_version,
-        "runId": run_id,
-        "stepId": step_id,
-        "createdAt": created_at,
-        "finishedAt": created_at,
-        "symbol": symbol,
-        "timeframe": timeframe,
-        "llm": {
-            "promptId": inputs.prompt_id,
-            "modelName": llm_profile_obj.model_name,
-            "schemaId": schema.schema_id,
-            "schemaSha256": schema.sha256,
-            "llmProfile": dict(inputs.llm_profile),
-            "finishReason": response.finish_reason,
-            "usageMetadata": response.usage,
-        },
-        "inputs": {
-            "ohlcv_gcs_uri": inputs.ohlcv_gcs_uri,
-            "charts_outputsManifestGcsUri": inputs.charts_manifest_gcs_uri,
-        },
-    }
-    if inputs.previous_report_gcs_uris:
-        metadata["inputs"]["report_gcs_uris"] = list(inputs.previous_report_gcs_uris)
-
-    report = LLMReportFile(metadata=metadata, output=validated)
-    try:
-        payload = report.to_json_bytes()
-    except SerializationError as exc:
-        return _finalize_failed(ErrorCode.INVALID_STEP_INPUTS, str(exc))
-
-    payload_bytes = len(payload)
-    event_logger.log(
-        event="gcs_write_started",
-        severity="INFO",
-        eventId=event_id,
-        runId=run_id,
-        stepId=step_id,
-        artifact={"gcs_uri": str(report_uri)},
-        bytes=payload_bytes,
-    )
+    batch: _BatchOutcome | None = None
+    if batch_policy is not None and batch_policy.enabled:
+        batch = _run_step_batch(
+            batch_policy=batch_policy,
+            flow_run=flow_run,
+            primary=pick.step,
+            primary_inputs=inputs,
+            primary_payload=user_payload,
+            primary_timeframe=timeframe,
+            prompt=prompt,
+            schema=schema,
+            schema_version=schema_version,
+            symbol=symbol,
+            llm_profile=llm_profile_obj,
+            flow_repo=flow_repo,
+            artifact_store=artifact_store,
+            path_policy=path_policy,
+            llm_client=llm_client,
+            user_input_assembler=user_input_assembler,
+            structured_output_validator=structured_output_validator,
+            time_budget=time_budget,
+            finalize_budget_seconds=finalize_budget_seconds,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            write_retry=write_retry,
+            report_content_encoding=report_content_encoding,
+        )
 
-    try:
-        write_result = artifact_store.write_bytes_create_only(
-            report_uri, payload, content_type="application/json"
+    if batch is not None and batch.primary_output is not None:
+        response = batch.response
+        used_model_name = batch.model_name
+        fallback_path: list[dict[str, Any]] = []
+        validated = batch.primary_output
+    else:
+        outcome = _generate_with_fallback(
+            llm_client,
+            prompt=prompt,
+            profile=llm_profile_obj,
+            schema=schema,
+            user_parts=user_parts,
+            cached_prefix_parts=cached_prefix_parts,
+            model_allowed=model_allowed,
+            cache_tracker=cache_tracker,
+            time_budget=time_budget,
+            event_logger=event_logger,
+            log_ids={"eventId": event_id, "runId": run_id, "stepId": step_id},
         )
-    except ArtifactWriteFailed as exc:
-        event_logger.log(
-            event="gcs_write_finished",
-            severity="ERROR",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            artifact={"gcs_uri": str(report_uri)},
-            ok=False,
-            bytes=payload_bytes,
-            error={"code": ErrorCode.GCS_WRITE_FAILED.value, "retryable": exc.retryable},
+        if outcome.response is None:
+            return _finalize_failed(*outcome.failure)
+        response = outcome.response
+        used_model_name = outcome.model_name
+        fallback_path = outcome.fallback_path
+
+        validated = structured_output_validator.validate(
+            text=response.text,
+            llm_schema=schema,
+            finish_reason=response.finish_reason,
         )
-        return _finalize_failed(ErrorCode.GCS_WRITE_FAILED, "Artifact write failed")
+        if isinstance(validated, StructuredOutputInvalid):
+            _log_structured_output_invalid(
+                event_logger,
+                validated=validated,
+                finish_reason=response.finish_reason,
+                finalize_budget_seconds=finalize_budget_seconds,
+                log_ids={"eventId": event_id, "runId": run_id, "stepId": step_id},
+            )
+            return _finalize_failed(
+                ErrorCode.INVALID_STRUCTURED_OUTPUT,
+                validated.to_error_message(),
+            )
 
-    event_logger.log(
-        event="gcs_write_finished",
-        severity="INFO",
-        eventId=event_id,
-        runId=run_id,
-        stepId=step_id,
-        artifact={"gcs_uri": str(report_uri)},
-        ok=True,
-        bytes=payload_bytes,
-        reused=write_result.reused,
+    metadata = _llm_report_metadata(
+        schema_version=schema_version,
+        run_id=run_id,
+        step_id=step_id,
+        symbol=symbol,
+        timeframe=timeframe,
+        inputs=inputs,
+        metadata_inputs=_report_metadata_inputs(inputs, resolved),
+        schema=schema,
+        model_name=used_model_name,
+        response=response,
+        fallback_path=fallback_path,
     )
-
-    return _finalize_success(outputs_gcs_uri=str(report_uri))
+    if batch is not None and batch.primary_output is not None:
+        # The primary is first in request order, so it carries the usage.
+        _set_batch_metadata(metadata, batch.batch, usage=response.usage)
+
+    # The report URI is fixed, so the finalize read can run during the upload;
+    # the patch itself is only sent once the write is confirmed.
+    pending = commit_pipeline.begin(flow_repo, run_id) if commit_pipeline is not None else None
+    failure = _store_report(
+        artifact_store,
+        report=LLMReportFile(metadata=metadata, output=validated),
+        report_uri=report_uri,
+        event_logger=event_logger,
+        event_id=event_id,
+        run_id=run_id,
+        step_id=step_id,
+        write_retry=write_retry,
+        time_budget=time_budget,
+        content_encoding=report_content_encoding,
+        commit_pipeline=commit_pipeline,
+    )
+    if failure is not None:
+        if pending is not None:
+            pending.cancel()
+        return _finalize_failed(*failure)
+    return _finalize_success(outputs_gcs_uri=str(report_uri), pending=pending)
@@ -18,6 +18,21 @@ class RateLimited(LLMClientError):
 class RequestFailed(LLMClientError):
     """Raised when provider call fails with a retryable error."""
 
+    def __init__(self, message: str, *, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+    def is_server_error(self) -> bool:
+        return self.status_code is not None and 500 <= self.status_code < 600
+
+
+class FileReferencesExpired(RequestFailed):
+    """Raised when the provider rejected uploaded file references.
+
+    The client has already forgotten those uploads; the caller may resend
+    the request once with ``inline_files=True`` if its time budget allows.
+    """
+
 
 class SafetyBlocked(LLMClientError):
     """Raised when provider blocks output for safety."""
@@ -29,6 +44,67 @@ class ProviderResponse:
     finish_reason: str | None
     usage: dict[str, Any] | None
     raw: Any
+    cached_content: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FileReference:
+    """Provider-side file referenced from a request as a ``file_data`` part."""
+
+    file_uri: str
+    mime_type: str
+
+
+@dataclass(frozen=True, slots=True)
+class UploadedFile:
+    uri: str
+    mime_type: str
+    expires_at: float | None = None  # epoch seconds; None when the provider does not expire files
+
+
+class ProviderFileStore(Protocol):
+    def upload(self, *, data: bytes, mime_type: str, display_name: str) -> UploadedFile:
+        ...
+
+
+BATCH_JOB_PENDING = "PENDING"
+BATCH_JOB_RUNNING = "RUNNING"
+BATCH_JOB_SUCCEEDED = "SUCCEEDED"
+BATCH_JOB_FAILED = "FAILED"
+
+
+@dataclass(frozen=True, slots=True)
+class BatchJobStatus:
+    """Provider batch job state; ``response`` is set once the job succeeded."""
+
+    state: str
+    response: ProviderResponse | None = None
+    error: str | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in (BATCH_JOB_SUCCEEDED, BATCH_JOB_FAILED)
+
+
+class BatchPredictionService(Protocol):
+    def submit(
+        self,
+        *,
+        display_name: str,
+        system: str,
+        user_parts: Sequence[Any],
+        profile: LLMProfile,
+        llm_schema: LLMSchema | None = None,
+    ) -> str:
+        """Submit one request as a provider batch job; returns the job name."""
+        ...
+
+    def get(self, job_name: str) -> BatchJobStatus:
+        ...
+
+    def cancel(self, job_name: str) -> None:
+        """Cancel a submitted job that will not be completed."""
+        ...
 
 
 class LLMClient(Protocol):
@@ -39,5 +115,14 @@ class LLMClient(Protocol):
         user_parts: Sequence[Any],
         profile: LLMProfile,
         llm_schema: LLMSchema | None = None,
+        cached_prefix_parts: int = 0,
     ) -> ProviderResponse:
+        """Generate a response.
+
+        ``cached_prefix_parts`` marks how many leading ``user_parts`` (together
+        with ``system``) are shared across steps and may be served from a
+        provider-side context cache. Clients without caching ignore it.
+        Clients that raise ``FileReferencesExpired`` also accept
+        ``inline_files=True``, which sends every image as inline bytes.
+        """
         ...
@@ -0,0 +1,541 @@
+"""Speculative prefetch for LLM_REPORT steps waiting on their last dependency.
+
+When a run has no executable step but a READY ``LLM_REPORT`` step is blocked
+on exactly one dependency, everything else it will read is already known:
+its prompt and schema, and the outputs of the dependencies that did succeed.
+``StepPrefetcher`` reads those in the background through the same caching
+stores the handler uses, so the invocation that finally runs the step finds
+them in memory. Prefetch is best-effort: failures are counted, never raised.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import threading
+import time
+from typing import Any, Callable, Generic, Mapping, Sequence, TypeVar
+
+from worker_llm_client.app.services import (
+    LLMPrompt,
+    LLMSchema,
+    PromptRepository,
+    SchemaRepository,
+)
+from worker_llm_client.artifacts.domain import (
+    ArtifactUri,
+    InvalidArtifactUri,
+    report_digest_uri,
+)
+from worker_llm_client.artifacts.services import ArtifactStore
+from worker_llm_client.ops.logging import EventLogger
+from worker_llm_client.reporting.services import (
+    MAX_CHART_IMAGE_BYTES,
+    MAX_OHLCV_BINARY_BYTES,
+    chart_image_uris,
+)
+from worker_llm_client.workflow.domain import (
+    PREVIOUS_REPORT_FORMAT_DIGEST,
+    FlowRun,
+)
+from worker_llm_client.workflow.policies import BlockedStep
+
+
+_T = TypeVar("_T")
+_MANIFEST_FALLBACK_KEYS = ("outputsManifestGcsUri", "outputs_manifest_gcs_uri")
+
+
+class _TtlCache(Generic[_T]):
+    """Positive results only, so a missing document is re-read every time."""
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float]) -> None:
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, _T]] = {}
+
+    def get_or_load(self, key: str, load: Callable[[str], _T | None]) -> _T | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        value = load(key)
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (now + self._ttl_seconds, value)
+        return value
+
+
+class CachingPromptRepository(PromptRepository):
+    """Serves prompts from memory for ``ttl_seconds`` after a successful read."""
+
+    def __init__(
+        self,
+        repo: PromptRepository,
+        *,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._repo = repo
+        self._cache: _TtlCache[LLMPrompt] = _TtlCache(ttl_seconds, clock)
+
+    def get(self, prompt_id: str) -> LLMPrompt | None:
+        return self._cache.get_or_load(prompt_id, self._repo.get)
+
+
+class CachingSchemaRepository(SchemaRepository):
+    """Serves schemas from memory for ``ttl_seconds`` after a successful read."""
+
+    def __init__(
+        self,
+        repo: SchemaRepository,
+        *,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._repo = repo
+        self._cache: _TtlCache[LLMSchema] = _TtlCache(ttl_seconds, clock)
+
+    def get(self, schema_id: str) -> LLMSchema | None:
+        return self._cache.get_or_load(schema_id, self._repo.get)
+
+
+@dataclass(frozen=True, slots=True)
+class PrefetchPolicy:
+    """Bounds: ``max_pending`` queued or running plans, ``timeout_seconds`` per
+    plan from scheduling, ``max_artifact_bytes`` per JSON/OHLCV object."""
+
+    max_workers: int = 2
+    max_pending: int = 8
+    timeout_seconds: float = 30.0
+    max_artifact_bytes: int = MAX_OHLCV_BINARY_BYTES
+    max_chart_image_bytes: int = MAX_CHART_IMAGE_BYTES
+    chart_images: bool = True
+
+    def __post_init__(self) -> None:
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if self.max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        if self.timeout_seconds <= 0:
+            raise ValueError("timeout_seconds must be > 0")
+
+
+@dataclass(frozen=True, slots=True)
+class PrefetchPlan:
+    run_id: str
+    step_id: str
+    # Unmet dependency for speculative prefetch; None when the step can run.
+    waiting_on: str | None = None
+    prompt_id: str | None = None
+    schema_id: str | None = None
+    ohlcv_uri: str | None = None
+    manifest_uri: str | None = None
+    previous_report_uris: tuple[str, ...] = ()
+    digest_reports: bool = True
+
+    @property
+    def artifact_count(self) -> int:
+        known = (self.ohlcv_uri, self.manifest_uri)
+        return sum(1 for uri in known if uri) + len(self.previous_report_uris)
+
+
+def plan_prefetch(flow_run: FlowRun, blocked: Sequence[BlockedStep]) -> list[PrefetchPlan]:
+    """Plans for blocked steps with a single unmet dependency.
+
+    Only outputs of SUCCEEDED dependencies (and explicit previous report URIs)
+    are included; the pending dependency's output does not exist yet.
+    """
+    plans: list[PrefetchPlan] = []
+    for blocked_step in blocked:
+        if len(blocked_step.unmet) != 1:
+            continue
+        plan = plan_for_step(
+            flow_run, blocked_step.step_id, waiting_on=blocked_step.unmet[0].step_id
+        )
+        if plan is not None:
+            plans.append(plan)
+    return plans
+
+
+def plan_for_step(
+    flow_run: FlowRun, step_id: str, *, waiting_on: str | None = None
+) -> PrefetchPlan | None:
+    """Everything ``step_id`` will read that the flow run snapshot already names.
+
+    Works on the raw inputs without validating them: a plan is only a hint,
+    the handler still parses the inputs before using anything it loaded.
+    """
+    run_id = flow_run.run_id
+    step = flow_run.get_step(step_id)
+    if not run_id or step is None:
+        return None
+    inputs = step.inputs
+    llm = inputs.get("llm") if isinstance(inputs.get("llm"), Mapping) else {}
+    profile = llm.get("llmProfile") if isinstance(llm.get("llmProfile"), Mapping) else {}
+    structured = profile.get("structuredOutput")
+    schema_id = structured.get("schemaId") if isinstance(structured, Mapping) else None
+    return PrefetchPlan(
+        run_id=run_id,
+        step_id=step.step_id,
+        waiting_on=waiting_on,
+        prompt_id=_non_empty(llm.get("promptId")),
+        schema_id=_non_empty(schema_id),
+        ohlcv_uri=_succeeded_output_uri(flow_run, inputs.get("ohlcvStepId")),
+        manifest_uri=_succeeded_output_uri(
+            flow_run,
+            inputs.get("chartsManifestStepId"),
+            fallback_keys=_MANIFEST_FALLBACK_KEYS,
+        ),
+        previous_report_uris=_previous_report_uris(flow_run, inputs),
+        digest_reports=(
+            inputs.get("previousReportFormat", PREVIOUS_REPORT_FORMAT_DIGEST)
+            == PREVIOUS_REPORT_FORMAT_DIGEST
+        ),
+    )
+
+
+@dataclass(slots=True)
+class _PrefetchTask:
+    plan: PrefetchPlan
+    event_id: str
+    deadline: float
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    future: Future[Any] | None = None
+    fetched: int = 0
+    failed: int = 0
+    bytes: int = 0
+
+
+class _PrefetchStopped(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class StepPrefetcher:
+    """Runs prefetch plans on a small thread pool; see the module docstring.
+
+    A (run, step) pair is prefetched at most once at a time. ``cancel`` stops
+    the plans of one run (or all) between reads; a plan also stops when its
+    time budget runs out.
+    """
+
+    def __init__(
+        self,
+        *,
+        artifact_store: ArtifactStore,
+        prompt_repo: PromptRepository,
+        schema_repo: SchemaRepository,
+        event_logger: EventLogger,
+        policy: PrefetchPolicy | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._prompt_repo = prompt_repo
+        self._schema_repo = schema_repo
+        self._event_logger = event_logger
+        self._policy = policy or PrefetchPolicy()
+        self._clock = clock
+        self._warmer = _ArtifactWarmer(artifact_store, self._policy, clock)
+        self._lock = threading.Lock()
+        self._tasks: dict[tuple[str, str], _PrefetchTask] = {}
+        self._pool = ThreadPoolExecutor(
+            max_workers=self._policy.max_workers, thread_name_prefix="prefetch"
+        )
+
+    def schedule(
+        self, flow_run: FlowRun, blocked: Sequence[BlockedStep], *, event_id: str = "unknown"
+    ) -> int:
+        """Queue plans for ``blocked``; returns how many were newly scheduled."""
+        scheduled = 0
+        for plan in plan_prefetch(flow_run, blocked):
+            key = (plan.run_id, plan.step_id)
+            with self._lock:
+                if key in self._tasks or len(self._tasks) >= self._policy.max_pending:
+                    continue
+                task = _PrefetchTask(
+                    plan=plan,
+                    event_id=event_id,
+                    deadline=self._clock() + self._policy.timeout_seconds,
+                )
+                self._tasks[key] = task
+            self._event_logger.log(
+                event="prefetch_scheduled",
+                severity="INFO",
+                eventId=event_id,
+                runId=plan.run_id,
+                stepId=plan.step_id,
+                waitingOn=plan.waiting_on,
+                artifacts=plan.artifact_count,
+            )
+            task.future = self._pool.submit(self._run, task)
+            scheduled += 1
+        return scheduled
+
+    def cancel(self, run_id: str | None = None) -> int:
+        """Stop the plans of ``run_id`` (every plan when None) at the next read."""
+        with self._lock:
+            tasks = [
+                task
+                for (task_run_id, _step_id), task in self._tasks.items()
+                if run_id is None or task_run_id == run_id
+            ]
+        for task in tasks:
+            task.cancelled.set()
+        return len(tasks)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        self.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, task: _PrefetchTask) -> str:
+        plan = task.plan
+        started = self._clock()
+        status = "ok"
+        try:
+            if plan.prompt_id:
+                self._warmer.fetch(task, lambda: self._prompt_repo.get(plan.prompt_id))
+            if plan.schema_id:
+                self._warmer.fetch(task, lambda: self._schema_repo.get(plan.schema_id))
+            self._warmer.read_plan(task)
+        except _PrefetchStopped as stopped:
+            status = stopped.reason
+        finally:
+            with self._lock:
+                self._tasks.pop((plan.run_id, plan.step_id), None)
+        self._event_logger.log(
+            event="prefetch_finished",
+            severity="INFO",
+            eventId=task.event_id,
+            runId=plan.run_id,
+            stepId=plan.step_id,
+            status=status,
+            fetched=task.fetched,
+            failed=task.failed,
+            bytes=task.bytes,
+            durationMs=int((self._clock() - started) * 1000),
+        )
+        return status
+
+
+@dataclass(slots=True)
+class PreludeLoads:
+    """Loads started for a picked step while its claim is in flight."""
+
+    plan: PrefetchPlan
+    prompt: Future[LLMPrompt | None] | None
+    schema: Future[LLMSchema | None] | None
+    artifacts: Future[Any] | None
+    _task: _PrefetchTask
+
+    def prompt_for(
+        self, prompt_id: str, load: Callable[[str], LLMPrompt | None]
+    ) -> LLMPrompt | None:
+        return _speculated(self.prompt, self.plan.prompt_id, prompt_id, load)
+
+    def schema_for(
+        self, schema_id: str, load: Callable[[str], LLMSchema | None]
+    ) -> LLMSchema | None:
+        return _speculated(self.schema, self.plan.schema_id, schema_id, load)
+
+    def discard(self) -> None:
+        """Drop everything not yet done (the claim was lost)."""
+        self._task.cancelled.set()
+        for future in (self.prompt, self.schema, self.artifacts):
+            if future is not None:
+                future.cancel()
+
+
+class ClaimPrelude:
+    """Overlaps the claim with the reads the picked step needs next.
+
+    ``start`` submits the prompt and schema loads and the artifact reads named
+    by the flow run snapshot; the handler then claims the step and, once the
+    claim succeeded, takes prompt and schema from the futures. Artifact reads
+    only warm ``artifact_store`` (a ``CachingArtifactStore`` shared with the
+    assembler), which hands in-flight reads over to the context resolve.
+    Nothing here writes; a lost claim discards whatever has not run yet.
+    """
+
+    def __init__(
+        self,
+        *,
+        artifact_store: ArtifactStore,
+        policy: PrefetchPolicy | None = None,
+        max_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self._policy = policy or PrefetchPolicy()
+        self._clock = clock
+        self._warmer = _ArtifactWarmer(artifact_store, self._policy, clock)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prelude")
+
+    def start(
+        self,
+        flow_run: FlowRun,
+        step_id: str,
+        *,
+        prompt_repo: PromptRepository,
+        schema_repo: SchemaRepository,
+        event_id: str = "unknown",
+    ) -> PreludeLoads | None:
+        plan = plan_for_step(flow_run, step_id)
+        if plan is None:
+            return None
+        task = _PrefetchTask(
+            plan=plan, event_id=event_id, deadline=self._clock() + self._policy.timeout_seconds
+        )
+        prompt = self._pool.submit(prompt_repo.get, plan.prompt_id) if plan.prompt_id else None
+        schema = self._pool.submit(schema_repo.get, plan.schema_id) if plan.schema_id else None
+        artifacts = self._pool.submit(self._read, task) if plan.artifact_count else None
+        return PreludeLoads(
+            plan=plan, prompt=prompt, schema=schema, artifacts=artifacts, _task=task
+        )
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _read(self, task: _PrefetchTask) -> str:
+        try:
+            self._warmer.read_plan(task)
+        except _PrefetchStopped as stopped:
+            return stopped.reason
+        return "ok"
+
+
+def _speculated(
+    future: Future[_T | None] | None,
+    planned_id: str | None,
+    wanted_id: str,
+    load: Callable[[str], _T | None],
+) -> _T | None:
+    # A load that has not started yet (pool busy) is faster to do inline, and
+    # a plan built from unvalidated inputs may name a different document.
+    if future is None or planned_id != wanted_id or future.cancel():
+        return load(wanted_id)
+    return future.result()
+
+
+class _ArtifactWarmer:
+    """Reads a plan's artifacts, stopping between reads when told to."""
+
+    def __init__(
+        self, store: ArtifactStore, policy: PrefetchPolicy, clock: Callable[[], float]
+    ) -> None:
+        self._store = store
+        self._policy = policy
+        self._clock = clock
+
+    def check(self, task: _PrefetchTask) -> None:
+        if task.cancelled.is_set():
+            raise _PrefetchStopped("cancelled")
+        if self._clock() >= task.deadline:
+            raise _PrefetchStopped("timeout")
+
+    def fetch(self, task: _PrefetchTask, load: Callable[[], Any]) -> None:
+        self.check(task)
+        try:
+            found = load() is not None
+        except Exception:
+            found = False
+        if found:
+            task.fetched += 1
+        else:
+            task.failed += 1
+
+    def read_plan(self, task: _PrefetchTask) -> None:
+        plan = task.plan
+        max_bytes = self._policy.max_artifact_bytes
+        if plan.ohlcv_uri:
+            self._read(task, plan.ohlcv_uri, max_bytes)
+        for report_uri in plan.previous_report_uris:
+            digest = _digest_uri(report_uri) if plan.digest_reports else None
+            if digest is None or not self._read(task, digest, max_bytes, optional=True):
+                self._read(task, report_uri, max_bytes)
+        if plan.manifest_uri:
+            manifest = self._read(task, plan.manifest_uri, max_bytes)
+            if manifest is not None and self._policy.chart_images:
+                self._read_chart_images(task, manifest)
+
+    def _read(
+        self, task: _PrefetchTask, uri: str, max_bytes: int, *, optional: bool = False
+    ) -> bytes | None:
+        self.check(task)
+        try:
+            read = self._store.read_bytes_limited(ArtifactUri.parse(uri), max_bytes)
+        except Exception:
+            if not optional:
+                task.failed += 1
+            return None
+        task.fetched += 1
+        task.bytes += len(read.data)
+        return read.data
+
+    def _read_chart_images(self, task: _PrefetchTask, manifest: bytes) -> None:
+        try:
+            uris = [ArtifactUri.parse(uri) for uri in chart_image_uris(json.loads(manifest))]
+        except (ValueError, InvalidArtifactUri):
+            task.failed += 1
+            return
+        if not uris:
+            return
+        self.check(task)
+        for result in self._store.read_many(uris, self._policy.max_chart_image_bytes):
+            if result.read is None:
+                task.failed += 1
+                continue
+            task.fetched += 1
+            task.bytes += len(result.read.data)
+
+
+def _non_empty(value: Any) -> str | None:
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def _succeeded_output_uri(
+    flow_run: FlowRun, step_id: Any, *, fallback_keys: tuple[str, ...] = ()
+) -> str | None:
+    step_id = _non_empty(step_id)
+    step = flow_run.get_step(step_id) if step_id else None
+    if step is None or not step.is_succeeded():
+        return None
+    for key in ("gcs_uri", *fallback_keys):
+        value = _non_empty(step.outputs.get(key))
+        if value is not None:
+            return value
+    return None
+
+
+def _previous_report_uris(flow_run: FlowRun, inputs: Mapping[str, Any]) -> tuple[str, ...]:
+    uris: list[str] = []
+    step_ids = inputs.get("previousReportStepIds")
+    if isinstance(step_ids, Sequence) and not isinstance(step_ids, str):
+        uris.extend(filter(None, (_succeeded_output_uri(flow_run, sid) for sid in step_ids)))
+    refs = inputs.get("previousReports")
+    if isinstance(refs, Sequence) and not isinstance(refs, str):
+        for ref in refs:
+            if not isinstance(ref, Mapping):
+                continue
+            uri = _non_empty(ref.get("gcs_uri")) or _non_empty(ref.get("gcsUri"))
+            uri = uri or _succeeded_output_uri(flow_run, ref.get("stepId"))
+            if uri is not None:
+                uris.append(uri)
+    return tuple(uris)
+
+
+def _digest_uri(report_uri: str) -> str | None:
+    try:
+        digest = report_digest_uri(ArtifactUri.parse(report_uri))
+    except InvalidArtifactUri:
+        return None
+    return str(digest) if digest is not None else None
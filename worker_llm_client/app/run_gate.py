@@ -0,0 +1,107 @@
+"""Per-run gate: serializes handling of one run and remembers idle snapshots."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+from worker_llm_client.infra.cloudevents import parse_timestamp
+
+
+@dataclass(frozen=True, slots=True)
+class _IdleSnapshot:
+    update_time: Any
+    expires_at: float
+
+
+class RunGate:
+    """In-process gate shared by every invocation on one instance.
+
+    ``hold(run_id)`` serializes handling of the same run, so a burst of events
+    for one run is handled one at a time instead of racing on the claim.
+    ``mark_idle`` records that the run had nothing to execute at a given
+    ``update_time``; until the entry expires, events describing that snapshot
+    or an older write are known to be no-ops and can skip the Firestore read.
+    """
+
+    def __init__(
+        self,
+        *,
+        idle_ttl_seconds: float = 30.0,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if idle_ttl_seconds <= 0:
+            raise ValueError("idle_ttl_seconds must be > 0")
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._idle_ttl_seconds = idle_ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        # run_id -> [lock, holders]; removed when the last holder leaves.
+        self._run_locks: dict[str, list[Any]] = {}
+        self._idle: OrderedDict[str, _IdleSnapshot] = OrderedDict()
+
+    @contextmanager
+    def hold(self, run_id: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._run_locks.setdefault(run_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._run_locks.pop(run_id, None)
+
+    def mark_idle(self, run_id: str, update_time: Any) -> None:
+        if update_time is None:
+            return
+        with self._lock:
+            self._idle.pop(run_id, None)
+            self._idle[run_id] = _IdleSnapshot(
+                update_time=update_time, expires_at=self._clock() + self._idle_ttl_seconds
+            )
+            while len(self._idle) > self._max_entries:
+                self._idle.popitem(last=False)
+
+    def forget(self, run_id: str) -> None:
+        with self._lock:
+            self._idle.pop(run_id, None)
+
+    def is_idle_snapshot(self, run_id: str, update_time: Any) -> bool:
+        """True if ``update_time`` is exactly the snapshot last seen idle."""
+        snapshot = self._snapshot(run_id)
+        return snapshot is not None and update_time is not None and snapshot.update_time == update_time
+
+    def covers(self, run_id: str, event_time: datetime | None) -> bool:
+        """True if a write at ``event_time`` is no newer than the idle snapshot."""
+        if event_time is None:
+            return False
+        snapshot = self._snapshot(run_id)
+        if snapshot is None:
+            return False
+        idle_time = parse_timestamp(snapshot.update_time)
+        return idle_time is not None and event_time <= idle_time
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def _snapshot(self, run_id: str) -> _IdleSnapshot | None:
+        with self._lock:
+            snapshot = self._idle.get(run_id)
+            if snapshot is None:
+                return None
+            if snapshot.expires_at <= self._clock():
+                del self._idle[run_id]
+                return None
+            return snapshot
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Mapping, Protocol
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Mapping, Protocol
 
 try:
     from google.cloud import firestore as _firestore  # type: ignore
@@ -10,6 +10,9 @@ except Exception:  # pragma: no cover - optional in non-firestore environments
 
 from worker_llm_client.workflow.domain import FlowRun, FlowRunInvalid, StepError
 
+if TYPE_CHECKING:  # pragma: no cover - reporting imports this module
+    from worker_llm_client.reporting.projection import ContextProjection
+
 
 @dataclass(frozen=True, slots=True)
 class FlowRunRecord:
@@ -61,6 +64,28 @@ class FlowRunRepository(Protocol):
     ) -> FinalizeResult:
         ...
 
+    def record_submission(
+        self, run_id: str, step_id: str, submission: Mapping[str, Any]
+    ) -> FinalizeResult:
+        """Store the deferred sub-state of a RUNNING step (status unchanged)."""
+        ...
+
+    def release_step(self, run_id: str, step_id: str) -> FinalizeResult:
+        """Return a claimed (RUNNING) step to READY without finishing it."""
+        ...
+
+
+class FlowRunScanner(Protocol):
+    def ready_run_ids(self, *, limit: int) -> list[str]:
+        """RUNNING flow runs with at least one executable READY LLM_REPORT step."""
+        ...
+
+
+class DeferredRunScanner(Protocol):
+    def deferred_run_ids(self, *, limit: int) -> list[str]:
+        """RUNNING flow runs with at least one LLM_REPORT step on a SUBMITTED job."""
+        ...
+
 
 @dataclass(frozen=True, slots=True)
 class LLMPrompt:
@@ -68,6 +93,10 @@ class LLMPrompt:
     schema_version: int
     system_instruction: str
     user_prompt: str
+    derived_indicators: tuple[str, ...] = ()
+    context_projections: Mapping[str, "ContextProjection"] = field(default_factory=dict)
+    # Used instead of ``user_prompt`` when a step runs in incremental mode.
+    incremental_user_prompt: str | None = None
 
     @classmethod
     def from_raw(cls, raw: Mapping[str, Any], *, prompt_id: str) -> "LLMPrompt":
@@ -82,11 +111,30 @@ class LLMPrompt:
         user_prompt = raw.get("userPrompt")
         if not isinstance(user_prompt, str) or not user_prompt.strip():
             raise ValueError("prompt userPrompt must be a non-empty string")
+        from worker_llm_client.reporting.indicators import INDICATOR_NAMES
+        from worker_llm_client.reporting.projection import parse_context_projections
+
+        derived_indicators = raw.get("derivedIndicators", [])
+        if not isinstance(derived_indicators, list) or not all(
+            isinstance(item, str) and item in INDICATOR_NAMES for item in derived_indicators
+        ):
+            raise ValueError(
+                "prompt derivedIndicators must be an array of: " + ", ".join(INDICATOR_NAMES)
+            )
+        context_projections = parse_context_projections(raw.get("contextProjections"))
+        incremental_user_prompt = raw.get("incrementalUserPrompt")
+        if incremental_user_prompt is not None and (
+            not isinstance(incremental_user_prompt, str) or not incremental_user_prompt.strip()
+        ):
+            raise ValueError("prompt incrementalUserPrompt must be a non-empty string")
         return cls(
             prompt_id=prompt_id,
             schema_version=schema_version,
             system_instruction=system_instruction,
             user_prompt=user_prompt,
+            derived_indicators=tuple(dict.fromkeys(derived_indicators)),
+            context_projections=context_projections,
+            incremental_user_prompt=incremental_user_prompt,
         )
 
 
@@ -160,6 +208,20 @@ def build_claim_patch(step_id: str, started_at_rfc3339: str) -> dict[str, Any]:
     return build_step_update(step_id, updates)
 
 
+def build_release_patch(step_id: str) -> dict[str, Any]:
+    delete_field = getattr(_firestore, "DELETE_FIELD", None)
+    return build_step_update(
+        step_id,
+        {"status": "READY", "outputs.execution.timing.startedAt": delete_field},
+    )
+
+
+def build_submission_patch(step_id: str, submission: Mapping[str, Any]) -> dict[str, Any]:
+    if not isinstance(submission, Mapping) or not submission.get("jobName"):
+        raise ValueError("submission must include jobName")
+    return build_step_update(step_id, {"outputs.execution.deferred": dict(submission)})
+
+
 def build_finalize_patch(
     *,
     step_id: str,
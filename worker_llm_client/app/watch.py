@@ -0,0 +1,283 @@
+"""Watch mode: keep READY runs in memory from a flow_runs snapshot listener."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+from typing import Any, Callable, Mapping, Protocol, Sequence
+
+from worker_llm_client.app.services import (
+    ClaimResult,
+    FinalizeResult,
+    FlowRunRecord,
+    FlowRunRepository,
+    FlowRunScanner,
+)
+from worker_llm_client.ops.logging import EventLogger
+from worker_llm_client.workflow.domain import FlowRun, FlowRunInvalid, StepError
+from worker_llm_client.workflow.policies import ReadyStepSelector
+
+
+@dataclass(frozen=True, slots=True)
+class RunChange:
+    """One listener change; ``raw`` is None when the run left the watched set."""
+
+    run_id: str
+    raw: Mapping[str, Any] | None
+    update_time: Any = None
+
+
+class RunWatchSubscription(Protocol):
+    @property
+    def is_active(self) -> bool:
+        ...
+
+    def unsubscribe(self) -> None:
+        ...
+
+
+class RunWatchSource(Protocol):
+    def subscribe(
+        self, on_changes: Callable[[Sequence[RunChange], bool], None]
+    ) -> RunWatchSubscription:
+        """Listen to RUNNING flow runs.
+
+        ``on_changes(changes, reset)``: ``reset`` is True when ``changes`` is
+        the complete current result set (first snapshot of a subscription).
+        """
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class ReadyRunIndexStats:
+    runs: int
+    ready: int
+    applied: int
+    duplicates: int
+    resets: int
+
+
+class ReadyRunIndex(FlowRunScanner):
+    """Latest snapshot of every watched run plus the set of runs with READY steps.
+
+    Snapshot bursts collapse per run: only the newest document is kept and a
+    change carrying an already-applied ``update_time`` is dropped. ``changed``
+    is set whenever a run becomes ready so an idle worker wakes up at once.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._records: dict[str, FlowRunRecord] = {}
+        self._ready: dict[str, None] = {}
+        self._applied = 0
+        self._duplicates = 0
+        self._resets = 0
+        self.changed = threading.Event()
+
+    def apply(self, changes: Sequence[RunChange], *, reset: bool = False) -> None:
+        woke = False
+        with self._lock:
+            if reset:
+                self._resets += 1
+                self._records.clear()
+                self._ready.clear()
+            for change in changes:
+                woke = self._apply_locked(change) or woke
+        if woke:
+            self.changed.set()
+
+    def invalidate(self, run_id: str) -> None:
+        """Forget a run until the listener delivers its next snapshot."""
+        with self._lock:
+            self._records.pop(run_id, None)
+            self._ready.pop(run_id, None)
+
+    def record(self, run_id: str) -> FlowRunRecord | None:
+        with self._lock:
+            return self._records.get(run_id)
+
+    def ready_run_ids(self, *, limit: int) -> list[str]:
+        with self._lock:
+            return list(self._ready)[:limit]
+
+    def stats(self) -> ReadyRunIndexStats:
+        with self._lock:
+            return ReadyRunIndexStats(
+                runs=len(self._records),
+                ready=len(self._ready),
+                applied=self._applied,
+                duplicates=self._duplicates,
+                resets=self._resets,
+            )
+
+    def _apply_locked(self, change: RunChange) -> bool:
+        run_id = change.run_id
+        current = self._records.get(run_id)
+        if change.raw is None:
+            self._records.pop(run_id, None)
+            self._ready.pop(run_id, None)
+            return False
+        if (
+            current is not None
+            and change.update_time is not None
+            and current.update_time == change.update_time
+        ):
+            self._duplicates += 1
+            return False
+        try:
+            flow_run = FlowRun.from_raw(change.raw, run_id=run_id)
+        except FlowRunInvalid:
+            self._records.pop(run_id, None)
+            self._ready.pop(run_id, None)
+            return False
+        self._applied += 1
+        self._records[run_id] = FlowRunRecord(flow_run=flow_run, update_time=change.update_time)
+        if ReadyStepSelector.executable_llm_steps(flow_run):
+            became_ready = run_id not in self._ready
+            self._ready[run_id] = None
+            return became_ready
+        self._ready.pop(run_id, None)
+        return False
+
+
+class WatchedFlowRunRepository(FlowRunRepository):
+    """Serves ``get`` from the watch index; writes go to the delegate.
+
+    Claims re-read the document under a precondition in the delegate, so a
+    stale cached snapshot can only cost a claim conflict. A successful claim
+    drops the run from the index until the listener reports the write.
+    """
+
+    def __init__(self, delegate: FlowRunRepository, index: ReadyRunIndex) -> None:
+        self._delegate = delegate
+        self._index = index
+
+    def get(self, run_id: str) -> FlowRunRecord | None:
+        record = self._index.record(run_id)
+        if record is not None:
+            return record
+        return self._delegate.get(run_id)
+
+    def patch(
+        self, run_id: str, patch: Mapping[str, Any], *, precondition_update_time: Any
+    ) -> None:
+        self._delegate.patch(run_id, patch, precondition_update_time=precondition_update_time)
+
+    def claim_step(self, run_id: str, step_id: str, started_at_rfc3339: str) -> ClaimResult:
+        result = self._delegate.claim_step(run_id, step_id, started_at_rfc3339)
+        if result.claimed:
+            self._index.invalidate(run_id)
+        return result
+
+    def finalize_step(
+        self,
+        run_id: str,
+        step_id: str,
+        status: str,
+        finished_at_rfc3339: str,
+        *,
+        outputs_gcs_uri: str | None = None,
+        execution: Mapping[str, Any] | None = None,
+        error: StepError | Mapping[str, Any] | None = None,
+        allow_ready: bool = False,
+    ) -> FinalizeResult:
+        return self._delegate.finalize_step(
+            run_id,
+            step_id,
+            status,
+            finished_at_rfc3339,
+            outputs_gcs_uri=outputs_gcs_uri,
+            execution=execution,
+            error=error,
+            allow_ready=allow_ready,
+        )
+
+    def record_submission(
+        self, run_id: str, step_id: str, submission: Mapping[str, Any]
+    ) -> FinalizeResult:
+        return self._delegate.record_submission(run_id, step_id, submission)
+
+    def release_step(self, run_id: str, step_id: str) -> FinalizeResult:
+        return self._delegate.release_step(run_id, step_id)
+
+
+class RunWatchSupervisor:
+    """Keeps one listener subscription alive.
+
+    A listener that stopped (``is_active`` False) is replaced after a capped
+    exponential backoff. The replacement's first snapshot resets the index, so
+    changes missed while disconnected are recovered from the full result set.
+    """
+
+    def __init__(
+        self,
+        *,
+        source: RunWatchSource,
+        index: ReadyRunIndex,
+        event_logger: EventLogger,
+        check_interval_seconds: float = 5.0,
+        max_backoff_seconds: float = 60.0,
+    ) -> None:
+        self._source = source
+        self._index = index
+        self._event_logger = event_logger
+        self._check_interval_seconds = check_interval_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self._subscription: RunWatchSubscription | None = None
+        self.restarts = 0
+
+    def start(self) -> None:
+        self._subscription = self._source.subscribe(self._on_changes)
+        self._event_logger.log(event="watch_listener_started", severity="INFO")
+
+    def check(self) -> bool:
+        """Replace a dead subscription; True if the listener is (again) active."""
+        if self._subscription is not None and self._subscription.is_active:
+            return True
+        if self._subscription is not None:
+            self._subscription.unsubscribe()
+            self._subscription = None
+        self.restarts += 1
+        self._event_logger.log(
+            event="watch_listener_restarted",
+            severity="WARNING",
+            restarts=self.restarts,
+            index=_stats_payload(self._index.stats()),
+        )
+        try:
+            self._subscription = self._source.subscribe(self._on_changes)
+        except Exception as exc:
+            self._event_logger.log(
+                event="watch_listener_failed",
+                severity="ERROR",
+                error={"type": type(exc).__name__, "message": str(exc)},
+            )
+            return False
+        return True
+
+    def run(self, stop: threading.Event) -> None:
+        if self._subscription is None:
+            self.start()
+        backoff = 1.0
+        while not stop.wait(self._check_interval_seconds):
+            if self.check():
+                backoff = 1.0
+                continue
+            stop.wait(backoff)
+            backoff = min(backoff * 2, self._max_backoff_seconds)
+        if self._subscription is not None:
+            self._subscription.unsubscribe()
+            self._subscription = None
+
+    def _on_changes(self, changes: Sequence[RunChange], reset: bool) -> None:
+        self._index.apply(changes, reset=reset)
+
+
+def _stats_payload(stats: ReadyRunIndexStats) -> dict[str, int]:
+    return {
+        "runs": stats.runs,
+        "ready": stats.ready,
+        "applied": stats.applied,
+        "duplicates": stats.duplicates,
+        "resets": stats.resets,
+    }
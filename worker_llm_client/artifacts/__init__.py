@@ -1,23 +1,60 @@
+from worker_llm_client.artifacts.bundle import (
+    BundleArtifactStore,
+    ContextBundle,
+    InvalidContextBundle,
+    RecordingArtifactStore,
+    pack_context_bundle,
+)
+from worker_llm_client.artifacts.cache import ArtifactCacheStats, CachingArtifactStore
 from worker_llm_client.artifacts.domain import (
+    ARTIFACT_URI_SCHEMES,
     ArtifactPathPolicy,
+    ArtifactUri,
     GcsUri,
+    InvalidArtifactUri,
     InvalidGcsUri,
     InvalidIdentifier,
+    report_digest_uri,
 )
 from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactNotFound,
     ArtifactReadFailed,
     ArtifactStore,
+    ArtifactTooLarge,
     ArtifactWriteFailed,
+    BulkReadResult,
+    LimitedRead,
     WriteResult,
+    encoding_kwargs,
+    read_many_parallel,
 )
 
 __all__ = [
+    "BundleArtifactStore",
+    "ContextBundle",
+    "InvalidContextBundle",
+    "RecordingArtifactStore",
+    "pack_context_bundle",
+    "ArtifactCacheStats",
+    "CachingArtifactStore",
+    "ARTIFACT_URI_SCHEMES",
     "ArtifactPathPolicy",
+    "ArtifactUri",
     "GcsUri",
+    "InvalidArtifactUri",
     "InvalidGcsUri",
     "InvalidIdentifier",
+    "report_digest_uri",
+    "ArtifactMetadata",
+    "ArtifactNotFound",
     "ArtifactStore",
     "ArtifactReadFailed",
+    "ArtifactTooLarge",
     "ArtifactWriteFailed",
+    "BulkReadResult",
+    "LimitedRead",
     "WriteResult",
+    "encoding_kwargs",
+    "read_many_parallel",
 ]
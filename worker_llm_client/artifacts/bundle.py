@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import struct
+import threading
+from typing import Any, Mapping, Sequence
+
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactStore,
+    ArtifactTooLarge,
+    BulkReadResult,
+    LimitedRead,
+    WriteResult,
+    encoding_kwargs,
+)
+
+
+# Layout: MAGIC, a 4-byte big-endian header length, a UTF-8 JSON header
+# (table of contents) and the member blobs back to back. Member offsets are
+# relative to the end of the header, so a reader that knows the header can
+# fetch single members with range reads.
+CONTEXT_BUNDLE_MAGIC = b"CTXBNDL1"
+CONTEXT_BUNDLE_VERSION = 1
+CONTEXT_BUNDLE_CONTENT_TYPE = "application/x-context-bundle"
+_HEADER_LENGTH = struct.Struct(">I")
+_PREAMBLE_BYTES = len(CONTEXT_BUNDLE_MAGIC) + _HEADER_LENGTH.size
+
+
+class InvalidContextBundle(ValueError):
+    """Raised when bundle bytes do not follow the context bundle layout."""
+
+
+@dataclass(frozen=True, slots=True)
+class BundleMember:
+    metadata: ArtifactMetadata
+    offset: int
+    length: int
+
+
+def pack_context_bundle(reads: Sequence[LimitedRead]) -> bytes:
+    """Pack limited reads into one bundle; later duplicates of a URI are dropped."""
+    entries: list[dict[str, Any]] = []
+    blobs: list[bytes] = []
+    seen: set[str] = set()
+    offset = 0
+    for read in reads:
+        uri = str(read.metadata.uri)
+        if uri in seen:
+            continue
+        seen.add(uri)
+        entries.append(
+            {
+                "uri": uri,
+                "offset": offset,
+                "length": len(read.data),
+                "contentType": read.metadata.content_type,
+                "generation": read.metadata.generation,
+                "crc32c": read.metadata.crc32c,
+            }
+        )
+        blobs.append(read.data)
+        offset += len(read.data)
+    header = json.dumps(
+        {"version": CONTEXT_BUNDLE_VERSION, "members": entries},
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return b"".join([CONTEXT_BUNDLE_MAGIC, _HEADER_LENGTH.pack(len(header)), header, *blobs])
+
+
+class ContextBundle:
+    """Parsed bundle; member payloads are zero-copy slices of the bundle bytes."""
+
+    def __init__(self, data: bytes) -> None:
+        view = memoryview(data)
+        magic = bytes(view[: len(CONTEXT_BUNDLE_MAGIC)])
+        if len(view) < _PREAMBLE_BYTES or magic != CONTEXT_BUNDLE_MAGIC:
+            raise InvalidContextBundle("missing context bundle magic")
+        (header_len,) = _HEADER_LENGTH.unpack_from(view, len(CONTEXT_BUNDLE_MAGIC))
+        data_start = _PREAMBLE_BYTES + header_len
+        if data_start > len(view):
+            raise InvalidContextBundle("context bundle header is truncated")
+        try:
+            header = json.loads(str(view[_PREAMBLE_BYTES:data_start], "utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise InvalidContextBundle("context bundle header is not valid JSON") from exc
+        if not isinstance(header, Mapping) or header.get("version") != CONTEXT_BUNDLE_VERSION:
+            raise InvalidContextBundle("unsupported context bundle version")
+        self._view = view[data_start:]
+        self._members: dict[str, BundleMember] = {}
+        for entry in header.get("members") or []:
+            member = _parse_member(entry, data_len=len(self._view))
+            self._members[str(member.metadata.uri)] = member
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, uri: object) -> bool:
+        return str(uri) in self._members
+
+    @property
+    def size(self) -> int:
+        return len(self._view)
+
+    def member(self, uri: ArtifactUri) -> BundleMember | None:
+        return self._members.get(str(uri))
+
+    def read(self, member: BundleMember) -> bytes:
+        return bytes(self._view[member.offset : member.offset + member.length])
+
+
+def _parse_member(entry: Any, *, data_len: int) -> BundleMember:
+    try:
+        uri = ArtifactUri.parse(entry["uri"])
+        offset = int(entry["offset"])
+        length = int(entry["length"])
+    except Exception as exc:
+        raise InvalidContextBundle("context bundle member entry is invalid") from exc
+    if offset < 0 or length < 0 or offset + length > data_len:
+        raise InvalidContextBundle("context bundle member is out of bounds")
+    generation = entry.get("generation")
+    return BundleMember(
+        metadata=ArtifactMetadata(
+            uri=uri,
+            size=length,
+            content_type=entry.get("contentType"),
+            generation=int(generation) if generation is not None else None,
+            crc32c=entry.get("crc32c"),
+        ),
+        offset=offset,
+        length=length,
+    )
+
+
+class BundleArtifactStore(ArtifactStore):
+    """Serves reads of bundled objects from memory and delegates the rest."""
+
+    def __init__(self, bundle: ContextBundle, fallback: ArtifactStore) -> None:
+        self._bundle = bundle
+        self._fallback = fallback
+
+    def read_bytes(self, uri: ArtifactUri) -> bytes:
+        member = self._bundle.member(uri)
+        if member is None:
+            return self._fallback.read_bytes(uri)
+        return self._bundle.read(member)
+
+    def read_bytes_limited(self, uri: ArtifactUri, max_bytes: int) -> LimitedRead:
+        member = self._bundle.member(uri)
+        if member is None:
+            return self._fallback.read_bytes_limited(uri, max_bytes)
+        if member.length > max_bytes:
+            raise ArtifactTooLarge(
+                "bundled object exceeds size limit", size=member.length, max_bytes=max_bytes
+            )
+        return LimitedRead(data=self._bundle.read(member), metadata=member.metadata)
+
+    def read_many(self, uris: Sequence[ArtifactUri], max_bytes: int) -> list[BulkReadResult]:
+        results: list[BulkReadResult | None] = [None] * len(uris)
+        missing: list[int] = []
+        for index, uri in enumerate(uris):
+            if uri not in self._bundle:
+                missing.append(index)
+                continue
+            try:
+                results[index] = BulkReadResult(
+                    uri=uri, read=self.read_bytes_limited(uri, max_bytes), error=None, duration_ms=0
+                )
+            except ArtifactTooLarge as exc:
+                results[index] = BulkReadResult(uri=uri, read=None, error=exc, duration_ms=0)
+        if missing:
+            fetched = self._fallback.read_many([uris[index] for index in missing], max_bytes)
+            for index, result in zip(missing, fetched):
+                results[index] = result
+        return [result for result in results if result is not None]
+
+    def stat(self, uri: ArtifactUri) -> ArtifactMetadata:
+        member = self._bundle.member(uri)
+        return member.metadata if member is not None else self._fallback.stat(uri)
+
+    def exists(self, uri: ArtifactUri) -> bool:
+        return uri in self._bundle or self._fallback.exists(uri)
+
+    def write_bytes_create_only(
+        self,
+        uri: ArtifactUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        return self._fallback.write_bytes_create_only(
+            uri, data, content_type=content_type, **encoding_kwargs(content_encoding)
+        )
+
+
+class RecordingArtifactStore(ArtifactStore):
+    """Delegating store that keeps every successful limited read, in order."""
+
+    def __init__(self, store: ArtifactStore) -> None:
+        self._store = store
+        self._reads: list[LimitedRead] = []
+        self._lock = threading.Lock()
+
+    @property
+    def reads(self) -> tuple[LimitedRead, ...]:
+        with self._lock:
+            return tuple(self._reads)
+
+    def read_bytes(self, uri: ArtifactUri) -> bytes:
+        return self._store.read_bytes(uri)
+
+    def read_bytes_limited(self, uri: ArtifactUri, max_bytes: int) -> LimitedRead:
+        read = self._store.read_bytes_limited(uri, max_bytes)
+        self._record([read])
+        return read
+
+    def read_many(self, uris: Sequence[ArtifactUri], max_bytes: int) -> list[BulkReadResult]:
+        results = self._store.read_many(uris, max_bytes)
+        self._record([result.read for result in results if result.read is not None])
+        return results
+
+    def stat(self, uri: ArtifactUri) -> ArtifactMetadata:
+        return self._store.stat(uri)
+
+    def exists(self, uri: ArtifactUri) -> bool:
+        return self._store.exists(uri)
+
+    def write_bytes_create_only(
+        self,
+        uri: ArtifactUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        return self._store.write_bytes_create_only(
+            uri, data, content_type=content_type, **encoding_kwargs(content_encoding)
+        )
+
+    def _record(self, reads: Sequence[LimitedRead]) -> None:
+        with self._lock:
+            self._reads.extend(reads)
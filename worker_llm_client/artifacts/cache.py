@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+from typing import Sequence
+
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactStore,
+    ArtifactTooLarge,
+    BulkReadResult,
+    LimitedRead,
+    WriteResult,
+    encoding_kwargs,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactCacheStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+
+
+class CachingArtifactStore(ArtifactStore):
+    """Keeps successful limited reads in a byte-bounded LRU.
+
+    Upstream artifacts are written create-only, so a URI always names the same
+    bytes and entries never need invalidation. Concurrent reads of one URI are
+    coalesced: a read that finds another thread fetching the same object waits
+    for that fetch instead of issuing its own (this is how a background
+    prefetch hands its result to the invocation that needs it).
+    """
+
+    def __init__(self, store: ArtifactStore, *, max_bytes: int) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self._store = store
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, LimitedRead] = OrderedDict()
+        self._inflight: dict[str, threading.Event] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    def __contains__(self, uri: object) -> bool:
+        with self._lock:
+            return str(uri) in self._entries
+
+    def stats(self) -> ArtifactCacheStats:
+        with self._lock:
+            return ArtifactCacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                evictions=self._evictions,
+            )
+
+    def read_bytes(self, uri: ArtifactUri) -> bytes:
+        cached = self._lookup(str(uri))
+        if cached is not None:
+            return cached.data
+        return self._store.read_bytes(uri)
+
+    def read_bytes_limited(self, uri: ArtifactUri, max_bytes: int) -> LimitedRead:
+        key = str(uri)
+        while True:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return _within_limit(cached, max_bytes)
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    self._misses += 1
+                    break
+                self._coalesced += 1
+            # Another thread is fetching this object; its result (if it
+            # succeeded) is in the cache once the event is set.
+            pending.wait()
+            with self._lock:
+                cached = self._entries.get(key)
+            if cached is None:
+                return self._store.read_bytes_limited(uri, max_bytes)
+        try:
+            read = self._store.read_bytes_limited(uri, max_bytes)
+            self._insert(key, read)
+            return read
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def read_many(self, uris: Sequence[ArtifactUri], max_bytes: int) -> list[BulkReadResult]:
+        results: list[BulkReadResult | None] = [None] * len(uris)
+        missing: list[int] = []
+        for index, uri in enumerate(uris):
+            cached = self._lookup(str(uri))
+            if cached is None:
+                missing.append(index)
+                continue
+            try:
+                read = _within_limit(cached, max_bytes)
+            except ArtifactTooLarge as exc:
+                results[index] = BulkReadResult(uri=uri, read=None, error=exc, duration_ms=0)
+                continue
+            results[index] = BulkReadResult(uri=uri, read=read, error=None, duration_ms=0)
+        if missing:
+            with self._lock:
+                self._misses += len(missing)
+            fetched = self._store.read_many([uris[index] for index in missing], max_bytes)
+            for index, result in zip(missing, fetched):
+                if result.read is not None:
+                    self._insert(str(uris[index]), result.read)
+                results[index] = result
+        return [result for result in results if result is not None]
+
+    def stat(self, uri: ArtifactUri) -> ArtifactMetadata:
+        cached = self._lookup(str(uri))
+        return cached.metadata if cached is not None else self._store.stat(uri)
+
+    def exists(self, uri: ArtifactUri) -> bool:
+        return self._lookup(str(uri)) is not None or self._store.exists(uri)
+
+    def write_bytes_create_only(
+        self,
+        uri: ArtifactUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        return self._store.write_bytes_create_only(
+            uri, data, content_type=content_type, **encoding_kwargs(content_encoding)
+        )
+
+    def _lookup(self, key: str) -> LimitedRead | None:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            return cached
+
+    def _insert(self, key: str, read: LimitedRead) -> None:
+        size = len(read.data)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.data)
+            self._entries[key] = read
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.data)
+                self._evictions += 1
+
+
+def _within_limit(read: LimitedRead, max_bytes: int) -> LimitedRead:
+    # Same checks as the stores: stored size (metadata) and returned bytes.
+    size = max(read.metadata.size, len(read.data))
+    if size > max_bytes:
+        raise ArtifactTooLarge("cached object exceeds size limit", size=size, max_bytes=max_bytes)
+    return read
@@ -7,8 +7,12 @@ from typing import Any
 from worker_llm_client.ops.config import WorkerConfig
 
 
-class InvalidGcsUri(ValueError):
-    """Raised when a GCS URI is invalid."""
+class InvalidArtifactUri(ValueError):
+    """Raised when an artifact URI is invalid."""
+
+
+# Kept for callers that predate non-GCS backends.
+InvalidGcsUri = InvalidArtifactUri
 
 
 class InvalidIdentifier(ValueError):
@@ -17,63 +21,145 @@ class InvalidIdentifier(ValueError):
 
 _TIMEFRAME_TOKEN_RE = re.compile(r"^[0-9]+[A-Za-z]+$")
 
+# gs:// — Cloud Storage; file:/// — local filesystem (absolute paths only);
+# mem:// — in-process store used for tests and benchmarks.
+ARTIFACT_URI_SCHEMES = ("gs", "file", "mem")
+CONTEXT_BUNDLE_FILENAME = "_context.bundle"
+REPORT_DIGEST_SUFFIX = ".digest.json"
+
 
 @dataclass(frozen=True, slots=True)
-class GcsUri:
+class ArtifactUri:
+    """Backend-neutral artifact location ``<scheme>://<bucket>/<object_path>``.
+
+    For ``file`` URIs the bucket is empty and ``object_path`` is the absolute
+    path without its leading slash, so ``str()`` renders ``file:///abs/path``.
+    """
+
     bucket: str
     object_path: str
+    scheme: str = "gs"
 
     def __post_init__(self) -> None:
-        if not self.bucket or not self.bucket.strip():
-            raise InvalidGcsUri("bucket must be non-empty")
+        if self.scheme not in ARTIFACT_URI_SCHEMES:
+            raise InvalidArtifactUri(f"unsupported URI scheme: {self.scheme}")
+        if self.scheme == "file":
+            if self.bucket:
+                raise InvalidArtifactUri("file URIs must not include a host")
+        elif not self.bucket or not self.bucket.strip():
+            raise InvalidArtifactUri("bucket must be non-empty")
         if not self.object_path or not self.object_path.strip():
-            raise InvalidGcsUri("object_path must be non-empty")
+            raise InvalidArtifactUri("object_path must be non-empty")
         if self.object_path.startswith("/"):
-            raise InvalidGcsUri("object_path must not start with '/'")
+            raise InvalidArtifactUri("object_path must not start with '/'")
         if "?" in self.object_path or "#" in self.object_path:
-            raise InvalidGcsUri("object_path must not include query/fragment")
+            raise InvalidArtifactUri("object_path must not include query/fragment")
+        if self.scheme == "file" and ".." in self.object_path.split("/"):
+            raise InvalidArtifactUri("file URIs must not contain '..' segments")
 
     def __str__(self) -> str:
-        return f"gs://{self.bucket}/{self.object_path}"
+        return f"{self.scheme}://{self.bucket}/{self.object_path}"
 
     @classmethod
-    def parse(cls, value: str) -> "GcsUri":
+    def parse(cls, value: str) -> "ArtifactUri":
         if not isinstance(value, str) or not value.strip():
-            raise InvalidGcsUri("GCS URI must be a non-empty string")
+            raise InvalidArtifactUri("artifact URI must be a non-empty string")
         value = value.strip()
-        if not value.startswith("gs://"):
-            raise InvalidGcsUri("GCS URI must start with gs://")
-        path = value[len("gs://") :]
+        scheme, sep, path = value.partition("://")
+        if not sep or scheme not in ARTIFACT_URI_SCHEMES:
+            raise InvalidArtifactUri(
+                "artifact URI must start with one of "
+                + ", ".join(f"{name}://" for name in ARTIFACT_URI_SCHEMES)
+            )
         if not path or "/" not in path:
-            raise InvalidGcsUri("GCS URI must include bucket and object path")
+            raise InvalidArtifactUri("artifact URI must include bucket and object path")
         bucket, object_path = path.split("/", 1)
-        return cls(bucket=bucket, object_path=object_path)
+        return cls(bucket=bucket, object_path=object_path, scheme=scheme)
+
+
+# The original name; every backend now shares the same URI type.
+GcsUri = ArtifactUri
 
 
 @dataclass(frozen=True, slots=True)
 class ArtifactPathPolicy:
+    """Where report artifacts are written.
+
+    ``bucket`` is a GCS bucket name, or a ``file:///base/dir`` /
+    ``mem://namespace`` location for the non-GCS backends.
+    """
+
     bucket: str
     prefix: str | None = None
 
     def __post_init__(self) -> None:
         if not self.bucket or not self.bucket.strip():
             raise InvalidIdentifier("bucket must be non-empty")
+        _split_bucket(self.bucket)
 
     @classmethod
     def from_config(cls, config: WorkerConfig) -> "ArtifactPathPolicy":
         return cls(bucket=config.artifacts_bucket, prefix=config.artifacts_prefix)
 
-    def report_uri(self, run_id: str, timeframe: str, step_id: str) -> GcsUri:
+    @property
+    def scheme(self) -> str:
+        return _split_bucket(self.bucket)[0]
+
+    def report_uri(self, run_id: str, timeframe: str, step_id: str) -> ArtifactUri:
         run_id = _require_identifier(run_id, label="runId")
         timeframe = _require_identifier(timeframe, label="timeframe")
         step_id = _require_identifier(step_id, label="stepId")
         _validate_timeframe_in_step_id(timeframe, step_id)
+        return self._run_artifact_uri(run_id, timeframe, f"{step_id}.json")
+
+    def context_bundle_uri(self, run_id: str, timeframe: str) -> ArtifactUri:
+        """Packed context inputs shared by every step of a run and timeframe."""
+        run_id = _require_identifier(run_id, label="runId")
+        timeframe = _require_identifier(timeframe, label="timeframe")
+        # Reports are always `<stepId>.json`, so this name cannot collide.
+        return self._run_artifact_uri(run_id, timeframe, CONTEXT_BUNDLE_FILENAME)
 
+    def _run_artifact_uri(self, run_id: str, timeframe: str, filename: str) -> ArtifactUri:
+        scheme, bucket, base_path = _split_bucket(self.bucket)
         prefix = _normalize_prefix(self.prefix)
-        filename = f"{step_id}.json"
-        segments = [segment for segment in (prefix, run_id, timeframe, filename) if segment]
+        segments = [
+            segment for segment in (base_path, prefix, run_id, timeframe, filename) if segment
+        ]
         object_path = "/".join(segments)
-        return GcsUri(bucket=self.bucket, object_path=object_path)
+        return ArtifactUri(bucket=bucket, object_path=object_path, scheme=scheme)
+
+
+def report_digest_uri(report_uri: ArtifactUri) -> ArtifactUri | None:
+    """Digest sidecar of a report: `<stepId>.json` -> `<stepId>.digest.json`.
+
+    Returns None for objects that do not end in `.json` (no digest layout).
+    """
+    path = report_uri.object_path
+    if not path.endswith(".json") or path.endswith(REPORT_DIGEST_SUFFIX):
+        return None
+    return ArtifactUri(
+        bucket=report_uri.bucket,
+        object_path=path[: -len(".json")] + REPORT_DIGEST_SUFFIX,
+        scheme=report_uri.scheme,
+    )
+
+
+def _split_bucket(value: str) -> tuple[str, str, str | None]:
+    # Returns (scheme, bucket, base object path).
+    value = value.strip()
+    if "://" not in value:
+        return "gs", value, None
+    scheme, _, rest = value.partition("://")
+    if scheme not in ARTIFACT_URI_SCHEMES:
+        raise InvalidIdentifier(f"unsupported artifacts location scheme: {scheme}")
+    if scheme == "file":
+        if not rest.startswith("/"):
+            raise InvalidIdentifier("file artifacts location must be an absolute path")
+        return scheme, "", _normalize_prefix(rest)
+    bucket, _, base_path = rest.partition("/")
+    if not bucket:
+        raise InvalidIdentifier("bucket must be non-empty")
+    return scheme, bucket, _normalize_prefix(base_path)
 
 
 def _normalize_prefix(prefix: str | None) -> str | None:
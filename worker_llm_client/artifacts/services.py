@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Protocol
+import time
+from typing import Callable, Protocol, Sequence
 
 from worker_llm_client.artifacts.domain import GcsUri
 
@@ -16,6 +18,20 @@ class ArtifactReadFailed(ArtifactStoreError):
     pass
 
 
+class ArtifactNotFound(ArtifactReadFailed):
+    """The object does not exist; lets optional reads skip an exists() probe."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, retryable=False)
+
+
+class ArtifactTooLarge(ArtifactReadFailed):
+    def __init__(self, message: str, *, size: int, max_bytes: int) -> None:
+        super().__init__(message, retryable=False)
+        self.size = size
+        self.max_bytes = max_bytes
+
+
 class ArtifactWriteFailed(ArtifactStoreError):
     pass
 
@@ -25,14 +41,105 @@ class WriteResult:
     uri: GcsUri
     created: bool
     reused: bool
+    stored_bytes: int | None = None  # bytes at rest, after any content-encoding
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactMetadata:
+    uri: GcsUri
+    size: int
+    content_type: str | None = None
+    generation: int | None = None
+    crc32c: str | None = None
+    content_encoding: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class LimitedRead:
+    data: bytes
+    metadata: ArtifactMetadata
+
+
+@dataclass(frozen=True, slots=True)
+class BulkReadResult:
+    uri: GcsUri
+    read: LimitedRead | None
+    error: Exception | None
+    duration_ms: int
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class ArtifactStore(Protocol):
     def read_bytes(self, uri: GcsUri) -> bytes:
         ...
 
+    def read_bytes_limited(self, uri: GcsUri, max_bytes: int) -> LimitedRead:
+        """Read at most ``max_bytes``; raise ArtifactTooLarge without fetching
+        the body when metadata already shows the object is larger."""
+        ...
+
+    def read_many(self, uris: Sequence[GcsUri], max_bytes: int) -> list[BulkReadResult]:
+        """Limited-read several objects; results are in input order and carry
+        per-item errors instead of raising."""
+        ...
+
+    def stat(self, uri: GcsUri) -> ArtifactMetadata:
+        ...
+
     def exists(self, uri: GcsUri) -> bool:
         ...
 
-    def write_bytes_create_only(self, uri: GcsUri, data: bytes, *, content_type: str) -> WriteResult:
+    def write_bytes_create_only(
+        self,
+        uri: GcsUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        """Create ``uri`` unless it exists. ``content_encoding`` (``gzip``)
+        asks the store to compress this object; stores without transparent
+        decoding on read store ``data`` as is."""
         ...
+
+
+def encoding_kwargs(content_encoding: str | None) -> dict[str, str]:
+    """``content_encoding`` for ``write_bytes_create_only``, only when set.
+
+    Stores written before per-write encodings keep working for plain writes.
+    """
+    return {} if content_encoding is None else {"content_encoding": content_encoding}
+
+
+def read_many_parallel(
+    read_limited: Callable[[GcsUri, int], LimitedRead],
+    uris: Sequence[GcsUri],
+    max_bytes: int,
+    *,
+    max_workers: int,
+) -> list[BulkReadResult]:
+    def _read_one(uri: GcsUri) -> BulkReadResult:
+        started = time.monotonic()
+        try:
+            read = read_limited(uri, max_bytes)
+        except Exception as exc:
+            return BulkReadResult(
+                uri=uri,
+                read=None,
+                error=exc,
+                duration_ms=int((time.monotonic() - started) * 1000),
+            )
+        return BulkReadResult(
+            uri=uri,
+            read=read,
+            error=None,
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+
+    if len(uris) <= 1 or max_workers <= 1:
+        return [_read_one(uri) for uri in uris]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(uris))) as pool:
+        return list(pool.map(_read_one, uris))
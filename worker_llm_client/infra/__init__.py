@@ -2,16 +2,34 @@ from worker_llm_client.infra.cloudevents import CloudEventParser
 from worker_llm_client.infra.firestore import (
     FirestoreFlowRunRepository,
     FirestorePromptRepository,
+    FirestoreRunWatchSource,
     FirestoreSchemaRepository,
 )
+from worker_llm_client.infra.filesystem import FilesystemArtifactStore
 from worker_llm_client.infra.gcs import GcsArtifactStore
-from worker_llm_client.infra.gemini import GeminiClientAdapter
+from worker_llm_client.infra.gemini import (
+    GeminiBatchPredictionService,
+    GeminiClientAdapter,
+    GeminiFileStore,
+)
+from worker_llm_client.infra.memory import (
+    InMemoryArtifactStore,
+    InMemoryBatchPredictionService,
+    InMemoryFlowRunRepository,
+)
 
 __all__ = [
     "FirestoreFlowRunRepository",
     "FirestorePromptRepository",
+    "FirestoreRunWatchSource",
     "FirestoreSchemaRepository",
+    "FilesystemArtifactStore",
     "GcsArtifactStore",
+    "GeminiBatchPredictionService",
     "GeminiClientAdapter",
+    "GeminiFileStore",
+    "InMemoryArtifactStore",
+    "InMemoryBatchPredictionService",
+    "InMemoryFlowRunRepository",
     "CloudEventParser",
 ]
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any
+from datetime import datetime, timezone
+import re
+from typing import Any, Mapping
 
 
 @dataclass(frozen=True, slots=True)
@@ -21,3 +23,57 @@ class CloudEventParser:
                 run_id = parts[idx + 1].strip()
                 return run_id or None
         return None
+
+
+_FRACTION_RE = re.compile(r"\.(\d+)")
+
+
+def parse_timestamp(value: Any) -> datetime | None:
+    """RFC 3339 string, datetime or protobuf Timestamp -> aware datetime (µs precision)."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+    to_datetime = getattr(value, "ToDatetime", None)
+    if callable(to_datetime):
+        try:
+            return to_datetime().replace(tzinfo=timezone.utc)
+        except Exception:
+            return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = value.strip()
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    # Firestore emits nanoseconds; datetime keeps microseconds.
+    text = _FRACTION_RE.sub(lambda match: "." + match.group(1)[:6].ljust(6, "0"), text, count=1)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def snapshot_time(cloud_event: Any) -> datetime | None:
+    """Time of the document write an event describes.
+
+    Prefers the new document's ``updateTime`` from a JSON or decoded protobuf
+    payload and falls back to the CloudEvent ``time`` attribute.
+    """
+    data = cloud_event.get("data") if isinstance(cloud_event, Mapping) else getattr(
+        cloud_event, "data", None
+    )
+    value = data.get("value") if isinstance(data, Mapping) else getattr(data, "value", None)
+    if isinstance(value, Mapping):
+        update_time = value.get("updateTime")
+    else:
+        update_time = getattr(value, "update_time", None)
+    parsed = parse_timestamp(update_time)
+    if parsed is not None:
+        return parsed
+    if isinstance(cloud_event, Mapping):
+        event_time = cloud_event.get("time")
+    else:
+        try:
+            event_time = cloud_event["time"]
+        except Exception:
+            event_time = getattr(cloud_event, "time", None)
+    return parse_timestamp(event_time)
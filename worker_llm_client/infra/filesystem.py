@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import mimetypes
+import os
+from pathlib import Path
+import tempfile
+from typing import Sequence
+
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactNotFound,
+    ArtifactReadFailed,
+    ArtifactStore,
+    ArtifactTooLarge,
+    ArtifactWriteFailed,
+    BulkReadResult,
+    LimitedRead,
+    WriteResult,
+    read_many_parallel,
+)
+
+
+@dataclass(slots=True)
+class FilesystemArtifactStore(ArtifactStore):
+    """ArtifactStore over ``file:///`` URIs on a local or mounted filesystem.
+
+    Limited reads open the file once: the size check, the metadata and a
+    read of at most ``max_bytes + 1`` bytes all use the same handle.
+    Create-only writes are atomic: data is written to a temp file in the
+    target directory and published with ``link()``, which fails if the
+    target already exists.
+    """
+
+    read_concurrency: int = 8
+
+    def read_bytes(self, uri: ArtifactUri) -> bytes:
+        path = _local_path(uri, ArtifactReadFailed)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError as exc:
+            raise ArtifactNotFound("file not found") from exc
+        except OSError as exc:
+            raise ArtifactReadFailed("file read failed", retryable=False) from exc
+
+    def read_bytes_limited(self, uri: ArtifactUri, max_bytes: int) -> LimitedRead:
+        path = _local_path(uri, ArtifactReadFailed)
+        try:
+            with open(path, "rb") as handle:
+                metadata = _metadata(uri, path, os.fstat(handle.fileno()))
+                if metadata.size > max_bytes:
+                    raise ArtifactTooLarge(
+                        "file exceeds size limit", size=metadata.size, max_bytes=max_bytes
+                    )
+                # The file may have grown since fstat.
+                data = handle.read(max_bytes + 1)
+        except FileNotFoundError as exc:
+            raise ArtifactNotFound("file not found") from exc
+        except OSError as exc:
+            raise ArtifactReadFailed("file read failed", retryable=False) from exc
+        if len(data) > max_bytes:
+            raise ArtifactTooLarge("file exceeds size limit", size=len(data), max_bytes=max_bytes)
+        return LimitedRead(data=data, metadata=metadata)
+
+    def read_many(self, uris: Sequence[ArtifactUri], max_bytes: int) -> list[BulkReadResult]:
+        return read_many_parallel(
+            self.read_bytes_limited, uris, max_bytes, max_workers=self.read_concurrency
+        )
+
+    def stat(self, uri: ArtifactUri) -> ArtifactMetadata:
+        path = _local_path(uri, ArtifactReadFailed)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError as exc:
+            raise ArtifactNotFound("file not found") from exc
+        except OSError as exc:
+            raise ArtifactReadFailed("file metadata read failed", retryable=False) from exc
+        return _metadata(uri, path, st)
+
+    def exists(self, uri: ArtifactUri) -> bool:
+        return _local_path(uri, ArtifactReadFailed).is_file()
+
+    def write_bytes_create_only(
+        self,
+        uri: ArtifactUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        # Reads do not decode, so content_encoding is ignored.
+        path = _local_path(uri, ArtifactWriteFailed)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        except OSError as exc:
+            raise ArtifactWriteFailed("file write failed", retryable=False) from exc
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+            try:
+                os.link(tmp_name, path)
+            except FileExistsError:
+                return WriteResult(uri=uri, created=False, reused=True)
+            except OSError:
+                # Filesystems without hard links: fall back to an exclusive
+                # create, which is still create-only but not all-or-nothing.
+                return _write_exclusive(uri, path, data)
+        except OSError as exc:
+            raise ArtifactWriteFailed("file write failed", retryable=False) from exc
+        finally:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+        return WriteResult(uri=uri, created=True, reused=False, stored_bytes=len(data))
+
+
+def _metadata(uri: ArtifactUri, path: Path, st: os.stat_result) -> ArtifactMetadata:
+    content_type, _ = mimetypes.guess_type(path.name)
+    return ArtifactMetadata(
+        uri=uri,
+        size=st.st_size,
+        content_type=content_type,
+        generation=st.st_mtime_ns,
+    )
+
+
+def _write_exclusive(uri: ArtifactUri, path: Path, data: bytes) -> WriteResult:
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return WriteResult(uri=uri, created=False, reused=True)
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    return WriteResult(uri=uri, created=True, reused=False, stored_bytes=len(data))
+
+
+def _local_path(
+    uri: ArtifactUri, error: type[ArtifactReadFailed] | type[ArtifactWriteFailed]
+) -> Path:
+    if uri.scheme != "file":
+        raise error(f"filesystem store cannot handle {uri.scheme}:// URIs", retryable=False)
+    return Path("/" + uri.object_path)
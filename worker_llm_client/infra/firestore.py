@@ -2,24 +2,30 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import time
-from typing import Any, Mapping
+from typing import Any, Callable, Mapping, Sequence
 
 import re
 
 from worker_llm_client.app.services import (
     ClaimResult,
+    DeferredRunScanner,
     FinalizeResult,
     FlowRunRecord,
     FlowRunRepository,
+    FlowRunScanner,
     LLMPrompt,
     LLMSchema,
     PromptRepository,
     SchemaRepository,
     build_claim_patch,
     build_finalize_patch,
+    build_release_patch,
+    build_submission_patch,
     is_precondition_or_aborted,
 )
+from worker_llm_client.app.watch import RunChange, RunWatchSource, RunWatchSubscription
 from worker_llm_client.workflow.domain import FlowRun, FlowRunInvalid
+from worker_llm_client.workflow.policies import ReadyStepSelector
 
 
 def _get_step_status(flow_run: Mapping[str, Any], step_id: str) -> str | None:
@@ -52,7 +58,7 @@ def _is_schema_id_safe(schema_id: str) -> bool:
 
 
 @dataclass(slots=True)
-class FirestoreFlowRunRepository(FlowRunRepository):
+class FirestoreFlowRunRepository(FlowRunRepository, FlowRunScanner, DeferredRunScanner):
     client: Any
     flow_runs_collection: str = "flow_runs"
     max_attempts: int = 3
@@ -69,6 +75,35 @@ class FirestoreFlowRunRepository(FlowRunRepository):
         update_time = getattr(snapshot, "update_time", None)
         return FlowRunRecord(flow_run=flow_run, update_time=update_time)
 
+    def ready_run_ids(self, *, limit: int) -> list[str]:
+        return self._running_run_ids(ReadyStepSelector.executable_llm_steps, limit=limit)
+
+    def deferred_run_ids(self, *, limit: int) -> list[str]:
+        return self._running_run_ids(ReadyStepSelector.deferred_llm_steps, limit=limit)
+
+    def _running_run_ids(
+        self, steps: Callable[[FlowRun], Sequence[Any]], *, limit: int
+    ) -> list[str]:
+        # Step statuses live in a map, so only the run status can be filtered
+        # server-side; the steps themselves are matched client-side.
+        query = self.client.collection(self.flow_runs_collection).where(
+            "status", "==", "RUNNING"
+        )
+        run_ids: list[str] = []
+        for snapshot in query.stream():
+            flow_run_raw = snapshot.to_dict()
+            if not isinstance(flow_run_raw, Mapping):
+                continue
+            try:
+                flow_run = FlowRun.from_raw(flow_run_raw, run_id=snapshot.id)
+            except FlowRunInvalid:
+                continue
+            if steps(flow_run):
+                run_ids.append(snapshot.id)
+                if len(run_ids) >= limit:
+                    break
+        return run_ids
+
     def patch(
         self, run_id: str, patch: Mapping[str, Any], *, precondition_update_time: Any
     ) -> None:
@@ -176,6 +211,131 @@ class FirestoreFlowRunRepository(FlowRunRepository):
 
         return FinalizeResult(updated=False, status=last_status, reason="precondition_failed")
 
+    def record_submission(
+        self, run_id: str, step_id: str, submission: Mapping[str, Any]
+    ) -> FinalizeResult:
+        doc_ref = self.client.collection(self.flow_runs_collection).document(run_id)
+        last_status: str | None = None
+
+        for attempt in range(self.max_attempts):
+            snapshot = doc_ref.get()
+            flow_run_raw = snapshot.to_dict() if snapshot is not None else None
+            flow_run_raw = flow_run_raw if isinstance(flow_run_raw, Mapping) else {}
+            FlowRun.from_raw(flow_run_raw, run_id=run_id)
+
+            current_status = _get_step_status(flow_run_raw, step_id)
+            last_status = current_status
+            if current_status != "RUNNING":
+                return FinalizeResult(updated=False, status=current_status, reason="not_running")
+
+            patch = build_submission_patch(step_id, submission)
+            try:
+                update_time = getattr(snapshot, "update_time", None)
+                self.patch(run_id, patch, precondition_update_time=update_time)
+                return FinalizeResult(updated=True, status=current_status)
+            except Exception as exc:
+                if is_precondition_or_aborted(exc):
+                    if attempt < self.max_attempts - 1:
+                        time.sleep(self.base_backoff_seconds * (2**attempt))
+                        continue
+                    return FinalizeResult(
+                        updated=False, status=last_status, reason="precondition_failed"
+                    )
+                raise
+
+        return FinalizeResult(updated=False, status=last_status, reason="precondition_failed")
+
+    def release_step(self, run_id: str, step_id: str) -> FinalizeResult:
+        doc_ref = self.client.collection(self.flow_runs_collection).document(run_id)
+        last_status: str | None = None
+
+        for attempt in range(self.max_attempts):
+            snapshot = doc_ref.get()
+            flow_run_raw = snapshot.to_dict() if snapshot is not None else None
+            flow_run_raw = flow_run_raw if isinstance(flow_run_raw, Mapping) else {}
+            FlowRun.from_raw(flow_run_raw, run_id=run_id)
+
+            current_status = _get_step_status(flow_run_raw, step_id)
+            last_status = current_status
+            if current_status != "RUNNING":
+                return FinalizeResult(updated=False, status=current_status, reason="not_running")
+
+            patch = build_release_patch(step_id)
+            try:
+                update_time = getattr(snapshot, "update_time", None)
+                self.patch(run_id, patch, precondition_update_time=update_time)
+                return FinalizeResult(updated=True, status=current_status)
+            except Exception as exc:
+                if is_precondition_or_aborted(exc):
+                    if attempt < self.max_attempts - 1:
+                        time.sleep(self.base_backoff_seconds * (2**attempt))
+                        continue
+                    return FinalizeResult(
+                        updated=False, status=last_status, reason="precondition_failed"
+                    )
+                raise
+
+        return FinalizeResult(updated=False, status=last_status, reason="precondition_failed")
+
+
+@dataclass(slots=True)
+class _WatchSubscription(RunWatchSubscription):
+    watch: Any
+
+    @property
+    def is_active(self) -> bool:
+        # google.cloud.firestore_v1.watch.Watch: False once the stream closed
+        # for good (the SDK itself resumes transient disconnects).
+        return bool(getattr(self.watch, "is_active", True))
+
+    def unsubscribe(self) -> None:
+        try:
+            self.watch.unsubscribe()
+        except Exception:
+            pass
+
+
+@dataclass(slots=True)
+class FirestoreRunWatchSource(RunWatchSource):
+    """``on_snapshot`` listener on RUNNING flow runs."""
+
+    client: Any
+    flow_runs_collection: str = "flow_runs"
+
+    def subscribe(
+        self, on_changes: Callable[[Sequence[RunChange], bool], None]
+    ) -> RunWatchSubscription:
+        query = self.client.collection(self.flow_runs_collection).where(
+            "status", "==", "RUNNING"
+        )
+        first = [True]
+
+        def callback(docs: Sequence[Any], changes: Sequence[Any], read_time: Any) -> None:
+            if first[0]:
+                # Initial snapshot of this subscription: the full result set.
+                first[0] = False
+                on_changes([_run_change(doc) for doc in docs], True)
+                return
+            batch = []
+            for change in changes:
+                kind = getattr(getattr(change, "type", None), "name", "")
+                if kind == "REMOVED":
+                    batch.append(RunChange(run_id=change.document.id, raw=None))
+                else:
+                    batch.append(_run_change(change.document))
+            on_changes(batch, False)
+
+        return _WatchSubscription(watch=query.on_snapshot(callback))
+
+
+def _run_change(snapshot: Any) -> RunChange:
+    raw = snapshot.to_dict()
+    return RunChange(
+        run_id=snapshot.id,
+        raw=raw if isinstance(raw, Mapping) else None,
+        update_time=getattr(snapshot, "update_time", None),
+    )
+
 
 @dataclass(slots=True)
 class FirestorePromptRepository(PromptRepository):
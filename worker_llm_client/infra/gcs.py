@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import gzip
+from typing import Sequence
+import zlib
 
 from worker_llm_client.artifacts.domain import GcsUri
 from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactNotFound,
     ArtifactReadFailed,
     ArtifactStore,
+    ArtifactTooLarge,
     ArtifactWriteFailed,
+    BulkReadResult,
+    LimitedRead,
     WriteResult,
+    read_many_parallel,
 )
 
 try:
@@ -15,6 +24,17 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     gax = None
 
+try:
+    import google.auth  # type: ignore
+    from google.auth.transport.requests import AuthorizedSession  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    AuthorizedSession = None
+    HTTPAdapter = None
+
+DEFAULT_READ_CONCURRENCY = 8
+CONTENT_ENCODINGS = ("gzip",)
+
 
 def _is_already_exists(exc: Exception) -> bool:
     if gax is not None:
@@ -23,6 +43,12 @@ def _is_already_exists(exc: Exception) -> bool:
     return exc.__class__.__name__ in ("PreconditionFailed", "Conflict", "AlreadyExists")
 
 
+def _is_not_found(exc: Exception) -> bool:
+    if gax is not None and isinstance(exc, gax.NotFound):
+        return True
+    return exc.__class__.__name__ == "NotFound"
+
+
 def _is_retryable(exc: Exception) -> bool:
     if gax is not None:
         retryable = (
@@ -43,19 +69,120 @@ def _is_retryable(exc: Exception) -> bool:
     )
 
 
+def build_storage_client(*, project: str | None, pool_size: int = DEFAULT_READ_CONCURRENCY) -> object:
+    """Return a storage.Client whose HTTP connection pool fits ``pool_size``
+    concurrent reads (the default requests pool keeps only 10 connections per
+    host and warns/discards beyond that)."""
+    from google.cloud import storage  # type: ignore
+
+    if AuthorizedSession is None or HTTPAdapter is None:
+        return storage.Client(project=project)
+    credentials, _ = google.auth.default(
+        scopes=["https://www.googleapis.com/auth/devstorage.read_write"]
+    )
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+
 @dataclass(slots=True)
 class GcsArtifactStore(ArtifactStore):
     client: object
+    read_concurrency: int = DEFAULT_READ_CONCURRENCY
 
     def read_bytes(self, uri: GcsUri) -> bytes:
+        # gzip-encoded objects are served decompressed (decompressive
+        # transcoding), so callers always see the original bytes.
+        _require_gcs(uri, ArtifactReadFailed)
         try:
             bucket = self.client.bucket(uri.bucket)
             blob = bucket.blob(uri.object_path)
             return blob.download_as_bytes()
         except Exception as exc:
+            if _is_not_found(exc):
+                raise ArtifactNotFound("GCS object not found") from exc
             raise ArtifactReadFailed("GCS read failed", retryable=_is_retryable(exc)) from exc
 
+    def read_bytes_limited(self, uri: GcsUri, max_bytes: int) -> LimitedRead:
+        # A single ranged GET of at most max_bytes + 1 bytes: a longer body
+        # means the object is over the limit. The generation, crc32c and
+        # encoding come from the response headers, so the bytes and metadata
+        # always describe the same object generation. raw_download keeps
+        # gzip-encoded objects compressed so the range applies to the stored
+        # bytes.
+        _require_gcs(uri, ArtifactReadFailed)
+        try:
+            bucket = self.client.bucket(uri.bucket)
+            blob = bucket.blob(uri.object_path)
+            data = blob.download_as_bytes(start=0, end=max_bytes, raw_download=True)
+        except Exception as exc:
+            if _is_not_found(exc):
+                raise ArtifactNotFound("GCS object not found") from exc
+            raise ArtifactReadFailed("GCS read failed", retryable=_is_retryable(exc)) from exc
+        metadata = _metadata_from_blob(uri, blob, size=len(data))
+        if metadata.content_encoding == "gzip":
+            if len(data) <= max_bytes:
+                # The whole compressed object fit in the range.
+                return LimitedRead(data=_gunzip_limited(data, max_bytes), metadata=metadata)
+            # A compressed body over the limit can still inflate to fewer than
+            # max_bytes; the stored size decides.
+            blob, metadata = self._get_blob_metadata(uri)
+            return self._read_gzip_limited(blob, metadata, max_bytes)
+        if len(data) > max_bytes:
+            raise ArtifactTooLarge(
+                "GCS object exceeds size limit", size=len(data), max_bytes=max_bytes
+            )
+        return LimitedRead(data=data, metadata=metadata)
+
+    def _read_gzip_limited(
+        self, blob: object, metadata: ArtifactMetadata, max_bytes: int
+    ) -> LimitedRead:
+        # The stored size is the compressed size; the limit applies to the
+        # decompressed bytes. Deflate expands incompressible input by at most
+        # 5 bytes per 16 KiB block plus the gzip header/trailer, so anything
+        # stored beyond that bound cannot decompress to <= max_bytes.
+        if metadata.size > _max_gzip_stored_bytes(max_bytes):
+            raise ArtifactTooLarge(
+                "GCS object exceeds size limit", size=metadata.size, max_bytes=max_bytes
+            )
+        try:
+            kwargs = {"raw_download": True}
+            if metadata.generation is not None:
+                kwargs["if_generation_match"] = metadata.generation
+            raw = blob.download_as_bytes(**kwargs)
+        except Exception as exc:
+            retryable = _is_retryable(exc) or _is_already_exists(exc)
+            raise ArtifactReadFailed("GCS read failed", retryable=retryable) from exc
+        return LimitedRead(data=_gunzip_limited(raw, max_bytes), metadata=metadata)
+
+    def read_many(self, uris: Sequence[GcsUri], max_bytes: int) -> list[BulkReadResult]:
+        # storage.Client is thread-safe for reads; the pool size should match
+        # the HTTP connection pool of the client (see build_storage_client).
+        return read_many_parallel(
+            self.read_bytes_limited, uris, max_bytes, max_workers=self.read_concurrency
+        )
+
+    def stat(self, uri: GcsUri) -> ArtifactMetadata:
+        _blob, metadata = self._get_blob_metadata(uri)
+        return metadata
+
+    def _get_blob_metadata(self, uri: GcsUri) -> tuple[object, ArtifactMetadata]:
+        _require_gcs(uri, ArtifactReadFailed)
+        try:
+            bucket = self.client.bucket(uri.bucket)
+            blob = bucket.get_blob(uri.object_path)
+        except Exception as exc:
+            raise ArtifactReadFailed("GCS metadata read failed", retryable=_is_retryable(exc)) from exc
+        if blob is None:
+            raise ArtifactNotFound("GCS object not found")
+        size = getattr(blob, "size", None)
+        if not isinstance(size, int):
+            raise ArtifactReadFailed("GCS object size unavailable", retryable=False)
+        return blob, _metadata_from_blob(uri, blob, size=size)
+
     def exists(self, uri: GcsUri) -> bool:
+        _require_gcs(uri, ArtifactReadFailed)
         try:
             bucket = self.client.bucket(uri.bucket)
             blob = bucket.blob(uri.object_path)
@@ -63,17 +190,74 @@ class GcsArtifactStore(ArtifactStore):
         except Exception as exc:
             raise ArtifactReadFailed("GCS exists check failed", retryable=_is_retryable(exc)) from exc
 
-    def write_bytes_create_only(self, uri: GcsUri, data: bytes, *, content_type: str) -> WriteResult:
+    def write_bytes_create_only(
+        self,
+        uri: GcsUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        if content_encoding is not None and content_encoding not in CONTENT_ENCODINGS:
+            raise ValueError(f"content_encoding must be one of {', '.join(CONTENT_ENCODINGS)}")
+        _require_gcs(uri, ArtifactWriteFailed)
         try:
             bucket = self.client.bucket(uri.bucket)
             blob = bucket.blob(uri.object_path)
+            if content_encoding == "gzip":
+                # mtime=0 keeps the compressed bytes deterministic for
+                # identical payloads.
+                data = gzip.compress(data, mtime=0)
+                blob.content_encoding = "gzip"
             blob.upload_from_string(
                 data,
                 content_type=content_type,
                 if_generation_match=0,
             )
-            return WriteResult(uri=uri, created=True, reused=False)
+            return WriteResult(uri=uri, created=True, reused=False, stored_bytes=len(data))
         except Exception as exc:
             if _is_already_exists(exc):
                 return WriteResult(uri=uri, created=False, reused=True)
             raise ArtifactWriteFailed("GCS write failed", retryable=_is_retryable(exc)) from exc
+
+
+def _metadata_from_blob(uri: GcsUri, blob: object, *, size: int) -> ArtifactMetadata:
+    # Populated by get_blob, or from the response headers after a download.
+    return ArtifactMetadata(
+        uri=uri,
+        size=size,
+        content_type=getattr(blob, "content_type", None),
+        generation=getattr(blob, "generation", None),
+        crc32c=getattr(blob, "crc32c", None),
+        content_encoding=getattr(blob, "content_encoding", None),
+    )
+
+
+def _require_gcs(uri: GcsUri, error: type[ArtifactReadFailed] | type[ArtifactWriteFailed]) -> None:
+    if uri.scheme != "gs":
+        raise error(f"GCS store cannot handle {uri.scheme}:// URIs", retryable=False)
+
+
+def _max_gzip_stored_bytes(max_bytes: int) -> int:
+    return max_bytes + 5 * (max_bytes // 16384 + 1) + 64
+
+
+def _gunzip_limited(raw: bytes, max_bytes: int) -> bytes:
+    # Decompress at most max_bytes + 1 bytes; an oversized payload is never
+    # fully inflated in memory.
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(raw, max_bytes + 1)
+        if len(data) <= max_bytes and not decompressor.unconsumed_tail:
+            data += decompressor.flush()
+    except zlib.error as exc:
+        raise ArtifactReadFailed("GCS object is not valid gzip", retryable=False) from exc
+    if len(data) > max_bytes or decompressor.unconsumed_tail:
+        raise ArtifactTooLarge(
+            "GCS object exceeds size limit after decompression",
+            size=len(data),
+            max_bytes=max_bytes,
+        )
+    if not decompressor.eof:
+        raise ArtifactReadFailed("GCS object is truncated gzip", retryable=False)
+    return data
@@ -1,14 +1,31 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import io
 from typing import Any, Sequence
 
+from worker_llm_client.app.context_cache import (
+    CachedContent,
+    ContextCacheRegistry,
+    ProviderContextCache,
+)
+from worker_llm_client.app.file_registry import UploadedFileRegistry
 from worker_llm_client.app.llm_client import (
+    BATCH_JOB_FAILED,
+    BATCH_JOB_PENDING,
+    BATCH_JOB_RUNNING,
+    BATCH_JOB_SUCCEEDED,
+    BatchJobStatus,
+    BatchPredictionService,
+    FileReference,
+    FileReferencesExpired,
     LLMClient,
+    ProviderFileStore,
     ProviderResponse,
     RateLimited,
     RequestFailed,
     SafetyBlocked,
+    UploadedFile,
 )
 from worker_llm_client.app.services import LLMSchema
 from worker_llm_client.reporting.domain import LLMProfile
@@ -25,14 +42,113 @@ except Exception:  # pragma: no cover - optional dependency
 
 
 @dataclass(slots=True)
-class GeminiClientAdapter(LLMClient):
+class GeminiFileStore(ProviderFileStore):
+    """Gemini Files API upload adapter (AI Studio)."""
+
     api_key: str
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.api_key, str) or not self.api_key.strip():
+            raise ValueError("api_key must be a non-empty string")
+
+    def upload(self, *, data: bytes, mime_type: str, display_name: str) -> UploadedFile:
+        if genai is None or types is None:
+            raise RequestFailed("google-genai SDK is unavailable")
+        client = genai.Client(api_key=self.api_key)
+        try:
+            uploaded = client.files.upload(
+                file=io.BytesIO(data),
+                config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name),
+            )
+        except Exception as exc:
+            raise _map_gemini_error(exc) from exc
+        uri = getattr(uploaded, "uri", None)
+        if not isinstance(uri, str) or not uri:
+            raise RequestFailed("Gemini file upload returned no uri")
+        expiration = getattr(uploaded, "expiration_time", None)
+        return UploadedFile(
+            uri=uri,
+            mime_type=getattr(uploaded, "mime_type", None) or mime_type,
+            expires_at=expiration.timestamp() if hasattr(expiration, "timestamp") else None,
+        )
+
+
+@dataclass(slots=True)
+class GeminiContextCacheStore(ProviderContextCache):
+    """Creates Gemini cached contents (``client.caches``) for shared prompt prefixes."""
+
+    api_key: str | None = None
+    vertexai: bool = False
+    project: str | None = None
+    location: str | None = None
+
+    def create(
+        self,
+        *,
+        model_name: str,
+        system: str,
+        parts: Sequence[Any],
+        ttl_seconds: int,
+    ) -> CachedContent:
+        if genai is None or types is None:
+            raise RequestFailed("google-genai SDK is unavailable")
+        client = _build_client(
+            api_key=self.api_key,
+            vertexai=self.vertexai,
+            project=self.project,
+            location=self.location,
+        )
+        try:
+            cached = client.caches.create(
+                model=model_name,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system,
+                    contents=[
+                        types.Content(role="user", parts=[_coerce_part(part) for part in parts])
+                    ],
+                    ttl=f"{int(ttl_seconds)}s",
+                ),
+            )
+        except Exception as exc:
+            raise _map_gemini_error(exc) from exc
+        name = getattr(cached, "name", None)
+        if not isinstance(name, str) or not name:
+            raise RequestFailed("Gemini cache create returned no name")
+        expire_time = getattr(cached, "expire_time", None)
+        return CachedContent(
+            name=name,
+            expires_at=expire_time.timestamp() if hasattr(expire_time, "timestamp") else None,
+        )
+
+
+@dataclass(slots=True)
+class GeminiClientAdapter(LLMClient):
+    api_key: str | None = None
     timeout_seconds: int = 600
+    file_registry: UploadedFileRegistry | None = None
+    vertexai: bool = False
+    project: str | None = None
+    location: str | None = None
+    context_cache: ContextCacheRegistry | None = None
 
     def __post_init__(self) -> None:
+        if self.vertexai:
+            if not self.project or not self.location:
+                raise ValueError("project and location are required for Vertex AI")
+            if self.file_registry is not None:
+                raise ValueError("file_registry is not supported on Vertex AI")
+            return
         if not isinstance(self.api_key, str) or not self.api_key.strip():
             raise ValueError("api_key must be a non-empty string")
 
+    def _client(self) -> Any:
+        return _build_client(
+            api_key=self.api_key,
+            vertexai=self.vertexai,
+            project=self.project,
+            location=self.location,
+        )
+
     def generate(
         self,
         *,
@@ -40,37 +156,72 @@ class GeminiClientAdapter(LLMClient):
         user_parts: Sequence[Any],
         profile: LLMProfile,
         llm_schema: LLMSchema | None = None,
+        cached_prefix_parts: int = 0,
+        inline_files: bool = False,
     ) -> ProviderResponse:
         if genai is None or types is None:
             raise RequestFailed("google-genai SDK is unavailable")
 
         provider_request = profile.to_provider_request()
         config = dict(provider_request.get("config", {}))
-        response_mime_type = config.get("responseMimeType")
         response_schema = llm_schema.provider_schema() if llm_schema is not None else None
 
-        parts = [_coerce_part(part) for part in user_parts]
+        if not self.vertexai and any(_is_gcs_reference(part) for part in user_parts):
+            raise RequestFailed("gs:// chart references require the Vertex AI backend")
 
-        client = genai.Client(api_key=self.api_key)
-        try:
-            response = client.models.generate_content(
+        if inline_files:
+            prepared = list(user_parts)
+        else:
+            prepared = [self._prepare_part(part) for part in user_parts]
+        file_uris = [part.file_uri for part in prepared if isinstance(part, FileReference)]
+
+        cached_content = None
+        if self.context_cache is not None and 0 < cached_prefix_parts <= len(prepared):
+            cached_content = self.context_cache.lookup_or_create(
+                model_name=profile.model_name,
+                system=system,
+                parts=prepared[:cached_prefix_parts],
+            )
+
+        client = self._client()
+
+        def _call(parts: Sequence[Any], cache_name: str | None) -> Any:
+            contents = parts[cached_prefix_parts:] if cache_name is not None else parts
+            return client.models.generate_content(
                 model=profile.model_name,
-                contents=parts,
-                config=types.GenerateContentConfig(
-                    systemInstruction=system,
-                    temperature=config.get("temperature"),
-                    topP=config.get("topP"),
-                    topK=config.get("topK"),
-                    maxOutputTokens=config.get("maxOutputTokens"),
-                    candidateCount=config.get("candidateCount"),
-                    stopSequences=config.get("stopSequences"),
-                    responseMimeType=response_mime_type,
-                    responseJsonSchema=response_schema,
-                    thinkingConfig=config.get("thinkingConfig"),
+                contents=[_coerce_part(part) for part in contents],
+                config=_build_generate_config(
+                    config,
+                    system=system,
+                    response_schema=response_schema,
+                    cached_content=cache_name,
                 ),
             )
+
+        try:
+            response = _call(prepared, cached_content)
         except Exception as exc:
-            raise _map_gemini_error(exc) from exc
+            if cached_content is not None and _is_cache_reference_error(exc, cached_content):
+                # The cached prefix expired provider-side: drop it and send
+                # the full request uncached.
+                self.context_cache.invalidate(cached_content)
+                cached_content = None
+            elif file_uris and _is_file_reference_error(exc, file_uris):
+                # Uploaded files expired or were deleted provider-side: forget
+                # them; the caller decides whether there is time to resend the
+                # request with inline bytes.
+                for file_uri in file_uris:
+                    self.file_registry.invalidate(file_uri)
+                raise FileReferencesExpired(
+                    f"Gemini rejected uploaded files ({_format_api_error_detail(exc)})",
+                    status_code=getattr(exc, "code", None),
+                ) from exc
+            else:
+                raise _map_gemini_error(exc) from exc
+            try:
+                response = _call(prepared, None)
+            except Exception as retry_exc:
+                raise _map_gemini_error(retry_exc) from retry_exc
 
         text = getattr(response, "text", None)
         if text is None:
@@ -84,7 +235,159 @@ class GeminiClientAdapter(LLMClient):
             finish_reason=finish_reason,
             usage=usage,
             raw=response,
+            cached_content=cached_content,
+        )
+
+    def _prepare_part(self, part: Any) -> Any:
+        if self.file_registry is None or not isinstance(part, ChartImage) or part.data is None:
+            return part
+        reference = self.file_registry.reference_for(part.data, mime_type=part.mime_type)
+        return reference if reference is not None else part
+
+
+# Gemini Batch API job states (``JobState``) mapped to the worker's states.
+_BATCH_JOB_STATES = {
+    "JOB_STATE_PENDING": BATCH_JOB_PENDING,
+    "JOB_STATE_QUEUED": BATCH_JOB_PENDING,
+    "JOB_STATE_RUNNING": BATCH_JOB_RUNNING,
+    "JOB_STATE_SUCCEEDED": BATCH_JOB_SUCCEEDED,
+    "JOB_STATE_FAILED": BATCH_JOB_FAILED,
+    "JOB_STATE_CANCELLED": BATCH_JOB_FAILED,
+    "JOB_STATE_EXPIRED": BATCH_JOB_FAILED,
+}
+
+
+@dataclass(slots=True)
+class GeminiBatchPredictionService(BatchPredictionService):
+    """One-request inline batch jobs on the Gemini Batch API (AI Studio).
+
+    Inline requests carry chart images as bytes; ``gs://`` references and
+    uploaded files are not used so the job does not depend on their expiry.
+    """
+
+    api_key: str
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.api_key, str) or not self.api_key.strip():
+            raise ValueError("api_key must be a non-empty string")
+
+    def submit(
+        self,
+        *,
+        display_name: str,
+        system: str,
+        user_parts: Sequence[Any],
+        profile: LLMProfile,
+        llm_schema: LLMSchema | None = None,
+    ) -> str:
+        if genai is None or types is None:
+            raise RequestFailed("google-genai SDK is unavailable")
+        if any(_is_gcs_reference(part) for part in user_parts):
+            raise RequestFailed("gs:// chart references are not supported in batch jobs")
+        config = dict(profile.to_provider_request().get("config", {}))
+        request = types.InlinedRequest(
+            contents=[
+                types.Content(role="user", parts=[_coerce_part(part) for part in user_parts])
+            ],
+            config=_build_generate_config(
+                config,
+                system=system,
+                response_schema=llm_schema.provider_schema() if llm_schema is not None else None,
+                cached_content=None,
+            ),
         )
+        client = genai.Client(api_key=self.api_key)
+        try:
+            job = client.batches.create(
+                model=profile.model_name,
+                src=[request],
+                config=types.CreateBatchJobConfig(display_name=display_name),
+            )
+        except Exception as exc:
+            raise _map_gemini_error(exc) from exc
+        name = getattr(job, "name", None)
+        if not isinstance(name, str) or not name:
+            raise RequestFailed("Gemini batch create returned no name")
+        return name
+
+    def cancel(self, job_name: str) -> None:
+        if genai is None or types is None:
+            raise RequestFailed("google-genai SDK is unavailable")
+        client = genai.Client(api_key=self.api_key)
+        try:
+            client.batches.cancel(name=job_name)
+        except Exception as exc:
+            raise _map_gemini_error(exc) from exc
+
+    def get(self, job_name: str) -> BatchJobStatus:
+        if genai is None or types is None:
+            raise RequestFailed("google-genai SDK is unavailable")
+        client = genai.Client(api_key=self.api_key)
+        try:
+            job = client.batches.get(name=job_name)
+        except Exception as exc:
+            raise _map_gemini_error(exc) from exc
+        raw_state = getattr(job, "state", None)
+        state = _BATCH_JOB_STATES.get(
+            getattr(raw_state, "name", None) or str(raw_state), BATCH_JOB_PENDING
+        )
+        if state == BATCH_JOB_FAILED:
+            error = getattr(job, "error", None)
+            return BatchJobStatus(state=state, error=str(error) if error else str(raw_state))
+        if state != BATCH_JOB_SUCCEEDED:
+            return BatchJobStatus(state=state)
+
+        dest = getattr(job, "dest", None)
+        inlined = getattr(dest, "inlined_responses", None) or []
+        if not inlined:
+            return BatchJobStatus(state=BATCH_JOB_FAILED, error="batch job has no inline response")
+        first = inlined[0]
+        response = getattr(first, "response", None)
+        if response is None:
+            error = getattr(first, "error", None)
+            return BatchJobStatus(state=BATCH_JOB_FAILED, error=str(error or "empty response"))
+        text = getattr(response, "text", None)
+        return BatchJobStatus(
+            state=BATCH_JOB_SUCCEEDED,
+            response=ProviderResponse(
+                text=text if text is not None else _extract_text(response),
+                finish_reason=_extract_finish_reason(response),
+                usage=_extract_usage(response),
+                raw=response,
+            ),
+        )
+
+
+def _build_client(
+    *, api_key: str | None, vertexai: bool, project: str | None, location: str | None
+) -> Any:
+    if vertexai:
+        return genai.Client(vertexai=True, project=project, location=location)
+    return genai.Client(api_key=api_key)
+
+
+def _build_generate_config(
+    config: dict[str, Any],
+    *,
+    system: str,
+    response_schema: Any,
+    cached_content: str | None,
+) -> Any:
+    # With a cached prefix the system instruction lives in the cache and must
+    # not be repeated in the request.
+    return types.GenerateContentConfig(
+        systemInstruction=None if cached_content is not None else system,
+        cachedContent=cached_content,
+        temperature=config.get("temperature"),
+        topP=config.get("topP"),
+        topK=config.get("topK"),
+        maxOutputTokens=config.get("maxOutputTokens"),
+        candidateCount=config.get("candidateCount"),
+        stopSequences=config.get("stopSequences"),
+        responseMimeType=config.get("responseMimeType"),
+        responseJsonSchema=response_schema,
+        thinkingConfig=config.get("thinkingConfig"),
+    )
 
 
 def _extract_text(response: Any) -> str | None:
@@ -124,7 +427,11 @@ def _extract_usage(response: Any) -> dict[str, Any] | None:
 def _coerce_part(part: Any) -> Any:
     if types is None:
         return part
+    if isinstance(part, FileReference):
+        return types.Part.from_uri(file_uri=part.file_uri, mime_type=part.mime_type)
     if isinstance(part, ChartImage):
+        if part.data is None:
+            return types.Part.from_uri(file_uri=part.uri, mime_type=part.mime_type)
         return types.Part.from_bytes(data=part.data, mime_type=part.mime_type)
     if hasattr(part, "data") and hasattr(part, "mime_type"):
         data = getattr(part, "data")
@@ -147,12 +454,85 @@ def _map_gemini_error(exc: Exception) -> Exception:
             return RateLimited(f"Gemini rate limited ({detail})")
         if getattr(exc, "status", None) == "SAFETY":
             return SafetyBlocked(f"Gemini safety block ({detail})")
+        status_code = code if isinstance(code, int) else None
         if 500 <= int(code or 0) < 600:
-            return RequestFailed(f"Gemini server error ({detail})")
-        return RequestFailed(f"Gemini request failed ({detail})")
+            return RequestFailed(f"Gemini server error ({detail})", status_code=status_code)
+        return RequestFailed(f"Gemini request failed ({detail})", status_code=status_code)
     return RequestFailed(f"Gemini request failed ({exc.__class__.__name__})")
 
 
+def _is_gcs_reference(part: Any) -> bool:
+    return isinstance(part, ChartImage) and part.data is None
+
+
+# Status codes (and their canonical status) of a request naming a resource
+# that is gone or not accessible.
+_REFERENCE_ERROR_STATUSES = {400: "INVALID_ARGUMENT", 403: "PERMISSION_DENIED", 404: "NOT_FOUND"}
+
+
+def _reported_references(exc: Exception) -> tuple[set[str], str] | None:
+    """Fields and resources named by a 400/403/404 ``APIError``, plus its message.
+
+    Fields come from ``google.rpc.BadRequest.fieldViolations[].field`` and
+    ``google.rpc.ResourceInfo`` (``resourceType``/``resourceName``) in the
+    error details, lower-cased without underscores.
+    """
+    if genai_errors is None or not isinstance(exc, genai_errors.APIError):
+        return None
+    code = getattr(exc, "code", None)
+    expected_status = _REFERENCE_ERROR_STATUSES.get(code)
+    if expected_status is None:
+        return None
+    status = getattr(exc, "status", None)
+    if status is not None and status != expected_status:
+        return None
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict) and isinstance(details.get("error"), dict):
+        details = details["error"]
+    entries = details.get("details") if isinstance(details, dict) else None
+    reported: set[str] = set()
+    for entry in entries if isinstance(entries, list) else ():
+        if not isinstance(entry, dict):
+            continue
+        values = [entry.get("resourceType"), entry.get("resourceName")]
+        for violation in entry.get("fieldViolations") or ():
+            if isinstance(violation, dict):
+                values.append(violation.get("field"))
+        reported.update(
+            value.lower().replace("_", "") for value in values if isinstance(value, str)
+        )
+    message = getattr(exc, "message", None)
+    return reported, message if isinstance(message, str) else str(exc)
+
+
+def _is_file_reference_error(exc: Exception, file_uris: Sequence[str]) -> bool:
+    reported = _reported_references(exc)
+    if reported is None:
+        return False
+    fields, message = reported
+    file_ids = [_file_resource_name(uri) for uri in file_uris]
+    if any(field.startswith("files/") or "filedata" in field for field in fields):
+        return True
+    # Without details Gemini names the file it could not access in the message.
+    return any(file_id in message for file_id in file_ids)
+
+
+def _is_cache_reference_error(exc: Exception, cache_name: str) -> bool:
+    reported = _reported_references(exc)
+    if reported is None:
+        return False
+    fields, message = reported
+    if any("cachedcontent" in field for field in fields):
+        return True
+    return cache_name in message or "CachedContent" in message
+
+
+def _file_resource_name(file_uri: str) -> str:
+    # ``https://.../v1beta/files/abc`` -> ``files/abc``
+    _prefix, sep, file_id = file_uri.rpartition("files/")
+    return f"files/{file_id}" if sep else file_uri
+
+
 def _format_api_error_detail(exc: Exception) -> str:
     code = getattr(exc, "code", None)
     status = getattr(exc, "status", None)
@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+import itertools
+import threading
+import time
+from typing import Any, Callable, Mapping, Sequence
+
+try:
+    from google.cloud import firestore as _firestore  # type: ignore
+except Exception:  # pragma: no cover - optional in non-firestore environments
+    _firestore = None
+
+from worker_llm_client.app.llm_client import (
+    BATCH_JOB_FAILED,
+    BATCH_JOB_PENDING,
+    BATCH_JOB_SUCCEEDED,
+    BatchJobStatus,
+    BatchPredictionService,
+    ProviderResponse,
+    RequestFailed,
+)
+from worker_llm_client.app.services import (
+    ClaimResult,
+    DeferredRunScanner,
+    FinalizeResult,
+    FlowRunRecord,
+    FlowRunRepository,
+    FlowRunScanner,
+    LLMSchema,
+    build_claim_patch,
+    build_finalize_patch,
+    build_release_patch,
+    build_submission_patch,
+)
+from worker_llm_client.artifacts.domain import ArtifactUri
+from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactNotFound,
+    ArtifactReadFailed,
+    ArtifactStore,
+    ArtifactTooLarge,
+    BulkReadResult,
+    LimitedRead,
+    WriteResult,
+    read_many_parallel,
+)
+from worker_llm_client.workflow.domain import FlowRun, FlowRunInvalid, StepError
+from worker_llm_client.workflow.policies import ReadyStepSelector
+
+
+@dataclass(frozen=True, slots=True)
+class _StoredObject:
+    data: bytes
+    content_type: str | None
+    generation: int
+
+
+@dataclass(slots=True)
+class InMemoryArtifactStore(ArtifactStore):
+    """Process-local ArtifactStore for tests, load tests and benchmarks.
+
+    Accepts URIs of any scheme. ``read_latency_seconds`` is slept on every
+    body read to emulate network round trips when measuring concurrency.
+    """
+
+    read_latency_seconds: float = 0.0
+    read_concurrency: int = 8
+    _objects: dict[str, _StoredObject] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _generations: itertools.count = field(default_factory=lambda: itertools.count(1))
+
+    def put(self, uri: ArtifactUri, data: bytes, *, content_type: str | None = None) -> None:
+        """Seed or overwrite an object (test setup; not create-only)."""
+        with self._lock:
+            self._objects[str(uri)] = _StoredObject(
+                data=bytes(data), content_type=content_type, generation=next(self._generations)
+            )
+
+    def read_bytes(self, uri: ArtifactUri) -> bytes:
+        stored = self._get(uri)
+        self._simulate_latency()
+        return stored.data
+
+    def read_bytes_limited(self, uri: ArtifactUri, max_bytes: int) -> LimitedRead:
+        stored = self._get(uri)
+        metadata = self._metadata(uri, stored)
+        if metadata.size > max_bytes:
+            raise ArtifactTooLarge("object exceeds size limit", size=metadata.size, max_bytes=max_bytes)
+        self._simulate_latency()
+        return LimitedRead(data=stored.data, metadata=metadata)
+
+    def read_many(self, uris: Sequence[ArtifactUri], max_bytes: int) -> list[BulkReadResult]:
+        return read_many_parallel(
+            self.read_bytes_limited, uris, max_bytes, max_workers=self.read_concurrency
+        )
+
+    def stat(self, uri: ArtifactUri) -> ArtifactMetadata:
+        return self._metadata(uri, self._get(uri))
+
+    def exists(self, uri: ArtifactUri) -> bool:
+        with self._lock:
+            return str(uri) in self._objects
+
+    def write_bytes_create_only(
+        self,
+        uri: ArtifactUri,
+        data: bytes,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> WriteResult:
+        # Reads do not decode, so content_encoding is ignored.
+        key = str(uri)
+        with self._lock:
+            if key in self._objects:
+                return WriteResult(uri=uri, created=False, reused=True)
+            self._objects[key] = _StoredObject(
+                data=bytes(data), content_type=content_type, generation=next(self._generations)
+            )
+        return WriteResult(uri=uri, created=True, reused=False, stored_bytes=len(data))
+
+    def _get(self, uri: ArtifactUri) -> _StoredObject:
+        with self._lock:
+            stored = self._objects.get(str(uri))
+        if stored is None:
+            raise ArtifactNotFound("object not found")
+        return stored
+
+    def _simulate_latency(self) -> None:
+        if self.read_latency_seconds > 0:
+            time.sleep(self.read_latency_seconds)
+
+    @staticmethod
+    def _metadata(uri: ArtifactUri, stored: _StoredObject) -> ArtifactMetadata:
+        return ArtifactMetadata(
+            uri=uri,
+            size=len(stored.data),
+            content_type=stored.content_type,
+            generation=stored.generation,
+        )
+
+
+@dataclass(slots=True)
+class InMemoryBatchPredictionService(BatchPredictionService):
+    """Local stand-in for a provider batch prediction API.
+
+    Jobs stay PENDING until a test (or a local driver) calls ``complete`` or
+    ``fail``; ``submissions`` keeps every submitted request for inspection.
+    """
+
+    submissions: dict[str, dict[str, Any]] = field(default_factory=dict)
+    _statuses: dict[str, BatchJobStatus] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _ids: itertools.count = field(default_factory=lambda: itertools.count(1))
+
+    def submit(
+        self,
+        *,
+        display_name: str,
+        system: str,
+        user_parts: Sequence[Any],
+        profile: Any,
+        llm_schema: LLMSchema | None = None,
+    ) -> str:
+        with self._lock:
+            job_name = f"batches/mem-{next(self._ids)}"
+            self.submissions[job_name] = {
+                "display_name": display_name,
+                "system": system,
+                "user_parts": list(user_parts),
+                "model_name": profile.model_name,
+                "llm_schema": llm_schema,
+            }
+            self._statuses[job_name] = BatchJobStatus(state=BATCH_JOB_PENDING)
+        return job_name
+
+    def get(self, job_name: str) -> BatchJobStatus:
+        with self._lock:
+            status = self._statuses.get(job_name)
+        if status is None:
+            raise RequestFailed(f"batch job not found: {job_name}", status_code=404)
+        return status
+
+    def complete(
+        self,
+        job_name: str,
+        text: str,
+        *,
+        finish_reason: str = "STOP",
+        usage: dict[str, Any] | None = None,
+    ) -> None:
+        response = ProviderResponse(text=text, finish_reason=finish_reason, usage=usage, raw=None)
+        self._set(job_name, BatchJobStatus(state=BATCH_JOB_SUCCEEDED, response=response))
+
+    def cancel(self, job_name: str) -> None:
+        try:
+            self.fail(job_name, "cancelled")
+        except KeyError:
+            raise RequestFailed(f"batch job not found: {job_name}", status_code=404) from None
+
+    def fail(self, job_name: str, message: str) -> None:
+        self._set(job_name, BatchJobStatus(state=BATCH_JOB_FAILED, error=message))
+
+    def _set(self, job_name: str, status: BatchJobStatus) -> None:
+        with self._lock:
+            if job_name not in self._statuses:
+                raise KeyError(job_name)
+            self._statuses[job_name] = status
+
+
+class FailedPrecondition(RuntimeError):
+    """``patch`` precondition mismatch (named like the google-api-core error)."""
+
+
+@dataclass(slots=True)
+class InMemoryFlowRunRepository(FlowRunRepository, FlowRunScanner, DeferredRunScanner):
+    """In-process ``flow_runs`` collection for tests and local pull workers.
+
+    Claims, finalizes and submissions are applied atomically under a lock, so
+    the precondition retries of the Firestore repository are not needed;
+    ``update_time`` is a per-document version counter.
+    """
+
+    _docs: dict[str, dict[str, Any]] = field(default_factory=dict)
+    _versions: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def put(self, run_id: str, flow_run: Mapping[str, Any]) -> None:
+        FlowRun.from_raw(flow_run, run_id=run_id)
+        with self._lock:
+            self._docs[run_id] = copy.deepcopy(dict(flow_run))
+            self._versions[run_id] = self._versions.get(run_id, 0) + 1
+
+    def raw(self, run_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            doc = self._docs.get(run_id)
+            return copy.deepcopy(doc) if doc is not None else None
+
+    def get(self, run_id: str) -> FlowRunRecord | None:
+        with self._lock:
+            doc = self._docs.get(run_id)
+            if doc is None:
+                return None
+            snapshot = copy.deepcopy(doc)
+            version = self._versions[run_id]
+        return FlowRunRecord(flow_run=FlowRun.from_raw(snapshot, run_id=run_id), update_time=version)
+
+    def ready_run_ids(self, *, limit: int) -> list[str]:
+        return self._running_run_ids(ReadyStepSelector.executable_llm_steps, limit=limit)
+
+    def deferred_run_ids(self, *, limit: int) -> list[str]:
+        return self._running_run_ids(ReadyStepSelector.deferred_llm_steps, limit=limit)
+
+    def _running_run_ids(
+        self, steps: Callable[[FlowRun], Sequence[Any]], *, limit: int
+    ) -> list[str]:
+        with self._lock:
+            docs = [(run_id, copy.deepcopy(doc)) for run_id, doc in self._docs.items()]
+        run_ids: list[str] = []
+        for run_id, doc in sorted(docs, key=lambda item: item[0]):
+            try:
+                flow_run = FlowRun.from_raw(doc, run_id=run_id)
+            except FlowRunInvalid:
+                continue
+            if flow_run.status == "RUNNING" and steps(flow_run):
+                run_ids.append(run_id)
+                if len(run_ids) >= limit:
+                    break
+        return run_ids
+
+    def patch(
+        self, run_id: str, patch: Mapping[str, Any], *, precondition_update_time: Any
+    ) -> None:
+        with self._lock:
+            if run_id not in self._docs:
+                raise KeyError(run_id)
+            if (
+                precondition_update_time is not None
+                and precondition_update_time != self._versions[run_id]
+            ):
+                raise FailedPrecondition(f"flow run {run_id} changed")
+            self._apply_locked(run_id, patch)
+
+    def claim_step(self, run_id: str, step_id: str, started_at_rfc3339: str) -> ClaimResult:
+        with self._lock:
+            status = self._step_status_locked(run_id, step_id)
+            if status != "READY":
+                return ClaimResult(claimed=False, status=status, reason="not_ready")
+            self._apply_locked(run_id, build_claim_patch(step_id, started_at_rfc3339))
+        return ClaimResult(claimed=True, status=status)
+
+    def finalize_step(
+        self,
+        run_id: str,
+        step_id: str,
+        status: str,
+        finished_at_rfc3339: str,
+        *,
+        outputs_gcs_uri: str | None = None,
+        execution: Mapping[str, Any] | None = None,
+        error: StepError | Mapping[str, Any] | None = None,
+        allow_ready: bool = False,
+    ) -> FinalizeResult:
+        patch = build_finalize_patch(
+            step_id=step_id,
+            status=status,
+            finished_at_rfc3339=finished_at_rfc3339,
+            outputs_gcs_uri=outputs_gcs_uri,
+            execution=execution,
+            error=error,
+        )
+        with self._lock:
+            current = self._step_status_locked(run_id, step_id)
+            if current in ("SUCCEEDED", "FAILED"):
+                return FinalizeResult(updated=False, status=current, reason="already_final")
+            if current != "RUNNING" and not (allow_ready and current == "READY"):
+                return FinalizeResult(updated=False, status=current, reason="not_running")
+            self._apply_locked(run_id, patch)
+        return FinalizeResult(updated=True, status=current)
+
+    def record_submission(
+        self, run_id: str, step_id: str, submission: Mapping[str, Any]
+    ) -> FinalizeResult:
+        patch = build_submission_patch(step_id, submission)
+        with self._lock:
+            current = self._step_status_locked(run_id, step_id)
+            if current != "RUNNING":
+                return FinalizeResult(updated=False, status=current, reason="not_running")
+            self._apply_locked(run_id, patch)
+        return FinalizeResult(updated=True, status=current)
+
+    def release_step(self, run_id: str, step_id: str) -> FinalizeResult:
+        with self._lock:
+            current = self._step_status_locked(run_id, step_id)
+            if current != "RUNNING":
+                return FinalizeResult(updated=False, status=current, reason="not_running")
+            self._apply_locked(run_id, build_release_patch(step_id))
+        return FinalizeResult(updated=True, status=current)
+
+    def _step_status_locked(self, run_id: str, step_id: str) -> str | None:
+        doc = self._docs.get(run_id)
+        steps = doc.get("steps") if doc is not None else None
+        step = steps.get(step_id) if isinstance(steps, Mapping) else None
+        status = step.get("status") if isinstance(step, Mapping) else None
+        return status if isinstance(status, str) else None
+
+    def _apply_locked(self, run_id: str, patch: Mapping[str, Any]) -> None:
+        # Dotted field paths as in Firestore ``update``; None / DELETE_FIELD
+        # remove the field.
+        delete_field = getattr(_firestore, "DELETE_FIELD", None)
+        doc = self._docs[run_id]
+        for path, value in patch.items():
+            *parents, leaf = path.split(".")
+            target = doc
+            for key in parents:
+                child = target.get(key)
+                if not isinstance(child, dict):
+                    child = target[key] = {}
+                target = child
+            if value is None or (delete_field is not None and value is delete_field):
+                target.pop(leaf, None)
+            else:
+                target[leaf] = copy.deepcopy(value)
+        self._versions[run_id] += 1
@@ -76,20 +76,43 @@ class GeminiApiKey:
         return "GeminiApiKey(api_key=***redacted***)"
 
 
+GEMINI_AUTH_MODES = ("ai_studio_api_key", "vertex_adc")
+USER_PROMPT_LAYOUTS = ("default", "prefix_stable")
+REPORT_CONTENT_ENCODINGS = ("gzip",)
+WORKER_MODES = ("scan", "watch")
+
+
 @dataclass(frozen=True, slots=True, repr=False)
 class GeminiAuthConfig:
-    """Gemini auth configuration (single-key)."""
+    """Gemini auth configuration: single AI Studio key or Vertex AI via ADC."""
 
     mode: str
-    api_key: str
+    api_key: str | None = None
+    project: str | None = None
+    location: str | None = None
 
     def __post_init__(self) -> None:
-        if self.mode != "ai_studio_api_key":
+        if self.mode not in GEMINI_AUTH_MODES:
             raise ConfigurationError("Unsupported Gemini auth mode")
-        if not self.api_key.strip():
-            raise ConfigurationError("GEMINI_API_KEY must be non-empty")
+        if self.mode == "ai_studio_api_key":
+            if not isinstance(self.api_key, str) or not self.api_key.strip():
+                raise ConfigurationError("GEMINI_API_KEY must be non-empty")
+        if self.mode == "vertex_adc":
+            if not self.project or not self.project.strip():
+                raise ConfigurationError("GCP_PROJECT is required for GEMINI_AUTH_MODE=vertex_adc")
+            if not self.location or not self.location.strip():
+                raise ConfigurationError("GEMINI_LOCATION is required for GEMINI_AUTH_MODE=vertex_adc")
+
+    @property
+    def is_vertex(self) -> bool:
+        return self.mode == "vertex_adc"
 
     def __repr__(self) -> str:  # pragma: no cover - defensive, but trivial
+        if self.is_vertex:
+            return (
+                f"GeminiAuthConfig(mode='vertex_adc', project={self.project!r}, "
+                f"location={self.location!r})"
+            )
         return "GeminiAuthConfig(mode='ai_studio_api_key', api_key=***redacted***)"
 
 
@@ -104,13 +127,39 @@ class WorkerConfig:
     artifacts_bucket: str
     artifacts_prefix: str | None
     artifacts_dry_run: bool
-    gemini_api_key: GeminiApiKey
+    gemini_api_key: GeminiApiKey | None
     gemini_auth: GeminiAuthConfig
     gemini_timeout_seconds: int
     finalize_budget_seconds: int
     invocation_timeout_seconds: int
     gemini_allowed_models: tuple[str, ...] | None
     log_level: str
+    gemini_files_upload_enabled: bool = False
+    gemini_context_cache_enabled: bool = False
+    gemini_context_cache_ttl_seconds: int = 3600
+    user_prompt_layout: str = "default"
+    gcs_read_concurrency: int = 8
+    report_content_encoding: str | None = None
+    ohlcv_max_candles: int | None = None
+    ohlcv_recent_candles: int = 200
+    context_bundle_enabled: bool = False
+    llm_batch_max_steps: int = 1
+    llm_batch_max_input_tokens: int = 200_000
+    llm_batch_step_seconds: int = 60
+    gemini_batch_api_enabled: bool = False
+    worker_concurrency: int = 4
+    worker_poll_interval_seconds: int = 5
+    worker_scan_limit: int = 50
+    worker_mode: str = "scan"
+    run_gate_enabled: bool = False
+    run_gate_idle_ttl_seconds: int = 30
+    prefetch_enabled: bool = False
+    prefetch_cache_max_mb: int = 64
+    prefetch_timeout_seconds: int = 30
+    prefetch_config_ttl_seconds: int = 300
+    claim_prelude_enabled: bool = False
+    commit_pipeline_enabled: bool = False
+    gcs_write_max_attempts: int = 3
 
     @classmethod
     def from_env(cls, env: Mapping[str, str] | None = None) -> "WorkerConfig":
@@ -133,9 +182,20 @@ class WorkerConfig:
         if "/" in llm_models_collection:
             raise ConfigurationError("LLM_MODELS_COLLECTION must not contain '/'")
 
-        gemini_key_raw = _require_env(env, "GEMINI_API_KEY")
-        gemini_api_key = GeminiApiKey(api_key=gemini_key_raw)
-        gemini_auth = GeminiAuthConfig(mode="ai_studio_api_key", api_key=gemini_key_raw)
+        gemini_auth_mode = _optional_env(env, "GEMINI_AUTH_MODE", "ai_studio_api_key")
+        if gemini_auth_mode == "vertex_adc":
+            gemini_api_key = None
+            gemini_auth = GeminiAuthConfig(
+                mode="vertex_adc",
+                project=gcp_project,
+                location=_optional_env(env, "GEMINI_LOCATION", gcp_region),
+            )
+        elif gemini_auth_mode == "ai_studio_api_key":
+            gemini_key_raw = _require_env(env, "GEMINI_API_KEY")
+            gemini_api_key = GeminiApiKey(api_key=gemini_key_raw)
+            gemini_auth = GeminiAuthConfig(mode="ai_studio_api_key", api_key=gemini_key_raw)
+        else:
+            raise ConfigurationError("GEMINI_AUTH_MODE must be ai_studio_api_key or vertex_adc")
 
         gemini_timeout_seconds = _parse_int(env, "GEMINI_TIMEOUT_SECONDS", 600)
         finalize_budget_seconds = _parse_int(env, "FINALIZE_BUDGET_SECONDS", 120)
@@ -146,6 +206,60 @@ class WorkerConfig:
             _parse_allowlist(allowed_models_raw) if allowed_models_raw is not None else None
         )
 
+        gemini_files_upload_enabled = _parse_bool(env, "GEMINI_FILES_UPLOAD_ENABLED", False)
+        if gemini_files_upload_enabled and gemini_auth.is_vertex:
+            raise ConfigurationError(
+                "GEMINI_FILES_UPLOAD_ENABLED requires GEMINI_AUTH_MODE=ai_studio_api_key"
+            )
+
+        gemini_batch_api_enabled = _parse_bool(env, "GEMINI_BATCH_API_ENABLED", False)
+        if gemini_batch_api_enabled and gemini_auth.is_vertex:
+            raise ConfigurationError(
+                "GEMINI_BATCH_API_ENABLED requires GEMINI_AUTH_MODE=ai_studio_api_key"
+            )
+
+        gemini_context_cache_enabled = _parse_bool(env, "GEMINI_CONTEXT_CACHE_ENABLED", False)
+        gemini_context_cache_ttl_seconds = _parse_int(env, "GEMINI_CONTEXT_CACHE_TTL_SECONDS", 3600)
+
+        gcs_read_concurrency = _parse_int(env, "GCS_READ_CONCURRENCY", 8)
+        report_content_encoding = _optional_env(env, "REPORT_CONTENT_ENCODING")
+        if report_content_encoding is not None:
+            report_content_encoding = report_content_encoding.lower()
+            if report_content_encoding not in REPORT_CONTENT_ENCODINGS:
+                raise ConfigurationError("REPORT_CONTENT_ENCODING must be gzip when set")
+
+        ohlcv_max_candles = (
+            _parse_int(env, "OHLCV_MAX_CANDLES", 0)
+            if _optional_env(env, "OHLCV_MAX_CANDLES") is not None
+            else None
+        )
+        ohlcv_recent_candles = _parse_int(env, "OHLCV_RECENT_CANDLES", 200)
+        context_bundle_enabled = _parse_bool(env, "CONTEXT_BUNDLE_ENABLED", False)
+        llm_batch_max_steps = _parse_int(env, "LLM_BATCH_MAX_STEPS", 1)
+        llm_batch_max_input_tokens = _parse_int(env, "LLM_BATCH_MAX_INPUT_TOKENS", 200_000)
+        llm_batch_step_seconds = _parse_int(env, "LLM_BATCH_STEP_SECONDS", 60)
+        worker_concurrency = _parse_int(env, "WORKER_CONCURRENCY", 4)
+        worker_poll_interval_seconds = _parse_int(env, "WORKER_POLL_INTERVAL_SECONDS", 5)
+        worker_scan_limit = _parse_int(env, "WORKER_SCAN_LIMIT", 50)
+        worker_mode = (_optional_env(env, "WORKER_MODE", "scan") or "scan").lower()
+        if worker_mode not in WORKER_MODES:
+            raise ConfigurationError("WORKER_MODE must be one of scan|watch")
+        run_gate_enabled = _parse_bool(env, "RUN_GATE_ENABLED", False)
+        run_gate_idle_ttl_seconds = _parse_int(env, "RUN_GATE_IDLE_TTL_SECONDS", 30)
+        prefetch_enabled = _parse_bool(env, "PREFETCH_ENABLED", False)
+        prefetch_cache_max_mb = _parse_int(env, "PREFETCH_CACHE_MAX_MB", 64)
+        prefetch_timeout_seconds = _parse_int(env, "PREFETCH_TIMEOUT_SECONDS", 30)
+        prefetch_config_ttl_seconds = _parse_int(env, "PREFETCH_CONFIG_TTL_SECONDS", 300)
+        claim_prelude_enabled = _parse_bool(env, "CLAIM_PRELUDE_ENABLED", False)
+        commit_pipeline_enabled = _parse_bool(env, "COMMIT_PIPELINE_ENABLED", False)
+        gcs_write_max_attempts = _parse_int(env, "GCS_WRITE_MAX_ATTEMPTS", 3)
+
+        user_prompt_layout = (
+            _optional_env(env, "USER_PROMPT_LAYOUT", "default") or "default"
+        ).lower()
+        if user_prompt_layout not in USER_PROMPT_LAYOUTS:
+            raise ConfigurationError("USER_PROMPT_LAYOUT must be one of default|prefix_stable")
+
         log_level = (_optional_env(env, "LOG_LEVEL", "INFO") or "INFO").upper()
         if log_level not in ALLOWED_LOG_LEVELS:
             raise ConfigurationError("LOG_LEVEL must be one of DEBUG|INFO|WARNING|ERROR")
@@ -167,6 +281,32 @@ class WorkerConfig:
             invocation_timeout_seconds=invocation_timeout_seconds,
             gemini_allowed_models=gemini_allowed_models,
             log_level=log_level,
+            gemini_files_upload_enabled=gemini_files_upload_enabled,
+            gemini_context_cache_enabled=gemini_context_cache_enabled,
+            gemini_context_cache_ttl_seconds=gemini_context_cache_ttl_seconds,
+            user_prompt_layout=user_prompt_layout,
+            gcs_read_concurrency=gcs_read_concurrency,
+            report_content_encoding=report_content_encoding,
+            ohlcv_max_candles=ohlcv_max_candles,
+            ohlcv_recent_candles=ohlcv_recent_candles,
+            context_bundle_enabled=context_bundle_enabled,
+            llm_batch_max_steps=llm_batch_max_steps,
+            llm_batch_max_input_tokens=llm_batch_max_input_tokens,
+            llm_batch_step_seconds=llm_batch_step_seconds,
+            gemini_batch_api_enabled=gemini_batch_api_enabled,
+            worker_concurrency=worker_concurrency,
+            worker_poll_interval_seconds=worker_poll_interval_seconds,
+            worker_scan_limit=worker_scan_limit,
+            worker_mode=worker_mode,
+            run_gate_enabled=run_gate_enabled,
+            run_gate_idle_ttl_seconds=run_gate_idle_ttl_seconds,
+            prefetch_enabled=prefetch_enabled,
+            prefetch_cache_max_mb=prefetch_cache_max_mb,
+            prefetch_timeout_seconds=prefetch_timeout_seconds,
+            prefetch_config_ttl_seconds=prefetch_config_ttl_seconds,
+            claim_prelude_enabled=claim_prelude_enabled,
+            commit_pipeline_enabled=commit_pipeline_enabled,
+            gcs_write_max_attempts=gcs_write_max_attempts,
         )
 
     def is_model_allowed(self, model_name: str | None) -> bool:
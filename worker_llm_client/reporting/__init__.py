@@ -1,5 +1,6 @@
 from worker_llm_client.reporting.domain import (
     LLMProfile,
+    LLMReportDigest,
     LLMReportFile,
     SerializationError,
     StructuredOutputInvalid,
@@ -17,6 +18,7 @@ from worker_llm_client.reporting.structured_output import ExtractedText, Structu
 
 __all__ = [
     "LLMProfile",
+    "LLMReportDigest",
     "LLMReportFile",
     "SerializationError",
     "StructuredOutputInvalid",
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+import hashlib
 import json
 import re
 from typing import Any, Mapping, Sequence
@@ -73,6 +74,7 @@ class LLMProfile:
     response_mime_type: str | None = None
     structured_output: StructuredOutputSpec | None = None
     thinking_config: Mapping[str, Any] | None = None
+    fallback_model_names: tuple[str, ...] = ()
     raw: Mapping[str, Any] | None = None
 
     def __post_init__(self) -> None:
@@ -112,6 +114,10 @@ class LLMProfile:
         if thinking_config is not None and not isinstance(thinking_config, Mapping):
             raise LLMProfileInvalid("llmProfile.thinkingConfig must be an object")
 
+        fallback_model_names = _optional_str_array(
+            raw.get("fallbackModelNames"), label="llmProfile.fallbackModelNames"
+        )
+
         return cls(
             model_name=model_name,
             temperature=temperature,
@@ -125,6 +131,7 @@ class LLMProfile:
             else None,
             structured_output=structured_output,
             thinking_config=thinking_config,
+            fallback_model_names=fallback_model_names,
             raw=raw,
         )
 
@@ -137,6 +144,13 @@ class LLMProfile:
             raise LLMProfileInvalid("llmProfile.structuredOutput is required")
         _ = self.structured_output.schema_version()
 
+    def model_chain(self) -> tuple[str, ...]:
+        """Primary model followed by de-duplicated fallback models, in order."""
+        return tuple(dict.fromkeys((self.model_name, *self.fallback_model_names)))
+
+    def with_model_name(self, model_name: str) -> "LLMProfile":
+        return replace(self, model_name=model_name)
+
     def to_provider_request(self) -> dict[str, Any]:
         config: dict[str, Any] = {}
         if self.temperature is not None:
@@ -221,6 +235,89 @@ class LLMReportFile:
         return payload.encode("utf-8")
 
 
+REPORT_DIGEST_VERSION = 1
+# `output.details` keys copied into a digest when the report has them; the
+# rest of `details` is schema-owned narrative that later steps rarely need.
+REPORT_DIGEST_DETAIL_KEYS = (
+    "trend",
+    "key_levels",
+    "signals",
+    "analysis_confidence",
+    "summary_for_next_timeframes",
+)
+_DIGEST_LLM_KEYS = ("promptId", "modelName", "schemaId")
+
+
+@dataclass(frozen=True, slots=True)
+class LLMReportDigest:
+    """Small sidecar of an LLM report used as previous-report context.
+
+    Keeps the report's `output` shape (summary plus selected details) so
+    prompts and context projections work on either; `report.sha256` is the
+    hash of the full report file the digest was built from.
+    """
+
+    report: Mapping[str, Any]
+    metadata: Mapping[str, Any]
+    output: Mapping[str, Any]
+
+    @classmethod
+    def from_report(
+        cls, report: LLMReportFile, *, report_uri: str, payload: bytes
+    ) -> "LLMReportDigest":
+        metadata = dict(report.metadata)
+        llm = metadata.get("llm")
+        inputs = metadata.get("inputs")
+        metadata = {
+            key: metadata[key]
+            for key in ("schemaVersion", "runId", "stepId", "createdAt", "symbol", "timeframe")
+            if key in metadata
+        }
+        if isinstance(llm, Mapping):
+            metadata["llm"] = {key: llm[key] for key in _DIGEST_LLM_KEYS if key in llm}
+        if isinstance(inputs, Mapping) and "ohlcv_coverage" in inputs:
+            # Lets a later incremental step start from the digest alone.
+            metadata["inputs"] = {"ohlcv_coverage": inputs["ohlcv_coverage"]}
+        output: dict[str, Any] = {}
+        summary = report.output.get("summary")
+        if summary is not None:
+            output["summary"] = summary
+        details = report.output.get("details")
+        if isinstance(details, Mapping):
+            output["details"] = {
+                key: details[key] for key in REPORT_DIGEST_DETAIL_KEYS if key in details
+            }
+        return cls(
+            report={
+                "uri": report_uri,
+                "sha256": hashlib.sha256(payload).hexdigest(),
+                "bytes": len(payload),
+            },
+            metadata=metadata,
+            output=output,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "digestVersion": REPORT_DIGEST_VERSION,
+            "report": dict(self.report),
+            "metadata": dict(self.metadata),
+            "output": dict(self.output),
+        }
+
+    def to_json_bytes(self) -> bytes:
+        try:
+            payload = json.dumps(
+                self.to_dict(),
+                ensure_ascii=False,
+                sort_keys=True,
+                separators=(",", ":"),
+            )
+        except (TypeError, ValueError) as exc:
+            raise SerializationError("Failed to serialize LLMReportDigest") from exc
+        return payload.encode("utf-8")
+
+
 @dataclass(frozen=True, slots=True)
 class StructuredOutputInvalid:
     kind: str
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import threading
+from typing import Any, Sequence
+
+from worker_llm_client.reporting.ohlcv import OhlcvFrame
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+
+INDICATOR_NAMES = ("sma", "ema", "rsi", "atr", "bollinger", "swings", "volume_profile")
+
+SMA_PERIODS = (20, 50)
+EMA_PERIODS = (12, 26)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_PERIOD = 20
+BOLLINGER_STDDEV = 2.0
+SWING_WINDOW = 3  # candles on each side of a pivot
+SWING_POINTS = 3  # most recent pivots reported per side
+VOLUME_PROFILE_BINS = 12
+VOLUME_PROFILE_TOP = 3
+
+DEFAULT_CACHE_ENTRIES = 128
+
+
+def compute_indicators(frame: OhlcvFrame, names: Sequence[str]) -> dict[str, Any]:
+    """Compute the latest value of each requested indicator over the frame.
+
+    Values are summaries of the most recent candle (not full series) rounded
+    to 6 significant digits, so the context block stays a few hundred bytes
+    regardless of history length. Indicators whose lookback exceeds the
+    available candles are omitted.
+    """
+    if np is None:
+        raise RuntimeError("derived indicators require numpy")
+    unknown = [name for name in names if name not in INDICATOR_NAMES]
+    if unknown:
+        raise ValueError(f"unknown indicators: {', '.join(unknown)}")
+
+    close = np.asarray(frame.columns["close"], dtype=np.float64)
+    high = np.asarray(frame.columns["high"], dtype=np.float64)
+    low = np.asarray(frame.columns["low"], dtype=np.float64)
+    result: dict[str, Any] = {"candles": int(len(close))}
+    if len(close) == 0:
+        return result
+
+    for name in names:
+        if name == "sma":
+            values = {f"sma{n}": _round(close[-n:].mean()) for n in SMA_PERIODS if len(close) >= n}
+            if values:
+                result["sma"] = values
+        elif name == "ema":
+            values = {
+                f"ema{n}": _round(_ewm_last(close, 2.0 / (n + 1))) for n in EMA_PERIODS if len(close) >= n
+            }
+            if values:
+                result["ema"] = values
+        elif name == "rsi" and len(close) > RSI_PERIOD:
+            result["rsi"] = {f"rsi{RSI_PERIOD}": _round(_rsi(close, RSI_PERIOD))}
+        elif name == "atr" and len(close) > ATR_PERIOD:
+            atr = _atr(high, low, close, ATR_PERIOD)
+            result["atr"] = {
+                f"atr{ATR_PERIOD}": _round(atr),
+                "atrPct": _round(100.0 * atr / close[-1]) if close[-1] else None,
+            }
+        elif name == "bollinger" and len(close) >= BOLLINGER_PERIOD:
+            window = close[-BOLLINGER_PERIOD:]
+            mid = window.mean()
+            width = BOLLINGER_STDDEV * window.std()
+            upper, lower = mid + width, mid - width
+            result["bollinger"] = {
+                "period": BOLLINGER_PERIOD,
+                "middle": _round(mid),
+                "upper": _round(upper),
+                "lower": _round(lower),
+                "percentB": _round((close[-1] - lower) / (upper - lower)) if upper > lower else None,
+            }
+        elif name == "swings":
+            swings = _swings(frame, high, low)
+            if swings is not None:
+                result["swings"] = swings
+        elif name == "volume_profile" and "volume" in frame.columns:
+            result["volumeProfile"] = _volume_profile(close, np.asarray(frame.columns["volume"], dtype=np.float64))
+    return result
+
+
+class IndicatorCache:
+    """LRU of computed indicators keyed by OHLCV artifact identity.
+
+    Keys are ``(uri, generation, names)``; artifacts without a generation
+    are never cached because their content cannot be pinned.
+    """
+
+    def __init__(self, *, max_entries: int = DEFAULT_CACHE_ENTRIES) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int, tuple[str, ...]], dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, *, uri: str, generation: int | None, names: Sequence[str]
+    ) -> dict[str, Any] | None:
+        """Cached indicators for this artifact generation, without a frame."""
+        if generation is None:
+            return None
+        key = (uri, generation, tuple(names))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+            return cached
+
+    def get_or_compute(
+        self,
+        *,
+        uri: str,
+        generation: int | None,
+        frame: OhlcvFrame,
+        names: Sequence[str],
+    ) -> tuple[dict[str, Any], bool]:
+        """Return ``(indicators, cache_hit)``."""
+        names = tuple(names)
+        if generation is None:
+            return compute_indicators(frame, names), False
+        key = (uri, generation, names)
+        cached = self.get(uri=uri, generation=generation, names=names)
+        if cached is not None:
+            return cached, True
+        computed = compute_indicators(frame, names)
+        with self._lock:
+            self._entries[key] = computed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return computed, False
+
+
+def _round(value: Any) -> float | None:
+    value = float(value)
+    if not np.isfinite(value):
+        return None
+    return float(f"{value:.6g}")
+
+
+def _ewm_last(values: Any, alpha: float, *, seed: float | None = None) -> float:
+    # Last value of y_t = alpha * x_t + (1 - alpha) * y_{t-1}, y_0 = seed or
+    # x_0, evaluated in closed form as a weighted sum instead of a Python loop.
+    values = np.asarray(values, dtype=np.float64)
+    if seed is None:
+        seed, values = values[0], values[1:]
+    count = len(values)
+    if count == 0:
+        return float(seed)
+    decay = 1.0 - alpha
+    weights = alpha * decay ** np.arange(count - 1, -1, -1, dtype=np.float64)
+    return float(decay**count * seed + np.dot(weights, values))
+
+
+def _rsi(close: Any, period: int) -> float:
+    # Wilder's RSI: smoothing with alpha = 1/period, seeded by the simple
+    # average of the first `period` changes.
+    delta = np.diff(close)
+    gains = np.clip(delta, 0.0, None)
+    losses = np.clip(-delta, 0.0, None)
+    alpha = 1.0 / period
+    avg_gain = _ewm_last(gains[period:], alpha, seed=gains[:period].mean())
+    avg_loss = _ewm_last(losses[period:], alpha, seed=losses[:period].mean())
+    if avg_loss == 0.0:
+        return 100.0 if avg_gain > 0.0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def _atr(high: Any, low: Any, close: Any, period: int) -> float:
+    prev_close = close[:-1]
+    true_range = np.maximum.reduce(
+        [high[1:] - low[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)]
+    )
+    return _ewm_last(true_range[period:], 1.0 / period, seed=true_range[:period].mean())
+
+
+def _swings(frame: OhlcvFrame, high: Any, low: Any) -> dict[str, Any] | None:
+    span = 2 * SWING_WINDOW + 1
+    if len(high) < span:
+        return None
+    windows_high = np.lib.stride_tricks.sliding_window_view(high, span)
+    windows_low = np.lib.stride_tricks.sliding_window_view(low, span)
+    centers = np.arange(SWING_WINDOW, len(high) - SWING_WINDOW)
+    pivot_highs = centers[windows_high.argmax(axis=1) == SWING_WINDOW]
+    pivot_lows = centers[windows_low.argmin(axis=1) == SWING_WINDOW]
+    timestamps = frame.columns["timestamp"]
+
+    def _points(indexes: Any, prices: Any) -> list[dict[str, Any]]:
+        return [
+            {"timestamp": timestamps[i].item(), "price": _round(prices[i])}
+            for i in indexes[-SWING_POINTS:]
+        ]
+
+    return {"highs": _points(pivot_highs, high), "lows": _points(pivot_lows, low)}
+
+
+def _volume_profile(close: Any, volume: Any) -> dict[str, Any] | None:
+    if not np.isfinite(volume).any() or close.min() == close.max():
+        return None
+    volume = np.nan_to_num(volume, nan=0.0)
+    totals, edges = np.histogram(close, bins=VOLUME_PROFILE_BINS, weights=volume)
+    centers = (edges[:-1] + edges[1:]) / 2.0
+    top = np.argsort(totals, kind="stable")[::-1][:VOLUME_PROFILE_TOP]
+    total_volume = totals.sum()
+    return {
+        "bins": VOLUME_PROFILE_BINS,
+        "pointOfControl": _round(centers[top[0]]),
+        "topLevels": [
+            {
+                "price": _round(centers[i]),
+                "volumeShare": _round(totals[i] / total_volume) if total_volume else None,
+            }
+            for i in top
+        ],
+    }
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import io
+import json
+from typing import Any, Mapping
+
+from worker_llm_client.workflow.domain import InvalidStepInputs
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc as pa_ipc  # type: ignore
+    import pyarrow.parquet as pa_parquet  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    pa_ipc = None
+    pa_parquet = None
+
+
+OHLCV_REQUIRED_COLUMNS = ("timestamp", "open", "high", "low", "close")
+OHLCV_OPTIONAL_COLUMNS = ("volume",)
+OHLCV_BINARY_FORMATS = ("npz", "parquet", "arrow")
+DOWNSAMPLE_METHOD_OHLC_BUCKETS = "ohlc_buckets"
+
+_EXTENSION_FORMATS = {
+    ".npz": "npz",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+_CONTENT_TYPE_FORMATS = {
+    "application/x-npz": "npz",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/x-arrow": "arrow",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class OhlcvFrame:
+    """Columnar OHLCV candles: one 1-D NumPy array per column, equal lengths."""
+
+    columns: Mapping[str, Any]
+
+    def __len__(self) -> int:
+        return int(len(self.columns["timestamp"]))
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        return tuple(self.columns)
+
+
+@dataclass(frozen=True, slots=True)
+class OhlcvDownsampling:
+    """Downsampling applied to an OHLCV frame; recorded in ``metadata.inputs``."""
+
+    method: str
+    source_candles: int
+    output_candles: int
+    recent_candles: int
+    bucket_size: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "method": self.method,
+            "sourceCandles": self.source_candles,
+            "outputCandles": self.output_candles,
+            "recentCandles": self.recent_candles,
+            "bucketSize": self.bucket_size,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class OhlcvCoverage:
+    """Candle range of an OHLCV artifact; recorded in ``metadata.inputs``."""
+
+    candles: int
+    first_timestamp: Any
+    last_timestamp: Any
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "candles": self.candles,
+            "firstTimestamp": self.first_timestamp,
+            "lastTimestamp": self.last_timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Any) -> "OhlcvCoverage | None":
+        """Parse a recorded coverage; None when absent or malformed."""
+        if not isinstance(raw, Mapping):
+            return None
+        candles = raw.get("candles")
+        last = raw.get("lastTimestamp")
+        if not isinstance(candles, int) or isinstance(last, bool) or not isinstance(last, (int, float, str)):
+            return None
+        return cls(candles=candles, first_timestamp=raw.get("firstTimestamp"), last_timestamp=last)
+
+
+@dataclass(frozen=True, slots=True)
+class OhlcvIncrement:
+    """Incremental mode applied to an OHLCV frame; recorded in ``metadata.inputs``."""
+
+    base_last_timestamp: Any
+    source_candles: int
+    new_candles: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "baseLastTimestamp": self.base_last_timestamp,
+            "sourceCandles": self.source_candles,
+            "newCandles": self.new_candles,
+        }
+
+
+def binary_ohlcv_format(uri: str, content_type: str | None = None) -> str | None:
+    """Return the columnar format of an OHLCV artifact, or None for JSON."""
+    path = uri.split("?", 1)[0].lower()
+    for extension, fmt in _EXTENSION_FORMATS.items():
+        if path.endswith(extension):
+            return fmt
+    if content_type:
+        return _CONTENT_TYPE_FORMATS.get(content_type.split(";", 1)[0].strip().lower())
+    return None
+
+
+def load_ohlcv_frame(data: bytes, fmt: str) -> OhlcvFrame:
+    if np is None:
+        raise InvalidStepInputs("binary OHLCV artifacts require numpy")
+    try:
+        if fmt == "npz":
+            columns = _load_npz(data)
+        elif fmt in ("parquet", "arrow"):
+            columns = _load_arrow(data, fmt)
+        else:
+            raise InvalidStepInputs(f"unsupported OHLCV format: {fmt}")
+    except InvalidStepInputs:
+        raise
+    except Exception as exc:
+        raise InvalidStepInputs(f"ohlcv {fmt} artifact could not be decoded") from exc
+    return _validate_columns(columns)
+
+
+def ohlcv_frame_from_json(data: Any) -> OhlcvFrame | None:
+    """Build a frame from parsed JSON candles (``{"data": [...]}`` or a list).
+
+    Returns None when numpy is unavailable or the rows do not carry the OHLCV
+    columns with numeric values; JSON artifacts stay valid prompt context
+    regardless, so callers treat this as "no columnar view".
+    """
+    if np is None:
+        return None
+    rows = data.get("data") if isinstance(data, Mapping) else data
+    if not isinstance(rows, list) or not all(isinstance(row, Mapping) for row in rows):
+        return None
+    names = [
+        name
+        for name in OHLCV_REQUIRED_COLUMNS + OHLCV_OPTIONAL_COLUMNS
+        if name in OHLCV_REQUIRED_COLUMNS or (rows and all(name in row for row in rows))
+    ]
+    try:
+        columns = {name: np.asarray([row[name] for row in rows]) for name in names}
+        return _validate_columns(columns)
+    except (KeyError, ValueError, TypeError, InvalidStepInputs):
+        return None
+
+
+def downsample_ohlcv(
+    frame: OhlcvFrame, *, max_candles: int, recent_candles: int
+) -> tuple[OhlcvFrame, OhlcvDownsampling | None]:
+    """Reduce the frame to at most ``max_candles`` candles.
+
+    The last ``recent_candles`` candles are kept as-is; older candles are
+    merged into equal-size buckets with OHLC semantics (first open, max high,
+    min low, last close, summed volume, timestamp of the bucket's first
+    candle). Buckets are anchored at the boundary with the recent candles, so
+    only the oldest bucket can be partial. Returns the frame unchanged and
+    ``None`` when it already fits.
+    """
+    if max_candles <= 0:
+        raise ValueError("max_candles must be positive")
+    total = len(frame)
+    if total <= max_candles:
+        return frame, None
+    recent = max(0, min(recent_candles, max_candles - 1))
+    older = total - recent
+    bucket = -(-older // (max_candles - recent))
+    ends = np.arange(older, 0, -bucket)[::-1]
+    starts = np.maximum(ends - bucket, 0)
+
+    columns: dict[str, Any] = {}
+    for name, column in frame.columns.items():
+        head = column[:older]
+        if name in ("timestamp", "open"):
+            merged = head[starts]
+        elif name == "close":
+            merged = head[ends - 1]
+        elif name == "high":
+            merged = np.maximum.reduceat(head, starts)
+        elif name == "low":
+            merged = np.minimum.reduceat(head, starts)
+        else:
+            merged = np.add.reduceat(head, starts)
+        columns[name] = np.concatenate([merged, column[older:]])
+    sampled = OhlcvFrame(columns=columns)
+    return sampled, OhlcvDownsampling(
+        method=DOWNSAMPLE_METHOD_OHLC_BUCKETS,
+        source_candles=total,
+        output_candles=len(sampled),
+        recent_candles=recent,
+        bucket_size=int(bucket),
+    )
+
+
+def ohlcv_coverage(frame: OhlcvFrame) -> OhlcvCoverage | None:
+    if len(frame) == 0:
+        return None
+    timestamps = frame.columns["timestamp"]
+    return OhlcvCoverage(
+        candles=len(frame),
+        first_timestamp=timestamps[0].item(),
+        last_timestamp=timestamps[-1].item(),
+    )
+
+
+def ohlcv_coverage_from_json(data: Any) -> OhlcvCoverage | None:
+    """Coverage of parsed JSON candles from their first and last rows only."""
+    rows = data.get("data") if isinstance(data, Mapping) else data
+    if not isinstance(rows, list) or not rows:
+        return None
+    first, last = rows[0], rows[-1]
+    if not isinstance(first, Mapping) or not isinstance(last, Mapping):
+        return None
+    timestamps = (first.get("timestamp"), last.get("timestamp"))
+    if any(isinstance(t, bool) or not isinstance(t, (int, float, str)) for t in timestamps):
+        return None
+    return OhlcvCoverage(
+        candles=len(rows), first_timestamp=timestamps[0], last_timestamp=timestamps[1]
+    )
+
+
+def ohlcv_since(frame: OhlcvFrame, last_timestamp: Any) -> OhlcvFrame | None:
+    """Candles strictly newer than ``last_timestamp``.
+
+    Returns None when the frame cannot extend that point: timestamps of a
+    different type (e.g. epoch numbers vs ISO strings) or a frame that starts
+    after it, which would leave a gap between the two windows.
+    """
+    timestamps = frame.columns["timestamp"]
+    if timestamps.dtype.kind == "U":
+        comparable = isinstance(last_timestamp, str)
+    else:
+        comparable = isinstance(last_timestamp, (int, float)) and not isinstance(last_timestamp, bool)
+    if not comparable or len(frame) == 0 or timestamps[0] > last_timestamp:
+        return None
+    newer = timestamps > last_timestamp
+    return OhlcvFrame(columns={name: column[newer] for name, column in frame.columns.items()})
+
+
+def render_ohlcv_json(frame: OhlcvFrame) -> str:
+    """Render candles as a compact JSON array of row objects with sorted keys.
+
+    Matches the canonical form of the JSON path (``sort_keys`` and compact
+    separators), built with vectorized string operations over the columns
+    instead of per-candle Python dicts.
+    """
+    if len(frame) == 0:
+        return "[]"
+    names = sorted(frame.column_names)
+    rows = None
+    for index, name in enumerate(names):
+        prefix = ("{" if index == 0 else ",") + f'"{name}":'
+        rendered = np.char.add(prefix, _render_column(frame.columns[name]))
+        rows = rendered if rows is None else np.char.add(rows, rendered)
+    rows = np.char.add(rows, "}")
+    return "[" + ",".join(rows.tolist()) + "]"
+
+
+def _load_npz(data: bytes) -> dict[str, Any]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        return {name: np.asarray(archive[name]) for name in archive.files}
+
+
+def _load_arrow(data: bytes, fmt: str) -> dict[str, Any]:
+    if pa is None:
+        raise InvalidStepInputs(f"{fmt} OHLCV artifacts require pyarrow")
+    if fmt == "parquet":
+        table = pa_parquet.read_table(pa.BufferReader(data))
+    else:
+        table = pa_ipc.open_file(pa.BufferReader(data)).read_all()
+    return {
+        name: table.column(name).to_numpy(zero_copy_only=False)
+        for name in table.column_names
+    }
+
+
+def _validate_columns(columns: Mapping[str, Any]) -> OhlcvFrame:
+    missing = [name for name in OHLCV_REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise InvalidStepInputs(f"ohlcv artifact is missing columns: {', '.join(missing)}")
+    selected: dict[str, Any] = {}
+    length = None
+    for name in OHLCV_REQUIRED_COLUMNS + OHLCV_OPTIONAL_COLUMNS:
+        if name not in columns:
+            continue
+        column = np.asarray(columns[name])
+        if column.ndim != 1:
+            raise InvalidStepInputs(f"ohlcv column {name} must be one-dimensional")
+        if column.dtype.kind == "O":
+            column = _object_strings(name, column)
+        if column.dtype.kind == "M":
+            column = column.astype("datetime64[ms]").astype(np.int64)
+        elif column.dtype.kind not in "iuf" and not (name == "timestamp" and column.dtype.kind == "U"):
+            raise InvalidStepInputs(f"ohlcv column {name} has unsupported dtype {column.dtype}")
+        if length is None:
+            length = len(column)
+        elif len(column) != length:
+            raise InvalidStepInputs("ohlcv columns must have equal lengths")
+        selected[name] = column
+    return OhlcvFrame(columns=selected)
+
+
+def _object_strings(name: str, column: Any) -> Any:
+    # pyarrow converts string columns to object arrays of str; nulls or mixed
+    # values stay unsupported.
+    values = column.tolist()
+    if not all(isinstance(value, str) for value in values):
+        raise InvalidStepInputs(f"ohlcv column {name} has unsupported dtype {column.dtype}")
+    return np.asarray(values, dtype=str)
+
+
+def _render_column(column: Any) -> Any:
+    kind = column.dtype.kind
+    if kind == "U":
+        # String timestamps may contain quotes, backslashes or control
+        # characters; encode each like the JSON path does.
+        return np.array(
+            [json.dumps(value, ensure_ascii=False) for value in column.tolist()], dtype=str
+        )
+    rendered = column.astype(str)
+    if kind == "f":
+        # json.dumps would emit NaN/Infinity, which is not valid JSON.
+        rendered = np.where(np.isfinite(column), rendered, "null")
+    return rendered
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Sequence
+
+
+# Input kinds a projection may target. The charts manifest is deliberately
+# absent: its image URIs drive chart loading and must stay intact.
+PROJECTION_KINDS = ("ohlcv", "previous_report")
+TRUNCATION_MARKER = "…[truncated]"
+WILDCARD = "*"
+
+_MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class ContextProjection:
+    """Declarative reduction of a JSON context artifact before injection.
+
+    Steps run in a fixed order: ``include`` (keep only these JSON pointers),
+    ``exclude`` (drop these pointers), ``array_windows`` (keep the last N
+    elements of the arrays at these pointers) and ``max_string_chars``
+    (truncate longer strings). Pointers follow RFC 6901; a ``*`` segment
+    matches every key or index at that level.
+    """
+
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    array_windows: tuple[tuple[str, int], ...] = ()
+    max_string_chars: int | None = None
+
+    @classmethod
+    def from_raw(cls, raw: Any, *, kind: str) -> "ContextProjection":
+        if not isinstance(raw, Mapping):
+            raise ValueError(f"contextProjections.{kind} must be an object")
+        unknown = set(raw) - {"include", "exclude", "arrayWindows", "maxStringChars"}
+        if unknown:
+            raise ValueError(
+                f"contextProjections.{kind} has unknown fields: {', '.join(sorted(unknown))}"
+            )
+        include = _parse_pointers(raw.get("include", []), field=f"{kind}.include")
+        exclude = _parse_pointers(raw.get("exclude", []), field=f"{kind}.exclude")
+        windows_raw = raw.get("arrayWindows", {})
+        if not isinstance(windows_raw, Mapping):
+            raise ValueError(f"contextProjections.{kind}.arrayWindows must be an object")
+        array_windows = []
+        for pointer, size in windows_raw.items():
+            _parse_pointers([pointer], field=f"{kind}.arrayWindows")
+            if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+                raise ValueError(f"contextProjections.{kind}.arrayWindows values must be positive integers")
+            array_windows.append((pointer, size))
+        max_string_chars = raw.get("maxStringChars")
+        if max_string_chars is not None and (
+            not isinstance(max_string_chars, int) or isinstance(max_string_chars, bool) or max_string_chars <= 0
+        ):
+            raise ValueError(f"contextProjections.{kind}.maxStringChars must be a positive integer")
+        return cls(
+            include=include,
+            exclude=exclude,
+            array_windows=tuple(array_windows),
+            max_string_chars=max_string_chars,
+        )
+
+    def apply(self, value: Any) -> Any:
+        """Return a projected copy of ``value``; the input is not modified."""
+        if self.include:
+            value = _prune(value, [_split_pointer(pointer) for pointer in self.include])
+            if value is _MISSING:
+                value = None
+        for pointer in self.exclude:
+            value = _map_at(value, _split_pointer(pointer), lambda _node: _MISSING)
+        for pointer, size in self.array_windows:
+            value = _map_at(
+                value,
+                _split_pointer(pointer),
+                lambda node, size=size: node[-size:] if isinstance(node, list) else node,
+            )
+        if self.max_string_chars is not None:
+            value = _truncate_strings(value, self.max_string_chars)
+        return value
+
+
+def parse_context_projections(raw: Any) -> dict[str, ContextProjection]:
+    """Parse the prompt document's ``contextProjections`` object."""
+    if raw is None:
+        return {}
+    if not isinstance(raw, Mapping):
+        raise ValueError("contextProjections must be an object")
+    projections = {}
+    for kind, spec in raw.items():
+        if kind not in PROJECTION_KINDS:
+            raise ValueError(f"contextProjections keys must be one of: {', '.join(PROJECTION_KINDS)}")
+        projections[kind] = ContextProjection.from_raw(spec, kind=kind)
+    return projections
+
+
+def _parse_pointers(raw: Any, *, field: str) -> tuple[str, ...]:
+    if not isinstance(raw, list) or not all(
+        isinstance(item, str) and item.startswith("/") for item in raw
+    ):
+        raise ValueError(f"contextProjections.{field} must be an array of JSON pointers")
+    return tuple(raw)
+
+
+def _split_pointer(pointer: str) -> tuple[str, ...]:
+    return tuple(token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:])
+
+
+def _matches(token: str, key: str) -> bool:
+    return token == WILDCARD or token == key
+
+
+def _children(value: Any) -> list[tuple[str, Any]] | None:
+    if isinstance(value, Mapping):
+        return [(str(key), child) for key, child in value.items()]
+    if isinstance(value, list):
+        return [(str(index), child) for index, child in enumerate(value)]
+    return None
+
+
+def _rebuild(value: Any, items: list[tuple[str, Any]]) -> Any:
+    if isinstance(value, Mapping):
+        return {key: child for key, child in items}
+    return [child for _key, child in items]
+
+
+def _prune(value: Any, paths: Sequence[tuple[str, ...]]) -> Any:
+    # Keep only the nodes on (or below) one of the paths.
+    if any(not path for path in paths):
+        return value
+    children = _children(value)
+    if children is None:
+        return _MISSING
+    kept = []
+    for key, child in children:
+        sub_paths = [path[1:] for path in paths if _matches(path[0], key)]
+        if sub_paths:
+            pruned = _prune(child, sub_paths)
+            if pruned is not _MISSING:
+                kept.append((key, pruned))
+    return _rebuild(value, kept)
+
+
+def _map_at(value: Any, path: tuple[str, ...], fn: Callable[[Any], Any]) -> Any:
+    # Apply ``fn`` to the nodes at ``path``; ``_MISSING`` results are removed.
+    if not path:
+        return fn(value)
+    children = _children(value)
+    if children is None:
+        return value
+    mapped = []
+    for key, child in children:
+        if _matches(path[0], key):
+            child = _map_at(child, path[1:], fn)
+            if child is _MISSING:
+                continue
+        mapped.append((key, child))
+    return _rebuild(value, mapped)
+
+
+def _truncate_strings(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + TRUNCATION_MARKER
+    children = _children(value)
+    if children is None:
+        return value
+    return _rebuild(value, [(key, _truncate_strings(child, max_chars)) for key, child in children])
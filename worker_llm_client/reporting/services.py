@@ -1,14 +1,58 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
 import json
+import threading
 import time
 from typing import Any, Mapping, Sequence
 
-from worker_llm_client.artifacts.domain import GcsUri, InvalidGcsUri
-from worker_llm_client.artifacts.services import ArtifactStore
+from worker_llm_client.artifacts.bundle import (
+    CONTEXT_BUNDLE_CONTENT_TYPE,
+    BundleArtifactStore,
+    ContextBundle,
+    InvalidContextBundle,
+    RecordingArtifactStore,
+    pack_context_bundle,
+)
+from worker_llm_client.artifacts.domain import (
+    ArtifactPathPolicy,
+    ArtifactUri,
+    GcsUri,
+    InvalidArtifactUri,
+    InvalidGcsUri,
+    InvalidIdentifier,
+    report_digest_uri,
+)
+from worker_llm_client.artifacts.services import (
+    ArtifactMetadata,
+    ArtifactNotFound,
+    ArtifactStore,
+    ArtifactStoreError,
+    ArtifactTooLarge,
+    BulkReadResult,
+    LimitedRead,
+)
 from worker_llm_client.ops.logging import EventLogger
+from worker_llm_client.reporting.indicators import IndicatorCache
+from worker_llm_client.reporting.projection import ContextProjection
+from worker_llm_client.reporting.ohlcv import (
+    OhlcvCoverage,
+    OhlcvDownsampling,
+    OhlcvFrame,
+    OhlcvIncrement,
+    binary_ohlcv_format,
+    downsample_ohlcv,
+    load_ohlcv_frame,
+    ohlcv_coverage,
+    ohlcv_coverage_from_json,
+    ohlcv_frame_from_json,
+    ohlcv_since,
+    render_ohlcv_json,
+)
 from worker_llm_client.workflow.domain import (
+    OHLCV_MODE_INCREMENTAL,
+    PREVIOUS_REPORT_FORMAT_DIGEST,
     FlowRun,
     InvalidStepInputs,
     LLMReportInputs,
@@ -21,6 +65,20 @@ from worker_llm_client.workflow.domain import (
 # oversized artifacts from being injected into the model request.
 MAX_CONTEXT_BYTES_PER_JSON_ARTIFACT = 65536
 MAX_CHART_IMAGE_BYTES = 262144
+# Raw cap for columnar OHLCV artifacts; the rendered JSON is still bounded by
+# MAX_CONTEXT_BYTES_PER_JSON_ARTIFACT.
+MAX_OHLCV_BINARY_BYTES = 4 * 1024 * 1024
+# Raw cap for JSON artifacts with a context projection; the projected payload
+# is still bounded by MAX_CONTEXT_BYTES_PER_JSON_ARTIFACT.
+MAX_PROJECTED_SOURCE_BYTES = 4 * 1024 * 1024
+# Candles kept at full resolution when OHLCV downsampling is enabled.
+DEFAULT_OHLCV_RECENT_CANDLES = 200
+# Raw cap for a packed context bundle (OHLCV + manifest + chart images).
+MAX_CONTEXT_BUNDLE_BYTES = 16 * 1024 * 1024
+CHART_IMAGE_MIME_TYPES = frozenset({"image/png", "image/jpeg", "image/webp"})
+PROMPT_LAYOUT_DEFAULT = "default"
+PROMPT_LAYOUT_PREFIX_STABLE = "prefix_stable"
+PROMPT_LAYOUTS = (PROMPT_LAYOUT_DEFAULT, PROMPT_LAYOUT_PREFIX_STABLE)
 
 
 @dataclass(frozen=True, slots=True)
@@ -29,6 +87,8 @@ class JsonArtifact:
     payload: str
     bytes_len: int
     data: Any
+    generation: int | None = None
+    crc32c: str | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -36,14 +96,18 @@ class ChartImage:
     uri: str
     description: str
     mime_type: str
-    data: bytes
+    data: bytes | None  # None when the image is passed to the provider by gs:// reference
     bytes_len: int
+    generation: int | None = None
+    crc32c: str | None = None
 
 
 @dataclass(frozen=True, slots=True)
 class PreviousReport:
     step_id: str | None
     artifact: JsonArtifact
+    # True when ``artifact`` is the report's digest sidecar, not the report.
+    digest: bool = False
 
 
 @dataclass(frozen=True, slots=True)
@@ -54,12 +118,26 @@ class ResolvedUserInput:
     charts_manifest: JsonArtifact
     chart_images: tuple[ChartImage, ...]
     previous_reports: tuple[PreviousReport, ...]
+    # Full-resolution candles when they were decoded (columnar artifacts, or
+    # JSON rows that were downsampled or cut); ``ohlcv`` holds what the
+    # prompt shows.
+    ohlcv_frame: OhlcvFrame | None = None
+    ohlcv_downsampling: OhlcvDownsampling | None = None
+    derived_indicators: Mapping[str, Any] | None = None
+    # Range of the full OHLCV artifact, and the incremental cut applied to
+    # ``ohlcv`` when only candles newer than the base report are shown.
+    ohlcv_coverage: OhlcvCoverage | None = None
+    ohlcv_increment: OhlcvIncrement | None = None
 
 
 @dataclass(frozen=True, slots=True)
 class UserInputPayload:
     text: str
     chart_images: tuple[ChartImage, ...]
+    # Length of the leading part of ``text`` that does not depend on the step
+    # (base prompt, task in the prefix-stable layout, charts and OHLCV blocks);
+    # 0 when unknown.
+    shared_prefix_chars: int = 0
 
 
 class UserInputAssembler:
@@ -69,10 +147,39 @@ class UserInputAssembler:
         artifact_store: ArtifactStore,
         max_json_bytes: int = MAX_CONTEXT_BYTES_PER_JSON_ARTIFACT,
         max_chart_image_bytes: int = MAX_CHART_IMAGE_BYTES,
+        max_ohlcv_binary_bytes: int = MAX_OHLCV_BINARY_BYTES,
+        reference_chart_images: bool = False,
+        layout: str = PROMPT_LAYOUT_DEFAULT,
+        indicator_cache: IndicatorCache | None = None,
+        ohlcv_max_candles: int | None = None,
+        ohlcv_recent_candles: int = DEFAULT_OHLCV_RECENT_CANDLES,
+        bundle_path_policy: ArtifactPathPolicy | None = None,
+        max_bundle_bytes: int = MAX_CONTEXT_BUNDLE_BYTES,
     ) -> None:
+        if layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"layout must be one of {', '.join(PROMPT_LAYOUTS)}")
+        if ohlcv_max_candles is not None and ohlcv_max_candles <= 0:
+            raise ValueError("ohlcv_max_candles must be positive")
         self._artifact_store = artifact_store
         self._max_json_bytes = max_json_bytes
         self._max_chart_image_bytes = max_chart_image_bytes
+        self._max_ohlcv_binary_bytes = max_ohlcv_binary_bytes
+        self._reference_chart_images = reference_chart_images
+        self._layout = layout
+        self._indicator_cache = indicator_cache or IndicatorCache()
+        self._ohlcv_max_candles = ohlcv_max_candles
+        self._ohlcv_recent_candles = ohlcv_recent_candles
+        self._bundle_path_policy = bundle_path_policy
+        self._max_bundle_bytes = max_bundle_bytes
+        # Bundles are packed and uploaded off the request path, while the
+        # step's LLM call runs; see wait_for_bundle_writes.
+        self._bundle_pool = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-bundle")
+            if bundle_path_policy is not None
+            else None
+        )
+        self._bundle_lock = threading.Lock()
+        self._bundle_writes: set[Future[None]] = set()
 
     def resolve(
         self,
@@ -82,6 +189,8 @@ class UserInputAssembler:
         inputs: LLMReportInputs,
         event_logger: EventLogger | None = None,
         event_id: str | None = None,
+        indicators: Sequence[str] = (),
+        projections: Mapping[str, ContextProjection] | None = None,
     ) -> ResolvedUserInput:
         # Resolve *all* upstream context referenced by LLM_REPORT inputs.
         # This produces a fully materialized snapshot that can be rendered into
@@ -91,21 +200,118 @@ class UserInputAssembler:
         event_id = event_id or "unknown"
         symbol = _extract_symbol(flow_run)
         timeframe = _extract_timeframe(step)
+        projections = projections or {}
+
+        # Shared inputs (OHLCV, manifest, chart images) come from the run's
+        # context bundle when one exists; otherwise the per-object reads are
+        # recorded so the bundle can be written for the following steps.
+        bundle_uri = self._bundle_uri(run_id, timeframe)
+        context_store = self._artifact_store
+        recorder = None
+        if bundle_uri is not None:
+            bundle = _open_context_bundle(
+                self._artifact_store,
+                bundle_uri,
+                max_bytes=self._max_bundle_bytes,
+                event_logger=event_logger,
+                event_id=event_id,
+                run_id=run_id,
+                step_id=step_id,
+            )
+            if bundle is not None:
+                context_store = BundleArtifactStore(bundle, self._artifact_store)
+            else:
+                context_store = recorder = RecordingArtifactStore(self._artifact_store)
+
+        # Previous reports may be referenced by stepId or external GCS URI.
+        # Each reference is loaded and normalized as JSON for prompt context;
+        # the report's digest sidecar is used instead when one exists, unless
+        # the step asks for full reports. In incremental mode the first report
+        # is the base whose OHLCV coverage decides which candles are new.
+        incremental = inputs.ohlcv_mode == OHLCV_MODE_INCREMENTAL
+        base_coverage = None
+        previous_reports = []
+        for index, ref in enumerate(inputs.previous_report_refs):
+            ref_step_id = ref.step_id
+            label = ref_step_id or "external"
+            is_base = incremental and index == 0
+            report = None
+            if inputs.previous_report_format == PREVIOUS_REPORT_FORMAT_DIGEST:
+                report = _load_report_digest(
+                    self._artifact_store,
+                    ref.gcs_uri,
+                    label=f"previous_report_digest:{label}",
+                    max_bytes=self._max_json_bytes,
+                    projection=projections.get("previous_report"),
+                    keep_data=is_base,
+                    event_logger=event_logger,
+                    event_id=event_id,
+                    run_id=run_id,
+                    step_id=step_id,
+                )
+            digest = report is not None
+            if report is None:
+                report = _load_json_artifact(
+                    self._artifact_store,
+                    ref.gcs_uri,
+                    label=f"previous_report:{label}",
+                    max_bytes=self._max_json_bytes,
+                    projection=projections.get("previous_report"),
+                    keep_data=is_base,
+                    event_logger=event_logger,
+                    event_id=event_id,
+                    run_id=run_id,
+                    step_id=step_id,
+                )
+            if is_base:
+                base_coverage = _report_ohlcv_coverage(report.data)
+                report = replace(report, data=None)
+            previous_reports.append(
+                PreviousReport(step_id=ref_step_id, artifact=report, digest=digest)
+            )
+        since = None
+        if incremental:
+            if base_coverage is None:
+                _log_incremental_skipped(
+                    event_logger,
+                    {"eventId": event_id, "runId": run_id, "stepId": step_id},
+                    "base_coverage_missing",
+                )
+            else:
+                since = base_coverage.last_timestamp
 
         # Load JSON artifacts from GCS, validate size/UTF-8/JSON, and normalize
         # to a canonical JSON string for deterministic prompt injection.
-        ohlcv = _load_json_artifact(
-            self._artifact_store,
+        ohlcv, ohlcv_frame, ohlcv_downsampling, ohlcv_increment = _load_ohlcv_artifact(
+            context_store,
             inputs.ohlcv_gcs_uri,
-            label="ohlcv",
-            max_bytes=self._max_json_bytes,
+            max_json_bytes=self._max_json_bytes,
+            max_binary_bytes=self._max_ohlcv_binary_bytes,
+            max_candles=self._ohlcv_max_candles,
+            recent_candles=self._ohlcv_recent_candles,
+            projection=projections.get("ohlcv"),
+            since=since,
             event_logger=event_logger,
             event_id=event_id,
             run_id=run_id,
             step_id=step_id,
         )
+        # Indicators requested by the prompt are best-effort: the raw candles
+        # are still in context, so a failure here only drops the extra block.
+        derived_indicators = None
+        if indicators:
+            derived_indicators = _compute_derived_indicators(
+                self._indicator_cache,
+                ohlcv,
+                ohlcv_frame,
+                indicators,
+                event_logger=event_logger,
+                event_id=event_id,
+                run_id=run_id,
+                step_id=step_id,
+            )
         charts_manifest = _load_json_artifact(
-            self._artifact_store,
+            context_store,
             inputs.charts_manifest_gcs_uri,
             label="charts_manifest",
             max_bytes=self._max_json_bytes,
@@ -116,34 +322,28 @@ class UserInputAssembler:
         )
 
         # Chart images are optional, but the manifest must contain at least one
-        # valid image URI; otherwise the step is invalid.
+        # valid image URI; otherwise the step is invalid. In reference mode the
+        # bytes stay in GCS and only object metadata is checked.
         chart_images = _load_chart_images(
-            self._artifact_store,
+            context_store,
             charts_manifest.data,
             max_bytes=self._max_chart_image_bytes,
+            reference_only=self._reference_chart_images,
             event_logger=event_logger,
             event_id=event_id,
             run_id=run_id,
             step_id=step_id,
         )
 
-        # Previous reports may be referenced by stepId or external GCS URI.
-        # Each reference is loaded and normalized as JSON for prompt context.
-        previous_reports = []
-        for ref in inputs.previous_report_refs:
-            step_id = ref.step_id
-            label = step_id or "external"
-            report = _load_json_artifact(
-                self._artifact_store,
-                ref.gcs_uri,
-                label=f"previous_report:{label}",
-                max_bytes=self._max_json_bytes,
+        if recorder is not None and bundle_uri is not None:
+            self._submit_bundle_write(
+                bundle_uri,
+                recorder.reads,
                 event_logger=event_logger,
                 event_id=event_id,
                 run_id=run_id,
-                step_id=step.step.step_id,
+                step_id=step_id,
             )
-            previous_reports.append(PreviousReport(step_id=step_id, artifact=report))
 
         return ResolvedUserInput(
             symbol=symbol,
@@ -152,8 +352,66 @@ class UserInputAssembler:
             charts_manifest=charts_manifest,
             chart_images=tuple(chart_images),
             previous_reports=tuple(previous_reports),
+            ohlcv_frame=ohlcv_frame,
+            ohlcv_downsampling=ohlcv_downsampling,
+            derived_indicators=derived_indicators,
+            ohlcv_coverage=(
+                ohlcv_coverage(ohlcv_frame)
+                if ohlcv_frame is not None
+                else ohlcv_coverage_from_json(ohlcv.data)
+            ),
+            ohlcv_increment=ohlcv_increment,
         )
 
+    def wait_for_bundle_writes(self, timeout_seconds: float | None = None) -> None:
+        """Block until the context bundle writes started so far are done."""
+        with self._bundle_lock:
+            pending = list(self._bundle_writes)
+        if pending:
+            wait(pending, timeout=timeout_seconds)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        if self._bundle_pool is not None:
+            self._bundle_pool.shutdown(wait=wait)
+
+    def _submit_bundle_write(
+        self,
+        uri: ArtifactUri,
+        reads: Sequence[LimitedRead],
+        *,
+        event_logger: EventLogger | None,
+        event_id: str,
+        run_id: str,
+        step_id: str,
+    ) -> None:
+        if self._bundle_pool is None or not reads:
+            return
+        future = self._bundle_pool.submit(
+            _write_context_bundle,
+            self._artifact_store,
+            uri,
+            tuple(reads),
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+        )
+        with self._bundle_lock:
+            self._bundle_writes.add(future)
+        future.add_done_callback(self._bundle_write_done)
+
+    def _bundle_write_done(self, future: Future[None]) -> None:
+        with self._bundle_lock:
+            self._bundle_writes.discard(future)
+
+    def _bundle_uri(self, run_id: str, timeframe: str) -> ArtifactUri | None:
+        if self._bundle_path_policy is None:
+            return None
+        try:
+            return self._bundle_path_policy.context_bundle_uri(run_id, timeframe)
+        except InvalidIdentifier:
+            return None
+
     def assemble(self, *, base_user_prompt: str, resolved: ResolvedUserInput) -> UserInputPayload:
         # Compose the final user prompt by appending XML-tagged context blocks
         # for OHLCV, charts (image descriptions), and optional previous reports,
@@ -164,40 +422,101 @@ class UserInputAssembler:
         lines: list[str] = []
         lines.append(base_user_prompt.rstrip())
         lines.append("")
-        _append_context_block(
-            lines,
-            data_type=f"{resolved.timeframe} OHLCV Candles (JSON)",
-            content=_render_ohlcv_data(resolved.ohlcv),
-        )
+        prefix_stable = self._layout == PROMPT_LAYOUT_PREFIX_STABLE
+        increment = resolved.ohlcv_increment
+        if prefix_stable:
+            # Most-shared to most-volatile: the fixed task text goes right after
+            # the base prompt so the provider's implicit prefix cache can match
+            # across every step using the same prompt.
+            _append_task_block(
+                lines, context_position="in this message", update=increment is not None
+            )
+        ohlcv_title = f"{resolved.timeframe} OHLCV Candles"
+        ohlcv_notes = ["JSON"]
+        if increment is not None:
+            # Only candles the base report has not seen are included.
+            ohlcv_title += " since the previous report"
+            ohlcv_notes.append(
+                f"{increment.new_candles} new after {increment.base_last_timestamp}"
+            )
+        downsampling = resolved.ohlcv_downsampling
+        if downsampling is not None:
+            # Tell the model that older rows span several candles each.
+            ohlcv_notes.append(
+                f"last {downsampling.recent_candles} at full resolution, "
+                f"older merged {downsampling.bucket_size}:1"
+            )
+        ohlcv_data_type = f"{ohlcv_title} ({'; '.join(ohlcv_notes)})"
 
         chart_lines = ["[Images attached to this message with description]"]
         for image in resolved.chart_images:
             chart_lines.append(f"- {image.description}")
+        if prefix_stable:
+            # Chart descriptions repeat across runs while the candles change
+            # every run, so they go first to extend the cacheable prefix.
+            _append_context_block(
+                lines, data_type="Technical Charts (Images)", content=chart_lines
+            )
         _append_context_block(
             lines,
-            data_type="Technical Charts (Images)",
-            content=chart_lines,
+            data_type=ohlcv_data_type,
+            content=_render_ohlcv_data(resolved.ohlcv),
         )
+        if resolved.derived_indicators:
+            _append_context_block(
+                lines,
+                data_type=f"{resolved.timeframe} Derived Indicators (JSON)",
+                content=_normalize_json(resolved.derived_indicators),
+            )
+        if not prefix_stable:
+            _append_context_block(
+                lines,
+                data_type="Technical Charts (Images)",
+                content=chart_lines,
+            )
+        shared_prefix_chars = len("\n".join(lines).lstrip())
 
         for report in resolved.previous_reports:
             label = report.step_id or "external"
-            _append_context_block(
-                lines,
-                data_type=f"Previous Report ({label}, uri: {report.artifact.uri}) (JSON)",
-                content=report.artifact.payload,
+            kind = "Previous Report Digest" if report.digest else "Previous Report"
+            # Artifact URIs embed run ids; keep them out of the stable layout.
+            data_type = (
+                f"{kind} ({label}) (JSON)"
+                if prefix_stable
+                else f"{kind} ({label}, uri: {report.artifact.uri}) (JSON)"
             )
+            _append_context_block(lines, data_type=data_type, content=report.artifact.payload)
 
-        lines.append("<task>")
-        lines.append(
-            "Based on the context above, perform the analysis for `symbol`, `timeframe` "
-            "defined in the System Instructions."
-        )
-        lines.append("Generate the full report in JSON.")
-        lines.append("</task>")
+        if not prefix_stable:
+            _append_task_block(lines, context_position="above", update=increment is not None)
 
         # Return a text payload for the prompt, plus any chart images that will
         # be attached as separate binary parts by the LLM client.
-        return UserInputPayload(text="\n".join(lines).strip() + "\n", chart_images=resolved.chart_images)
+        return UserInputPayload(
+            text="\n".join(lines).strip() + "\n",
+            chart_images=resolved.chart_images,
+            shared_prefix_chars=shared_prefix_chars,
+        )
+
+
+def _append_task_block(lines: list[str], *, context_position: str, update: bool = False) -> None:
+    lines.append("<task>")
+    if update:
+        # Incremental mode: the candles only cover the period after the
+        # first previous report, which stands in for the older history.
+        lines.append(
+            f"Based on the context {context_position}, update the first previous report for "
+            "`symbol`, `timeframe` defined in the System Instructions with the new candles."
+        )
+        lines.append("Keep conclusions the new candles do not change; revise the ones they do.")
+    else:
+        lines.append(
+            f"Based on the context {context_position}, perform the analysis for `symbol`, "
+            "`timeframe` defined in the System Instructions."
+        )
+    lines.append("Generate the full report in JSON.")
+    lines.append("</task>")
+    lines.append("")
 
 
 def _append_context_block(lines: list[str], *, data_type: str, content: str | Sequence[str]) -> None:
@@ -308,14 +627,390 @@ def _load_json_artifact(
     event_id: str,
     run_id: str,
     step_id: str,
+    projection: ContextProjection | None = None,
+    keep_data: bool = True,
+    optional: bool = False,
 ) -> JsonArtifact:
     # Reads a JSON artifact from GCS and enforces:
     # - valid gs:// URI
-    # - max size limit (raw bytes)
+    # - max size limit (raw bytes, or the projected payload when a
+    #   projection is configured)
     # - UTF-8 decoding
     # - valid JSON parse
     # It then re-serializes the JSON with sorted keys for stable prompt output.
+    # The read result is handed straight to the parser (not bound here) so
+    # the raw bytes can be released as soon as they are decoded.
+    # ``optional`` artifacts raise ArtifactNotFound without an error log.
+    gcs_uri = _parse_gcs_uri(uri, label=label)
+    artifact = _parse_json_artifact(
+        _read_context_artifact(
+            store,
+            gcs_uri,
+            label=label,
+            max_bytes=MAX_PROJECTED_SOURCE_BYTES if projection is not None else max_bytes,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+            optional=optional,
+        ),
+        label=label,
+        event_logger=event_logger,
+        event_id=event_id,
+        run_id=run_id,
+        step_id=step_id,
+        projection=projection,
+        keep_data=keep_data,
+    )
+    if projection is not None:
+        projected_bytes = len(artifact.payload.encode("utf-8"))
+        if projected_bytes > max_bytes:
+            log_ids = {"eventId": event_id, "runId": run_id, "stepId": step_id}
+            _log_too_large(event_logger, log_ids, label, projected_bytes, max_bytes)
+            raise InvalidStepInputs(f"{label} exceeds maxContextBytesPerJsonArtifact")
+    return artifact
+
+
+def _load_report_digest(
+    store: ArtifactStore,
+    report_uri: str,
+    *,
+    label: str,
+    max_bytes: int,
+    projection: ContextProjection | None,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+    keep_data: bool = False,
+) -> JsonArtifact | None:
+    # Returns None when the report has no usable digest; the caller then
+    # loads the full report, so older reports without sidecars still work.
+    # The digest is read directly: a missing sidecar is the read's
+    # not-found result rather than a separate exists() round trip.
+    try:
+        digest_uri = report_digest_uri(ArtifactUri.parse(report_uri))
+    except InvalidArtifactUri:
+        return None
+    if digest_uri is None:
+        return None
+    try:
+        return _load_json_artifact(
+            store,
+            str(digest_uri),
+            label=label,
+            max_bytes=max_bytes,
+            projection=projection,
+            keep_data=keep_data,
+            optional=True,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+        )
+    except ArtifactNotFound:
+        return None
+    except (ArtifactStoreError, InvalidStepInputs) as exc:
+        _log_event(
+            event_logger,
+            event="previous_report_digest_fallback",
+            severity="WARNING",
+            eventId=event_id,
+            runId=run_id,
+            stepId=step_id,
+            uri=str(digest_uri),
+            reason=exc.__class__.__name__,
+        )
+        return None
+
+
+def _load_ohlcv_artifact(
+    store: ArtifactStore,
+    uri: str,
+    *,
+    max_json_bytes: int,
+    max_binary_bytes: int,
+    max_candles: int | None,
+    recent_candles: int,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+    projection: ContextProjection | None = None,
+    since: Any = None,
+) -> tuple[JsonArtifact, OhlcvFrame | None, OhlcvDownsampling | None, OhlcvIncrement | None]:
+    # Columnar artifacts (npz/parquet/arrow, by extension or content type)
+    # are decoded straight into arrays and rendered once; the context size
+    # limit then applies to the rendered JSON rather than the raw encoding.
+    # With downsampling enabled, JSON candles may also exceed the context
+    # limit on disk, as long as they fit once downsampled (or projected;
+    # projections apply to JSON candles only). With ``since`` (incremental
+    # mode) only candles newer than it are rendered, so the same applies.
+    label = "ohlcv"
+    log_ids = {"eventId": event_id, "runId": run_id, "stepId": step_id}
     gcs_uri = _parse_gcs_uri(uri, label=label)
+    fmt = binary_ohlcv_format(str(gcs_uri))
+    downsample = max_candles is not None
+    if fmt is None and not _has_json_extension(gcs_uri):
+        # Without a known extension only the content type tells a columnar
+        # file from JSON; it decides the read cap, so fetch it first.
+        content_type = _stat_context_artifact(
+            store,
+            gcs_uri,
+            label=label,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+        ).content_type
+        fmt = binary_ohlcv_format(str(gcs_uri), content_type)
+    if fmt is None:
+        json_capped = not downsample and projection is None and since is None
+        # The read result goes straight into the parser, which drops the raw
+        # bytes as soon as they are decoded.
+        artifact = _parse_json_artifact(
+            _read_context_artifact(
+                store,
+                gcs_uri,
+                label=label,
+                max_bytes=max_json_bytes if json_capped else max_binary_bytes,
+                event_logger=event_logger,
+                event_id=event_id,
+                run_id=run_id,
+                step_id=step_id,
+            ),
+            label=label,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+            projection=projection,
+        )
+        source_bytes, generation, crc32c = artifact.bytes_len, artifact.generation, artifact.crc32c
+        size = len(artifact.payload.encode("utf-8")) if projection is not None else artifact.bytes_len
+        frame = ohlcv_frame_from_json(artifact.data) if downsample or since is not None else None
+        if since is not None and frame is None:
+            _log_incremental_skipped(event_logger, log_ids, "ohlcv_not_columnar")
+            since = None
+        if frame is None:
+            if size > max_json_bytes:
+                _log_too_large(event_logger, log_ids, label, size, max_json_bytes)
+                raise InvalidStepInputs(f"{label} exceeds maxContextBytesPerJsonArtifact")
+            return artifact, None, None, None
+    else:
+        limited = _read_context_artifact(
+            store,
+            gcs_uri,
+            label=label,
+            max_bytes=max_binary_bytes,
+            event_logger=event_logger,
+            event_id=event_id,
+            run_id=run_id,
+            step_id=step_id,
+        )
+        source_bytes = len(limited.data)
+        generation, crc32c = limited.metadata.generation, limited.metadata.crc32c
+        frame = load_ohlcv_frame(limited.data, fmt)
+        del limited
+
+    # ``frame`` stays the full history (indicators, coverage); ``shown`` is
+    # what the prompt gets.
+    shown = frame
+    increment = None
+    if since is not None:
+        newer = ohlcv_since(frame, since)
+        if newer is None:
+            _log_incremental_skipped(event_logger, log_ids, "not_contiguous")
+        else:
+            shown = newer
+            increment = OhlcvIncrement(
+                base_last_timestamp=since, source_candles=len(frame), new_candles=len(newer)
+            )
+            _log_event(
+                event_logger,
+                event="context_ohlcv_incremental",
+                severity="INFO",
+                **log_ids,
+                increment=increment.to_dict(),
+            )
+    if fmt is None and increment is None and not (
+        downsample and (len(frame) > max_candles or size > max_json_bytes)
+    ):
+        # Nothing is cut or merged: the artifact keeps its normalized shape,
+        # including any fields around a wrapped ``data`` array.
+        if size > max_json_bytes:
+            _log_too_large(event_logger, log_ids, label, size, max_json_bytes)
+            raise InvalidStepInputs(f"{label} exceeds maxContextBytesPerJsonArtifact")
+        return artifact, frame, None, None
+
+    # Cut or merged candles are rendered as a bare array of OHLCV rows.
+    downsampling = None
+    rendered = render_ohlcv_json(shown)
+    rendered_bytes = len(rendered.encode("utf-8"))
+    if downsample and (len(shown) > max_candles or rendered_bytes > max_json_bytes):
+        target = max_candles
+        if rendered_bytes > max_json_bytes:
+            # Rows render to near-uniform widths, so scale the candle count
+            # to the byte budget (with headroom) instead of searching.
+            target = min(target, max(1, int(len(shown) * max_json_bytes * 0.95 / rendered_bytes)))
+        sampled, downsampling = downsample_ohlcv(
+            shown, max_candles=target, recent_candles=recent_candles
+        )
+        rendered = render_ohlcv_json(sampled)
+        rendered_bytes = len(rendered.encode("utf-8"))
+    if rendered_bytes > max_json_bytes:
+        _log_too_large(event_logger, log_ids, label, rendered_bytes, max_json_bytes)
+        raise InvalidStepInputs(f"{label} exceeds maxContextBytesPerJsonArtifact")
+    if fmt is not None:
+        _log_event(
+            event_logger,
+            event="context_ohlcv_decoded",
+            severity="INFO",
+            **log_ids,
+            format=fmt,
+            candles=len(frame),
+            bytes=source_bytes,
+            renderedBytes=rendered_bytes,
+        )
+    if downsampling is not None:
+        _log_event(
+            event_logger,
+            event="context_ohlcv_downsampled",
+            severity="INFO",
+            **log_ids,
+            downsampling=downsampling.to_dict(),
+            renderedBytes=rendered_bytes,
+        )
+    artifact = JsonArtifact(
+        uri=str(gcs_uri),
+        payload=rendered,
+        bytes_len=source_bytes,
+        data=None,
+        generation=generation,
+        crc32c=crc32c,
+    )
+    return artifact, frame, downsampling, increment
+
+
+def _has_json_extension(uri: GcsUri) -> bool:
+    return str(uri).split("?", 1)[0].lower().endswith(".json")
+
+
+def _log_incremental_skipped(
+    event_logger: EventLogger | None, log_ids: Mapping[str, str], reason: str
+) -> None:
+    _log_event(
+        event_logger,
+        event="context_ohlcv_incremental_skipped",
+        severity="WARNING",
+        **log_ids,
+        reason=reason,
+    )
+
+
+def _report_ohlcv_coverage(report: Any) -> OhlcvCoverage | None:
+    # Reports and digests both record it at metadata.inputs.ohlcv_coverage.
+    metadata = report.get("metadata") if isinstance(report, Mapping) else None
+    inputs = metadata.get("inputs") if isinstance(metadata, Mapping) else None
+    if not isinstance(inputs, Mapping):
+        return None
+    return OhlcvCoverage.from_dict(inputs.get("ohlcv_coverage"))
+
+
+def _log_too_large(
+    event_logger: EventLogger | None,
+    log_ids: Mapping[str, str],
+    label: str,
+    size: int,
+    max_bytes: int,
+) -> None:
+    _log_event(
+        event_logger,
+        event="context_json_too_large",
+        severity="WARNING",
+        **log_ids,
+        kind=label,
+        bytes=size,
+        maxBytes=max_bytes,
+    )
+
+
+def _compute_derived_indicators(
+    cache: IndicatorCache,
+    ohlcv: JsonArtifact,
+    frame: OhlcvFrame | None,
+    indicators: Sequence[str],
+    *,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> Mapping[str, Any] | None:
+    started = time.monotonic()
+    # A hit needs only the artifact identity; the frame is built on a miss.
+    values = cache.get(uri=ohlcv.uri, generation=ohlcv.generation, names=indicators)
+    cache_hit = values is not None
+    if values is None:
+        if frame is None:
+            frame = ohlcv_frame_from_json(ohlcv.data)
+        if frame is None:
+            _log_event(
+                event_logger,
+                event="derived_indicators_skipped",
+                severity="WARNING",
+                eventId=event_id,
+                runId=run_id,
+                stepId=step_id,
+                indicators=list(indicators),
+                reason="ohlcv_not_columnar",
+            )
+            return None
+        try:
+            values, cache_hit = cache.get_or_compute(
+                uri=ohlcv.uri,
+                generation=ohlcv.generation,
+                frame=frame,
+                names=indicators,
+            )
+        except Exception as exc:
+            _log_event(
+                event_logger,
+                event="derived_indicators_skipped",
+                severity="WARNING",
+                eventId=event_id,
+                runId=run_id,
+                stepId=step_id,
+                indicators=list(indicators),
+                reason=exc.__class__.__name__,
+            )
+            return None
+    _log_event(
+        event_logger,
+        event="derived_indicators_computed",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId=step_id,
+        indicators=list(indicators),
+        candles=values.get("candles"),
+        cacheHit=cache_hit,
+        durationMs=int((time.monotonic() - started) * 1000),
+    )
+    return values
+
+
+def _read_context_artifact(
+    store: ArtifactStore,
+    gcs_uri: GcsUri,
+    *,
+    label: str,
+    max_bytes: int,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+    optional: bool = False,
+) -> LimitedRead:
     _log_event(
         event_logger,
         event="gcs_read_started",
@@ -328,12 +1023,28 @@ def _load_json_artifact(
     )
     started = time.monotonic()
     try:
-        payload = store.read_bytes(gcs_uri)
+        limited = store.read_bytes_limited(gcs_uri, max_bytes)
+    except ArtifactTooLarge as exc:
+        # Rejected from object metadata (or a capped range read) before the
+        # body was transferred.
+        _log_event(
+            event_logger,
+            event="context_json_too_large",
+            severity="WARNING",
+            eventId=event_id,
+            runId=run_id,
+            stepId=step_id,
+            kind=label,
+            bytes=exc.size,
+            maxBytes=max_bytes,
+        )
+        raise InvalidStepInputs(f"{label} exceeds maxContextBytesPerJsonArtifact") from exc
     except Exception as exc:
+        missing = optional and isinstance(exc, ArtifactNotFound)
         _log_event(
             event_logger,
             event="gcs_read_finished",
-            severity="ERROR",
+            severity="INFO" if missing else "ERROR",
             eventId=event_id,
             runId=run_id,
             stepId=step_id,
@@ -354,23 +1065,79 @@ def _load_json_artifact(
         gcs_uri=str(gcs_uri),
         kind=label,
         ok=True,
-        bytes=len(payload),
+        bytes=len(limited.data),
+        generation=limited.metadata.generation,
         durationMs=int((time.monotonic() - started) * 1000),
     )
-    if len(payload) > max_bytes:
+    return limited
+
+
+def _stat_context_artifact(
+    store: ArtifactStore,
+    gcs_uri: GcsUri,
+    *,
+    label: str,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> ArtifactMetadata:
+    started = time.monotonic()
+    try:
+        meta = store.stat(gcs_uri)
+    except Exception as exc:
         _log_event(
             event_logger,
-            event="context_json_too_large",
-            severity="WARNING",
+            event="gcs_stat_finished",
+            severity="ERROR",
             eventId=event_id,
             runId=run_id,
             stepId=step_id,
+            gcs_uri=str(gcs_uri),
             kind=label,
-            bytes=len(payload),
-            maxBytes=max_bytes,
+            ok=False,
+            error={"type": exc.__class__.__name__},
+            durationMs=int((time.monotonic() - started) * 1000),
         )
-        raise InvalidStepInputs(f"{label} exceeds maxContextBytesPerJsonArtifact")
-    text = _decode_utf8(payload, label=label)
+        raise
+    _log_event(
+        event_logger,
+        event="gcs_stat_finished",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId=step_id,
+        gcs_uri=str(gcs_uri),
+        kind=label,
+        ok=True,
+        bytes=meta.size,
+        durationMs=int((time.monotonic() - started) * 1000),
+    )
+    return meta
+
+
+def _parse_json_artifact(
+    limited: LimitedRead,
+    *,
+    label: str,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+    projection: ContextProjection | None = None,
+    keep_data: bool = True,
+) -> JsonArtifact:
+    # Each representation (raw bytes -> text -> parsed tree -> canonical
+    # string) is dropped as soon as the next one exists. This relies on the
+    # caller passing ``limited`` without holding its own reference; with a
+    # CachingArtifactStore the cache keeps the raw bytes (bounded by its own
+    # byte budget), so only the text, tree and string are released here.
+    # ``keep_data=False`` drains the tree while the canonical string is
+    # emitted, for artifacts that are only injected as text.
+    metadata = limited.metadata
+    source_bytes = len(limited.data)
+    text = _decode_utf8(limited.data, label=label)
+    del limited
     try:
         parsed = json.loads(text)
     except json.JSONDecodeError as exc:
@@ -385,7 +1152,14 @@ def _load_json_artifact(
             error={"type": exc.__class__.__name__},
         )
         raise InvalidStepInputs(f"{label} must be valid JSON") from exc
-    normalized = json.dumps(parsed, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    del text
+    if projection is not None:
+        parsed = projection.apply(parsed)
+    if keep_data:
+        normalized = _normalize_json(parsed)
+    else:
+        normalized = _drain_canonical_json(parsed)
+        parsed = None
     _log_event(
         event_logger,
         event="context_json_validated",
@@ -394,14 +1168,17 @@ def _load_json_artifact(
         runId=run_id,
         stepId=step_id,
         kind=label,
-        bytes=len(payload),
+        bytes=source_bytes,
         normalizedBytes=len(normalized.encode("utf-8")),
+        projected=projection is not None,
     )
     return JsonArtifact(
-        uri=str(gcs_uri),
+        uri=str(metadata.uri),
         payload=normalized,
-        bytes_len=len(payload),
+        bytes_len=source_bytes,
         data=parsed,
+        generation=metadata.generation,
+        crc32c=metadata.crc32c,
     )
 
 
@@ -414,6 +1191,7 @@ def _load_chart_images(
     event_id: str,
     run_id: str,
     step_id: str,
+    reference_only: bool = False,
 ) -> list[ChartImage]:
     # Parse the charts manifest and load image bytes from GCS. The manifest is
     # expected to be a JSON object containing an array of items under one of the
@@ -423,115 +1201,304 @@ def _load_chart_images(
         raise InvalidStepInputs("charts manifest must be an object")
 
     items = _extract_manifest_items(manifest_data)
-    items_with_uri = 0
-    images: list[ChartImage] = []
+    entries: list[tuple[GcsUri, str]] = []
     for item in items:
         if not isinstance(item, Mapping):
             continue
         uri = _extract_chart_uri(item)
         if uri is None:
             continue
-        items_with_uri += 1
         description = _extract_chart_description(item)
-        gcs_uri = _parse_gcs_uri(uri, label="chart_image")
-        _log_event(
-            event_logger,
-            event="gcs_read_started",
-            severity="INFO",
-            eventId=event_id,
-            runId=run_id,
-            stepId=step_id,
-            gcs_uri=str(gcs_uri),
-            kind="chart_image",
-        )
-        started = time.monotonic()
-        try:
-            data = store.read_bytes(gcs_uri)
-        except Exception as exc:
+        entries.append((_parse_gcs_uri(uri, label="chart_image"), description))
+    items_with_uri = len(entries)
+
+    images: list[ChartImage] = []
+    if reference_only:
+        for gcs_uri, description in entries:
+            images.append(
+                _reference_chart_image(
+                    store,
+                    gcs_uri,
+                    description=description,
+                    max_bytes=max_bytes,
+                    event_logger=event_logger,
+                    event_id=event_id,
+                    run_id=run_id,
+                    step_id=step_id,
+                )
+            )
+    elif entries:
+        # Download all images concurrently; results come back in manifest
+        # order and are validated one by one below.
+        for gcs_uri, _description in entries:
             _log_event(
                 event_logger,
-                event="gcs_read_finished",
-                severity="ERROR",
+                event="gcs_read_started",
+                severity="INFO",
                 eventId=event_id,
                 runId=run_id,
                 stepId=step_id,
                 gcs_uri=str(gcs_uri),
                 kind="chart_image",
-                ok=False,
-                error={"type": exc.__class__.__name__},
-                durationMs=int((time.monotonic() - started) * 1000),
             )
-            raise
+        results = store.read_many([gcs_uri for gcs_uri, _ in entries], max_bytes)
+        for (gcs_uri, description), result in zip(entries, results):
+            images.append(
+                _chart_image_from_read(
+                    result,
+                    description=description,
+                    max_bytes=max_bytes,
+                    event_logger=event_logger,
+                    event_id=event_id,
+                    run_id=run_id,
+                    step_id=step_id,
+                )
+            )
+
+    _log_event(
+        event_logger,
+        event="charts_manifest_parsed",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId=step_id,
+        itemsTotal=len(items),
+        itemsWithUri=items_with_uri,
+    )
+    # The manifest must point to at least one valid image to be considered usable.
+    if not images:
+        _log_event(
+            event_logger,
+            event="charts_manifest_no_images",
+            severity="WARNING",
+            eventId=event_id,
+            runId=run_id,
+            stepId=step_id,
+            itemsTotal=len(items),
+        )
+        raise InvalidStepInputs("charts manifest contains no valid image URIs")
+
+    return images
+
+
+def _chart_image_from_read(
+    result: BulkReadResult,
+    *,
+    description: str,
+    max_bytes: int,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> ChartImage:
+    gcs_uri = result.uri
+    exc = result.error
+    if isinstance(exc, ArtifactTooLarge):
+        _log_event(
+            event_logger,
+            event="chart_image_too_large",
+            severity="WARNING",
+            eventId=event_id,
+            runId=run_id,
+            stepId=step_id,
+            gcs_uri=str(gcs_uri),
+            bytes=exc.size,
+            maxBytes=max_bytes,
+        )
+        raise InvalidStepInputs("chart image exceeds maxChartImageBytes") from exc
+    if exc is not None:
         _log_event(
             event_logger,
             event="gcs_read_finished",
-            severity="INFO",
+            severity="ERROR",
             eventId=event_id,
             runId=run_id,
             stepId=step_id,
             gcs_uri=str(gcs_uri),
             kind="chart_image",
-            ok=True,
-            bytes=len(data),
-            durationMs=int((time.monotonic() - started) * 1000),
-        )
-        if len(data) > max_bytes:
-            _log_event(
-                event_logger,
-                event="chart_image_too_large",
-                severity="WARNING",
-                eventId=event_id,
-                runId=run_id,
-                stepId=step_id,
-                gcs_uri=str(gcs_uri),
-                bytes=len(data),
-                maxBytes=max_bytes,
-            )
-            raise InvalidStepInputs("chart image exceeds maxChartImageBytes")
-        images.append(
-            ChartImage(
-                uri=str(gcs_uri),
-                description=description,
-                mime_type="image/png",
-                data=data,
-                bytes_len=len(data),
-            )
+            ok=False,
+            error={"type": exc.__class__.__name__},
+            durationMs=result.duration_ms,
         )
+        raise exc
+    limited = result.read
+    data = limited.data
+    _log_event(
+        event_logger,
+        event="gcs_read_finished",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId=step_id,
+        gcs_uri=str(gcs_uri),
+        kind="chart_image",
+        ok=True,
+        bytes=len(data),
+        generation=limited.metadata.generation,
+        durationMs=result.duration_ms,
+    )
+    image = ChartImage(
+        uri=str(gcs_uri),
+        description=description,
+        mime_type="image/png",
+        data=data,
+        bytes_len=len(data),
+        generation=limited.metadata.generation,
+        crc32c=limited.metadata.crc32c,
+    )
+    _log_event(
+        event_logger,
+        event="chart_image_loaded",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId=step_id,
+        gcs_uri=str(gcs_uri),
+        bytes=len(data),
+    )
+    return image
+
+
+def _reference_chart_image(
+    store: ArtifactStore,
+    gcs_uri: GcsUri,
+    *,
+    description: str,
+    max_bytes: int,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> ChartImage:
+    # Zero-copy path: the provider reads the object directly from GCS, so only
+    # the metadata is fetched to enforce the size and content-type policy.
+    meta = _stat_context_artifact(
+        store,
+        gcs_uri,
+        label="chart_image",
+        event_logger=event_logger,
+        event_id=event_id,
+        run_id=run_id,
+        step_id=step_id,
+    )
+    if meta.size > max_bytes:
         _log_event(
             event_logger,
-            event="chart_image_loaded",
-            severity="INFO",
+            event="chart_image_too_large",
+            severity="WARNING",
             eventId=event_id,
             runId=run_id,
             stepId=step_id,
             gcs_uri=str(gcs_uri),
-            bytes=len(data),
+            bytes=meta.size,
+            maxBytes=max_bytes,
         )
-
+        raise InvalidStepInputs("chart image exceeds maxChartImageBytes")
+    mime_type = (meta.content_type or "image/png").split(";", 1)[0].strip().lower()
+    if mime_type not in CHART_IMAGE_MIME_TYPES:
+        raise InvalidStepInputs(f"chart image content type not supported: {mime_type}")
     _log_event(
         event_logger,
-        event="charts_manifest_parsed",
+        event="chart_image_referenced",
         severity="INFO",
         eventId=event_id,
         runId=run_id,
         stepId=step_id,
-        itemsTotal=len(items),
-        itemsWithUri=items_with_uri,
+        gcs_uri=str(gcs_uri),
+        bytes=meta.size,
     )
-    # The manifest must point to at least one valid image to be considered usable.
-    if not images:
+    return ChartImage(
+        uri=str(gcs_uri),
+        description=description,
+        mime_type=mime_type,
+        data=None,
+        bytes_len=meta.size,
+        generation=meta.generation,
+        crc32c=meta.crc32c,
+    )
+
+
+def _open_context_bundle(
+    store: ArtifactStore,
+    uri: ArtifactUri,
+    *,
+    max_bytes: int,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> ContextBundle | None:
+    # Any failure means per-object reads; a bundle is only ever an optimization.
+    # The bundle is read directly: the usual first-step miss is the read's
+    # not-found result, which is not worth a warning.
+    try:
+        read = store.read_bytes_limited(uri, max_bytes)
+        bundle = ContextBundle(read.data)
+    except ArtifactNotFound:
+        return None
+    except (ArtifactStoreError, InvalidContextBundle) as exc:
         _log_event(
             event_logger,
-            event="charts_manifest_no_images",
+            event="context_bundle_unavailable",
             severity="WARNING",
             eventId=event_id,
             runId=run_id,
             stepId=step_id,
-            itemsTotal=len(items),
+            uri=str(uri),
+            reason=exc.__class__.__name__,
         )
-        raise InvalidStepInputs("charts manifest contains no valid image URIs")
+        return None
+    _log_event(
+        event_logger,
+        event="context_bundle_hit",
+        severity="INFO",
+        eventId=event_id,
+        runId=run_id,
+        stepId=step_id,
+        uri=str(uri),
+        members=len(bundle),
+        bytes=bundle.size,
+    )
+    return bundle
 
-    return images
+
+def _write_context_bundle(
+    store: ArtifactStore,
+    uri: ArtifactUri,
+    reads: Sequence[LimitedRead],
+    *,
+    event_logger: EventLogger | None,
+    event_id: str,
+    run_id: str,
+    step_id: str,
+) -> None:
+    if not reads:
+        return
+    data = pack_context_bundle(reads)
+    log_ids = {"eventId": event_id, "runId": run_id, "stepId": step_id, "uri": str(uri)}
+    try:
+        result = store.write_bytes_create_only(
+            uri, data, content_type=CONTEXT_BUNDLE_CONTENT_TYPE
+        )
+    except ArtifactStoreError as exc:
+        _log_event(
+            event_logger,
+            event="context_bundle_write_failed",
+            severity="WARNING",
+            **log_ids,
+            reason=exc.__class__.__name__,
+        )
+        return
+    _log_event(
+        event_logger,
+        event="context_bundle_written",
+        severity="INFO",
+        **log_ids,
+        members=len({str(read.metadata.uri) for read in reads}),
+        bytes=len(data),
+        created=result.created,
+        reused=result.reused,
+    )
 
 
 def _log_event(event_logger: EventLogger | None, **payload: Any) -> None:
@@ -540,6 +1507,18 @@ def _log_event(event_logger: EventLogger | None, **payload: Any) -> None:
     event_logger.log(**payload)
 
 
+def chart_image_uris(manifest_data: Any) -> list[str]:
+    """Image URIs listed by a charts manifest, in manifest order ([] if malformed)."""
+    if not isinstance(manifest_data, Mapping):
+        return []
+    try:
+        items = _extract_manifest_items(manifest_data)
+    except InvalidStepInputs:
+        return []
+    uris = [_extract_chart_uri(item) for item in items if isinstance(item, Mapping)]
+    return [uri for uri in uris if uri is not None]
+
+
 def _extract_manifest_items(manifest: Mapping[str, Any]) -> Sequence[Any]:
     items = manifest.get("items")
     if items is None:
@@ -601,15 +1580,41 @@ def _parse_gcs_uri(uri: str, *, label: str) -> GcsUri:
     try:
         return GcsUri.parse(uri)
     except InvalidGcsUri as exc:
-        raise InvalidStepInputs(f"{label} must be a valid gs:// URI") from exc
+        raise InvalidStepInputs(f"{label} must be a valid artifact URI (gs://, file:///)") from exc
 
 
-def _decode_utf8(payload: bytes, *, label: str) -> str:
+def _decode_utf8(payload: bytes | memoryview, *, label: str) -> str:
     try:
-        return payload.decode("utf-8")
+        return str(payload, "utf-8")
     except UnicodeDecodeError as exc:
         raise InvalidStepInputs(f"{label} must be utf-8 JSON") from exc
 
 
 def _normalize_json(value: Any) -> str:
     return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+# Container levels ``_drain_canonical_json`` walks element by element; deeper
+# subtrees are emitted whole.
+_DRAIN_DEPTH = 4
+
+
+def _drain_canonical_json(value: Any, *, depth: int = _DRAIN_DEPTH) -> str:
+    """``_normalize_json`` that empties ``value`` while emitting it.
+
+    Each element is removed from its container once its text exists, so the
+    parsed tree shrinks as the canonical string grows instead of both being
+    held in full.
+    """
+    if depth <= 0 or not value or not isinstance(value, (dict, list)):
+        return _normalize_json(value)
+    chunks: list[str] = []
+    if isinstance(value, dict):
+        for key in sorted(value):
+            item = _drain_canonical_json(value.pop(key), depth=depth - 1)
+            chunks.append(f"{_normalize_json(key)}:{item}")
+        return "{" + ",".join(chunks) + "}"
+    value.reverse()
+    while value:
+        chunks.append(_drain_canonical_json(value.pop(), depth=depth - 1))
+    return "[" + ",".join(chunks) + "]"
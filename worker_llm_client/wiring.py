@@ -0,0 +1,299 @@
+"""Process wiring shared by the Cloud Function (``main.py``) and the pull worker.
+
+Builds the configured repositories, artifact store, Gemini clients and
+optional accelerators once per process. Nothing here depends on
+functions-framework, so ``python -m worker_llm_client.worker`` runs from any
+working directory.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import os
+from typing import Any
+
+from worker_llm_client.app.batch import LLMBatchPolicy
+from worker_llm_client.app.cache_metrics import PromptCacheTracker
+from worker_llm_client.app.commit import CommitPipeline, WriteRetryPolicy
+from worker_llm_client.app.context_cache import ContextCacheRegistry
+from worker_llm_client.app.file_registry import UploadedFileRegistry
+from worker_llm_client.app.handler import DeferredStepCompleter, FlowRunEventHandler
+from worker_llm_client.app.llm_client import BatchPredictionService, LLMClient
+from worker_llm_client.app.prefetch import (
+    CachingPromptRepository,
+    CachingSchemaRepository,
+    ClaimPrelude,
+    PrefetchPolicy,
+    StepPrefetcher,
+)
+from worker_llm_client.app.run_gate import RunGate
+from worker_llm_client.app.services import (
+    FlowRunRepository,
+    PromptRepository,
+    SchemaRepository,
+)
+from worker_llm_client.artifacts.cache import CachingArtifactStore
+from worker_llm_client.artifacts.domain import ArtifactPathPolicy
+from worker_llm_client.artifacts.services import ArtifactStore
+from worker_llm_client.infra.filesystem import FilesystemArtifactStore
+from worker_llm_client.infra.firestore import (
+    FirestoreFlowRunRepository,
+    FirestorePromptRepository,
+    FirestoreSchemaRepository,
+)
+from worker_llm_client.infra.gcs import GcsArtifactStore, build_storage_client
+from worker_llm_client.infra.gemini import (
+    GeminiBatchPredictionService,
+    GeminiClientAdapter,
+    GeminiContextCacheStore,
+    GeminiFileStore,
+)
+from worker_llm_client.infra.memory import InMemoryArtifactStore
+from worker_llm_client.ops.config import ConfigurationError, WorkerConfig
+from worker_llm_client.ops.logging import (
+    CloudLoggingEventLogger,
+    EventLogger,
+    configure_logging,
+)
+from worker_llm_client.reporting.services import UserInputAssembler
+from worker_llm_client.reporting.structured_output import StructuredOutputValidator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Wiring:
+    """Process-wide components; handlers are built on top of them."""
+
+    config: WorkerConfig
+    event_logger: EventLogger
+    firestore_client: Any
+    flow_run_repo: FirestoreFlowRunRepository
+    prompt_repo: PromptRepository
+    schema_repo: SchemaRepository
+    path_policy: ArtifactPathPolicy
+    artifact_store: ArtifactStore
+    user_input_assembler: UserInputAssembler
+    structured_output_validator: StructuredOutputValidator
+    llm_client: LLMClient
+    context_cache: ContextCacheRegistry | None
+    prompt_cache_tracker: PromptCacheTracker
+    batch_policy: LLMBatchPolicy
+    batch_prediction: BatchPredictionService | None
+    prefetcher: StepPrefetcher | None
+    claim_prelude: ClaimPrelude | None
+    commit_pipeline: CommitPipeline | None
+    write_retry: WriteRetryPolicy
+    # One gate per instance: serializes same-run events and caches idle snapshots.
+    run_gate: RunGate | None
+
+    def event_handler(self, flow_repo: FlowRunRepository | None = None) -> FlowRunEventHandler:
+        """Handler wired to this process's clients; ``flow_repo`` overrides the repository."""
+        config = self.config
+        return FlowRunEventHandler(
+            flow_repo=flow_repo or self.flow_run_repo,
+            prompt_repo=self.prompt_repo,
+            schema_repo=self.schema_repo,
+            event_logger=self.event_logger,
+            flow_runs_collection=config.flow_runs_collection,
+            artifact_store=self.artifact_store,
+            path_policy=self.path_policy,
+            artifacts_dry_run=config.artifacts_dry_run,
+            llm_client=self.llm_client,
+            user_input_assembler=self.user_input_assembler,
+            structured_output_validator=self.structured_output_validator,
+            model_allowed=config.is_model_allowed,
+            cache_shared_prefix=self.context_cache is not None,
+            cache_tracker=self.prompt_cache_tracker,
+            finalize_budget_seconds=config.finalize_budget_seconds,
+            invocation_timeout_seconds=config.invocation_timeout_seconds,
+            batch_policy=self.batch_policy,
+            batch_prediction=self.batch_prediction,
+            run_gate=self.run_gate,
+            prefetcher=self.prefetcher,
+            claim_prelude=self.claim_prelude,
+            commit_pipeline=self.commit_pipeline,
+            write_retry=self.write_retry,
+            report_content_encoding=config.report_content_encoding,
+        )
+
+    def deferred_completer(self) -> DeferredStepCompleter | None:
+        """None unless ``GEMINI_BATCH_API_ENABLED`` is on."""
+        if self.batch_prediction is None:
+            return None
+        return DeferredStepCompleter(
+            flow_repo=self.flow_run_repo,
+            schema_repo=self.schema_repo,
+            event_logger=self.event_logger,
+            artifact_store=self.artifact_store,
+            path_policy=self.path_policy,
+            batch_prediction=self.batch_prediction,
+            structured_output_validator=self.structured_output_validator,
+            finalize_budget_seconds=self.config.finalize_budget_seconds,
+            report_content_encoding=self.config.report_content_encoding,
+        )
+
+
+def load_config() -> WorkerConfig:
+    """Read ``WorkerConfig`` from the environment and configure logging."""
+    configure_logging()
+    try:
+        config = WorkerConfig.from_env()
+    except ConfigurationError as exc:
+        logger.error("Configuration error: %s", exc)
+        raise
+    configure_logging(level=config.log_level)
+    return config
+
+
+def build_wiring(config: WorkerConfig, *, firestore_client: Any | None = None) -> Wiring:
+    """Build the process components; ``firestore_client`` defaults to a real client."""
+    if firestore_client is None:
+        try:
+            from google.cloud import firestore  # type: ignore
+        except Exception as exc:  # pragma: no cover - runtime guard
+            logger.error("Firestore client unavailable: %s", exc)
+            raise
+        firestore_client = firestore.Client(
+            project=config.gcp_project,
+            database=config.firestore_database,
+        )
+    flow_run_repo = FirestoreFlowRunRepository(
+        firestore_client, flow_runs_collection=config.flow_runs_collection
+    )
+    prompt_repo: PromptRepository = FirestorePromptRepository(
+        firestore_client, prompts_collection=config.llm_prompts_collection
+    )
+    schema_repo: SchemaRepository = FirestoreSchemaRepository(firestore_client)
+
+    path_policy = ArtifactPathPolicy.from_config(config)
+    artifact_store = _build_artifact_store(config, path_policy)
+    if config.prefetch_enabled or config.claim_prelude_enabled:
+        # Shared with the prefetcher and the claim prelude: reads they make are
+        # served from memory (or handed over while in flight) later.
+        artifact_store = CachingArtifactStore(
+            artifact_store, max_bytes=config.prefetch_cache_max_mb * 1024 * 1024
+        )
+    if config.prefetch_enabled:
+        prompt_repo = CachingPromptRepository(
+            prompt_repo, ttl_seconds=config.prefetch_config_ttl_seconds
+        )
+        schema_repo = CachingSchemaRepository(
+            schema_repo, ttl_seconds=config.prefetch_config_ttl_seconds
+        )
+
+    gemini_auth = config.gemini_auth
+    file_registry = (
+        UploadedFileRegistry(file_store=GeminiFileStore(api_key=gemini_auth.api_key))
+        if config.gemini_files_upload_enabled
+        else None
+    )
+    context_cache = (
+        ContextCacheRegistry(
+            cache_store=GeminiContextCacheStore(
+                api_key=gemini_auth.api_key,
+                vertexai=gemini_auth.is_vertex,
+                project=gemini_auth.project,
+                location=gemini_auth.location,
+            ),
+            ttl_seconds=config.gemini_context_cache_ttl_seconds,
+        )
+        if config.gemini_context_cache_enabled
+        else None
+    )
+    llm_client = GeminiClientAdapter(
+        api_key=gemini_auth.api_key,
+        timeout_seconds=config.gemini_timeout_seconds,
+        file_registry=file_registry,
+        vertexai=gemini_auth.is_vertex,
+        project=gemini_auth.project,
+        location=gemini_auth.location,
+        context_cache=context_cache,
+    )
+
+    env_label = os.environ.get("ENV") or os.environ.get("ENVIRONMENT") or "dev"
+    event_logger = CloudLoggingEventLogger(
+        service="worker_llm_client",
+        env=env_label,
+        component="worker_llm_client",
+        logger=logging.getLogger(),
+    )
+    # Vertex reads chart images by reference; only their metadata is used.
+    prefetch_policy = PrefetchPolicy(
+        timeout_seconds=config.prefetch_timeout_seconds,
+        chart_images=not gemini_auth.is_vertex,
+    )
+
+    return Wiring(
+        config=config,
+        event_logger=event_logger,
+        firestore_client=firestore_client,
+        flow_run_repo=flow_run_repo,
+        prompt_repo=prompt_repo,
+        schema_repo=schema_repo,
+        path_policy=path_policy,
+        artifact_store=artifact_store,
+        user_input_assembler=UserInputAssembler(
+            artifact_store=artifact_store,
+            reference_chart_images=gemini_auth.is_vertex,
+            layout=config.user_prompt_layout,
+            ohlcv_max_candles=config.ohlcv_max_candles,
+            ohlcv_recent_candles=config.ohlcv_recent_candles,
+            bundle_path_policy=path_policy if config.context_bundle_enabled else None,
+        ),
+        structured_output_validator=StructuredOutputValidator(),
+        llm_client=llm_client,
+        context_cache=context_cache,
+        prompt_cache_tracker=PromptCacheTracker(),
+        batch_policy=LLMBatchPolicy(
+            max_steps=config.llm_batch_max_steps,
+            max_input_tokens=config.llm_batch_max_input_tokens,
+            step_seconds=config.llm_batch_step_seconds,
+        ),
+        batch_prediction=(
+            GeminiBatchPredictionService(api_key=gemini_auth.api_key)
+            if config.gemini_batch_api_enabled
+            else None
+        ),
+        prefetcher=(
+            StepPrefetcher(
+                artifact_store=artifact_store,
+                prompt_repo=prompt_repo,
+                schema_repo=schema_repo,
+                event_logger=event_logger,
+                policy=prefetch_policy,
+            )
+            if config.prefetch_enabled
+            else None
+        ),
+        claim_prelude=(
+            ClaimPrelude(artifact_store=artifact_store, policy=prefetch_policy)
+            if config.claim_prelude_enabled
+            else None
+        ),
+        commit_pipeline=CommitPipeline() if config.commit_pipeline_enabled else None,
+        write_retry=WriteRetryPolicy(max_attempts=config.gcs_write_max_attempts),
+        run_gate=(
+            RunGate(idle_ttl_seconds=config.run_gate_idle_ttl_seconds)
+            if config.run_gate_enabled
+            else None
+        ),
+    )
+
+
+def _build_artifact_store(config: WorkerConfig, path_policy: ArtifactPathPolicy) -> ArtifactStore:
+    if path_policy.scheme == "file":
+        # Offline reprocessing / on-prem batch runs against a local or mounted
+        # filesystem (ARTIFACTS_BUCKET=file:///path).
+        return FilesystemArtifactStore(read_concurrency=config.gcs_read_concurrency)
+    if path_policy.scheme == "mem":
+        return InMemoryArtifactStore(read_concurrency=config.gcs_read_concurrency)
+    try:
+        storage_client = build_storage_client(
+            project=config.gcp_project, pool_size=config.gcs_read_concurrency
+        )
+    except Exception as exc:  # pragma: no cover - runtime guard
+        logger.error("GCS client unavailable: %s", exc)
+        raise
+    return GcsArtifactStore(storage_client, read_concurrency=config.gcs_read_concurrency)
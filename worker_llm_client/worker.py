@@ -0,0 +1,254 @@
+"""Pull-based worker: scans ``flow_runs`` instead of waiting for CloudEvents.
+
+Run with ``python -m worker_llm_client.worker`` (same environment variables as
+the Cloud Function plus ``WORKER_*``). ``WORKER_MODE=watch`` replaces the
+periodic query with a snapshot listener feeding ``ReadyRunIndex``. Each
+dispatched run goes through ``FlowRunEventHandler`` exactly like a Firestore
+update event, so claim, execute and finalize semantics are unchanged.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import signal
+import threading
+import time
+from typing import Any
+import uuid
+
+from worker_llm_client.app.handler import FlowRunEventHandler
+from worker_llm_client.app.services import FlowRunScanner
+from worker_llm_client.app.watch import (
+    ReadyRunIndex,
+    RunWatchSupervisor,
+    WatchedFlowRunRepository,
+)
+from worker_llm_client.infra.firestore import FirestoreRunWatchSource
+from worker_llm_client.ops.logging import EventLogger
+from worker_llm_client.wiring import build_wiring, load_config
+
+
+PULL_EVENT_TYPE = "worker_llm_client.pull"
+# Handler outcomes that leave the run as it was; such runs (and runs whose task
+# raised) sit out one poll interval instead of being re-dispatched at once.
+_IDLE_RESULTS = frozenset({"noop", "ignored"})
+
+
+@dataclass(frozen=True, slots=True)
+class PullWorkerPolicy:
+    """``concurrency`` bounds in-flight runs; scans only fill free slots."""
+
+    concurrency: int = 4
+    poll_interval_seconds: float = 5.0
+    scan_limit: int = 50
+
+    def __post_init__(self) -> None:
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        if self.poll_interval_seconds <= 0:
+            raise ValueError("poll_interval_seconds must be > 0")
+        if self.scan_limit < 1:
+            raise ValueError("scan_limit must be >= 1")
+
+
+class PullWorker:
+    """Feeds runs with READY LLM_REPORT steps to a bounded thread pool.
+
+    A run is never dispatched twice at the same time; once its task finishes it
+    is picked up again by a later scan while READY steps remain. ``stop`` lets
+    in-flight tasks finish (graceful shutdown) but dispatches nothing new.
+    """
+
+    # Seconds source for the cool-down of idle runs; replaceable in tests.
+    clock = staticmethod(time.monotonic)
+
+    def __init__(
+        self,
+        *,
+        scanner: FlowRunScanner,
+        handler: FlowRunEventHandler,
+        flow_runs_collection: str,
+        event_logger: EventLogger,
+        policy: PullWorkerPolicy | None = None,
+        wake: threading.Event | None = None,
+    ) -> None:
+        self._scanner = scanner
+        self._handler = handler
+        self._flow_runs_collection = flow_runs_collection
+        self._event_logger = event_logger
+        self._policy = policy or PullWorkerPolicy()
+        # Set by push-style scanners (watch mode) when a run becomes ready.
+        self._wake = wake
+        self._stop = threading.Event()
+        self._cooldown: dict[str, float] = {}
+        self.processed = 0
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._wake is not None:
+            self._wake.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def run(self, *, until_idle: bool = False) -> int:
+        """Loop until ``stop()``; with ``until_idle`` also return once no run is ready.
+
+        Returns the number of dispatched runs that finished.
+        """
+        policy = self._policy
+        in_flight: dict[str, Future[Any]] = {}
+        self._event_logger.log(
+            event="pull_worker_started",
+            severity="INFO",
+            policy={
+                "concurrency": policy.concurrency,
+                "pollIntervalSeconds": policy.poll_interval_seconds,
+                "scanLimit": policy.scan_limit,
+            },
+        )
+        with ThreadPoolExecutor(
+            max_workers=policy.concurrency, thread_name_prefix="llm-report"
+        ) as pool:
+            while not self._stop.is_set():
+                self._reap(in_flight)
+                free = policy.concurrency - len(in_flight)
+                if free <= 0:
+                    # Backpressure: no scans while every slot is busy.
+                    _wait_any(in_flight, timeout=policy.poll_interval_seconds)
+                    continue
+                if self._wake is not None:
+                    self._wake.clear()
+                dispatched = 0
+                now = self.clock()
+                self._cooldown = {
+                    run_id: until for run_id, until in self._cooldown.items() if until > now
+                }
+                for run_id in self._scan(limit=policy.scan_limit):
+                    if dispatched >= free:
+                        break
+                    if run_id in in_flight or self._cooldown.get(run_id, 0.0) > now:
+                        continue
+                    in_flight[run_id] = pool.submit(self._process, run_id)
+                    dispatched += 1
+                if dispatched:
+                    continue
+                if until_idle and not in_flight:
+                    break
+                if in_flight:
+                    _wait_any(in_flight, timeout=policy.poll_interval_seconds)
+                elif self._wake is not None:
+                    self._wake.wait(policy.poll_interval_seconds)
+                else:
+                    self._stop.wait(policy.poll_interval_seconds)
+            wait(list(in_flight.values()))
+            self._reap(in_flight)
+        self._event_logger.log(
+            event="pull_worker_stopped",
+            severity="INFO",
+            processed=self.processed,
+        )
+        return self.processed
+
+    def _scan(self, *, limit: int) -> list[str]:
+        try:
+            return self._scanner.ready_run_ids(limit=limit)
+        except Exception as exc:
+            self._event_logger.log(
+                event="pull_worker_scan_failed",
+                severity="ERROR",
+                error={"type": type(exc).__name__, "message": str(exc)},
+            )
+            return []
+
+    def _process(self, run_id: str) -> str:
+        cloud_event = {
+            "id": f"pull-{uuid.uuid4().hex}",
+            "type": PULL_EVENT_TYPE,
+            "subject": f"documents/{self._flow_runs_collection}/{run_id}",
+        }
+        return self._handler.handle(cloud_event)
+
+    def _reap(self, in_flight: dict[str, Future[Any]]) -> None:
+        for run_id, future in list(in_flight.items()):
+            if not future.done():
+                continue
+            del in_flight[run_id]
+            self.processed += 1
+            self._cooldown.pop(run_id, None)
+            exc = future.exception()
+            if exc is not None:
+                self._event_logger.log(
+                    event="pull_worker_task_failed",
+                    severity="ERROR",
+                    runId=run_id,
+                    error={"type": type(exc).__name__, "message": str(exc)},
+                )
+            if exc is not None or future.result() in _IDLE_RESULTS:
+                self._cooldown[run_id] = self.clock() + self._policy.poll_interval_seconds
+
+
+def _wait_any(in_flight: dict[str, Future[Any]], *, timeout: float) -> None:
+    wait(list(in_flight.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+
+
+def main() -> None:  # pragma: no cover - process entry point
+    # Same wiring as the Cloud Function (config, repositories, Gemini client).
+    config = load_config()
+    wiring = build_wiring(config)
+    policy = PullWorkerPolicy(
+        concurrency=config.worker_concurrency,
+        poll_interval_seconds=config.worker_poll_interval_seconds,
+        scan_limit=config.worker_scan_limit,
+    )
+    stop = threading.Event()
+    supervisor_thread: threading.Thread | None = None
+    if config.worker_mode == "watch":
+        index = ReadyRunIndex()
+        supervisor = RunWatchSupervisor(
+            source=FirestoreRunWatchSource(
+                wiring.firestore_client,
+                flow_runs_collection=config.flow_runs_collection,
+            ),
+            index=index,
+            event_logger=wiring.event_logger,
+        )
+        supervisor.start()
+        supervisor_thread = threading.Thread(
+            target=supervisor.run, args=(stop,), name="flow-runs-watch", daemon=True
+        )
+        supervisor_thread.start()
+        worker = PullWorker(
+            scanner=index,
+            handler=wiring.event_handler(
+                WatchedFlowRunRepository(wiring.flow_run_repo, index)
+            ),
+            flow_runs_collection=config.flow_runs_collection,
+            event_logger=wiring.event_logger,
+            policy=policy,
+            wake=index.changed,
+        )
+    else:
+        worker = PullWorker(
+            scanner=wiring.flow_run_repo,
+            handler=wiring.event_handler(),
+            flow_runs_collection=config.flow_runs_collection,
+            event_logger=wiring.event_logger,
+            policy=policy,
+        )
+
+    def _shutdown(*_args: Any) -> None:
+        stop.set()
+        worker.stop()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, _shutdown)
+    worker.run()
+    if supervisor_thread is not None:
+        supervisor_thread.join(timeout=10)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
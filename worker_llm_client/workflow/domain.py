@@ -7,6 +7,17 @@ from typing import Any, Mapping, Sequence
 
 RUN_STATUSES = {"PENDING", "RUNNING", "SUCCEEDED", "FAILED", "CANCELLED"}
 TERMINAL_RUN_STATUSES = {"SUCCEEDED", "FAILED", "CANCELLED"}
+PREVIOUS_REPORT_FORMAT_DIGEST = "digest"
+PREVIOUS_REPORT_FORMAT_FULL = "full"
+PREVIOUS_REPORT_FORMATS = (PREVIOUS_REPORT_FORMAT_DIGEST, PREVIOUS_REPORT_FORMAT_FULL)
+OHLCV_MODE_FULL = "full"
+OHLCV_MODE_INCREMENTAL = "incremental"
+OHLCV_MODES = (OHLCV_MODE_FULL, OHLCV_MODE_INCREMENTAL)
+EXECUTION_MODE_ONLINE = "online"
+EXECUTION_MODE_DEFERRED = "deferred"
+EXECUTION_MODES = (EXECUTION_MODE_ONLINE, EXECUTION_MODE_DEFERRED)
+# Sub-state of a RUNNING step whose request waits in a provider batch job.
+DEFERRED_STATE_SUBMITTED = "SUBMITTED"
 
 
 class FlowRunInvalid(ValueError):
@@ -156,6 +167,21 @@ class FlowStep:
         outputs = self.raw.get("outputs")
         return outputs if isinstance(outputs, Mapping) else {}
 
+    def deferred_submission(self) -> Mapping[str, Any] | None:
+        """``outputs.execution.deferred`` while the step waits on a batch job."""
+        if not self.is_running():
+            return None
+        execution = self.outputs.get("execution")
+        deferred = execution.get("deferred") if isinstance(execution, Mapping) else None
+        if not isinstance(deferred, Mapping):
+            return None
+        if deferred.get("state") != DEFERRED_STATE_SUBMITTED:
+            return None
+        job_name = deferred.get("jobName")
+        if not isinstance(job_name, str) or not job_name.strip():
+            return None
+        return deferred
+
 
 @dataclass(frozen=True, slots=True)
 class FlowRun:
@@ -227,6 +253,9 @@ class LLMReportInputs:
     charts_manifest_gcs_uri: str
     previous_report_refs: tuple[PreviousReportRef, ...]
     previous_report_gcs_uris: tuple[str, ...]
+    previous_report_format: str = PREVIOUS_REPORT_FORMAT_DIGEST
+    ohlcv_mode: str = OHLCV_MODE_FULL
+    execution_mode: str = EXECUTION_MODE_ONLINE
 
     @classmethod
     def from_raw(
@@ -279,6 +308,26 @@ class LLMReportInputs:
             fallback_keys=("outputsManifestGcsUri", "outputs_manifest_gcs_uri"),
         )
         previous_report_gcs_uris = tuple(ref.gcs_uri for ref in previous_report_refs)
+        # Digests are preferred; "full" forces the complete report files.
+        previous_report_format = inputs.get("previousReportFormat", PREVIOUS_REPORT_FORMAT_DIGEST)
+        if previous_report_format not in PREVIOUS_REPORT_FORMATS:
+            raise InvalidStepInputs(
+                f"inputs.previousReportFormat must be one of: {', '.join(PREVIOUS_REPORT_FORMATS)}"
+            )
+        # Incremental mode sends only candles newer than the OHLCV coverage
+        # recorded in the first previous report.
+        ohlcv_mode = inputs.get("ohlcvMode", OHLCV_MODE_FULL)
+        if ohlcv_mode not in OHLCV_MODES:
+            raise InvalidStepInputs(f"inputs.ohlcvMode must be one of: {', '.join(OHLCV_MODES)}")
+        if ohlcv_mode == OHLCV_MODE_INCREMENTAL and not previous_report_refs:
+            raise InvalidStepInputs("inputs.ohlcvMode=incremental requires a previous report")
+        # Deferred steps are submitted to the provider's batch API and
+        # finalized later by the completion entry point.
+        execution_mode = inputs.get("executionMode", EXECUTION_MODE_ONLINE)
+        if execution_mode not in EXECUTION_MODES:
+            raise InvalidStepInputs(
+                f"inputs.executionMode must be one of: {', '.join(EXECUTION_MODES)}"
+            )
 
         return cls(
             prompt_id=prompt_id,
@@ -289,6 +338,9 @@ class LLMReportInputs:
             charts_manifest_gcs_uri=charts_manifest_gcs_uri,
             previous_report_refs=tuple(previous_report_refs),
             previous_report_gcs_uris=previous_report_gcs_uris,
+            previous_report_format=previous_report_format,
+            ohlcv_mode=ohlcv_mode,
+            execution_mode=execution_mode,
         )
 
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Mapping
+from typing import Iterator, Mapping
 
 from worker_llm_client.workflow.domain import FlowRun, FlowStep, LLMReportStep, StepInvalid
 
@@ -38,24 +38,47 @@ class ReadyStepSelector:
             return ReadyStepPick(step=None, reason="no_ready_step")
 
         blocked: list[BlockedStep] = []
-        for step in flow_run.iter_steps_sorted():
-            if step.step_type != "LLM_REPORT":
-                continue
-            if step.status != "READY":
-                continue
-            unmet = _find_unmet_dependencies(flow_run, step)
-            if unmet:
-                blocked.append(BlockedStep(step_id=step.step_id, unmet=tuple(unmet)))
-                continue
-            try:
-                return ReadyStepPick(step=LLMReportStep.from_flow_step(step), reason=None, blocked=tuple(blocked))
-            except StepInvalid:
-                continue
+        for step in _iter_executable_llm_steps(flow_run, blocked):
+            return ReadyStepPick(step=step, reason=None, blocked=tuple(blocked))
 
         if blocked:
             return ReadyStepPick(step=None, reason="dependency_not_succeeded", blocked=tuple(blocked))
         return ReadyStepPick(step=None, reason="no_ready_step")
 
+    @staticmethod
+    def executable_llm_steps(flow_run: FlowRun) -> tuple[LLMReportStep, ...]:
+        """Every executable READY LLM_REPORT step, in ``pick`` order."""
+        if flow_run.status != "RUNNING":
+            return ()
+        return tuple(_iter_executable_llm_steps(flow_run, []))
+
+    @staticmethod
+    def deferred_llm_steps(flow_run: FlowRun) -> tuple[FlowStep, ...]:
+        """LLM_REPORT steps left RUNNING on a SUBMITTED batch job, in step order."""
+        return tuple(
+            step
+            for step in flow_run.iter_steps_sorted()
+            if step.step_type == "LLM_REPORT" and step.deferred_submission() is not None
+        )
+
+
+def _iter_executable_llm_steps(
+    flow_run: FlowRun, blocked: list[BlockedStep]
+) -> Iterator[LLMReportStep]:
+    for step in flow_run.iter_steps_sorted():
+        if step.step_type != "LLM_REPORT":
+            continue
+        if step.status != "READY":
+            continue
+        unmet = _find_unmet_dependencies(flow_run, step)
+        if unmet:
+            blocked.append(BlockedStep(step_id=step.step_id, unmet=tuple(unmet)))
+            continue
+        try:
+            yield LLMReportStep.from_flow_step(step)
+        except StepInvalid:
+            continue
+
 
 def _find_unmet_dependencies(flow_run: FlowRun, step: FlowStep) -> list[BlockedDependency]:
     unmet: list[BlockedDependency] = []